@@ -0,0 +1,261 @@
+import os
+import numpy as np
+
+from benchFixture import SyntheticMatFile, makeOpd, makeMirrorNodes, \
+    makeM1M3GridData, makeM1M3ThermalData, makeM1M3ForceData, \
+    makeStarCatalog, writeStarCatalogFile, NUM_OF_M1M3_NODE, \
+    NUM_OF_M1M3_THERMAL_NODE, NUM_OF_M2_NODE
+
+
+class BenchCase(object):
+
+    def __init__(self, name, setupFunc, paramList, fullParamList=None):
+        """Initialization of benchmark case class.
+
+        Parameters
+        ----------
+        name : str
+            Name of case.
+        setupFunc : function
+            Function of (param, workDir) to prepare the fixture. It returns
+            the function to benchmark without argument. The preparation is
+            not timed.
+        paramList : list
+            Parameters (e.g. OPD dimension) in the quick run.
+        fullParamList : list, optional
+            Additional parameters in the full run (e.g. production size).
+            (the default is None.)
+        """
+
+        self.name = name
+        self.setupFunc = setupFunc
+        self.paramList = list(paramList)
+        self.fullParamList = [] if (fullParamList is None) \
+            else list(fullParamList)
+
+    def getCaseId(self, param):
+        """Get the Id of case with the parameter.
+
+        Parameters
+        ----------
+        param : int or str
+            Parameter.
+
+        Returns
+        -------
+        str
+            Id of case (e.g. "calcPssn[255]").
+        """
+
+        return "%s[%s]" % (self.name, param)
+
+    def getParamList(self, isFull=False):
+        """Get the parameters to run.
+
+        Parameters
+        ----------
+        isFull : bool, optional
+            Include the parameters of full run. (the default is False.)
+
+        Returns
+        -------
+        list
+            Parameters.
+        """
+
+        if (isFull):
+            return self.paramList + self.fullParamList
+        else:
+            return list(self.paramList)
+
+    def setup(self, param, workDir):
+        """Prepare the fixture.
+
+        Parameters
+        ----------
+        param : int or str
+            Parameter.
+        workDir : str
+            Work directory for the files of fixture.
+
+        Returns
+        -------
+        function
+            Function to benchmark without argument.
+        """
+
+        return self.setupFunc(param, workDir)
+
+
+def _setupCalcPssn(dimension, workDir):
+
+    from lsst.ts.phosim.MetroTool import calc_pssn
+
+    opd = makeOpd(dimension)
+
+    return lambda: calc_pssn(opd, 0.5)
+
+
+def _setupCalcPssnSingle(dimension, workDir):
+
+    from lsst.ts.phosim.MetroTool import calc_pssn
+
+    opd = makeOpd(dimension)
+
+    return lambda: calc_pssn(opd, 0.5, singlePrecision=True)
+
+
+def _setupPsf2eAtmW(dimension, workDir):
+
+    from lsst.ts.phosim.MetroTool import psf2eAtmW
+
+    opd = makeOpd(dimension)
+
+    return lambda: psf2eAtmW(opd, 0.5)
+
+
+def _setupGetZkFromOpd(dimension, workDir):
+
+    from lsst.ts.phosim.OpdMetrology import OpdMetrology
+
+    metr = OpdMetrology()
+    opd = makeOpd(dimension)
+
+    return lambda: metr.getZkFromOpd(opdMap=opd)
+
+
+def _setupGridSampInMnInZemax(surfaceGridN, workDir):
+
+    from lsst.ts.phosim.telescope.MirrorSim import MirrorSim
+
+    # M2 size and FEA density
+    innerRinM = 0.9
+    outerRinM = 1.71
+    mirrorSim = MirrorSim(innerRinM, outerRinM, workDir)
+    x, y, z = makeMirrorNodes(NUM_OF_M2_NODE, innerRinM, outerRinM)
+
+    return lambda: mirrorSim._gridSampInMnInZemax(
+        z * 1e3, x * 1e3, y * 1e3, innerRinM * 1e3, outerRinM * 1e3,
+        surfaceGridN, surfaceGridN)
+
+
+def _setupGridSampLocalRbf(numOfNode, workDir):
+
+    from lsst.ts.phosim.telescope.MirrorSim import gridSampInMnInZemax
+
+    # M2 size with the FEA density of this parameter
+    innerRinM = 0.9
+    outerRinM = 1.71
+    x, y, z = makeMirrorNodes(numOfNode, innerRinM, outerRinM)
+
+    return lambda: gridSampInMnInZemax(
+        z * 1e3, x * 1e3, y * 1e3, innerRinM * 1e3, outerRinM * 1e3, 50, 50,
+        numOfNeighbor=50)
+
+
+def _getM1M3Sim(numOfNode=NUM_OF_M1M3_NODE,
+                numOfThermalNode=NUM_OF_M1M3_THERMAL_NODE):
+
+    from lsst.ts.phosim.telescope.M1M3Sim import M1M3Sim
+
+    # Replace the FEA data in the policy files by the synthetic ones
+    m1m3 = M1M3Sim()
+    m1m3._gridFile = SyntheticMatFile(makeM1M3GridData(numOfNode=numOfNode))
+    m1m3._feaFile = SyntheticMatFile(
+        makeM1M3ThermalData(numOfNode=numOfThermalNode))
+
+    lut, zenithForce, horizonForce, influence = makeM1M3ForceData(
+        numOfNode=numOfNode)
+    m1m3._lutFile = SyntheticMatFile(lut)
+    m1m3._forceZenFile = SyntheticMatFile(zenithForce)
+    m1m3._forceHorFile = SyntheticMatFile(horizonForce)
+    m1m3._forceInflFile = SyntheticMatFile(influence)
+
+    return m1m3
+
+
+def _setupGetTempCorr(numOfNode, workDir):
+
+    m1m3 = _getM1M3Sim(numOfNode=numOfNode, numOfThermalNode=numOfNode)
+
+    return lambda: m1m3.getTempCorr(0.09, 0.03, 0.02, 0.01, 0.01)
+
+
+def _setupGetTempCorrLocalRbf(numOfNode, workDir):
+
+    m1m3 = _getM1M3Sim(numOfNode=numOfNode, numOfThermalNode=numOfNode)
+    m1m3._numOfRbfNeighbor = 50
+
+    return lambda: m1m3.getTempCorr(0.09, 0.03, 0.02, 0.01, 0.01)
+
+
+def _setupGenMirSurfRandErr(numOfNode, workDir):
+
+    m1m3 = _getM1M3Sim(numOfNode=numOfNode)
+
+    return lambda: m1m3.genMirSurfRandErr(np.deg2rad(27.0912), seedNum=6)
+
+
+def _setupAddStarByFile(numOfStar, workDir):
+
+    from lsst.ts.phosim.SkySim import SkySim
+
+    starFilePath = os.path.join(workDir, "star%d.txt" % numOfStar)
+    writeStarCatalogFile(starFilePath, numOfStar)
+
+    def func():
+        skySim = SkySim()
+        skySim.addStarByFile(starFilePath)
+
+    return func
+
+
+def _setupWriteStarInstFile(numOfStar, workDir):
+
+    from lsst.ts.wep.Utility import FilterType
+    from lsst.ts.phosim.SkySim import SkySim
+    from lsst.ts.phosim.telescope.TeleFacade import TeleFacade
+
+    tele = TeleFacade()
+    tele.setSurveyParam(obsId=9006000, filterType=FilterType.REF,
+                        boresight=(0, 0), zAngleInDeg=27.0912,
+                        rotAngInDeg=0.0)
+
+    skySim = SkySim()
+    skySim.addStarByRaDecInDeg(*makeStarCatalog(numOfStar))
+
+    return lambda: tele.writeStarInstFile(workDir, skySim)
+
+
+def getBenchCaseList():
+    """Get the benchmark cases.
+
+    Returns
+    -------
+    list[BenchCase]
+        Benchmark cases.
+    """
+
+    return [
+        BenchCase("calcPssn", _setupCalcPssn, [255], [1024]),
+        BenchCase("calcPssnSingle", _setupCalcPssnSingle, [255], [1024]),
+        BenchCase("psf2eAtmW", _setupPsf2eAtmW, [255], [1024]),
+        BenchCase("getZkFromOpd", _setupGetZkFromOpd, [255], [1024]),
+        BenchCase("gridSampInMnInZemax", _setupGridSampInMnInZemax, [20],
+                  [200]),
+        BenchCase("gridSampLocalRbf", _setupGridSampLocalRbf,
+                  [NUM_OF_M2_NODE], [16 * NUM_OF_M2_NODE]),
+        BenchCase("getTempCorr", _setupGetTempCorr, [1000],
+                  [NUM_OF_M1M3_THERMAL_NODE]),
+        BenchCase("getTempCorrLocalRbf", _setupGetTempCorrLocalRbf, [1000],
+                  [NUM_OF_M1M3_THERMAL_NODE, 16 * NUM_OF_M1M3_THERMAL_NODE]),
+        BenchCase("genMirSurfRandErr", _setupGenMirSurfRandErr,
+                  [NUM_OF_M1M3_NODE]),
+        BenchCase("addStarByFile", _setupAddStarByFile, [1000, 10000],
+                  [100000, 1000000]),
+        BenchCase("writeStarInstFile", _setupWriteStarInstFile,
+                  [1000, 10000], [100000, 1000000])]
+
+
+if __name__ == "__main__":
+    pass
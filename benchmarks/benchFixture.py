@@ -0,0 +1,293 @@
+import numpy as np
+
+# Obscuration of the LSST pupil used in the annular Zernike fitting
+OBSCURATION = 0.61
+
+# Number of nodes in the production FEA models
+NUM_OF_M1M3_NODE = 5256
+NUM_OF_M1M3_THERMAL_NODE = 5244
+NUM_OF_M2_NODE = 9084
+
+# Number of actuators and LUT angles in the production M1M3 model
+NUM_OF_M1M3_ACTUATOR = 256
+NUM_OF_M1M3_ACTUATOR_IN_Z = 156
+NUM_OF_LUT_ANGLE = 91
+
+
+class SyntheticMatFile(object):
+
+    def __init__(self, matContent):
+        """Initialization of synthetic matrix file class.
+
+        This replaces the ParamReader of the policy files (e.g. the FEA
+        model) by the synthetic data in the memory.
+
+        Parameters
+        ----------
+        matContent : numpy.ndarray
+            Matrix content.
+        """
+
+        self._matContent = np.asarray(matContent)
+
+    def getMatContent(self):
+        """Get the matrix content.
+
+        Returns
+        -------
+        numpy.ndarray
+            Matrix content.
+        """
+
+        return self._matContent
+
+
+def makeOpd(dimension, seed=0):
+    """Make the synthetic OPD map.
+
+    The OPD is a sum of low-order polynomials in the annular pupil plus a
+    small high-frequency noise. The values outside the pupil are 0, which is
+    the same as the PhoSim OPD.
+
+    OPD: Optical path difference.
+
+    Parameters
+    ----------
+    dimension : int
+        Dimension of the square OPD map in pixel (e.g. 255 for PhoSim).
+    seed : int, optional
+        Random seed. (the default is 0.)
+
+    Returns
+    -------
+    numpy.ndarray
+        OPD map in um.
+    """
+
+    rng = np.random.RandomState(seed)
+
+    grid1d = np.linspace(-1, 1, dimension)
+    x, y = np.meshgrid(grid1d, grid1d)
+    r2 = x**2 + y**2
+
+    coef = rng.normal(scale=0.05, size=6)
+    opd = coef[0] * (2 * r2 - 1) + coef[1] * (x**2 - y**2) + \
+        coef[2] * 2 * x * y + coef[3] * (3 * r2 - 2) * x + \
+        coef[4] * (3 * r2 - 2) * y + coef[5] * (6 * r2**2 - 6 * r2 + 1)
+    opd += rng.normal(scale=0.005, size=opd.shape)
+
+    isInPupil = (r2 <= 1) & (r2 >= OBSCURATION**2)
+    opd[~isInPupil] = 0
+
+    return opd
+
+
+def makeMirrorNodes(numOfNode, innerRinM, outerRinM, seed=0):
+    """Make the synthetic FEA nodes of mirror surface.
+
+    FEA: Finite element analysis.
+
+    Parameters
+    ----------
+    numOfNode : int
+        Number of nodes.
+    innerRinM : float
+        Inner radius in m.
+    outerRinM : float
+        Outer radius in m.
+    seed : int, optional
+        Random seed. (the default is 0.)
+
+    Returns
+    -------
+    numpy.ndarray
+        x position in m.
+    numpy.ndarray
+        y position in m.
+    numpy.ndarray
+        Smooth surface along z in m.
+    """
+
+    rng = np.random.RandomState(seed)
+
+    # Uniform density in the annulus
+    radius = np.sqrt(rng.uniform(innerRinM**2, outerRinM**2, numOfNode))
+    theta = rng.uniform(0, 2 * np.pi, numOfNode)
+    x = radius * np.cos(theta)
+    y = radius * np.sin(theta)
+
+    rho = radius / outerRinM
+    z = 1e-8 * (rho**2 * np.cos(2 * theta) + 0.5 * rho**3 * np.sin(theta) +
+                0.1 * rng.normal(size=numOfNode))
+
+    return x, y, z
+
+
+def makeM1M3GridData(numOfNode=NUM_OF_M1M3_NODE, numOfMode=20, seed=0):
+    """Make the synthetic M1M3 bending mode grid data.
+
+    Parameters
+    ----------
+    numOfNode : int, optional
+        Number of nodes. (the default is NUM_OF_M1M3_NODE.)
+    numOfMode : int, optional
+        Number of bending modes. (the default is 20.)
+    seed : int, optional
+        Random seed. (the default is 0.)
+
+    Returns
+    -------
+    numpy.ndarray
+        The columns are node Id (1 for M1 and 3 for M3), x in m, y in m, and
+        the bending modes.
+    """
+
+    rng = np.random.RandomState(seed)
+
+    numOfM1Node = int(numOfNode * 0.6)
+    xM1, yM1 = makeMirrorNodes(numOfM1Node, 2.558, 4.180, seed=seed)[0:2]
+    xM3, yM3 = makeMirrorNodes(numOfNode - numOfM1Node, 0.550, 2.508,
+                               seed=seed + 1)[0:2]
+
+    nodeId = np.append(np.ones(numOfM1Node),
+                       3 * np.ones(numOfNode - numOfM1Node))
+    bendingMode = rng.normal(scale=1e-6, size=(numOfNode, numOfMode))
+
+    return np.column_stack((nodeId, np.append(xM1, xM3),
+                            np.append(yM1, yM3), bendingMode))
+
+
+def makeM1M3ThermalData(numOfNode=NUM_OF_M1M3_THERMAL_NODE, seed=0):
+    """Make the synthetic M1M3 thermal FEA data.
+
+    FEA: Finite element analysis.
+
+    Parameters
+    ----------
+    numOfNode : int, optional
+        Number of nodes. (the default is NUM_OF_M1M3_THERMAL_NODE.)
+    seed : int, optional
+        Random seed. (the default is 0.)
+
+    Returns
+    -------
+    numpy.ndarray
+        The columns are x (normalized), y (normalized), and the deformation
+        in um of bulk, x-grad, y-grad, z-grad, and r-grad.
+    """
+
+    x, y, z = makeMirrorNodes(numOfNode, 0.550 / 4.180, 1.0, seed=seed)
+
+    rng = np.random.RandomState(seed)
+    deformation = np.column_stack(
+        [1e8 * z * rng.uniform(0.5, 1.5) for idx in range(5)])
+
+    return np.column_stack((x, y, deformation))
+
+
+def makeM1M3ForceData(numOfNode=NUM_OF_M1M3_NODE,
+                      numOfActuator=NUM_OF_M1M3_ACTUATOR,
+                      numOfActuatorInZ=NUM_OF_M1M3_ACTUATOR_IN_Z,
+                      numOfAngle=NUM_OF_LUT_ANGLE, seed=0):
+    """Make the synthetic M1M3 actuator force data.
+
+    LUT: Look-up table.
+
+    Parameters
+    ----------
+    numOfNode : int, optional
+        Number of nodes. (the default is NUM_OF_M1M3_NODE.)
+    numOfActuator : int, optional
+        Number of actuators. (the default is NUM_OF_M1M3_ACTUATOR.)
+    numOfActuatorInZ : int, optional
+        Number of actuators in z direction. (the default is
+        NUM_OF_M1M3_ACTUATOR_IN_Z.)
+    numOfAngle : int, optional
+        Number of zenith angles in LUT. (the default is NUM_OF_LUT_ANGLE.)
+    seed : int, optional
+        Random seed. (the default is 0.)
+
+    Returns
+    -------
+    numpy.ndarray
+        LUT. The first row is the zenith angle in degree and the others are
+        the actuator forces in N.
+    numpy.ndarray
+        Net actuator forces along zenith direction.
+    numpy.ndarray
+        Net actuator forces along horizon direction.
+    numpy.ndarray
+        Influence matrix of actuator forces (node x actuator).
+    """
+
+    rng = np.random.RandomState(seed)
+
+    angleInDeg = np.linspace(0, 90, numOfAngle)
+    forceInZ = 1000 * np.outer(np.ones(numOfActuatorInZ),
+                               np.cos(np.deg2rad(angleInDeg)))
+    forceInY = 500 * np.outer(np.ones(numOfActuator - numOfActuatorInZ),
+                              np.sin(np.deg2rad(angleInDeg)))
+    lut = np.vstack((angleInDeg, forceInZ, forceInY))
+
+    zenithForce = lut[1:, 0] + rng.normal(scale=1, size=numOfActuator)
+    horizonForce = lut[1:, -1] + rng.normal(scale=1, size=numOfActuator)
+    influence = rng.normal(scale=1e-9, size=(numOfNode, numOfActuator))
+
+    return lut, zenithForce, horizonForce, influence
+
+
+def makeStarCatalog(numOfStar, seed=0):
+    """Make the synthetic star catalog around the boresight (0, 0).
+
+    Parameters
+    ----------
+    numOfStar : int
+        Number of stars.
+    seed : int, optional
+        Random seed. (the default is 0.)
+
+    Returns
+    -------
+    numpy.ndarray[int]
+        Star Id.
+    numpy.ndarray
+        Star ra in degree between 0 and 360.
+    numpy.ndarray
+        Star decl in degree.
+    numpy.ndarray
+        Star magnitude.
+    """
+
+    rng = np.random.RandomState(seed)
+
+    starId = np.arange(numOfStar)
+    ra = np.mod(rng.uniform(-1.75, 1.75, numOfStar), 360)
+    decl = rng.uniform(-1.75, 1.75, numOfStar)
+    mag = rng.uniform(14, 18, numOfStar)
+
+    return starId, ra, decl, mag
+
+
+def writeStarCatalogFile(filePath, numOfStar, seed=0):
+    """Write the synthetic star catalog in the text format of SkySim.
+
+    Parameters
+    ----------
+    filePath : str
+        File path.
+    numOfStar : int
+        Number of stars.
+    seed : int, optional
+        Random seed. (the default is 0.)
+    """
+
+    starId, ra, decl, mag = makeStarCatalog(numOfStar, seed=seed)
+
+    with open(filePath, "w") as file:
+        file.write("# Id\t Ra\t\t Decl\t\t Mag\n")
+        np.savetxt(file, np.column_stack((starId, ra, decl, mag)),
+                   fmt=["%d", "%3.6f", "%3.6f", "%3.6f"], delimiter="\t ")
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+
+from benchCase import getBenchCaseList
+
+
+def main(baselineFilePath, numOfRepeat=3, isFull=False, keyword="",
+         saveBaseline=False, threshold=None):
+
+    baseline = _readBaseline(baselineFilePath)
+    if (threshold is None):
+        threshold = float(baseline.get("defaultThreshold", 1.5))
+
+    workDir = tempfile.mkdtemp(prefix="phosimBench_")
+    try:
+        results = _runBenchCases(workDir, numOfRepeat, isFull, keyword)
+    finally:
+        shutil.rmtree(workDir)
+
+    numOfRegression = _reportResults(results, baseline, threshold)
+
+    if (saveBaseline):
+        baseline.setdefault("defaultThreshold", threshold)
+        baseline.setdefault("results", dict()).update(results)
+        _writeBaseline(baselineFilePath, baseline)
+        print("The baseline is saved to %s." % baselineFilePath)
+
+    return numOfRegression
+
+
+def _readBaseline(baselineFilePath):
+
+    if (not os.path.exists(baselineFilePath)):
+        return dict()
+
+    with open(baselineFilePath, "r") as file:
+        return json.load(file)
+
+
+def _writeBaseline(baselineFilePath, baseline):
+
+    with open(baselineFilePath, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def _runBenchCases(workDir, numOfRepeat, isFull, keyword):
+
+    results = dict()
+    for benchCase in getBenchCaseList():
+        for param in benchCase.getParamList(isFull=isFull):
+            caseId = benchCase.getCaseId(param)
+            if (keyword not in caseId):
+                continue
+
+            try:
+                func = benchCase.setup(param, workDir)
+            except ImportError as error:
+                print("%-35s skipped (%s)" % (caseId, error))
+                continue
+
+            timeInSec, peakMemInMb = _measure(func, numOfRepeat)
+            results[caseId] = {"timeInSec": timeInSec,
+                               "peakMemInMb": peakMemInMb}
+
+    return results
+
+
+def _measure(func, numOfRepeat):
+
+    # The memory is traced in a separate run because the tracing slows down
+    # the function.
+    tracemalloc.start()
+    func()
+    peakMemInByte = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timeList = []
+    for idx in range(max(int(numOfRepeat), 1)):
+        startTime = time.perf_counter()
+        func()
+        timeList.append(time.perf_counter() - startTime)
+
+    return float(np.median(timeList)), peakMemInByte / 2**20
+
+
+def _reportResults(results, baseline, threshold):
+
+    baselineResults = baseline.get("results", dict())
+
+    numOfRegression = 0
+    print("%-35s %12s %12s %12s %12s  %s" % (
+        "case", "time(s)", "baseTime(s)", "mem(MB)", "baseMem(MB)",
+        "status"))
+    for caseId, result in results.items():
+
+        base = baselineResults.get(caseId)
+        if (base is None):
+            print("%-35s %12.4f %12s %12.2f %12s  %s" % (
+                caseId, result["timeInSec"], "-", result["peakMemInMb"], "-",
+                "no baseline"))
+            continue
+
+        caseThreshold = float(base.get("threshold", threshold))
+        isTimeRegressed = (result["timeInSec"] >
+                           base["timeInSec"] * caseThreshold)
+        isMemRegressed = (result["peakMemInMb"] >
+                          base["peakMemInMb"] * caseThreshold)
+
+        status = "ok"
+        if (isTimeRegressed or isMemRegressed):
+            status = "REGRESSION"
+            numOfRegression += 1
+
+        print("%-35s %12.4f %12.4f %12.2f %12.2f  %s" % (
+            caseId, result["timeInSec"], base["timeInSec"],
+            result["peakMemInMb"], base["peakMemInMb"], status))
+
+    return numOfRegression
+
+
+if __name__ == "__main__":
+
+    # Set the parser
+    parser = argparse.ArgumentParser(
+        description="Run the benchmarks of numerical hot paths with the synthetic fixtures.")
+    parser.add_argument("--baseline", type=str,
+                        default=os.path.join(os.path.dirname(
+                            os.path.abspath(__file__)), "baseline.json"),
+                        help="baseline file (default: benchmarks/baseline.json)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of timed runs of each case (default: 3)")
+    parser.add_argument("--full", default=False, action="store_true",
+                        help="include the production sizes (1024^2 OPD, 10^6 stars, etc.)")
+    parser.add_argument("-k", type=str, default="",
+                        help="only run the cases with this keyword in the Id")
+    parser.add_argument("--saveBaseline", default=False, action="store_true",
+                        help="save the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="ratio to the baseline regarded as regression (default: in baseline file)")
+    args = parser.parse_args()
+
+    numOfRegression = main(args.baseline, numOfRepeat=args.repeat,
+                           isFull=args.full, keyword=args.k,
+                           saveBaseline=args.saveBaseline,
+                           threshold=args.threshold)
+
+    sys.exit(1 if (numOfRegression > 0) else 0)
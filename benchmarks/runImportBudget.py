@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+
+# Script run in a new interpreter to time the import of module. The time of
+# interpreter startup is not included.
+_IMPORT_SCRIPT = """
+import sys
+import json
+import time
+import importlib
+
+startTime = time.perf_counter()
+importlib.import_module(sys.argv[1])
+timeInSec = time.perf_counter() - startTime
+
+heavyModules = [name for name in sys.argv[2:] if (name in sys.modules)]
+print(json.dumps({"timeInSec": timeInSec, "heavyModules": heavyModules}))
+"""
+
+
+def main(budgetFilePath, numOfRepeat=3, keyword="", budget=None,
+         numOfDetail=0):
+
+    budgetSetting = _readBudget(budgetFilePath)
+    if (budget is None):
+        budget = float(budgetSetting.get("defaultBudgetInSec", 2.0))
+
+    heavyModules = budgetSetting.get("heavyModules", [])
+
+    numOfViolation = 0
+    print("%-40s %10s %10s  %s" % ("module", "time(s)", "budget(s)",
+                                   "status"))
+    for moduleName, setting in budgetSetting.get("modules", dict()).items():
+        if (keyword not in moduleName):
+            continue
+
+        try:
+            timeInSec, loadedHeavyModules = _measure(moduleName, heavyModules,
+                                                     numOfRepeat)
+        except RuntimeError as error:
+            print("%-40s %10s %10s  skipped (%s)" % (moduleName, "-", "-",
+                                                     error))
+            continue
+
+        moduleBudget = float(setting.get("budgetInSec", budget))
+        status = "ok"
+        if (timeInSec > moduleBudget):
+            status = "OVER BUDGET"
+        if (len(loadedHeavyModules) != 0):
+            status = "EAGER IMPORT of %s" % ", ".join(loadedHeavyModules)
+        if (status != "ok"):
+            numOfViolation += 1
+
+        print("%-40s %10.4f %10.4f  %s" % (moduleName, timeInSec,
+                                           moduleBudget, status))
+
+        if (numOfDetail > 0):
+            _printSlowestImports(moduleName, numOfDetail)
+
+    return numOfViolation
+
+
+def _readBudget(budgetFilePath):
+
+    with open(budgetFilePath, "r") as file:
+        return json.load(file)
+
+
+def _measure(moduleName, heavyModules, numOfRepeat):
+
+    timeList = []
+    loadedHeavyModules = []
+    for idx in range(max(int(numOfRepeat), 1)):
+        result = _runInNewProcess(["-c", _IMPORT_SCRIPT, moduleName] +
+                                  list(heavyModules))
+        output = json.loads(result.stdout.strip().splitlines()[-1])
+
+        timeList.append(output["timeInSec"])
+        loadedHeavyModules = output["heavyModules"]
+
+    return float(np.median(timeList)), loadedHeavyModules
+
+
+def _runInNewProcess(argList):
+
+    # The new interpreter should see the same modules as this one
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [path for path in sys.path if (path != "")])
+
+    result = subprocess.run([sys.executable] + argList, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    if (result.returncode != 0):
+        errorLines = result.stderr.strip().splitlines()
+        raise RuntimeError(errorLines[-1] if (len(errorLines) != 0)
+                           else "exit code %d" % result.returncode)
+
+    return result
+
+
+def _printSlowestImports(moduleName, numOfDetail):
+
+    # The "-X importtime" writes "import time: self [us] | cumulative | name"
+    # to stderr for each imported module.
+    result = _runInNewProcess(["-X", "importtime", "-c",
+                               "import %s" % moduleName])
+
+    importTimeList = []
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if (len(fields) != 3 or not fields[0].startswith("import time:")):
+            continue
+        try:
+            selfTimeInUs = int(fields[0].split(":")[1])
+        except ValueError:
+            continue
+        importTimeList.append((selfTimeInUs, fields[2].strip()))
+
+    importTimeList.sort(reverse=True)
+    for selfTimeInUs, name in importTimeList[:numOfDetail]:
+        print("%40s %10.4f  %s" % ("", selfTimeInUs * 1e-6, name))
+
+
+if __name__ == "__main__":
+
+    # Set the parser
+    parser = argparse.ArgumentParser(
+        description="Check the import time of core modules against the startup budget.")
+    parser.add_argument("--budget", type=str,
+                        default=os.path.join(os.path.dirname(
+                            os.path.abspath(__file__)), "importBudget.json"),
+                        help="budget file (default: benchmarks/importBudget.json)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of timed imports of each module (default: 3)")
+    parser.add_argument("-k", type=str, default="",
+                        help="only check the modules with this keyword in the name")
+    parser.add_argument("--maxTime", type=float, default=None,
+                        help="budget in second of the modules without their own budget "
+                             "(default: in budget file)")
+    parser.add_argument("--detail", type=int, default=0,
+                        help="show this number of slowest imported modules by self time (default: 0)")
+    args = parser.parse_args()
+
+    numOfViolation = main(args.budget, numOfRepeat=args.repeat,
+                          keyword=args.k, budget=args.maxTime,
+                          numOfDetail=args.detail)
+
+    sys.exit(1 if (numOfViolation > 0) else 0)
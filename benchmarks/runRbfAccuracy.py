@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+import time
+import argparse
+import numpy as np
+
+from lsst.ts.phosim.telescope.M1M3Sim import M1M3Sim
+from lsst.ts.phosim.telescope.M2Sim import M2Sim
+from lsst.ts.phosim.telescope.MirrorSim import gridSampInMnInZemax
+from lsst.ts.phosim.telescope.RbfInterpolator import RbfInterpolator
+
+# Names of the columns of M1M3 thermal FEA data
+M1M3_THERMAL_COLUMN = {2: "bulk", 3: "x-grad", 4: "y-grad", 5: "z-grad",
+                       6: "r-grad"}
+
+# Names of the columns of grid residue map
+GRID_COLUMN = ("z", "dx", "dy", "dxdy")
+
+
+def main(numOfNeighborList, surfaceGridN=200, numOfPointInDiameter=200):
+
+    print("%-24s %9s %9s %11s %11s" % ("data", "neighbor", "time(s)",
+                                       "rms/max", "max/max"))
+
+    _compareM1M3ThermalFit(numOfNeighborList, numOfPointInDiameter)
+    _compareM2GridSamp(numOfNeighborList, surfaceGridN)
+
+
+def _compareM1M3ThermalFit(numOfNeighborList, numOfPointInDiameter):
+
+    m1m3 = M1M3Sim()
+    data = m1m3._feaFile.getMatContent()
+
+    # Regular points on M1 and M3 in the coordinate normalized by the outer
+    # radius of M1
+    innerRinM = m1m3.getInnerRinM()
+    outerRinM = m1m3.getOuterRinM()
+    pos = np.linspace(-1, 1, numOfPointInDiameter)
+    x, y = np.meshgrid(pos, pos)
+    radius = np.hypot(x, y) * outerRinM[0]
+    inMirror = ((radius >= innerRinM[0]) & (radius <= outerRinM[0])) | \
+        ((radius >= innerRinM[1]) & (radius <= outerRinM[1]))
+    x = x[inMirror]
+    y = y[inMirror]
+
+    for column, name in M1M3_THERMAL_COLUMN.items():
+        valueList = []
+        for numOfNeighbor in [0] + list(numOfNeighborList):
+            startTime = time.perf_counter()
+            rbfi = RbfInterpolator(numOfNeighbor=numOfNeighbor)
+            rbfi.fit(data[:, 0], data[:, 1], data[:, column])
+            values = rbfi.evaluate(x, y)
+            timeInSec = time.perf_counter() - startTime
+
+            valueList.append(values)
+            _printDiff("M1M3 thermal %s" % name, numOfNeighbor, timeInSec,
+                       values, valueList[0])
+
+
+def _compareM2GridSamp(numOfNeighborList, surfaceGridN):
+
+    # Surface of the unit test of M2
+    m2 = M2Sim()
+    zAngleInRadian = np.deg2rad(27.0912)
+    m2.setSurfAlongZ(m2.getPrintthz(zAngleInRadian) +
+                     m2.getTempCorr(-0.0675, -0.1416))
+    resInMm, xInMm, yInMm = m2.getMirrorResInMmInZemax()[0:3]
+
+    innerRinMm = m2.getInnerRinM() * 1e3
+    outerRinMm = m2.getOuterRinM() * 1e3
+
+    gridList = []
+    for numOfNeighbor in [0] + list(numOfNeighborList):
+        startTime = time.perf_counter()
+        content = gridSampInMnInZemax(resInMm, xInMm, yInMm, innerRinMm,
+                                      outerRinMm, surfaceGridN, surfaceGridN,
+                                      numOfNeighbor=numOfNeighbor)
+        timeInSec = time.perf_counter() - startTime
+
+        lines = content.splitlines()
+        grid = np.loadtxt(lines[1:])
+        gridList.append(grid)
+
+        # Grid points in the mirror and in the extension out of the nodes
+        numOfPixel = surfaceGridN + 4
+        delx = float(lines[0].split()[2])
+        pos = (np.arange(numOfPixel) - 0.5 * (numOfPixel - 1)) * delx
+        x, y = np.meshgrid(pos, pos)
+        radius = np.hypot(x, y).ravel()
+        inMirror = (radius >= innerRinMm) & (radius <= outerRinMm)
+        inExtension = (grid[:, 0] != 0) & (~inMirror)
+
+        for idx, name in enumerate(GRID_COLUMN):
+            for region, isInRegion in (("in", inMirror),
+                                       ("edge", inExtension)):
+                _printDiff("M2 grid %s %s" % (name, region), numOfNeighbor,
+                           timeInSec, grid[isInRegion, idx],
+                           gridList[0][isInRegion, idx],
+                           scale=np.max(np.abs(gridList[0][:, idx])))
+
+
+def _printDiff(name, numOfNeighbor, timeInSec, values, ansValues,
+               scale=None):
+
+    if (scale is None):
+        scale = np.max(np.abs(ansValues))
+
+    diff = np.abs(values - ansValues) / scale
+    print("%-24s %9d %9.2f %11.2e %11.2e" % (name, numOfNeighbor, timeInSec,
+                                             np.sqrt(np.mean(diff**2)),
+                                             np.max(diff)))
+
+
+if __name__ == "__main__":
+
+    # Set the parser
+    parser = argparse.ArgumentParser(
+        description="Compare the local radial basis function (RBF) with the global RBF "
+                    "on the FEA data of mirrors.")
+    parser.add_argument("--neighbor", type=int, nargs="+", default=[20, 50, 100],
+                        help="numbers of nearest nodes of local RBF (default: 20 50 100)")
+    parser.add_argument("--gridN", type=int, default=200,
+                        help="surface grid number of M2 (default: 200)")
+    parser.add_argument("--pointN", type=int, default=200,
+                        help="number of points in the diameter to evaluate the M1M3 thermal FEA data "
+                             "(default: 200)")
+    args = parser.parse_args()
+
+    main(args.neighbor, surfaceGridN=args.gridN,
+         numOfPointInDiameter=args.pointN)
@@ -7,6 +7,7 @@ import numpy as np
 from lsst.ts.wep.Utility import FilterType, CamType, runProgram
 from lsst.ts.wep.ctrlIntf.WEPCalculationFactory import WEPCalculationFactory
 from lsst.ts.wep.ctrlIntf.RawExpData import RawExpData
+from lsst.ts.wep.ctrlIntf.SensorWavefrontError import SensorWavefrontError
 
 from lsst.ts.ofc.Utility import InstName
 from lsst.ts.ofc.ctrlIntf.OFCCalculationFactory import OFCCalculationFactory
@@ -14,16 +15,40 @@ from lsst.ts.ofc.ctrlIntf.OFCCalculationFactory import OFCCalculationFactory
 from lsst.ts.phosim.telescope.TeleFacade import TeleFacade
 from lsst.ts.phosim.PhosimCmpt import PhosimCmpt
 from lsst.ts.phosim.SkySim import SkySim
-from lsst.ts.phosim.Utility import getPhoSimPath, getAoclcOutputPath
-from lsst.ts.phosim.PlotUtil import plotFwhmOfIters
+from lsst.ts.phosim.Utility import getPhoSimPath, getAoclcOutputPath, \
+    getFakePhoSimDir, PlotMode
+from lsst.ts.phosim.ResultsStore import ResultsStore
+from lsst.ts.phosim.Checkpoint import Checkpoint
+from lsst.ts.phosim.TaskGraph import TaskGraph
+from lsst.ts.phosim.PlotUtil import plotFwhmData, getFwhmDataInStore
+from lsst.ts.phosim.PlotService import PlotService
+from lsst.ts.phosim.Tracer import getTracer
 
 
 def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
-         useMinDofIdx=False, inputSkyFilePath="", m1m3ForceError=0.05):
+         useMinDofIdx=False, inputSkyFilePath="", m1m3ForceError=0.05,
+         pertCacheDir="", exportTextFile=True, resume=False,
+         cpuBudget=None, seedNum=6, zAngleInDeg=27.0912, rotAngInDeg=0.0,
+         starMag=15, fakeFlatDir="", phosimRunCacheDir="", trace=False,
+         plotMode=PlotMode.Background, phosimWorkDir=""):
+
+    # Record the spans of stages
+    if (trace):
+        getTracer().enable()
+
+    # Checkpoint of the iterations. The resumption is only possible if the
+    # first iteration has been started.
+    checkpoint = Checkpoint(os.path.join(baseOutputDir, "checkpoint.json"))
+    isResumed = (resume and checkpoint.hasIter(0))
+    if (not isResumed):
+        checkpoint.clear()
 
     # Prepare the calibration products (only for the amplifier images)
+    # They have been prepared and ingested if the run is resumed. The
+    # products given by fakeFlatDir (e.g. shared by the ensemble members)
+    # are used directly.
     sensorNameList = _getComCamSensorNameList()
-    if (not isEimg):
+    if (not isEimg and not isResumed and fakeFlatDir == ""):
         fakeFlatDir = _makeCalibs(baseOutputDir, sensorNameList)
 
     # Make the ISR directory
@@ -31,19 +56,42 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
     isrDir = os.path.join(baseOutputDir, isrDirName)
     _makeDir(isrDir)
 
-    # Test star magnitude
-    starMag = 15
-
     # Survey parameters
     filterType = FilterType.REF
     raInDeg = 0.0
     decInDeg = 0.0
-    rotAngInDeg = 0.0
 
     # Prepare the components
     phosimCmpt = _preparePhosimCmpt(phosimDir, filterType, raInDeg, decInDeg,
-                                    rotAngInDeg, numPro, isEimg,
-                                    m1m3ForceError)
+                                    zAngleInDeg, rotAngInDeg, numPro, isEimg,
+                                    m1m3ForceError, seedNum)
+
+    # Reuse the perturbation files across the iterations
+    if (pertCacheDir == ""):
+        pertCacheDir = os.path.join(baseOutputDir, "pertCache")
+    phosimCmpt.setPertCacheDir(pertCacheDir)
+
+    # Plot the mirror residue maps off the critical path of iteration
+    plotService = PlotService(plotMode=plotMode)
+    phosimCmpt.getTele().setPlotService(plotService)
+
+    # Reuse the PhoSim output images of the same inputs (e.g. shared by the
+    # ensemble members)
+    if (phosimRunCacheDir != ""):
+        phosimCmpt.setPhoSimRunCacheDir(phosimRunCacheDir)
+
+    # Keep the PhoSim intermediate files away from the other simulations
+    # running at the same time
+    if (phosimWorkDir != ""):
+        phosimCmpt.setPhoSimWorkDir(phosimWorkDir)
+
+    # Store the results of iterations in a single binary file
+    resultsFilePath = os.path.join(baseOutputDir, "results.npz")
+    if (os.path.exists(resultsFilePath) and not isResumed):
+        os.remove(resultsFilePath)
+    resultsStore = ResultsStore(resultsFilePath)
+    phosimCmpt.setResultsStore(resultsStore, exportTextFile=exportTextFile)
+    phosimCmpt.setWriteResultInBackground(True)
 
     wepCalc = _prepareWepCalc(isrDir, filterType, raInDeg, decInDeg,
                               rotAngInDeg, isEimg)
@@ -55,7 +103,7 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
     ofcCalc = _prepareOfcCalc(filterType, rotAngInDeg)
 
     # Ingest the calibration products (only for the amplifier images)
-    if (not isEimg):
+    if (not isEimg and not isResumed):
         wepCalc.ingestCalibs(fakeFlatDir)
 
     # Only use 10 hexapod positions and first 3 bending modes of M1M3 and M2
@@ -63,11 +111,33 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
         _useMinDofIdx(ofcCalc)
 
     # Set the telescope state to be the same as the OFC
-    state0 = ofcCalc.getStateAggregated()
-    phosimCmpt.setDofInUm(state0)
+    simSeed = 1000
+    if (isResumed):
+        startIterNum = checkpoint.getResumeIterNum()
+        print("Resume from iteration %d." % startIterNum)
+
+        iterState = checkpoint.getIterState(startIterNum)
+        obsId = iterState["obsId"]
+        simSeed = iterState["simSeed"]
+        phosimCmpt.setSeedNum(iterState["seedNum"])
+
+        _restoreOfcState(ofcCalc, iterState["dofInUm"])
+        phosimCmpt.setDofInUm(iterState["dofInUm"])
+
+        # Remove the results of unfinished iterations
+        resultsStore.truncate(startIterNum)
+    else:
+        startIterNum = 0
+        obsId = 9006000
+
+        state0 = ofcCalc.getStateAggregated()
+        phosimCmpt.setDofInUm(state0)
+
+        checkpoint.setIterState(startIterNum, obsId, state0,
+                                seedNum=phosimCmpt.getSeedNum(),
+                                simSeed=simSeed)
 
     # Do the iteration
-    obsId = 9006000
     opdZkFileName = "opd.zer"
     wfsZkFileName = "wfs.zer"
     opdPssnFileName = "PSSN.txt"
@@ -76,11 +146,14 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
     iterDefaultDirName = "iter"
     dofInUmFileName = "dofPertInNextIter.mat"
     skyInfoFileName = "skyComCamInfo.txt"
-    for iterCount in range(iterNum):
+    for iterCount in range(startIterNum, iterNum):
 
         # Set the observation Id
         phosimCmpt.setSurveyParam(obsId=obsId)
 
+        # Set the iteration number of results
+        phosimCmpt.setIterNum(iterCount)
+
         # The iteration directory
         iterDirName = "%s%d" % (iterDefaultDirName, iterCount)
 
@@ -93,26 +166,9 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
                                     outputImgDirName)
         phosimCmpt.setOutputImgDir(outputImgDir)
 
-        # Generate the OPD image
-        argString = phosimCmpt.getComCamOpdArgsAndFilesForPhoSim()
-        phosimCmpt.runPhoSim(argString)
-
-        # Analyze the OPD data
-        phosimCmpt.analyzeComCamOpdData(zkFileName=opdZkFileName,
-                                        pssnFileName=opdPssnFileName)
-
-        # Get the PSSN from file
-        pssn = phosimCmpt.getOpdPssnFromFile(opdPssnFileName)
-        print("Calculated PSSN is %s." % pssn)
-
-        # Get the GQ effective FWHM from file
-        gqEffFwhm = phosimCmpt.getOpdGqEffFwhmFromFile(opdPssnFileName)
-        print("GQ effective FWHM is %.4f." % gqEffFwhm)
-
-        # Set the FWHM data
-        listOfFWHMSensorData = phosimCmpt.getListOfFwhmSensorData(
-            opdPssnFileName, sensorNameList)
-        ofcCalc.setFWHMSensorDataOfCam(listOfFWHMSensorData)
+        # Prepare the arguments and files of PhoSim sequentially because
+        # they depend on the state of phosimCmpt
+        opdArgString = phosimCmpt.getComCamOpdArgsAndFilesForPhoSim()
 
         # Prepare the faked sky
         if (inputSkyFilePath == ""):
@@ -133,20 +189,10 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
         extraObsId = obsId + 1
         intraObsId = obsId + 2
 
-        # Generate the defocal images
-        simSeed = 1000
-        argStringList = phosimCmpt.getComCamStarArgsAndFilesForPhoSim(
+        starArgStringList = phosimCmpt.getComCamStarArgsAndFilesForPhoSim(
             extraObsId, intraObsId, skySim, simSeed=simSeed,
             cmdSettingFileName="starDefault.cmd",
             instSettingFileName="starSingleExp.inst")
-        for argString in argStringList:
-            phosimCmpt.runPhoSim(argString)
-
-        # Repackage the images based on the image type
-        if (isEimg):
-            phosimCmpt.repackageComCamEimgFromPhoSim()
-        else:
-            phosimCmpt.repackageComCamAmpImgFromPhoSim()
 
         # Collect the defocal images
         intraRawExpData = RawExpData()
@@ -159,9 +205,59 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
                                       phosimCmpt.getExtraFocalDirName())
         extraRawExpData.append(extraObsId, 0, extraRawExpDir)
 
-        # Calculate the wavefront error and DOF
-        listOfWfErr = wepCalc.calculateWavefrontErrors(
-            intraRawExpData, extraRawExpData=extraRawExpData)
+        # Run the stages of iteration as a task graph. The OPD branch (OPD
+        # image and analysis) and the star branch (defocal images,
+        # repackaging, and WEP) are independent.
+        taskGraph = TaskGraph()
+
+        taskGraph.addTask(
+            "opdPhoSim", _runPhoSimStage,
+            args=(phosimCmpt, checkpoint, iterCount, "opdPhoSim",
+                  opdArgString), numOfCpu=numPro)
+        taskGraph.addTask(
+            "opdAnalysis", phosimCmpt.analyzeComCamOpdData,
+            kwargs={"zkFileName": opdZkFileName,
+                    "pssnFileName": opdPssnFileName},
+            dependOn=["opdPhoSim"])
+
+        starTaskNameList = []
+        for idx, argString in enumerate(starArgStringList):
+            starTaskName = "starPhoSim%d" % idx
+            taskGraph.addTask(
+                starTaskName, _runPhoSimStage,
+                args=(phosimCmpt, checkpoint, iterCount, starTaskName,
+                      argString), numOfCpu=numPro)
+            starTaskNameList.append(starTaskName)
+
+        taskGraph.addTask(
+            "repackage", _repackageStage,
+            args=(phosimCmpt, checkpoint, iterCount, isEimg),
+            dependOn=starTaskNameList)
+        taskGraph.addTask(
+            "wep", _calcWfErrStage,
+            args=(wepCalc, checkpoint, iterCount, intraRawExpData,
+                  extraRawExpData), dependOn=["repackage"])
+
+        taskGraph.run(cpuBudget=cpuBudget)
+        print(taskGraph.getTimingSummary())
+
+        opdResult = taskGraph.getResult("opdAnalysis")
+        listOfWfErr = taskGraph.getResult("wep")
+
+        # Get the PSSN
+        pssn = opdResult.getPssn()
+        print("Calculated PSSN is %s." % pssn)
+
+        # Get the GQ effective FWHM
+        gqEffFwhm = opdResult.getGqEffFwhm()
+        print("GQ effective FWHM is %.4f." % gqEffFwhm)
+
+        # Set the FWHM data
+        listOfFWHMSensorData = phosimCmpt.getListOfFwhmSensorDataOfOpdResult(
+            opdResult, sensorNameList)
+        ofcCalc.setFWHMSensorDataOfCam(listOfFWHMSensorData)
+
+        # Calculate the DOF
         ofcCalc.calculateCorrections(listOfWfErr)
 
         # Record the wfs error with the same order as OPD for the comparison
@@ -179,11 +275,97 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, isEimg=False,
         # Add the observation ID by 10 for the next iteration
         obsId += 10
 
+        # Record the finished iteration
+        phosimCmpt.waitForResultWriting()
+        checkpoint.finishIter(iterCount, obsId, dofInUm)
+
     # Summarize the FWHM
-    pssnFiles = [os.path.join(baseOutputDir, "%s%d" % (iterDefaultDirName, num),
-                 outputImgDirName, opdPssnFileName) for num in range(iterNum)]
+    phosimCmpt.waitForResultWriting()
     saveToFilePath = os.path.join(baseOutputDir, "fwhmIters.png")
-    plotFwhmOfIters(pssnFiles, saveToFilePath=saveToFilePath)
+    plotService.submit(plotFwhmData, getFwhmDataInStore(resultsStore),
+                       saveToFilePath=saveToFilePath)
+
+    # Finish the deferred and background plots
+    plotService.close()
+
+    # Export the spans of stages
+    if (trace):
+        _writeTrace(baseOutputDir)
+
+
+def _writeTrace(outputDir):
+
+    tracer = getTracer()
+    tracer.writeChromeTrace(os.path.join(outputDir, "trace.json"))
+    tracer.writeSummary(os.path.join(outputDir, "traceSummary.txt"))
+    print(tracer.getSummary())
+
+
+def _runPhoSimStage(phosimCmpt, checkpoint, iterCount, stageName,
+                    argString):
+
+    # Skip the PhoSim run if it has been done
+    if (not checkpoint.isStageDone(iterCount, stageName)):
+        phosimCmpt.runPhoSim(argString)
+        checkpoint.markStageDone(iterCount, stageName)
+
+
+def _repackageStage(phosimCmpt, checkpoint, iterCount, isEimg):
+
+    # Repackage the images based on the image type
+    if (not checkpoint.isStageDone(iterCount, "repackage")):
+        if (isEimg):
+            phosimCmpt.repackageComCamEimgFromPhoSim()
+        else:
+            phosimCmpt.repackageComCamAmpImgFromPhoSim()
+        checkpoint.markStageDone(iterCount, "repackage")
+
+
+def _calcWfErrStage(wepCalc, checkpoint, iterCount, intraRawExpData,
+                    extraRawExpData):
+
+    # Restore the wavefront error if it has been calculated
+    if (checkpoint.isStageDone(iterCount, "wep")):
+        listOfWfErr = _mapDataToListOfWfErr(
+            checkpoint.getStageData(iterCount, "wep"))
+    else:
+        listOfWfErr = wepCalc.calculateWavefrontErrors(
+            intraRawExpData, extraRawExpData=extraRawExpData)
+        checkpoint.markStageDone(iterCount, "wep",
+                                 data=_mapListOfWfErrToData(listOfWfErr))
+
+    return listOfWfErr
+
+
+def _restoreOfcState(ofcCalc, stateAggregated):
+
+    ztaac = ofcCalc.getZtaac()
+    ztaac.setStateToState0()
+    ztaac.aggState(np.array(stateAggregated) - ztaac.getState0())
+
+
+def _mapListOfWfErrToData(listOfWfErr):
+
+    data = []
+    for sensorWavefrontData in listOfWfErr:
+        data.append(
+            [sensorWavefrontData.getSensorId(),
+             np.array(sensorWavefrontData.getAnnularZernikePoly()).tolist()])
+
+    return data
+
+
+def _mapDataToListOfWfErr(data):
+
+    listOfWfErr = []
+    for sensorId, zk in data:
+        sensorWavefrontData = SensorWavefrontError(numOfZk=len(zk))
+        sensorWavefrontData.setSensorId(sensorId)
+        sensorWavefrontData.setAnnularZernikePoly(np.array(zk))
+
+        listOfWfErr.append(sensorWavefrontData)
+
+    return listOfWfErr
 
 
 def _getComCamSensorNameList():
@@ -227,8 +409,8 @@ def _makeFakeFlat(detector):
     runProgram(command, argstring=argstring)
 
 
-def _preparePhosimCmpt(phosimDir, filterType, raInDeg, decInDeg, rotAngInDeg,
-                       numPro, isEimg, m1m3ForceError):
+def _preparePhosimCmpt(phosimDir, filterType, raInDeg, decInDeg, zAngleInDeg,
+                       rotAngInDeg, numPro, isEimg, m1m3ForceError, seedNum):
 
     # Set the Telescope facade class
     tele = TeleFacade()
@@ -240,7 +422,6 @@ def _preparePhosimCmpt(phosimDir, filterType, raInDeg, decInDeg, rotAngInDeg,
 
     # Set the telescope survey parameters
     boresight = (raInDeg, decInDeg)
-    zAngleInDeg = 27.0912
     phosimCmpt.setSurveyParam(filterType=filterType, boresight=boresight,
                               zAngleInDeg=zAngleInDeg, rotAngInDeg=rotAngInDeg)
 
@@ -252,7 +433,6 @@ def _preparePhosimCmpt(phosimDir, filterType, raInDeg, decInDeg, rotAngInDeg,
         settingFile.updateSetting("e2ADC", 0)
 
     # Set the seed number for M1M3 surface
-    seedNum = 6
     phosimCmpt.setSeedNum(seedNum)
 
     # Set the M1M3 force error
@@ -345,10 +525,48 @@ if __name__ == "__main__":
                         help="Star Id, ra, dec, and magnitude")
     parser.add_argument("--m1m3FErr", type=float, default=0.05,
                         help="Ratio of M1M3 actuator force error between 0 and 1 (default: 0.05)")
+    parser.add_argument("--pertCacheDir", type=str, default="",
+                        help="directory of perturbation cache shared by the iterations "
+                             "(default: output/pertCache)")
+    parser.add_argument("--noTextFile", default=False, action="store_true",
+                        help="only save the results to output/results.npz without the text files")
+    parser.add_argument("--resume", default=False, action="store_true",
+                        help="resume the unfinished run in the output directory by output/checkpoint.json")
+    parser.add_argument("--cpuBudget", type=int, default=0,
+                        help="number of CPU shared by the concurrent stages in each iteration "
+                             "(default: all CPUs)")
+    parser.add_argument("--seedNum", type=int, default=6,
+                        help="seed number of M1M3 surface (default: 6)")
+    parser.add_argument("--zAngle", type=float, default=27.0912,
+                        help="zenith angle in degree (default: 27.0912)")
+    parser.add_argument("--rotAng", type=float, default=0.0,
+                        help="camera rotation angle in degree (default: 0.0)")
+    parser.add_argument("--starMag", type=float, default=15,
+                        help="star magnitude at the OPD field positions (default: 15)")
+    parser.add_argument("--fakeFlatDir", type=str, default="",
+                        help="directory of the prepared fake flats (default: make them in output/fake_flats)")
+    parser.add_argument("--phosimRunCacheDir", type=str, default="",
+                        help="directory of PhoSim output images shared by the runs with the same inputs "
+                             "(default: no cache)")
+    parser.add_argument("--trace", default=False, action="store_true",
+                        help="record the time, I/O, and memory of stages to output/trace.json and "
+                             "output/traceSummary.txt")
+    parser.add_argument("--fakePhoSim", default=False, action="store_true",
+                        help="use the fake PhoSim with the synthetic outputs instead of PHOSIMPATH")
+    parser.add_argument("--plotMode", type=str, default="background",
+                        choices=[mode.name.lower() for mode in PlotMode],
+                        help="run the plots in foreground, background processes, deferred to the end, "
+                             "or disabled (default: background)")
+    parser.add_argument("--phosimWorkDir", type=str, default="",
+                        help="work directory of PhoSim intermediate files "
+                             "(default: work directory in PHOSIMPATH)")
     args = parser.parse_args()
 
     # Run the simulation
-    phosimDir = getPhoSimPath()
+    if (args.fakePhoSim):
+        phosimDir = getFakePhoSimDir()
+    else:
+        phosimDir = getPhoSimPath()
 
     if (args.output == ""):
         outputDir = getAoclcOutputPath()
@@ -358,4 +576,13 @@ if __name__ == "__main__":
 
     main(phosimDir, args.numOfProc, args.iterNum, outputDir,
          isEimg=args.eimage, useMinDofIdx=args.minDof,
-         inputSkyFilePath=args.skyFile, m1m3ForceError=args.m1m3FErr)
+         inputSkyFilePath=args.skyFile, m1m3ForceError=args.m1m3FErr,
+         pertCacheDir=args.pertCacheDir,
+         exportTextFile=(not args.noTextFile), resume=args.resume,
+         cpuBudget=(args.cpuBudget if (args.cpuBudget > 0) else None),
+         seedNum=args.seedNum, zAngleInDeg=args.zAngle,
+         rotAngInDeg=args.rotAng, starMag=args.starMag,
+         fakeFlatDir=args.fakeFlatDir,
+         phosimRunCacheDir=args.phosimRunCacheDir, trace=args.trace,
+         plotMode=PlotMode[args.plotMode.capitalize()],
+         phosimWorkDir=args.phosimWorkDir)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import os
+import argparse
+
+from lsst.ts.phosim.EnsembleRunner import EnsembleRunner
+from lsst.ts.phosim.SocketExecutor import SocketExecutor
+from lsst.ts.phosim.Utility import getEnsembleAuthkey
+
+
+def main(specFilePath, outputDir, numOfWorker=None, workerAddressList=None,
+         authkey=b""):
+
+    ensembleRunner = EnsembleRunner(outputDir)
+    ensembleRunner.readSpecFile(specFilePath)
+    print("Number of ensemble members is %d."
+          % len(ensembleRunner.getMemberList()))
+
+    # Run the members in the local process pool or the remote workers
+    if (workerAddressList is None) or (len(workerAddressList) == 0):
+        ensembleRunner.run(numOfWorker=numOfWorker)
+    else:
+        executor = SocketExecutor(workerAddressList, authkey=authkey)
+        try:
+            ensembleRunner.run(executor=executor)
+        finally:
+            executor.shutdown()
+
+    # Aggregate the results
+    tableFilePath = os.path.join(outputDir, "ensembleResults.csv")
+    ensembleRunner.writeResultsTable(tableFilePath)
+    print("The results are in %s." % tableFilePath)
+
+
+def _parseAddress(addressString):
+
+    host, port = addressString.rsplit(":", 1)
+    return (host, int(port))
+
+
+if __name__ == "__main__":
+
+    # Set the parser
+    parser = argparse.ArgumentParser(
+        description="Run the ensemble of AOS closed-loop simulations.")
+    parser.add_argument("--spec", type=str, required=True,
+                        help="yaml file of base and swept parameters")
+    parser.add_argument("--output", type=str, required=True,
+                        help="output directory shared by the members")
+    parser.add_argument("--numOfWorker", type=int, default=0,
+                        help="number of members running at the same time in local "
+                             "(default: number of CPUs divided by the CPUs of a member)")
+    parser.add_argument("--worker", type=str, action="append", default=[],
+                        help="address (host:port) of ensembleWorker.py; can be repeated")
+    parser.add_argument("--authkeyFile", type=str, default="",
+                        help="file of authentication key of workers "
+                             "(default: ENSEMBLEAUTHKEY environment variable)")
+    args = parser.parse_args()
+
+    authkey = b""
+    if (len(args.worker) != 0):
+        authkey = getEnsembleAuthkey(authkeyFilePath=args.authkeyFile)
+        if (len(authkey) == 0):
+            parser.error("Please set the 'ENSEMBLEAUTHKEY' environment "
+                         "variable or --authkeyFile with --worker.")
+
+    os.makedirs(args.output, exist_ok=True)
+
+    main(args.spec, args.output,
+         numOfWorker=(args.numOfWorker if (args.numOfWorker > 0) else None),
+         workerAddressList=[_parseAddress(address)
+                            for address in args.worker],
+         authkey=authkey)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+import argparse
+
+from lsst.ts.phosim.SocketWorker import SocketWorker
+from lsst.ts.phosim.Utility import getEnsembleAuthkey
+
+
+def main(host, port, authkey):
+
+    worker = SocketWorker(address=(host, port), authkey=authkey)
+    print("Worker listens on %s:%d." % worker.getAddress())
+
+    try:
+        worker.serve()
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+
+    # Set the parser
+    parser = argparse.ArgumentParser(
+        description="Run the worker of ensemble closed-loop simulations.")
+    parser.add_argument("--host", type=str, default="localhost",
+                        help="host to listen (default: localhost)")
+    parser.add_argument("--port", type=int, default=0,
+                        help="port to listen (default: chosen by the system)")
+    parser.add_argument("--authkeyFile", type=str, default="",
+                        help="file of authentication key shared with ensembleCloseLoop.py "
+                             "(default: ENSEMBLEAUTHKEY environment variable)")
+    args = parser.parse_args()
+
+    authkey = getEnsembleAuthkey(authkeyFilePath=args.authkeyFile)
+    if (len(authkey) == 0):
+        parser.error("Please set the 'ENSEMBLEAUTHKEY' environment variable "
+                     "or --authkeyFile.")
+
+    main(args.host, args.port, authkey)
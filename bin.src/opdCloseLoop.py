@@ -2,6 +2,8 @@
 
 import os
 import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 from lsst.ts.wep.Utility import FilterType
 from lsst.ts.ofc.Utility import InstName
@@ -9,36 +11,101 @@ from lsst.ts.ofc.ctrlIntf.OFCCalculationFactory import OFCCalculationFactory
 
 from lsst.ts.phosim.telescope.TeleFacade import TeleFacade
 from lsst.ts.phosim.PhosimCmpt import PhosimCmpt
-from lsst.ts.phosim.Utility import getPhoSimPath, getAoclcOutputPath
-from lsst.ts.phosim.PlotUtil import plotFwhmOfIters
-
-
-def main(phosimDir, numPro, iterNum, baseOutputDir, rotCamInDeg=0.0):
+from lsst.ts.phosim.Utility import getPhoSimPath, getAoclcOutputPath, \
+    getFakePhoSimDir, PlotMode
+from lsst.ts.phosim.ResultsStore import ResultsStore
+from lsst.ts.phosim.Checkpoint import Checkpoint
+from lsst.ts.phosim.PlotUtil import plotFwhmData, getFwhmDataInStore
+from lsst.ts.phosim.PlotService import PlotService
+from lsst.ts.phosim.Tracer import getTracer
+
+
+def main(phosimDir, numPro, iterNum, baseOutputDir, rotCamInDeg=0.0,
+         pertCacheDir="", exportTextFile=True, resume=False, trace=False,
+         numOfAnalysisProc=1, plotMode=PlotMode.Background):
+
+    # Record the spans of stages
+    if (trace):
+        getTracer().enable()
+
+    # Checkpoint of the iterations. The resumption is only possible if the
+    # first iteration has been started.
+    checkpoint = Checkpoint(os.path.join(baseOutputDir, "checkpoint.json"))
+    isResumed = (resume and checkpoint.hasIter(0))
+    if (not isResumed):
+        checkpoint.clear()
 
     # Survey parameters
     filterType = FilterType.REF
 
     # Prepare the components
     phosimCmpt = _preparePhosimCmpt(phosimDir, filterType, 0.0, numPro)
+
+    # Reuse the perturbation files across the iterations
+    if (pertCacheDir == ""):
+        pertCacheDir = os.path.join(baseOutputDir, "pertCache")
+    phosimCmpt.setPertCacheDir(pertCacheDir)
+
+    # Plot the mirror residue maps off the critical path of iteration
+    plotService = PlotService(plotMode=plotMode)
+    phosimCmpt.getTele().setPlotService(plotService)
+
+    # Analyze the OPD maps in the process pool
+    opdAnalysisExecutor = None
+    if (numOfAnalysisProc > 1):
+        opdAnalysisExecutor = ProcessPoolExecutor(
+            max_workers=numOfAnalysisProc)
+        phosimCmpt.setOpdAnalysisExecutor(opdAnalysisExecutor)
+
+    # Store the results of iterations in a single binary file
+    resultsFilePath = os.path.join(baseOutputDir, "results.npz")
+    if (os.path.exists(resultsFilePath) and not isResumed):
+        os.remove(resultsFilePath)
+    resultsStore = ResultsStore(resultsFilePath)
+    phosimCmpt.setResultsStore(resultsStore, exportTextFile=exportTextFile)
+    phosimCmpt.setWriteResultInBackground(True)
+
     ofcCalc = _prepareOfcCalc(filterType, rotCamInDeg)
 
     # Set the telescope state to be the same as the OFC
-    state0 = ofcCalc.getStateAggregated()
-    phosimCmpt.setDofInUm(state0)
+    if (isResumed):
+        startIterNum = checkpoint.getResumeIterNum()
+        print("Resume from iteration %d." % startIterNum)
+
+        iterState = checkpoint.getIterState(startIterNum)
+        obsId = iterState["obsId"]
+        phosimCmpt.setSeedNum(iterState["seedNum"])
+
+        _restoreOfcState(ofcCalc, iterState["dofInUm"])
+        phosimCmpt.setDofInUm(iterState["dofInUm"])
+
+        # Remove the results of unfinished iterations
+        resultsStore.truncate(startIterNum)
+    else:
+        startIterNum = 0
+        obsId = 9006000
+
+        state0 = ofcCalc.getStateAggregated()
+        phosimCmpt.setDofInUm(state0)
+
+        checkpoint.setIterState(startIterNum, obsId, state0,
+                                seedNum=phosimCmpt.getSeedNum())
 
     # Do the iteration
-    obsId = 9006000
     opdZkFileName = "opd.zer"
     opdPssnFileName = "PSSN.txt"
     outputDirName = "pert"
     outputImgDirName = "img"
     iterDefaultDirName = "iter"
     dofInUmFileName = "dofPertInNextIter.mat"
-    for iterCount in range(iterNum):
+    for iterCount in range(startIterNum, iterNum):
 
         # Set the observation Id
         phosimCmpt.setSurveyParam(obsId=obsId)
 
+        # Set the iteration number of results
+        phosimCmpt.setIterNum(iterCount)
+
         # The iteration directory
         iterDirName = "%s%d" % (iterDefaultDirName, iterCount)
 
@@ -52,33 +119,36 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, rotCamInDeg=0.0):
         phosimCmpt.setOutputImgDir(outputImgDir)
 
         # Generate the OPD image
+        # Skip the PhoSim run if it has been done
         argString = phosimCmpt.getComCamOpdArgsAndFilesForPhoSim()
-        phosimCmpt.runPhoSim(argString)
+        if (not checkpoint.isStageDone(iterCount, "opdPhoSim")):
+            phosimCmpt.runPhoSim(argString)
+            checkpoint.markStageDone(iterCount, "opdPhoSim")
 
         # Analyze the OPD data
         # Rotate OPD in the reversed direction of camera
-        phosimCmpt.analyzeComCamOpdData(zkFileName=opdZkFileName,
-                                        rotOpdInDeg=-rotCamInDeg,
-                                        pssnFileName=opdPssnFileName)
+        opdResult = phosimCmpt.analyzeComCamOpdData(
+            zkFileName=opdZkFileName, rotOpdInDeg=-rotCamInDeg,
+            pssnFileName=opdPssnFileName)
 
-        # Get the PSSN from file
-        pssn = phosimCmpt.getOpdPssnFromFile(opdPssnFileName)
+        # Get the PSSN
+        pssn = opdResult.getPssn()
         print("Calculated PSSN is %s." % pssn)
 
-        # Get the GQ effective FWHM from file
-        gqEffFwhm = phosimCmpt.getOpdGqEffFwhmFromFile(opdPssnFileName)
+        # Get the GQ effective FWHM
+        gqEffFwhm = opdResult.getGqEffFwhm()
         print("GQ effective FWHM is %.4f." % gqEffFwhm)
 
         # Set the FWHM data
         refSensorNameList = _getComCamSensorNameList()
-        listOfFWHMSensorData = phosimCmpt.getListOfFwhmSensorData(
-            opdPssnFileName, refSensorNameList)
+        listOfFWHMSensorData = phosimCmpt.getListOfFwhmSensorDataOfOpdResult(
+            opdResult, refSensorNameList)
         ofcCalc.setFWHMSensorDataOfCam(listOfFWHMSensorData)
 
         # Simulate to get the wavefront sensor data from WEP and calculate
         # the DOF
-        listOfWfErr = phosimCmpt.mapOpdDataToListOfWfErr(
-            opdZkFileName, refSensorNameList)
+        listOfWfErr = phosimCmpt.mapOpdResultToListOfWfErr(
+            opdResult, refSensorNameList)
         ofcCalc.calculateCorrections(listOfWfErr)
 
         # Set the new aggregated DOF to phosimCmpt
@@ -92,11 +162,40 @@ def main(phosimDir, numPro, iterNum, baseOutputDir, rotCamInDeg=0.0):
         # Add the observation ID by 1
         obsId += 1
 
+        # Record the finished iteration
+        phosimCmpt.waitForResultWriting()
+        checkpoint.finishIter(iterCount, obsId, dofInUm)
+
+    if (opdAnalysisExecutor is not None):
+        opdAnalysisExecutor.shutdown()
+
     # Summarize the FWHM
-    pssnFiles = [os.path.join(baseOutputDir, "%s%d" % (iterDefaultDirName, num),
-                 outputImgDirName, opdPssnFileName) for num in range(iterNum)]
+    phosimCmpt.waitForResultWriting()
     saveToFilePath = os.path.join(baseOutputDir, "fwhmIters.png")
-    plotFwhmOfIters(pssnFiles, saveToFilePath=saveToFilePath)
+    plotService.submit(plotFwhmData, getFwhmDataInStore(resultsStore),
+                       saveToFilePath=saveToFilePath)
+
+    # Finish the deferred and background plots
+    plotService.close()
+
+    # Export the spans of stages
+    if (trace):
+        _writeTrace(baseOutputDir)
+
+
+def _writeTrace(outputDir):
+
+    tracer = getTracer()
+    tracer.writeChromeTrace(os.path.join(outputDir, "trace.json"))
+    tracer.writeSummary(os.path.join(outputDir, "traceSummary.txt"))
+    print(tracer.getSummary())
+
+
+def _restoreOfcState(ofcCalc, stateAggregated):
+
+    ztaac = ofcCalc.getZtaac()
+    ztaac.setStateToState0()
+    ztaac.aggState(np.array(stateAggregated) - ztaac.getState0())
 
 
 def _preparePhosimCmpt(phosimDir, filterType, rotAngInDeg, numPro):
@@ -158,10 +257,31 @@ if __name__ == "__main__":
                         help="output directory")
     parser.add_argument("--rotCam", type=float, default=0.0,
                         help="Rotate camera (degree) in counter-clockwise direction (default: 0.0)")
+    parser.add_argument("--pertCacheDir", type=str, default="",
+                        help="directory of perturbation cache shared by the iterations "
+                             "(default: output/pertCache)")
+    parser.add_argument("--noTextFile", default=False, action="store_true",
+                        help="only save the results to output/results.npz without the text files")
+    parser.add_argument("--resume", default=False, action="store_true",
+                        help="resume the unfinished run in the output directory by output/checkpoint.json")
+    parser.add_argument("--trace", default=False, action="store_true",
+                        help="record the time, I/O, and memory of stages to output/trace.json and "
+                             "output/traceSummary.txt")
+    parser.add_argument("--numOfAnalysisProc", type=int, default=1,
+                        help="number of processor to analyze the OPD maps (default: 1)")
+    parser.add_argument("--fakePhoSim", default=False, action="store_true",
+                        help="use the fake PhoSim with the synthetic outputs instead of PHOSIMPATH")
+    parser.add_argument("--plotMode", type=str, default="background",
+                        choices=[mode.name.lower() for mode in PlotMode],
+                        help="run the plots in foreground, background processes, deferred to the end, "
+                             "or disabled (default: background)")
     args = parser.parse_args()
 
     # Run the simulation
-    phosimDir = getPhoSimPath()
+    if (args.fakePhoSim):
+        phosimDir = getFakePhoSimDir()
+    else:
+        phosimDir = getPhoSimPath()
 
     if (args.output == ""):
         outputDir = getAoclcOutputPath()
@@ -170,4 +290,7 @@ if __name__ == "__main__":
     os.makedirs(outputDir, exist_ok=True)
 
     main(phosimDir, args.numOfProc, args.iterNum, outputDir,
-         rotCamInDeg=args.rotCam)
+         rotCamInDeg=args.rotCam, pertCacheDir=args.pertCacheDir,
+         exportTextFile=(not args.noTextFile), resume=args.resume,
+         trace=args.trace, numOfAnalysisProc=args.numOfAnalysisProc,
+         plotMode=PlotMode[args.plotMode.capitalize()])
@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+
+import sys
+
+from lsst.ts.phosim.FakePhosim import FakePhosim
+
+
+if __name__ == "__main__":
+
+    # Stand-in of phosim.py in the PhoSim directory. Point the PhoSim
+    # directory to this one by getFakePhoSimDir() to run without PhoSim.
+    FakePhosim().run(sys.argv[1:])
@@ -0,0 +1,14 @@
+backgroundmode 0
+raydensity 0.0
+perturbationmode 1
+trackingmode 0
+cleartracking
+clearclouds
+clearturbulence
+atmosphericdispersion 0
+lascatprob 0.0
+contaminationmode 0
+diffractionmode 1
+straylight 0
+detectormode 0
+centroidfile 1
@@ -0,0 +1,320 @@
+import os
+import hashlib
+import numpy as np
+
+from lsst.ts.wep.ParamReader import ParamReader
+
+from lsst.ts.phosim.MetroTool import createMTFatm
+from lsst.ts.phosim.Utility import getConfigDir
+
+
+class BandPssn(object):
+
+    def __init__(self, wavelengthInUm, weight, zen=0, r0inmRef=0.1382,
+                 D=8.36):
+        """Initialization of band-integrated PSSN class.
+
+        The PSSN of one OPD map is calculated at all sampled wavelengths of
+        band together. The PSF of each wavelength is computed from the same
+        PTT-removed OPD and pupil in one batched FFT, and the atmosphere MTF
+        and the atmospheric PSS of each wavelength are cached for the
+        following OPD maps. This gives the same monochromatic PSSN as
+        calc_pssn() in MetroTool.
+
+        The band-integrated PSSN is the weighted mean of the monochromatic
+        PSSN. The weight is the filter throughput times the SED at the sampled
+        wavelength.
+
+        PSSN: Normalized point source sensitivity.
+        PSS: Point source sensitivity.
+        OPD: Optical path difference.
+        PTT: Piston, x-tilt, and y-tilt.
+        PSF: Point spread function.
+        MTF: Modulation transfer function.
+        SED: Spectral energy distribution.
+
+        Parameters
+        ----------
+        wavelengthInUm : list or numpy.ndarray
+            Sampled wavelengths in um.
+        weight : list or numpy.ndarray
+            Weight of each wavelength. The weights are normalized.
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+        D : float, optional
+            Side length of OPD image in meter. (the default is 8.36.)
+
+        Raises
+        ------
+        ValueError
+            The lengths of wavelengths and weights are different.
+        ValueError
+            The sum of weights is not positive.
+        """
+
+        self.wavelengthInUm = np.array(wavelengthInUm, dtype=float).ravel()
+        weight = np.array(weight, dtype=float).ravel()
+
+        if (len(self.wavelengthInUm) != len(weight)):
+            raise ValueError("The lengths of wavelengths (%d) and weights (%d) "
+                             "are different." % (len(self.wavelengthInUm),
+                                                 len(weight)))
+        if (np.sum(weight) <= 0):
+            raise ValueError("The sum of weights (%f) is not positive."
+                             % np.sum(weight))
+
+        self.weight = weight / np.sum(weight)
+        self.zen = zen
+        self.r0inmRef = r0inmRef
+        self.D = D
+
+        # Atmosphere MTF of each wavelength. The key is the dimension of OPD.
+        self._mtfAtm = dict()
+
+        # Atmospheric PSS of each wavelength. The key is the pupil.
+        self._pssAtm = dict()
+
+    def __getstate__(self):
+        """Get the state to pickle without the cached data.
+
+        The cached arrays are large compared with the OPD map and are rebuilt
+        in the process that uses the object.
+
+        Returns
+        -------
+        dict
+            State of object.
+        """
+
+        state = self.__dict__.copy()
+        state["_mtfAtm"] = dict()
+        state["_pssAtm"] = dict()
+
+        return state
+
+    def getWavelength(self):
+        """Get the sampled wavelengths.
+
+        Returns
+        -------
+        numpy.ndarray
+            Sampled wavelengths in um.
+        """
+
+        return self.wavelengthInUm
+
+    def getWeight(self):
+        """Get the normalized weights of sampled wavelengths.
+
+        Returns
+        -------
+        numpy.ndarray
+            Normalized weight of each wavelength.
+        """
+
+        return self.weight
+
+    def getEffWavelength(self):
+        """Get the effective wavelength of band.
+
+        Returns
+        -------
+        float
+            Weighted mean of sampled wavelengths in um.
+        """
+
+        return float(np.sum(self.weight * self.wavelengthInUm))
+
+    def calcMonoPssn(self, opdRmPTT):
+        """Calculate the PSSN at each sampled wavelength.
+
+        PSSN: Normalized point source sensitivity.
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        opdRmPTT : numpy.ndarray
+            PTT-removed OPD map in um. The outside of pupil should be 0.
+
+        Returns
+        -------
+        numpy.ndarray
+            PSSN of each wavelength.
+        """
+
+        opd = np.nan_to_num(np.asarray(opdRmPTT, dtype=float))
+        pupil = (opd != 0)
+
+        mtfAtm = self._getMtfAtm(max(opd.shape))
+        pssAtm = self._getPssAtm(pupil, mtfAtm)
+
+        psf = self._calcPsf(opd, pupil)
+        pss = self._calcPss(psf, mtfAtm)
+
+        return pss / pssAtm
+
+    def calcPssn(self, opdRmPTT):
+        """Calculate the band-integrated PSSN.
+
+        PSSN: Normalized point source sensitivity.
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        opdRmPTT : numpy.ndarray
+            PTT-removed OPD map in um. The outside of pupil should be 0.
+
+        Returns
+        -------
+        float
+            Band-integrated PSSN.
+        """
+
+        return float(np.sum(self.weight * self.calcMonoPssn(opdRmPTT)))
+
+    def _getMtfAtm(self, m):
+        """Get the cached atmosphere MTF of each wavelength.
+
+        MTF: Modulation transfer function.
+
+        Parameters
+        ----------
+        m : int
+            Dimension of OPD image in pixel.
+
+        Returns
+        -------
+        numpy.ndarray
+            Atmosphere MTF. The first axis is the wavelength.
+        """
+
+        if (m not in self._mtfAtm):
+            self._mtfAtm[m] = np.array([
+                createMTFatm(self.D, m, 1, wavelength, self.zen,
+                             self.r0inmRef, model="vonK")
+                for wavelength in self.wavelengthInUm])
+
+        return self._mtfAtm[m]
+
+    def _getPssAtm(self, pupil, mtfAtm):
+        """Get the cached atmospheric PSS of each wavelength.
+
+        This is the PSS of perfect telescope with the atmosphere.
+
+        PSS: Point source sensitivity.
+
+        Parameters
+        ----------
+        pupil : numpy.ndarray[bool]
+            Pupil function.
+        mtfAtm : numpy.ndarray
+            Atmosphere MTF of each wavelength.
+
+        Returns
+        -------
+        numpy.ndarray
+            Atmospheric PSS of each wavelength.
+        """
+
+        key = (pupil.shape, hashlib.sha1(np.packbits(pupil)).hexdigest())
+        if (key not in self._pssAtm):
+            psf = self._calcPsf(np.zeros(pupil.shape), pupil)
+            self._pssAtm[key] = self._calcPss(psf, mtfAtm)
+
+        return self._pssAtm[key]
+
+    def _calcPsf(self, opd, pupil):
+        """Calculate the normalized PSF of each wavelength.
+
+        PSF: Point spread function.
+
+        Parameters
+        ----------
+        opd : numpy.ndarray
+            OPD map in um.
+        pupil : numpy.ndarray[bool]
+            Pupil function.
+
+        Returns
+        -------
+        numpy.ndarray
+            PSF. The first axis is the wavelength.
+        """
+
+        axes = (1, 2)
+        wavelength = self.wavelengthInUm[:, np.newaxis, np.newaxis]
+
+        z = pupil * np.exp(-2j * np.pi * opd / wavelength)
+        z = np.fft.fftshift(np.fft.fft2(np.fft.fftshift(z, axes=axes),
+                                        axes=axes), axes=axes)
+        psf = np.abs(z)**2
+
+        return psf / np.sum(psf, axis=axes, keepdims=True)
+
+    def _calcPss(self, psf, mtfAtm):
+        """Calculate the PSS of PSF convolved with the atmosphere.
+
+        PSS: Point source sensitivity.
+        PSF: Point spread function.
+
+        Parameters
+        ----------
+        psf : numpy.ndarray
+            PSF of each wavelength.
+        mtfAtm : numpy.ndarray
+            Atmosphere MTF of each wavelength.
+
+        Returns
+        -------
+        numpy.ndarray
+            PSS of each wavelength.
+        """
+
+        axes = (1, 2)
+
+        otf = np.fft.fftshift(np.fft.fft2(np.fft.fftshift(psf, axes=axes),
+                                          axes=axes), axes=axes)
+        otf *= mtfAtm
+        psfTot = np.abs(np.fft.fftshift(
+            np.fft.ifft2(np.fft.fftshift(otf, axes=axes), axes=axes),
+            axes=axes))
+
+        return np.sum(psfTot**2, axis=axes)
+
+
+def getBandPssn(filterType, zen=0, r0inmRef=0.1382, settingFilePath=None):
+    """Get the band-integrated PSSN of filter.
+
+    PSSN: Normalized point source sensitivity.
+
+    Parameters
+    ----------
+    filterType : enum 'FilterType' in lsst.ts.wep.Utility
+        Filter type.
+    zen : float, optional
+        Telescope zenith angle in degree. (the default is 0.)
+    r0inmRef : float, optional
+        Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+    settingFilePath : str, optional
+        Band setting file path. Use the "bandSetting.yaml" in the policy
+        directory if this is None. (the default is None.)
+
+    Returns
+    -------
+    BandPssn
+        Band-integrated PSSN of filter.
+    """
+
+    if (settingFilePath is None):
+        settingFilePath = os.path.join(getConfigDir(), "bandSetting.yaml")
+    bandSetting = ParamReader(filePath=settingFilePath).getSetting(
+        filterType.name.lower())
+
+    return BandPssn(bandSetting["wavelengthInUm"], bandSetting["weight"],
+                    zen=zen, r0inmRef=r0inmRef)
+
+
+if __name__ == "__main__":
+    pass
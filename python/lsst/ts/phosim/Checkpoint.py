@@ -0,0 +1,289 @@
+import os
+import json
+import threading
+import numpy as np
+
+
+class Checkpoint(object):
+
+    def __init__(self, filePath):
+        """Initialization of checkpoint class.
+
+        The checkpoint keeps the state of closed-loop iterations in a JSON
+        file. The state of each iteration is the observation Id, degree of
+        freedom (DOF), seeds, and the markers of completed stages. The file
+        is replaced atomically in each update, so a crash never leaves a
+        partial checkpoint. The updates from different threads are
+        serialized.
+
+        Parameters
+        ----------
+        filePath : str
+            Path of checkpoint file. The existed checkpoint will be loaded.
+        """
+
+        self.filePath = filePath
+
+        # State of iterations. The key is the iteration number in str
+        # because of JSON.
+        self._iters = dict()
+
+        self._lock = threading.RLock()
+
+        if os.path.exists(self.filePath):
+            with open(self.filePath, "r") as file:
+                self._iters = json.load(file)["iterations"]
+
+    def getFilePath(self):
+        """Get the path of checkpoint file.
+
+        Returns
+        -------
+        str
+            Path of checkpoint file.
+        """
+
+        return self.filePath
+
+    def setIterState(self, iterNum, obsId, dofInUm, **kwargs):
+        """Set the state at the beginning of iteration.
+
+        The stage markers of this iteration are cleared.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        obsId : int
+            Observation Id.
+        dofInUm : list or numpy.ndarray
+            DOF in um. This is also the aggregated state of optical feedback
+            control (OFC).
+        **kwargs : dict
+            Other JSON-serializable state (e.g. seedNum=6).
+        """
+
+        state = dict(kwargs)
+        state["obsId"] = int(obsId)
+        state["dofInUm"] = np.array(dofInUm, dtype=float).tolist()
+
+        with self._lock:
+            self._iters[str(int(iterNum))] = {"state": state,
+                                              "stages": dict(),
+                                              "finished": False}
+            self.save()
+
+    def hasIter(self, iterNum):
+        """The state of iteration exists or not.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+
+        Returns
+        -------
+        bool
+            True if the state exists.
+        """
+
+        return str(int(iterNum)) in self._iters
+
+    def getIterState(self, iterNum):
+        """Get the state at the beginning of iteration.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+
+        Returns
+        -------
+        dict
+            State of iteration. The "dofInUm" is a numpy.ndarray.
+
+        Raises
+        ------
+        ValueError
+            No state of the iteration.
+        """
+
+        state = dict(self._getIter(iterNum)["state"])
+        state["dofInUm"] = np.array(state["dofInUm"])
+
+        return state
+
+    def _getIter(self, iterNum):
+        """Get the record of iteration.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+
+        Returns
+        -------
+        dict
+            Record of iteration.
+
+        Raises
+        ------
+        ValueError
+            No record of the iteration.
+        """
+
+        if (not self.hasIter(iterNum)):
+            raise ValueError("No checkpoint of iteration %d." % iterNum)
+
+        return self._iters[str(int(iterNum))]
+
+    def markStageDone(self, iterNum, stageName, data=None):
+        """Mark the stage of iteration as done.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        stageName : str
+            Name of stage (e.g. "opdPhoSim").
+        data : dict or list, optional
+            JSON-serializable output of stage to restore in the resumption.
+            (the default is None.)
+        """
+
+        with self._lock:
+            self._getIter(iterNum)["stages"][stageName] = data
+            self.save()
+
+    def isStageDone(self, iterNum, stageName):
+        """The stage of iteration is done or not.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        stageName : str
+            Name of stage.
+
+        Returns
+        -------
+        bool
+            True if the stage is done.
+        """
+
+        if (not self.hasIter(iterNum)):
+            return False
+
+        return stageName in self._getIter(iterNum)["stages"]
+
+    def getStageData(self, iterNum, stageName):
+        """Get the output of stage in iteration.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        stageName : str
+            Name of stage.
+
+        Returns
+        -------
+        dict, list, or None
+            Output of stage.
+
+        Raises
+        ------
+        ValueError
+            The stage is not done.
+        """
+
+        if (not self.isStageDone(iterNum, stageName)):
+            raise ValueError("The stage (%s) of iteration %d is not done."
+                             % (stageName, iterNum))
+
+        return self._getIter(iterNum)["stages"][stageName]
+
+    def finishIter(self, iterNum, obsIdOfNextIter, dofInUmOfNextIter):
+        """Finish the iteration and set the state of next iteration.
+
+        Both are saved in a single update. The other state (e.g. seeds) of
+        next iteration is the same as this iteration.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        obsIdOfNextIter : int
+            Observation Id of the next iteration.
+        dofInUmOfNextIter : list or numpy.ndarray
+            DOF in um of the next iteration.
+        """
+
+        with self._lock:
+            record = self._getIter(iterNum)
+            record["finished"] = True
+
+            state = dict(record["state"])
+            state["obsId"] = int(obsIdOfNextIter)
+            state["dofInUm"] = np.array(dofInUmOfNextIter,
+                                        dtype=float).tolist()
+
+            self._iters[str(int(iterNum) + 1)] = {"state": state,
+                                                  "stages": dict(),
+                                                  "finished": False}
+            self.save()
+
+    def isIterFinished(self, iterNum):
+        """The iteration is finished or not.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+
+        Returns
+        -------
+        bool
+            True if the iteration is finished.
+        """
+
+        return self.hasIter(iterNum) and self._getIter(iterNum)["finished"]
+
+    def getResumeIterNum(self):
+        """Get the iteration number to resume.
+
+        Returns
+        -------
+        int
+            The first iteration that is not finished.
+        """
+
+        iterNum = 0
+        while self.isIterFinished(iterNum):
+            iterNum += 1
+
+        return iterNum
+
+    def save(self):
+        """Save the checkpoint to file atomically."""
+
+        outputDir, fileName = os.path.split(os.path.abspath(self.filePath))
+        tmpFilePath = os.path.join(outputDir, ".tmp_%s" % fileName)
+        with self._lock:
+            with open(tmpFilePath, "w") as file:
+                json.dump({"iterations": self._iters}, file, indent=1)
+                file.flush()
+                os.fsync(file.fileno())
+
+            os.replace(tmpFilePath, self.filePath)
+
+    def clear(self):
+        """Clear the checkpoint."""
+
+        self._iters = dict()
+        if os.path.exists(self.filePath):
+            os.remove(self.filePath)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,258 @@
+import numpy as np
+
+from lsst.ts.wep.cwfs.Tool import ZernikeEval
+
+
+class DoubleZernikeFieldModel(object):
+
+    def __init__(self, numOfFieldTerms=6, fieldRadiusInDeg=None):
+        """Initialization of double Zernike field model class.
+
+        The annular Zernike polynomials (Zk) of pupil at each field position
+        are expanded in the Zernike polynomials of field. The coefficient of
+        Zk j and field term k is c_kj, and Zk_j(x, y) = sum_k c_kj Z_k(x / R,
+        y / R), where R is the field radius. The model is fitted by the Zk of
+        sparse OPD field positions (e.g. the GQ points) and evaluates the Zk
+        of arbitrary field positions.
+
+        OPD: Optical path difference.
+        GQ: Gaussian quadrature.
+
+        Parameters
+        ----------
+        numOfFieldTerms : int, optional
+            Number of Zernike terms of field (Z1-Zk in Noll's index). (the
+            default is 6.)
+        fieldRadiusInDeg : float, optional
+            Field radius in degree to normalize the field position. Use the
+            max radius of field positions in the fitting if this is None.
+            (the default is None.)
+        """
+
+        self.numOfFieldTerms = int(numOfFieldTerms)
+        self.fieldRadiusInDeg = fieldRadiusInDeg
+
+        # Coefficients. The row is the field term and the column is the Zk.
+        self._coef = None
+
+        # Leave-one-out residuals of Zk at the field positions in the fitting
+        self._looResidual = None
+
+    def isFitted(self):
+        """The model is fitted or not.
+
+        Returns
+        -------
+        bool
+            True if the model is fitted.
+        """
+
+        return (self._coef is not None)
+
+    def getCoef(self):
+        """Get the coefficients of model.
+
+        Returns
+        -------
+        numpy.ndarray
+            Coefficients. The row is the field term and the column is the Zk.
+            This is None if the model is not fitted.
+        """
+
+        return self._coef
+
+    def getFieldRadiusInDeg(self):
+        """Get the field radius.
+
+        Returns
+        -------
+        float
+            Field radius in degree.
+        """
+
+        return self.fieldRadiusInDeg
+
+    def _getFieldBasis(self, fieldXInDeg, fieldYInDeg):
+        """Get the Zernike basis of field positions.
+
+        Parameters
+        ----------
+        fieldXInDeg : numpy.ndarray
+            Field x in degree.
+        fieldYInDeg : numpy.ndarray
+            Field y in degree.
+
+        Returns
+        -------
+        numpy.ndarray
+            Basis. The row is the field position and the column is the field
+            term.
+        """
+
+        x = np.asarray(fieldXInDeg, dtype=float).ravel() / \
+            self.fieldRadiusInDeg
+        y = np.asarray(fieldYInDeg, dtype=float).ravel() / \
+            self.fieldRadiusInDeg
+
+        basis = np.zeros((len(x), self.numOfFieldTerms))
+        unitCoef = np.zeros(self.numOfFieldTerms)
+        for idx in range(self.numOfFieldTerms):
+            unitCoef[:] = 0
+            unitCoef[idx] = 1
+            basis[:, idx] = ZernikeEval(unitCoef, x, y)
+
+        return basis
+
+    def fit(self, fieldXInDeg, fieldYInDeg, zk):
+        """Fit the model by the Zk at the field positions.
+
+        Parameters
+        ----------
+        fieldXInDeg : list or numpy.ndarray
+            Field x in degree.
+        fieldYInDeg : list or numpy.ndarray
+            Field y in degree.
+        zk : numpy.ndarray
+            Zk (e.g. z4-z22) in um. The row is the field position and the
+            column is the Zk (e.g. the data in opd.zer).
+
+        Raises
+        ------
+        ValueError
+            The number of field positions is different from the rows of Zk.
+        ValueError
+            The number of field positions is less than the number of field
+            terms.
+        """
+
+        zk = np.atleast_2d(np.asarray(zk, dtype=float))
+        fieldXInDeg = np.asarray(fieldXInDeg, dtype=float)
+        fieldYInDeg = np.asarray(fieldYInDeg, dtype=float)
+
+        numOfField = len(fieldXInDeg)
+        if (numOfField != zk.shape[0]):
+            raise ValueError("The number of field positions (%d) != rows of "
+                             "zk (%d)." % (numOfField, zk.shape[0]))
+        if (numOfField < self.numOfFieldTerms):
+            raise ValueError("The number of field positions (%d) is less "
+                             "than the number of field terms (%d)."
+                             % (numOfField, self.numOfFieldTerms))
+
+        if (self.fieldRadiusInDeg is None):
+            self.fieldRadiusInDeg = float(
+                np.max(np.hypot(fieldXInDeg, fieldYInDeg)))
+
+        basis = self._getFieldBasis(fieldXInDeg, fieldYInDeg)
+        self._coef = np.linalg.lstsq(basis, zk, rcond=None)[0]
+
+        # The leave-one-out residual of linear least squares is
+        # r_i / (1 - h_ii), where h_ii is the diagonal of hat matrix.
+        # The residual is inf if the field position is needed to decide the
+        # model (h_ii = 1).
+        hatDiag = np.sum(basis * np.linalg.pinv(basis).T, axis=1)
+        residual = basis.dot(self._coef) - zk
+        with np.errstate(divide="ignore", invalid="ignore"):
+            looResidual = residual / (1 - hatDiag[:, np.newaxis])
+        looResidual[np.isclose(hatDiag, 1), :] = np.inf
+
+        self._looResidual = looResidual
+
+    def getLeaveOneOutResidual(self):
+        """Get the leave-one-out residuals of Zk at the field positions in
+        the fitting.
+
+        The residual of each field position is the prediction of model
+        fitted without this position minus the Zk of this position. This is
+        the error of model at the held-out field position.
+
+        Returns
+        -------
+        numpy.ndarray
+            Residual of Zk in um. The row is the field position and the
+            column is the Zk. This is None if the model is not fitted.
+        """
+
+        return self._looResidual
+
+    def calcResidual(self, fieldXInDeg, fieldYInDeg, zk):
+        """Calculate the residuals of Zk at the held-out field positions.
+
+        Parameters
+        ----------
+        fieldXInDeg : list or numpy.ndarray
+            Field x in degree.
+        fieldYInDeg : list or numpy.ndarray
+            Field y in degree.
+        zk : numpy.ndarray
+            Zk in um. The row is the field position and the column is the Zk.
+
+        Returns
+        -------
+        numpy.ndarray
+            Residual (model - data) of Zk in um.
+        """
+
+        return self.evalZk(fieldXInDeg, fieldYInDeg) - np.atleast_2d(zk)
+
+    def evalZk(self, fieldXInDeg, fieldYInDeg):
+        """Evaluate the Zk at the field positions.
+
+        Parameters
+        ----------
+        fieldXInDeg : float, list, or numpy.ndarray
+            Field x in degree.
+        fieldYInDeg : float, list, or numpy.ndarray
+            Field y in degree.
+
+        Returns
+        -------
+        numpy.ndarray
+            Zk in um. The row is the field position and the column is the Zk.
+
+        Raises
+        ------
+        RuntimeError
+            The model is not fitted.
+        """
+
+        if (not self.isFitted()):
+            raise RuntimeError("The field model is not fitted.")
+
+        basis = self._getFieldBasis(fieldXInDeg, fieldYInDeg)
+
+        return basis.dot(self._coef)
+
+    def getFieldGrid(self, numOfPointInDiameter=21):
+        """Get the square grid of field positions in the field radius.
+
+        Parameters
+        ----------
+        numOfPointInDiameter : int, optional
+            Number of grid points along the diameter. (the default is 21.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Field x in degree.
+        numpy.ndarray
+            Field y in degree.
+
+        Raises
+        ------
+        RuntimeError
+            The field radius is not decided.
+        """
+
+        if (self.fieldRadiusInDeg is None):
+            raise RuntimeError("The field radius is not decided.")
+
+        grid1d = np.linspace(-self.fieldRadiusInDeg, self.fieldRadiusInDeg,
+                             numOfPointInDiameter)
+        fieldX, fieldY = np.meshgrid(grid1d, grid1d)
+        idx = (np.hypot(fieldX, fieldY) <= self.fieldRadiusInDeg)
+
+        return fieldX[idx], fieldY[idx]
+
+
+if __name__ == "__main__":
+    pass
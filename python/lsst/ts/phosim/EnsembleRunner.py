@@ -0,0 +1,482 @@
+import os
+import csv
+import itertools
+import subprocess
+import yaml
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from lsst.ts.wep.Utility import runProgram
+
+from lsst.ts.phosim.ResultsStore import ResultsStore
+
+
+class EnsembleRunner(object):
+
+    # Parameters of closed-loop simulation that can be swept. The value is
+    # the option of comcamCloseLoop.py.
+    SWEEP_PARAM = {"seedNum": "--seedNum", "m1m3ForceError": "--m1m3FErr",
+                   "zAngleInDeg": "--zAngle", "rotAngInDeg": "--rotAng",
+                   "starMag": "--starMag"}
+
+    # PhoSim runs at the same time in an iteration of comcamCloseLoop.py:
+    # the OPD, intra-focal, and extra-focal images
+    NUM_OF_CONCURRENT_PHOSIM_RUN = 3
+
+    # ComCam sensors to make the fake flats
+    COMCAM_SENSOR_NAME_LIST = ["R22_S00", "R22_S01", "R22_S02", "R22_S10",
+                               "R22_S11", "R22_S12", "R22_S20", "R22_S21",
+                               "R22_S22"]
+
+    def __init__(self, outputDir):
+        """Initialization of ensemble runner class.
+
+        The ensemble is the closed-loop simulations (members) in the
+        Cartesian product of swept parameters. Each member runs
+        comcamCloseLoop.py in its own output directory. The products that do
+        not depend on the member are shared:
+
+        1. The perturbation files are deduplicated by the perturbation cache.
+        2. The fake flats are made once.
+        3. The PhoSim output images of the same inputs (e.g. the OPD images
+           of members only different in the star magnitude) are reused by
+           the PhoSim run cache.
+
+        Parameters
+        ----------
+        outputDir : str
+            Output directory of ensemble.
+        """
+
+        self.outputDir = outputDir
+
+        # Base parameters of the members
+        self.baseParam = dict()
+
+        # Swept parameters. The value is the list of values.
+        self.sweepParam = dict()
+
+        # Results of the last run. The item is the result of member.
+        self._results = []
+
+    def setSpec(self, baseParam=None, sweepParam=None):
+        """Set the specification of ensemble.
+
+        Parameters
+        ----------
+        baseParam : dict, optional
+            Base parameters of the members. The key should be in
+            SWEEP_PARAM or "iterNum", "numOfProc", "isEimg", "useMinDofIdx".
+            (the default is None.)
+        sweepParam : dict, optional
+            Swept parameters. The key should be in SWEEP_PARAM and the value
+            is the list of values. (the default is None.)
+
+        Raises
+        ------
+        ValueError
+            The parameter is not supported.
+        """
+
+        baseParam = dict() if (baseParam is None) else dict(baseParam)
+        sweepParam = dict() if (sweepParam is None) else dict(sweepParam)
+
+        baseKeyList = list(self.SWEEP_PARAM.keys()) + [
+            "iterNum", "numOfProc", "isEimg", "useMinDofIdx"]
+        for key in baseParam:
+            if key not in baseKeyList:
+                raise ValueError("The base parameter (%s) is not supported."
+                                 % key)
+        for key in sweepParam:
+            if key not in self.SWEEP_PARAM:
+                raise ValueError("The swept parameter (%s) is not supported."
+                                 % key)
+
+        self.baseParam = baseParam
+        self.sweepParam = dict([(key, list(np.atleast_1d(value).tolist()))
+                                for key, value in sweepParam.items()])
+
+    def readSpecFile(self, specFilePath):
+        """Read the specification of ensemble from the yaml file.
+
+        The file has the "base" and "sweep" sections. For example:
+
+        base:
+          iterNum: 5
+        sweep:
+          seedNum: [6, 7]
+          starMag: [15, 16]
+
+        Parameters
+        ----------
+        specFilePath : str
+            File path of specification.
+        """
+
+        with open(specFilePath, "r") as file:
+            spec = yaml.safe_load(file) or dict()
+
+        self.setSpec(baseParam=spec.get("base"),
+                     sweepParam=spec.get("sweep"))
+
+    def getMemberList(self):
+        """Get the parameters of ensemble members.
+
+        Returns
+        -------
+        list[dict]
+            Parameters of members. The swept parameters override the base
+            ones.
+        """
+
+        keyList = sorted(self.sweepParam.keys())
+        valueProduct = itertools.product(
+            *[self.sweepParam[key] for key in keyList])
+
+        memberList = []
+        for values in valueProduct:
+            member = dict(self.baseParam)
+            member.update(zip(keyList, values))
+            memberList.append(member)
+
+        return memberList
+
+    def getMemberDir(self, memberIdx):
+        """Get the output directory of ensemble member.
+
+        Parameters
+        ----------
+        memberIdx : int
+            Index of member.
+
+        Returns
+        -------
+        str
+            Output directory of member.
+        """
+
+        return os.path.join(self.outputDir, "member%d" % memberIdx)
+
+    def getSharedDir(self, productName):
+        """Get the directory of shared product.
+
+        Parameters
+        ----------
+        productName : str
+            Name of product ("pertCache", "fakeFlats", or "phosimRunCache").
+
+        Returns
+        -------
+        str
+            Directory of shared product.
+        """
+
+        return os.path.join(self.outputDir, "shared", productName)
+
+    def getNumOfCpuOfMember(self, member):
+        """Get the number of CPUs used by the ensemble member.
+
+        Each iteration of member runs the PhoSim of OPD, intra-focal, and
+        extra-focal images at the same time, and each PhoSim run uses
+        "numOfProc" processors.
+
+        Parameters
+        ----------
+        member : dict
+            Parameters of member.
+
+        Returns
+        -------
+        int
+            Number of CPUs.
+        """
+
+        numOfProc = max(int(member.get("numOfProc", 1)), 1)
+
+        return self.NUM_OF_CONCURRENT_PHOSIM_RUN * numOfProc
+
+    def getMemberArgString(self, memberIdx, member):
+        """Get the arguments of comcamCloseLoop.py for the ensemble member.
+
+        Parameters
+        ----------
+        memberIdx : int
+            Index of member.
+        member : dict
+            Parameters of member.
+
+        Returns
+        -------
+        str
+            Arguments of comcamCloseLoop.py. The CPU budget of member is
+            getNumOfCpuOfMember().
+        """
+
+        # The members running at the same time have the same observation
+        # Id. Each member needs its own PhoSim work directory.
+        argList = ["--output", self.getMemberDir(memberIdx),
+                   "--phosimWorkDir",
+                   os.path.join(self.getMemberDir(memberIdx), "phosimWork"),
+                   "--pertCacheDir", self.getSharedDir("pertCache"),
+                   "--phosimRunCacheDir", self.getSharedDir("phosimRunCache"),
+                   "--cpuBudget", str(self.getNumOfCpuOfMember(member))]
+
+        for key, option in self.SWEEP_PARAM.items():
+            if key in member:
+                argList += [option, str(member[key])]
+
+        if "iterNum" in member:
+            argList += ["--iterNum", str(int(member["iterNum"]))]
+        if "numOfProc" in member:
+            argList += ["--numOfProc", str(int(member["numOfProc"]))]
+        if member.get("useMinDofIdx", False):
+            argList.append("--minDof")
+
+        if member.get("isEimg", False):
+            argList.append("--eimage")
+        else:
+            argList += ["--fakeFlatDir", self.getSharedDir("fakeFlats")]
+
+        return " ".join(argList)
+
+    def prepareSharedProducts(self):
+        """Prepare the products shared by the ensemble members.
+
+        The fake flats are made once for the amplifier images.
+        """
+
+        for productName in ("pertCache", "phosimRunCache"):
+            os.makedirs(self.getSharedDir(productName), exist_ok=True)
+
+        if (not self.baseParam.get("isEimg", False)):
+            fakeFlatDir = self.getSharedDir("fakeFlats")
+            if (not os.path.isdir(fakeFlatDir)) or \
+                    (len(os.listdir(fakeFlatDir)) == 0):
+                os.makedirs(fakeFlatDir, exist_ok=True)
+                _makeFakeFlat(fakeFlatDir, self.COMCAM_SENSOR_NAME_LIST)
+
+    def run(self, executor=None, numOfWorker=None):
+        """Run the ensemble members.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor, optional
+            Executor to run the members (e.g. SocketExecutor for multiple
+            nodes). The output directory should be shared by the nodes. If
+            None, a local process pool is used. (the default is None.)
+        numOfWorker : int, optional
+            Number of members running at the same time in the local process
+            pool. If None, it is the number of CPUs divided by the number of
+            CPUs of a member, so the members do not oversubscribe the CPUs.
+            (the default is None.)
+
+        Returns
+        -------
+        list[dict]
+            Results of members. See runEnsembleMember().
+        """
+
+        self.prepareSharedProducts()
+
+        memberList = self.getMemberList()
+        argStringList = [self.getMemberArgString(memberIdx, member)
+                         for memberIdx, member in enumerate(memberList)]
+
+        if (executor is None):
+            if (numOfWorker is None):
+                numOfWorker = self.getNumOfLocalWorker(memberList)
+
+            with ProcessPoolExecutor(max_workers=numOfWorker) as pool:
+                results = self._runMembers(pool, memberList, argStringList)
+        else:
+            results = self._runMembers(executor, memberList, argStringList)
+
+        self._results = results
+
+        return results
+
+    def getNumOfLocalWorker(self, memberList, numOfCpu=None):
+        """Get the number of members running at the same time in local.
+
+        Parameters
+        ----------
+        memberList : list[dict]
+            Parameters of members.
+        numOfCpu : int, optional
+            Number of CPUs in local. If None, use os.cpu_count(). (the
+            default is None.)
+
+        Returns
+        -------
+        int
+            Number of members running at the same time.
+        """
+
+        if (numOfCpu is None):
+            numOfCpu = os.cpu_count() or 1
+
+        numOfCpuOfMember = max([self.getNumOfCpuOfMember(member)
+                                for member in memberList] + [1])
+
+        return max(int(numOfCpu) // numOfCpuOfMember, 1)
+
+    def _runMembers(self, executor, memberList, argStringList):
+        """Run the ensemble members by the executor.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor
+            Executor to run the members.
+        memberList : list[dict]
+            Parameters of members.
+        argStringList : list[str]
+            Arguments of comcamCloseLoop.py of members.
+
+        Returns
+        -------
+        list[dict]
+            Results of members.
+        """
+
+        futureList = []
+        for memberIdx, (member, argString) in enumerate(
+                zip(memberList, argStringList)):
+            futureList.append(executor.submit(
+                runEnsembleMember, memberIdx, member, argString,
+                self.getMemberDir(memberIdx)))
+
+        return [future.result() for future in futureList]
+
+    def getResults(self):
+        """Get the results of members in the last run.
+
+        Returns
+        -------
+        list[dict]
+            Results of members.
+        """
+
+        return self._results
+
+    def writeResultsTable(self, filePath, results=None):
+        """Write the aggregated results table of ensemble.
+
+        There is one row for each iteration of each member with the swept
+        parameters, GQ effective PSSN, and GQ effective FWHM in arcsec.
+
+        GQ: Gaussian quadrature.
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        filePath : str
+            File path of the table in csv.
+        results : list[dict], optional
+            Results of members. Use the results of last run if this is None.
+            (the default is None.)
+        """
+
+        if (results is None):
+            results = self._results
+
+        paramNameList = sorted(self.sweepParam.keys())
+        with open(filePath, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["member"] + paramNameList +
+                            ["iteration", "gqEffPssn", "gqEffFwhm"])
+
+            for result in results:
+                paramValues = [result["param"].get(paramName, "")
+                               for paramName in paramNameList]
+                for iterNum, gqEffPssn, gqEffFwhm in zip(
+                        result["iterNum"], result["gqEffPssn"],
+                        result["gqEffFwhm"]):
+                    writer.writerow(
+                        [result["member"]] + paramValues +
+                        [iterNum, "%.6f" % gqEffPssn, "%.6f" % gqEffFwhm])
+
+
+def runEnsembleMember(memberIdx, member, argString, memberDir):
+    """Run the ensemble member by comcamCloseLoop.py.
+
+    This is in the module level to be pickleable by the executors.
+
+    Parameters
+    ----------
+    memberIdx : int
+        Index of member.
+    member : dict
+        Parameters of member.
+    argString : str
+        Arguments of comcamCloseLoop.py.
+    memberDir : str
+        Output directory of member.
+
+    Returns
+    -------
+    dict
+        Result of member with the keys of "member", "param", "iterNum",
+        "gqEffPssn", and "gqEffFwhm". The last three are the lists by the
+        order of iterations.
+    """
+
+    os.makedirs(memberDir, exist_ok=True)
+    runProgram("comcamCloseLoop.py", argstring=argString)
+
+    return readEnsembleMemberResult(memberIdx, member, memberDir)
+
+
+def readEnsembleMemberResult(memberIdx, member, memberDir):
+    """Read the result of ensemble member from its results store.
+
+    Parameters
+    ----------
+    memberIdx : int
+        Index of member.
+    member : dict
+        Parameters of member.
+    memberDir : str
+        Output directory of member.
+
+    Returns
+    -------
+    dict
+        Result of member. See runEnsembleMember().
+    """
+
+    resultsStore = ResultsStore(os.path.join(memberDir, "results.npz"))
+    iterNumList = resultsStore.getIterNumList(quantity="pssn")
+
+    # The last column of PSSN data is the GQ value
+    if (len(iterNumList) == 0):
+        gqEffPssn = []
+        gqEffFwhm = []
+    else:
+        pssnData = resultsStore.getDataOfIters("pssn",
+                                               iterNumList=iterNumList)
+        gqEffPssn = pssnData[:, 0, -1].tolist()
+        gqEffFwhm = pssnData[:, 1, -1].tolist()
+
+    return {"member": int(memberIdx), "param": dict(member),
+            "iterNum": iterNumList, "gqEffPssn": gqEffPssn,
+            "gqEffFwhm": gqEffFwhm}
+
+
+def _makeFakeFlat(fakeFlatDir, sensorNameList):
+    """Make the fake flats in the directory.
+
+    Parameters
+    ----------
+    fakeFlatDir : str
+        Directory of fake flats.
+    sensorNameList : list[str]
+        List of sensor names.
+    """
+
+    command = ["makeGainImages.py", "--detector_list"] + list(sensorNameList)
+    subprocess.run(command, cwd=fakeFlatDir, check=True)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,710 @@
+import os
+import re
+import time
+import zlib
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from astropy.io import fits
+
+from lsst.ts.wep.ParamReader import ParamReader
+
+from lsst.ts.phosim.Utility import getConfigDir
+
+
+class FakePhosim(object):
+
+    # Index of camera piston (dz) in the "move" command of PhoSim
+    CAM_PISTON_IDX = 10
+
+    # Obscuration of the pupil
+    OBSCURATION = 0.61
+
+    # f-number of the telescope
+    F_NUMBER = 1.234
+
+    # Pixel size in um and pixel scale in arcsec
+    PIXEL_SIZE_IN_UM = 10.0
+    PIXEL_SCALE_IN_ARCSEC = 0.2
+
+    # Distance between the centers of neighboring sensors and rafts in
+    # degree
+    SENSOR_PITCH_IN_DEG = 0.2275
+    RAFT_PITCH_IN_DEG = 0.7
+
+    # Sensors of ComCam (raft R22) used if there is no sensor in the
+    # arguments
+    COMCAM_SENSOR_NAME_LIST = ["R22_S00", "R22_S01", "R22_S02", "R22_S10",
+                               "R22_S11", "R22_S12", "R22_S20", "R22_S21",
+                               "R22_S22"]
+
+    def __init__(self, settingFilePath=None):
+        """Initialization of fake PhoSim class.
+
+        This is a stand-in of PhoSim for the pipeline tests and benchmarks
+        without a PhoSim installation. It parses the instance and command
+        files written by TeleFacade and writes the correctly named outputs
+        with the synthetic content:
+
+        1. The OPD maps (opd_<obsId>_<opdId>.fits.gz) are the low-order
+           aberrations driven by the "move", "izernike", and "surfacemap"
+           commands and the field position of "opd" sources.
+        2. The eimages (lsst_e_...) and amplifier images (lsst_a_...) have
+           the postage stamps of "object" sources. The stamp is a donut if
+           the camera is pistoned, otherwise a Gaussian spot. The centroid
+           files (centroid_lsst_e_...) list the positions of stamps.
+
+        The sensor positions are a simple grid of rafts and sensors, which is
+        not the real camera geometry.
+
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        settingFilePath : str, optional
+            Setting file path. Use the "fakePhosimSetting.yaml" in the policy
+            directory if this is None. (the default is None.)
+        """
+
+        if (settingFilePath is None):
+            settingFilePath = os.path.join(getConfigDir(),
+                                           "fakePhosimSetting.yaml")
+        self._settingFile = ParamReader(filePath=settingFilePath)
+
+        # Sensitivity of the low-order aberrations (z4-z11) in um to the DOF
+        # in um. This is fixed to make the runs deterministic.
+        rng = np.random.RandomState(0)
+        self._sensitivity = rng.normal(scale=1e-3, size=(50, 8))
+
+    def getSettingFile(self):
+        """Get the setting file.
+
+        Returns
+        -------
+        lsst.ts.wep.ParamReader
+            Setting file.
+        """
+
+        return self._settingFile
+
+    def run(self, argList):
+        """Run the fake PhoSim with the arguments of phosim.py.
+
+        Parameters
+        ----------
+        argList : list[str]
+            Arguments of phosim.py (e.g. ["opd.inst", "-c", "opd.cmd", "-o",
+            "output"]).
+
+        Returns
+        -------
+        list[str]
+            List of output file paths.
+        """
+
+        args = self._parseArgs(argList)
+        if (args.v):
+            print("Fake PhoSim of ts_phosim")
+            return []
+
+        inst = self.readInstFile(args.instFile)
+        cmd = dict()
+        if (args.c is not None):
+            cmd = self.readCmdFile(args.c)
+
+        outputDir = os.path.abspath(args.o)
+        os.makedirs(outputDir, exist_ok=True)
+
+        latencyInSec = float(self._settingFile.getSetting("latencyInSec"))
+        if (latencyInSec > 0):
+            time.sleep(latencyInSec)
+
+        outputFileList = []
+        if (len(inst["opd"]) > 0):
+            outputFileList += self.writeOpdFiles(outputDir, inst, cmd)
+
+        if (len(inst["object"]) > 0):
+            if (args.s is None):
+                sensorNameList = self.COMCAM_SENSOR_NAME_LIST
+            else:
+                sensorNameList = args.s.split("|")
+
+            outputFileList += self.writeStarImgFiles(
+                outputDir, inst, cmd, sensorNameList, isAmpImg=(args.e == 1),
+                numOfProc=args.p)
+
+        print("Fake PhoSim wrote %d files to %s." % (len(outputFileList),
+                                                     outputDir))
+
+        return outputFileList
+
+    def _parseArgs(self, argList):
+        """Parse the arguments of phosim.py.
+
+        Parameters
+        ----------
+        argList : list[str]
+            Arguments.
+
+        Returns
+        -------
+        argparse.Namespace
+            Parsed arguments.
+        """
+
+        parser = argparse.ArgumentParser(prog="phosim.py",
+                                         description="Fake PhoSim.")
+        parser.add_argument("instFile", type=str, nargs="?", default=None)
+        parser.add_argument("-c", type=str, default=None)
+        parser.add_argument("-i", type=str, default="lsst")
+        parser.add_argument("-e", type=int, default=1)
+        parser.add_argument("-p", type=int, default=1)
+        parser.add_argument("-t", type=int, default=1)
+        parser.add_argument("-s", type=str, default=None)
+        parser.add_argument("-o", type=str, default="output")
+        parser.add_argument("-w", type=str, default=None)
+        parser.add_argument("-v", default=False, action="store_true")
+
+        args = parser.parse_args(argList)
+        if (args.instFile is None) and (not args.v):
+            parser.error("the instance file is required")
+
+        return args
+
+    def readInstFile(self, instFilePath):
+        """Read the instance file.
+
+        Parameters
+        ----------
+        instFilePath : str
+            Instance file path.
+
+        Returns
+        -------
+        dict
+            Instance with the keys of "obsId", "filterId", "seed", "ra",
+            "dec", "rotSkyPos", "opd", and "object". The "opd" is a list of
+            (OPD Id, field x in degree, field y in degree). The "object" is a
+            list of (star Id, ra in degree, dec in degree, magnitude).
+        """
+
+        inst = {"obsId": 0, "filterId": 0, "seed": 1000, "ra": 0.0,
+                "dec": 0.0, "rotSkyPos": 0.0, "opd": [], "object": []}
+
+        keyMap = {"opsim_obshistid": ("obsId", int),
+                  "obshistid": ("obsId", int),
+                  "opsim_filter": ("filterId", int),
+                  "filter": ("filterId", int),
+                  "sim_seed": ("seed", int),
+                  "rightascension": ("ra", float),
+                  "declination": ("dec", float),
+                  "rotskypos": ("rotSkyPos", float)}
+
+        with open(instFilePath, "r") as file:
+            for line in file:
+                items = line.split()
+                if (len(items) < 2):
+                    continue
+
+                keyword = items[0].lower()
+                if keyword in keyMap:
+                    key, valueType = keyMap[keyword]
+                    inst[key] = valueType(float(items[1]))
+                elif (keyword == "opd"):
+                    inst["opd"].append((int(items[1]), float(items[2]),
+                                        float(items[3])))
+                elif (keyword == "object"):
+                    inst["object"].append((int(float(items[1])),
+                                           float(items[2]), float(items[3]),
+                                           float(items[4])))
+
+        return inst
+
+    def readCmdFile(self, cmdFilePath):
+        """Read the physical command file.
+
+        Parameters
+        ----------
+        cmdFilePath : str
+            Physical command file path.
+
+        Returns
+        -------
+        dict
+            Commands with the keys of "move", "izernike", and "surfacemap".
+            The "move" is a dictionary of the values in um by index. The
+            "izernike" is a dictionary of the values in mm by (surface Id,
+            term index). The "surfacemap" is a list of (surface Id, file
+            path, relative scale).
+        """
+
+        cmd = {"move": dict(), "izernike": dict(), "surfacemap": []}
+        with open(cmdFilePath, "r") as file:
+            for line in file:
+                items = line.split()
+                if (len(items) < 3):
+                    continue
+
+                keyword = items[0].lower()
+                if (keyword == "move"):
+                    cmd["move"][int(items[1])] = float(items[2])
+                elif (keyword == "izernike") and (len(items) >= 4):
+                    cmd["izernike"][(int(items[1]), int(items[2]))] = \
+                        float(items[3])
+                elif (keyword == "surfacemap") and (len(items) >= 4):
+                    cmd["surfacemap"].append((int(items[1]), items[2],
+                                              float(items[3])))
+
+        return cmd
+
+    def writeOpdFiles(self, outputDir, inst, cmd):
+        """Write the OPD files.
+
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        outputDir : str
+            Output directory.
+        inst : dict
+            Instance from readInstFile().
+        cmd : dict
+            Commands from readCmdFile().
+
+        Returns
+        -------
+        list[str]
+            List of OPD file paths.
+        """
+
+        opdSize = int(self._settingFile.getSetting("opdSize"))
+        basis = self._getZkBasis(opdSize)
+        baseZk = self._getBaseZk(cmd)
+
+        outputFileList = []
+        for opdId, fieldX, fieldY in inst["opd"]:
+
+            # The field-dependent astigmatism and coma
+            zk = baseZk.copy()
+            zk[1] += 0.02 * (fieldX**2 - fieldY**2)
+            zk[2] += 0.04 * fieldX * fieldY
+            zk[3] += 0.01 * fieldX
+            zk[4] += 0.01 * fieldY
+
+            opd = np.tensordot(zk, basis, axes=1)
+
+            filePath = os.path.join(outputDir, "opd_%d_%d.fits.gz" % (
+                inst["obsId"], opdId))
+            fits.writeto(filePath, opd, overwrite=True)
+            outputFileList.append(filePath)
+
+        return outputFileList
+
+    def _getBaseZk(self, cmd):
+        """Get the low-order aberrations (z4-z11) from the commands.
+
+        Parameters
+        ----------
+        cmd : dict
+            Commands from readCmdFile().
+
+        Returns
+        -------
+        numpy.ndarray
+            Zk (z4-z11) in um.
+        """
+
+        # DOF in um
+        dofInUm = np.zeros(len(self._sensitivity))
+        for idx, value in cmd.get("move", dict()).items():
+            if (5 <= idx < 5 + len(dofInUm)):
+                dofInUm[idx - 5] = value
+        zk = dofInUm.dot(self._sensitivity)
+
+        # Surface Zernike terms (in mm) of z4-z11 (index 3-10)
+        for (surfId, termIdx), valueInMm in cmd.get("izernike",
+                                                    dict()).items():
+            if (3 <= termIdx <= 10):
+                zk[termIdx - 3] += 2 * valueInMm * 1e3
+
+        # The surface maps add a fixed pattern decided by the file content
+        for surfId, filePath, relScale in cmd.get("surfacemap", []):
+            if os.path.isfile(filePath):
+                rng = np.random.RandomState(self._getFileCrc(filePath))
+                zk += relScale * rng.normal(scale=0.01, size=len(zk))
+
+        return zk
+
+    def _getFileCrc(self, filePath):
+        """Get the CRC-32 checksum of file.
+
+        Parameters
+        ----------
+        filePath : str
+            File path.
+
+        Returns
+        -------
+        int
+            CRC-32 checksum.
+        """
+
+        crc = 0
+        with open(filePath, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                crc = zlib.crc32(block, crc)
+
+        return crc
+
+    def _getZkBasis(self, opdSize):
+        """Get the basis of low-order Zernike polynomials (z4-z11).
+
+        The values outside the annular pupil are 0.
+
+        Parameters
+        ----------
+        opdSize : int
+            Dimension of OPD map in pixel.
+
+        Returns
+        -------
+        numpy.ndarray
+            Basis with the shape of (8, opdSize, opdSize).
+        """
+
+        grid1d = np.linspace(-1, 1, opdSize)
+        x, y = np.meshgrid(grid1d, grid1d)
+        r2 = x**2 + y**2
+
+        basis = np.array([
+            np.sqrt(3) * (2 * r2 - 1),
+            np.sqrt(6) * (x**2 - y**2),
+            np.sqrt(6) * 2 * x * y,
+            np.sqrt(8) * (3 * r2 - 2) * y,
+            np.sqrt(8) * (3 * r2 - 2) * x,
+            np.sqrt(8) * y * (3 * x**2 - y**2),
+            np.sqrt(8) * x * (x**2 - 3 * y**2),
+            np.sqrt(5) * (6 * r2**2 - 6 * r2 + 1)])
+
+        isInPupil = (r2 <= 1) & (r2 >= self.OBSCURATION**2)
+        basis[:, ~isInPupil] = 0
+
+        return basis
+
+    def writeStarImgFiles(self, outputDir, inst, cmd, sensorNameList,
+                          isAmpImg=True, numOfProc=1):
+        """Write the star images and centroid files of sensors.
+
+        Parameters
+        ----------
+        outputDir : str
+            Output directory.
+        inst : dict
+            Instance from readInstFile().
+        cmd : dict
+            Commands from readCmdFile().
+        sensorNameList : list[str]
+            List of sensor names (e.g. "R22_S11").
+        isAmpImg : bool, optional
+            Write the amplifier images in addition to the eimages. (the
+            default is True.)
+        numOfProc : int, optional
+            Number of sensors written at the same time. (the default is 1.)
+
+        Returns
+        -------
+        list[str]
+            List of output file paths.
+        """
+
+        fieldX, fieldY = self._getFieldXYinDeg(inst)
+        pistonInUm = cmd.get("move", dict()).get(self.CAM_PISTON_IDX, 0.0)
+
+        with ThreadPoolExecutor(max_workers=max(int(numOfProc), 1)) as pool:
+            futureList = [
+                pool.submit(self._writeSensorFiles, outputDir, inst,
+                            sensorName, fieldX, fieldY, pistonInUm, isAmpImg)
+                for sensorName in sensorNameList]
+
+            outputFileList = []
+            for future in futureList:
+                outputFileList += future.result()
+
+        return outputFileList
+
+    def _getFieldXYinDeg(self, inst):
+        """Get the field positions of objects relative to the boresight.
+
+        The small-angle approximation is used.
+
+        Parameters
+        ----------
+        inst : dict
+            Instance from readInstFile().
+
+        Returns
+        -------
+        numpy.ndarray
+            Field x in degree.
+        numpy.ndarray
+            Field y in degree.
+        """
+
+        objects = np.array(inst["object"], dtype=float).reshape(-1, 4)
+
+        deltaRa = np.mod(objects[:, 1] - inst["ra"] + 180, 360) - 180
+        deltaX = deltaRa * np.cos(np.deg2rad(inst["dec"]))
+        deltaY = objects[:, 2] - inst["dec"]
+
+        rot = np.deg2rad(inst["rotSkyPos"])
+        fieldX = np.cos(rot) * deltaX + np.sin(rot) * deltaY
+        fieldY = -np.sin(rot) * deltaX + np.cos(rot) * deltaY
+
+        return fieldX, fieldY
+
+    def getSensorCenterInDeg(self, sensorName):
+        """Get the center of sensor in the field.
+
+        Parameters
+        ----------
+        sensorName : str
+            Sensor name (e.g. "R22_S11").
+
+        Returns
+        -------
+        float
+            Field x in degree.
+        float
+            Field y in degree.
+
+        Raises
+        ------
+        ValueError
+            The sensor name is not supported.
+        """
+
+        m = re.match(r"\AR(\d)(\d)_S(\d)(\d)\Z", sensorName)
+        if (m is None):
+            raise ValueError("The sensor name (%s) is not supported."
+                             % sensorName)
+
+        raftRow, raftCol, sensorRow, sensorCol = [int(value)
+                                                  for value in m.groups()]
+        centerX = (raftCol - 2) * self.RAFT_PITCH_IN_DEG + \
+            (sensorCol - 1) * self.SENSOR_PITCH_IN_DEG
+        centerY = (raftRow - 2) * self.RAFT_PITCH_IN_DEG + \
+            (sensorRow - 1) * self.SENSOR_PITCH_IN_DEG
+
+        return centerX, centerY
+
+    def _writeSensorFiles(self, outputDir, inst, sensorName, fieldX, fieldY,
+                          pistonInUm, isAmpImg):
+        """Write the eimage, amplifier images, and centroid file of sensor.
+
+        Parameters
+        ----------
+        outputDir : str
+            Output directory.
+        inst : dict
+            Instance from readInstFile().
+        sensorName : str
+            Sensor name.
+        fieldX : numpy.ndarray
+            Field x of objects in degree.
+        fieldY : numpy.ndarray
+            Field y of objects in degree.
+        pistonInUm : float
+            Camera piston in um.
+        isAmpImg : bool
+            Write the amplifier images or not.
+
+        Returns
+        -------
+        list[str]
+            List of output file paths.
+        """
+
+        numOfRow = int(self._settingFile.getSetting("sensorRows"))
+        numOfCol = int(self._settingFile.getSetting("sensorCols"))
+        fluxOfMag15 = float(self._settingFile.getSetting("fluxOfMag15"))
+        noiseSigma = float(self._settingFile.getSetting("noiseSigma"))
+
+        # Pixel positions of objects
+        centerX, centerY = self.getSensorCenterInDeg(sensorName)
+        degPerPixel = self.PIXEL_SCALE_IN_ARCSEC / 3600
+        pixelX = numOfCol / 2 + (fieldX - centerX) / degPerPixel
+        pixelY = numOfRow / 2 + (fieldY - centerY) / degPerPixel
+
+        # Stamp of a star with the unit flux
+        stamp = self._getStamp(pistonInUm)
+        halfSize = stamp.shape[0] // 2
+
+        img = np.zeros((numOfRow, numOfCol), dtype=np.float32)
+        centroidList = []
+        for obj, x, y in zip(inst["object"], pixelX, pixelY):
+            col = int(np.round(x))
+            row = int(np.round(y))
+            if (not (0 <= col < numOfCol and 0 <= row < numOfRow)):
+                continue
+
+            flux = fluxOfMag15 * 10**(-0.4 * (obj[3] - 15))
+            self._addStamp(img, stamp * flux, row - halfSize, col - halfSize)
+            centroidList.append((obj[0], flux, x, y))
+
+        if (noiseSigma > 0):
+            rng = np.random.RandomState(
+                (inst["seed"] + zlib.crc32(sensorName.encode())) % 2**32)
+            img += rng.normal(scale=noiseSigma,
+                              size=img.shape).astype(np.float32)
+
+        fileRoot = "lsst_e_%d_f%d_%s_E000" % (inst["obsId"],
+                                              inst["filterId"], sensorName)
+        header = fits.Header()
+        header["OBSID"] = inst["obsId"]
+        header["CCDID"] = sensorName
+        header["FILTER"] = inst["filterId"]
+
+        outputFileList = []
+        eimgFilePath = os.path.join(outputDir, fileRoot + ".fits.gz")
+        fits.writeto(eimgFilePath, img, header=header, overwrite=True)
+        outputFileList.append(eimgFilePath)
+
+        centroidFilePath = os.path.join(outputDir,
+                                        "centroid_%s.txt" % fileRoot)
+        self._writeCentroidFile(centroidFilePath, centroidList)
+        outputFileList.append(centroidFilePath)
+
+        if (isAmpImg):
+            outputFileList += self._writeAmpImgFiles(outputDir, inst,
+                                                     sensorName, img, header)
+
+        return outputFileList
+
+    def _getStamp(self, pistonInUm):
+        """Get the stamp of a star with the unit flux.
+
+        The stamp is a uniform donut if the camera is pistoned, otherwise a
+        Gaussian spot.
+
+        Parameters
+        ----------
+        pistonInUm : float
+            Camera piston in um.
+
+        Returns
+        -------
+        numpy.ndarray
+            Stamp with the odd dimension.
+        """
+
+        # Radius of donut in pixel
+        radius = abs(pistonInUm) / self.F_NUMBER / 2 / self.PIXEL_SIZE_IN_UM
+
+        halfSize = int(np.ceil(max(radius, 5.0))) + 2
+        grid1d = np.arange(-halfSize, halfSize + 1)
+        x, y = np.meshgrid(grid1d, grid1d)
+        r = np.sqrt(x**2 + y**2)
+
+        if (radius > 2):
+            stamp = ((r <= radius) &
+                     (r >= radius * self.OBSCURATION)).astype(float)
+        else:
+            stamp = np.exp(-r**2 / (2 * 1.5**2))
+
+        return stamp / np.sum(stamp)
+
+    def _addStamp(self, img, stamp, row, col):
+        """Add the stamp to the image with the clipping at the edges.
+
+        Parameters
+        ----------
+        img : numpy.ndarray
+            Image.
+        stamp : numpy.ndarray
+            Stamp.
+        row : int
+            Row of the lower-left corner of stamp in image.
+        col : int
+            Column of the lower-left corner of stamp in image.
+        """
+
+        rowStart = max(row, 0)
+        colStart = max(col, 0)
+        rowEnd = min(row + stamp.shape[0], img.shape[0])
+        colEnd = min(col + stamp.shape[1], img.shape[1])
+
+        img[rowStart:rowEnd, colStart:colEnd] += stamp[
+            rowStart - row:rowEnd - row, colStart - col:colEnd - col]
+
+    def _writeCentroidFile(self, filePath, centroidList):
+        """Write the centroid file.
+
+        Parameters
+        ----------
+        filePath : str
+            File path.
+        centroidList : list[tuple]
+            List of (source Id, photons, x in pixel, y in pixel).
+        """
+
+        with open(filePath, "w") as file:
+            file.write("SourceID Photons AvgX AvgY\n")
+            for sourceId, photons, x, y in centroidList:
+                file.write("%d %.1f %.6f %.6f\n" % (sourceId, photons, x, y))
+
+    def _writeAmpImgFiles(self, outputDir, inst, sensorName, img, header):
+        """Write the amplifier images of sensor.
+
+        The sensor is divided into 2 x 8 amplifiers. The channel is C<row>
+        <column>.
+
+        Parameters
+        ----------
+        outputDir : str
+            Output directory.
+        inst : dict
+            Instance from readInstFile().
+        sensorName : str
+            Sensor name.
+        img : numpy.ndarray
+            Eimage in electron.
+        header : astropy.io.fits.Header
+            Header of eimage.
+
+        Returns
+        -------
+        list[str]
+            List of amplifier image file paths.
+        """
+
+        gain = float(self._settingFile.getSetting("gain"))
+        bias = float(self._settingFile.getSetting("bias"))
+
+        numOfRow = img.shape[0] // 2
+        numOfCol = img.shape[1] // 8
+
+        outputFileList = []
+        for ampRow in range(2):
+            for ampCol in range(8):
+                ampImg = img[ampRow * numOfRow:(ampRow + 1) * numOfRow,
+                             ampCol * numOfCol:(ampCol + 1) * numOfCol]
+                ampImg = np.round(ampImg / gain + bias).astype(np.int32)
+
+                channel = "%d%d" % (ampRow, ampCol)
+                ampHeader = header.copy()
+                ampHeader["AMPID"] = "C%s" % channel
+                ampHeader["DATASEC"] = "[1:%d,1:%d]" % (numOfCol, numOfRow)
+
+                filePath = os.path.join(
+                    outputDir, "lsst_a_%d_f%d_%s_C%s_E000.fits.gz" % (
+                        inst["obsId"], inst["filterId"], sensorName,
+                        channel))
+                fits.writeto(filePath, ampImg, header=ampHeader,
+                             overwrite=True)
+                outputFileList.append(filePath)
+
+        return outputFileList
+
+
+if __name__ == "__main__":
+    pass
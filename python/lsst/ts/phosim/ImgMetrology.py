@@ -0,0 +1,322 @@
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from astropy.io import fits
+
+from lsst.ts.phosim.OpdMetrology import OpdMetrology
+from lsst.ts.phosim.MetroTool import addAtmToPsfImg, psf2eW
+
+
+class ImgMetrology(object):
+
+    # Minimum median ratio of the flux inside the central circle (radius of
+    # a quarter of stamp size) to the flux of stamp. The in-focus star
+    # without the atmosphere is compact. The defocal donut is larger than
+    # the stamp and its flux is spread.
+    MIN_CENTRAL_FLUX_RATIO = 0.5
+
+    def __init__(self, wavelengthInUm=0.5, stampSizeInPixel=64,
+                 pixelSizeInUm=10.0, zen=0, r0inmRef=0.1382, numOfProc=1):
+        """Initialization of image metrology class.
+
+        The image quality is measured from the postage stamps of stars in
+        the eimages directly without the OPD. The eimages should be
+        simulated in focus and without the atmosphere (e.g.
+        "Opsim_rawseeing -1" in the instance file), and the atmosphere is
+        added in the calculation of PSSN.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        wavelengthInUm : float, optional
+            Wavelength in microns. (the default is 0.5.)
+        stampSizeInPixel : int, optional
+            Dimension of postage stamp in pixel. (the default is 64.)
+        pixelSizeInUm : float, optional
+            Pixel size in um. (the default is 10.0.)
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+        numOfProc : int, optional
+            Number of processes to analyze the stamps. The stamps are
+            analyzed in this process if this is 1. (the default is 1.)
+        """
+
+        self.wavelengthInUm = wavelengthInUm
+        self.stampSizeInPixel = int(stampSizeInPixel)
+        self.pixelSizeInUm = pixelSizeInUm
+        self.zen = zen
+        self.r0inmRef = r0inmRef
+        self.numOfProc = max(int(numOfProc), 1)
+
+        # OPD metrology to calculate the effective FWHM
+        self.metr = OpdMetrology()
+
+    def getStampSizeInPixel(self):
+        """Get the dimension of postage stamp.
+
+        Returns
+        -------
+        int
+            Dimension of postage stamp in pixel.
+        """
+
+        return self.stampSizeInPixel
+
+    def cutStamps(self, eimgFilePath, xInPixel, yInPixel):
+        """Cut the postage stamps of stars from the eimage.
+
+        The eimage is memory-mapped and only the pixels of stamps are read.
+        This needs the uncompressed FITS file.
+
+        Parameters
+        ----------
+        eimgFilePath : str
+            Eimage FITS file path.
+        xInPixel : list or numpy.ndarray
+            Pixel position x of stars on camera coordinate (the column of
+            image).
+        yInPixel : list or numpy.ndarray
+            Pixel position y of stars on camera coordinate (the row of image).
+
+        Returns
+        -------
+        numpy.ndarray
+            Background-subtracted stamps. The first axis is the star. The
+            stamp is 0 if the star is not valid.
+        numpy.ndarray[bool]
+            The stamp is fully inside the image or not.
+
+        Raises
+        ------
+        ValueError
+            The eimage is compressed.
+        """
+
+        with open(eimgFilePath, "rb") as file:
+            if (file.read(2) == b"\x1f\x8b"):
+                raise ValueError(
+                    "The eimage (%s) is compressed and can not be "
+                    "memory-mapped. Decompress it first (e.g. by "
+                    "PhosimRepackager.repackageEimg())." % eimgFilePath)
+
+        xInPixel = np.atleast_1d(np.asarray(xInPixel, dtype=float))
+        yInPixel = np.atleast_1d(np.asarray(yInPixel, dtype=float))
+
+        size = self.stampSizeInPixel
+        halfSize = size // 2
+        stamps = np.zeros((len(xInPixel), size, size))
+        isValid = np.zeros(len(xInPixel), dtype=bool)
+
+        with fits.open(eimgFilePath, memmap=True) as hdul:
+            img = hdul[0].data
+            numOfRow, numOfCol = img.shape
+
+            for idx, (x, y) in enumerate(zip(xInPixel, yInPixel)):
+                row = int(np.round(y)) - halfSize
+                col = int(np.round(x)) - halfSize
+                if (row < 0 or col < 0 or row + size > numOfRow or
+                        col + size > numOfCol):
+                    continue
+
+                stamps[idx] = self._subtractBackground(
+                    np.array(img[row:row + size, col:col + size],
+                             dtype=float))
+                isValid[idx] = True
+
+        return stamps, isValid
+
+    def _subtractBackground(self, stamp):
+        """Subtract the background of stamp.
+
+        The background is the median of pixels on the edges of stamp. The
+        negative pixels after the subtraction are set to 0.
+
+        Parameters
+        ----------
+        stamp : numpy.ndarray
+            Postage stamp.
+
+        Returns
+        -------
+        numpy.ndarray
+            Background-subtracted stamp.
+        """
+
+        edge = np.concatenate((stamp[0, :], stamp[-1, :], stamp[1:-1, 0],
+                               stamp[1:-1, -1]))
+
+        return np.clip(stamp - np.median(edge), 0, None)
+
+    def analyzeStamps(self, stamps, isValid=None):
+        """Analyze the PSSN, effective FWHM, and ellipticity of stamps.
+
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        stamps : numpy.ndarray
+            Background-subtracted stamps. The first axis is the star.
+        isValid : numpy.ndarray[bool], optional
+            The stamp is valid or not. All stamps with the positive flux are
+            valid if this is None. (the default is None.)
+
+        Returns
+        -------
+        numpy.ndarray
+            PSSN of each stamp. The value is nan if the stamp is not valid.
+        numpy.ndarray
+            Effective FWHM in arcsec of each stamp.
+        numpy.ndarray
+            Ellipticity of each stamp.
+
+        Raises
+        ------
+        ValueError
+            The stars are not in focus.
+        """
+
+        stamps = np.asarray(stamps, dtype=float)
+        hasFlux = (np.sum(stamps, axis=(1, 2)) > 0)
+        if (isValid is None):
+            isValid = hasFlux
+        else:
+            isValid = np.asarray(isValid, dtype=bool) & hasFlux
+
+        centralFluxRatio = self.getCentralFluxRatio(stamps[isValid])
+        if (len(centralFluxRatio) != 0) and \
+                (np.median(centralFluxRatio) < self.MIN_CENTRAL_FLUX_RATIO):
+            raise ValueError(
+                "The stars are not in focus (median central flux ratio: "
+                "%.3f). Use the in-focus eimages without the atmosphere."
+                % np.median(centralFluxRatio))
+
+        pssn = np.full(len(stamps), np.nan)
+        ellip = np.full(len(stamps), np.nan)
+
+        validStamps = stamps[isValid]
+        argList = (validStamps, itertools.repeat(self.wavelengthInUm),
+                   itertools.repeat(self.pixelSizeInUm),
+                   itertools.repeat(self.zen),
+                   itertools.repeat(self.r0inmRef))
+        if (self.numOfProc == 1 or len(validStamps) <= 1):
+            resultList = list(map(analyzeStamp, *argList))
+        else:
+            chunkSize = max(len(validStamps) // (4 * self.numOfProc), 1)
+            with ProcessPoolExecutor(max_workers=self.numOfProc) as executor:
+                resultList = list(executor.map(analyzeStamp, *argList,
+                                               chunksize=chunkSize))
+
+        if (len(resultList) != 0):
+            pssn[isValid], ellip[isValid] = np.array(resultList).T
+
+        effFwhm = self.metr.calcFWHMeff(pssn)
+
+        return pssn, effFwhm, ellip
+
+    def getCentralFluxRatio(self, stamps):
+        """Get the ratio of the flux inside the central circle to the flux
+        of stamp.
+
+        The radius of central circle is a quarter of stamp size.
+
+        Parameters
+        ----------
+        stamps : numpy.ndarray
+            Background-subtracted stamps with the positive flux. The first
+            axis is the star.
+
+        Returns
+        -------
+        numpy.ndarray
+            Ratio of central flux of each stamp.
+        """
+
+        size = self.stampSizeInPixel
+        grid = np.arange(size) - (size - 1) / 2
+        x, y = np.meshgrid(grid, grid)
+        isCentral = (x**2 + y**2 <= (size / 4)**2)
+
+        stamps = np.asarray(stamps, dtype=float).reshape(-1, size, size)
+
+        return np.sum(stamps[:, isCentral], axis=1) / \
+            np.sum(stamps, axis=(1, 2))
+
+    def analyzeImg(self, eimgFilePath, xInPixel, yInPixel):
+        """Analyze the PSSN, effective FWHM, and ellipticity of stars in the
+        eimage.
+
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        eimgFilePath : str
+            Eimage FITS file path.
+        xInPixel : list or numpy.ndarray
+            Pixel position x of stars on camera coordinate.
+        yInPixel : list or numpy.ndarray
+            Pixel position y of stars on camera coordinate.
+
+        Returns
+        -------
+        numpy.ndarray
+            PSSN of each star. The value is nan if the stamp of star is not
+            fully inside the image.
+        numpy.ndarray
+            Effective FWHM in arcsec of each star.
+        numpy.ndarray
+            Ellipticity of each star.
+        """
+
+        stamps, isValid = self.cutStamps(eimgFilePath, xInPixel, yInPixel)
+
+        return self.analyzeStamps(stamps, isValid=isValid)
+
+
+def analyzeStamp(stamp, wavelengthInUm, pixelSizeInUm, zen, r0inmRef):
+    """Analyze the PSSN and ellipticity of stamp.
+
+    This is a module function to be run in the other processes.
+
+    PSSN: Normalized point source sensitivity.
+
+    Parameters
+    ----------
+    stamp : numpy.ndarray
+        Background-subtracted stamp of system PSF.
+    wavelengthInUm : float
+        Wavelength in microns.
+    pixelSizeInUm : float
+        Pixel size in um.
+    zen : float
+        Telescope zenith angle in degree.
+    r0inmRef : float
+        Fidicial atmosphere r0 @ 500nm in meter.
+
+    Returns
+    -------
+    float
+        PSSN.
+    float
+        Ellipticity of PSF with the atmosphere.
+    """
+
+    psftot, psfa = addAtmToPsfImg(stamp, wavelengthInUm,
+                                  imagedelta=pixelSizeInUm,
+                                  r0inmRef=r0inmRef, zen=zen)
+
+    # PSSN = (n_eff)_atm / (n_eff)_atm+sys
+    pssn = np.sum(psftot**2) / np.sum(psfa**2)
+
+    ellip = psf2eW(psftot, pixelSizeInUm, wavelengthInUm, atmModel="Gau")[0]
+
+    return pssn, ellip
+
+
+if __name__ == "__main__":
+    pass
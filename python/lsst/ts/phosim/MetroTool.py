@@ -6,7 +6,8 @@ from lsst.ts.wep.cwfs.Tool import padArray, extractArray
 
 
 def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
-              pmask=0, imagedelta=0, fno=1.2335, debugLevel=0):
+              pmask=0, imagedelta=0, fno=1.2335, debugLevel=0,
+              singlePrecision=False):
     """Calculate the normalized point source sensitivity (PSSN).
 
     Parameters
@@ -36,6 +37,9 @@ def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
     debugLevel : int, optional
         Debug level. The higher value gives more information. (the default
         is 0.)
+    singlePrecision : bool, optional
+        Calculate the PSF, OTF, and MTF in float32/complex64. The sums of
+        PSF^2 are still in float64. (the default is False.)
 
     Returns
     -------
@@ -81,7 +85,8 @@ def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
         k = fno*wlum/imagedelta
 
     # Get the modulation transfer function with the van Karman power spectrum
-    mtfa = createMTFatm(D, m, k, wlum, zen, r0inmRef, model="vonK")
+    mtfa = createMTFatm(D, m, k, wlum, zen, r0inmRef, model="vonK",
+                        singlePrecision=singlePrecision)
 
     # Get the pupil function
     if (aType == "opd"):
@@ -106,7 +111,8 @@ def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
 
     # OPD to PSF
     psft = opd2psf(opdt, iad, wlum, imagedelta=imagedelta, sensorFactor=1,
-                   fno=fno, debugLevel=debugLevel)
+                   fno=fno, debugLevel=debugLevel,
+                   singlePrecision=singlePrecision)
 
     # PSF to optical transfer function (OTF)
     otft = psf2otf(psft)
@@ -118,7 +124,7 @@ def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
     psfa = otf2psf(otfa)
 
     # Atmospheric PSS (point spread sensitivity) = 1/neff_atm
-    pssa = np.sum(psfa**2)
+    pssa = np.sum(psfa**2, dtype=np.float64)
 
     # Calculate PSF with error (atmosphere + system)
     if (aType == "opd"):
@@ -135,7 +141,8 @@ def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
             else:
                 array2D = array[ii, :, :].squeeze()
 
-            psfei = opd2psf(array2D, iad, wlum, debugLevel=debugLevel)
+            psfei = opd2psf(array2D, iad, wlum, debugLevel=debugLevel,
+                            singlePrecision=singlePrecision)
 
             if (ii == 0):
                 psfe = psfei
@@ -173,7 +180,7 @@ def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
     psftot = otf2psf(otftot)
 
     # atmospheric + error PSS
-    pss = np.sum(psftot**2)
+    pss = np.sum(psftot**2, dtype=np.float64)
 
     # normalized PSS
     pssn = pss/pssa
@@ -184,7 +191,168 @@ def calc_pssn(array, wlum, aType="opd", D=8.36, r0inmRef=0.1382, zen=0,
     return pssn
 
 
-def createMTFatm(D, m, k, wlum, zen, r0inmRef, model="vonK"):
+def calc_pssn_img(psf, wlum, imagedelta=10, D=8.36, r0inmRef=0.1382, zen=0,
+                  fno=1.2335):
+    """Calculate the normalized point source sensitivity (PSSN) of the PSF
+    image sampled by the sensor pixels.
+
+    The "psf" type of calc_pssn() pads the pupil k = fno * wlum / imagedelta
+    times, which is less than 1 for the sensor pixel (10 um). Here the
+    atmosphere is added on the pixel grid of image instead. See
+    addAtmToPsfImg().
+
+    Parameters
+    ----------
+    psf : numpy.ndarray
+        Background-subtracted square PSF image of system (without the
+        atmosphere).
+    wlum : float
+        Wavelength in microns.
+    imagedelta : float, optional
+        Pixel size in um. (the default is 10.)
+    D : float, optional
+        Diameter of telescope in meter. (the default is 8.36.)
+    r0inmRef : float, optional
+        Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+    zen : float, optional
+        Telescope zenith angle in degree. (the default is 0.)
+    fno : float, optional
+        f-number of telescope. (the default is 1.2335.)
+
+    Returns
+    -------
+    float
+        PSSN value.
+    """
+
+    psftot, psfa = addAtmToPsfImg(psf, wlum, imagedelta=imagedelta, D=D,
+                                  r0inmRef=r0inmRef, zen=zen, fno=fno)
+
+    # PSSN = (n_eff)_atm / (n_eff)_atm+sys
+    pssn = np.sum(psftot**2) / np.sum(psfa**2)
+
+    return pssn
+
+
+def addAtmToPsfImg(psf, wlum, imagedelta=10, D=8.36, r0inmRef=0.1382, zen=0,
+                   fno=1.2335):
+    """Add the atmosphere to the PSF image sampled by the sensor pixels.
+
+    The image is zero-padded 2 times to avoid the wrap-around of FFT. The
+    pixel of image is imagedelta / (fno * D) in radian, and the frequency
+    grid of image covers wlum / pixel in meter of the pupil plane, on which
+    the atmosphere MTF is evaluated.
+
+    Parameters
+    ----------
+    psf : numpy.ndarray
+        Background-subtracted square PSF image of system (without the
+        atmosphere).
+    wlum : float
+        Wavelength in microns.
+    imagedelta : float, optional
+        Pixel size in um. (the default is 10.)
+    D : float, optional
+        Diameter of telescope in meter. (the default is 8.36.)
+    r0inmRef : float, optional
+        Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+    zen : float, optional
+        Telescope zenith angle in degree. (the default is 0.)
+    fno : float, optional
+        f-number of telescope. (the default is 1.2335.)
+
+    Returns
+    -------
+    numpy.ndarray
+        Normalized PSF with the system and atmosphere errors.
+    numpy.ndarray
+        Normalized PSF of the atmosphere.
+
+    Raises
+    ------
+    ValueError
+        The PSF image is not square.
+    """
+
+    if (psf.ndim != 2 or psf.shape[0] != psf.shape[1]):
+        raise ValueError("The PSF image (%s) is not square." % (psf.shape,))
+
+    m = 2 * psf.shape[0]
+    psfe = padArray(psf / np.sum(psf), m)
+
+    # Pixel in radian and the pupil-plane sampling in meter
+    pixelInRad = imagedelta / (fno * D * 1e6)
+    dr = wlum * 1e-6 / (m * pixelInRad)
+
+    mtfa = createMTFatm(dr * (m - 1), m, 1, wlum, zen, r0inmRef,
+                        model="vonK")
+
+    psfa = otf2psf(mtfa)
+    psfa = psfa / np.sum(psfa)
+
+    psftot = otf2psf(psf2otf(psfe) * mtfa)
+    psftot = psftot / np.sum(psftot)
+
+    return psftot, psfa
+
+
+def rebinOpd(opd, m):
+    """Downsample the optical path difference (OPD) map by the area-weighted
+    average in the pupil.
+
+    Each pixel of the new map is the average of OPD over the area of pupil it
+    covers. The pixel is outside of the pupil (value of 0) if less than half
+    of its area is in the pupil. The side length of map is not changed.
+
+    Parameters
+    ----------
+    opd : numpy.ndarray
+        Square OPD map. The outside of pupil is 0.
+    m : int
+        Dimension of new OPD map in pixel.
+
+    Returns
+    -------
+    numpy.ndarray
+        Downsampled OPD map.
+
+    Raises
+    ------
+    ValueError
+        The OPD map is not square.
+    ValueError
+        The new dimension is larger than the OPD map.
+    """
+
+    n = opd.shape[0]
+    if (opd.ndim != 2 or opd.shape[1] != n):
+        raise ValueError("The OPD map (%s) is not square." % (opd.shape,))
+    if (m > n):
+        raise ValueError("The new dimension (%d) > OPD dimension (%d)."
+                         % (m, n))
+
+    # Overlap length of the new pixel i and the original pixel j
+    scale = n / m
+    lowerEdge = np.arange(m)[:, np.newaxis] * scale
+    idxOrig = np.arange(n)[np.newaxis, :]
+    wgt = np.clip(np.minimum(lowerEdge + scale, idxOrig + 1) -
+                  np.maximum(lowerEdge, idxOrig), 0, None)
+
+    opd = np.nan_to_num(opd)
+    pupil = (opd != 0).astype(float)
+
+    area = wgt.dot(pupil).dot(wgt.T)
+    sumOpd = wgt.dot(opd).dot(wgt.T)
+
+    opdRebin = np.zeros((m, m))
+    inPupil = (area >= 0.5 * scale**2)
+    opdRebin[inPupil] = sumOpd[inPupil] / area[inPupil]
+
+    return opdRebin
+
+
+def createMTFatm(D, m, k, wlum, zen, r0inmRef, model="vonK",
+                 singlePrecision=False):
     """Generate the modulation transfer function (MTF) for atmosphere.
 
     Parameters
@@ -205,6 +373,9 @@ def createMTFatm(D, m, k, wlum, zen, r0inmRef, model="vonK"):
     model : str, optional
         Kolmogorov power spectrum ("Kolm") or van Karman power spectrum
         ("vonK"). (the default is "vonK".)
+    singlePrecision : bool, optional
+        Return the MTF in float32. The structure function is calculated in
+        float64. (the default is False.)
 
     Returns
     -------
@@ -224,6 +395,9 @@ def createMTFatm(D, m, k, wlum, zen, r0inmRef, model="vonK"):
     # Pad the matrix if necessary
     mtfa = padArray(mtfa, N)
 
+    if (singlePrecision):
+        mtfa = mtfa.astype(np.float32)
+
     return mtfa
 
 
@@ -342,7 +516,8 @@ def r0Wz(r0inmRef, zen, wlum):
 
 
 def psf2eAtmW(array, wlum, aType="opd", D=8.36, pmask=0, r0inmRef=0.1382,
-              sensorFactor=1, zen=0, imagedelta=0.2, fno=1.2335, debugLevel=0):
+              sensorFactor=1, zen=0, imagedelta=0.2, fno=1.2335, debugLevel=0,
+              singlePrecision=False):
     """Calculate the ellipticity with the error of atmosphere and weighting
     function.
 
@@ -372,6 +547,9 @@ def psf2eAtmW(array, wlum, aType="opd", D=8.36, pmask=0, r0inmRef=0.1382,
         Only needed when psf is used. use 0 for opd. (the default is 1.2335.)
     debugLevel : int, optional
         The higher value gives more information. (the default is 0.)
+    singlePrecision : bool, optional
+        Calculate the PSF, OTF, and MTF in float32/complex64. The moments
+        are still accumulated in float64. (the default is False.)
 
     Returns
     -------
@@ -396,7 +574,7 @@ def psf2eAtmW(array, wlum, aType="opd", D=8.36, pmask=0, r0inmRef=0.1382,
         m = array.shape[0]/sensorFactor
         psfe = opd2psf(array, 0, wlum, imagedelta=imagedelta,
                        sensorFactor=sensorFactor, fno=fno,
-                       debugLevel=debugLevel)
+                       debugLevel=debugLevel, singlePrecision=singlePrecision)
     else:
         m = max(pmask.shape)
         psfe = array
@@ -405,7 +583,8 @@ def psf2eAtmW(array, wlum, aType="opd", D=8.36, pmask=0, r0inmRef=0.1382,
     otfe = psf2otf(psfe)
 
     # Modulation transfer function (MTF) with atmosphere
-    mtfa = createMTFatm(D, m, k, wlum, zen, r0inmRef)
+    mtfa = createMTFatm(D, m, k, wlum, zen, r0inmRef,
+                        singlePrecision=singlePrecision)
 
     # OTF with system and atmosphere errors
     otf = otfe*mtfa
@@ -458,8 +637,8 @@ def psf2eW(psf, pixinum, wlum, atmModel="Gau", debugLevel=0):
                        np.arange(1, psf.shape[1] + 1))
 
     # Average x and y
-    xbar = np.sum(x*psf)/np.sum(psf)
-    ybar = np.sum(y*psf)/np.sum(psf)
+    xbar = np.sum(x*psf, dtype=np.float64)/np.sum(psf, dtype=np.float64)
+    ybar = np.sum(y*psf, dtype=np.float64)/np.sum(psf, dtype=np.float64)
 
     # Show the averaged x and y
     if (debugLevel >= 3):
@@ -479,9 +658,10 @@ def psf2eW(psf, pixinum, wlum, atmModel="Gau", debugLevel=0):
     psf = psf*W
 
     # Correlation function
-    Q11 = np.sum(((x - xbar)**2) * psf) / np.sum(psf)
-    Q22 = np.sum(((y - ybar)**2) * psf) / np.sum(psf)
-    Q12 = np.sum(((x - xbar) * (y - ybar)) * psf) / np.sum(psf)
+    sumPsf = np.sum(psf, dtype=np.float64)
+    Q11 = np.sum(((x - xbar)**2) * psf, dtype=np.float64) / sumPsf
+    Q22 = np.sum(((y - ybar)**2) * psf, dtype=np.float64) / sumPsf
+    Q12 = np.sum(((x - xbar) * (y - ybar)) * psf, dtype=np.float64) / sumPsf
 
     # Calculate the ellipticity
     T = Q11 + Q22
@@ -573,7 +753,7 @@ def createAtm(wlum, fwhminarcsec, gridsize, pixinum, oversample, model="Gau",
 
 
 def opd2psf(opd, pupil, wavelength, imagedelta=0, sensorFactor=1, fno=1.2335,
-            debugLevel=0):
+            debugLevel=0, singlePrecision=False):
     """Optical path difference (OPD) to point spread function (PSF).
 
     Parameters
@@ -595,6 +775,9 @@ def opd2psf(opd, pupil, wavelength, imagedelta=0, sensorFactor=1, fno=1.2335,
          Only need this if imagedelta=0. (the default is 1.2335.)
     debugLevel : int, optional
         The higher value gives more information. (the default is 0.)
+    singlePrecision : bool, optional
+        Calculate the PSF in float32/complex64. The normalization is still
+        in float64. (the default is False.)
 
     Returns
     -------
@@ -658,12 +841,16 @@ def opd2psf(opd, pupil, wavelength, imagedelta=0, sensorFactor=1, fno=1.2335,
             print("padding = %8.6f." % padding)
 
     # If imagedelta = 0, we don't do any padding, and go with below
-    z = pupil * np.exp(-2j * np.pi * opd / wavelength)
-    z = np.fft.fftshift(np.fft.fft2(np.fft.fftshift(z), s=z.shape))
+    if (singlePrecision):
+        phase = (2 * np.pi / wavelength * opd).astype(np.float32)
+        z = pupil * np.exp(-1j * phase)
+    else:
+        z = pupil * np.exp(-2j * np.pi * opd / wavelength)
+    z = np.fft.fftshift(getFftModule(z).fft2(np.fft.fftshift(z), s=z.shape))
     z = np.absolute(z**2)
 
     # Normalize the PSF
-    z = z/np.sum(z)
+    z /= np.sum(z, dtype=np.float64)
 
     # Show the information of PSF from OPD
     if (debugLevel >= 3):
@@ -691,7 +878,8 @@ def psf2otf(psf):
         Optacal transfer function.
     """
 
-    otf = np.fft.fftshift(np.fft.fft2(np.fft.fftshift(psf), s=psf.shape))
+    otf = np.fft.fftshift(getFftModule(psf).fft2(np.fft.fftshift(psf),
+                                                 s=psf.shape))
 
     return otf
 
@@ -710,11 +898,36 @@ def otf2psf(otf):
         Point spread function.
     """
 
-    psf = np.absolute(np.fft.fftshift(np.fft.ifft2(
+    psf = np.absolute(np.fft.fftshift(getFftModule(otf).ifft2(
         np.fft.fftshift(otf), s=otf.shape)))
 
     return psf
 
 
+def getFftModule(array):
+    """Get the FFT module that keeps the precision of array.
+
+    numpy.fft always calculates in float64/complex128. scipy.fft keeps the
+    float32/complex64 of array.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Input array of FFT.
+
+    Returns
+    -------
+    module
+        scipy.fft if the array is in single precision, otherwise numpy.fft.
+    """
+
+    if array.dtype in (np.float32, np.complex64):
+        # scipy.fft is imported at the first use in single precision
+        import scipy.fft
+        return scipy.fft
+    else:
+        return np.fft
+
+
 if __name__ == "__main__":
     pass
@@ -0,0 +1,188 @@
+import numpy as np
+
+
+class OpdAnalysisResult(object):
+
+    def __init__(self, opdZk, pssn, gqEffPssn, effFwhm, gqEffFwhm,
+                 fieldIdx, rotOpdInDeg=0.0):
+        """Initialization of OPD analysis result class.
+
+        The result is immutable. The arrays are copied and set to be
+        read-only.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+        GQ: Gaussian quadrature.
+
+        Parameters
+        ----------
+        opdZk : numpy.ndarray
+            Zk data from OPD. This is a 2D array. The row is the OPD index and
+            the column is z4 to z22 in um.
+        pssn : list or numpy.ndarray
+            PSSN of each OPD.
+        gqEffPssn : float
+            GQ effective PSSN.
+        effFwhm : list or numpy.ndarray
+            Effective FWHM of each OPD in arcsec.
+        gqEffFwhm : float
+            GQ effective FWHM in arcsec.
+        fieldIdx : list or numpy.ndarray
+            Field index of each OPD in the PhoSim OPD file name. This is the
+            order of rows in the data.
+        rotOpdInDeg : float, optional
+            Rotation angle of OPD in degree used in the zk. (the default is
+            0.0.)
+        """
+
+        self._opdZk = self._getReadOnlyArray(np.atleast_2d(opdZk))
+        self._pssn = self._getReadOnlyArray(pssn)
+        self._gqEffPssn = float(gqEffPssn)
+        self._effFwhm = self._getReadOnlyArray(effFwhm)
+        self._gqEffFwhm = float(gqEffFwhm)
+        self._fieldIdx = self._getReadOnlyArray(fieldIdx, dtype=int)
+        self._rotOpdInDeg = float(rotOpdInDeg)
+
+    def _getReadOnlyArray(self, data, dtype=float):
+        """Get the read-only copy of data.
+
+        Parameters
+        ----------
+        data : list or numpy.ndarray
+            Data.
+        dtype : type, optional
+            Data type. (the default is float.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only copy of data.
+        """
+
+        array = np.array(data, dtype=dtype)
+        array.setflags(write=False)
+
+        return array
+
+    def getOpdZk(self):
+        """Get the zk of OPD.
+
+        OPD: Optical path difference.
+
+        Returns
+        -------
+        numpy.ndarray
+            Zk data from OPD. The row is the OPD index and the column is z4 to
+            z22 in um.
+        """
+
+        return self._opdZk
+
+    def getPssn(self):
+        """Get the PSSN of each OPD.
+
+        PSSN: Normalized point source sensitivity.
+
+        Returns
+        -------
+        numpy.ndarray
+            PSSN.
+        """
+
+        return self._pssn
+
+    def getGqEffPssn(self):
+        """Get the GQ effective PSSN.
+
+        GQ: Gaussian quadrature.
+        PSSN: Normalized point source sensitivity.
+
+        Returns
+        -------
+        float
+            GQ effective PSSN.
+        """
+
+        return self._gqEffPssn
+
+    def getEffFwhm(self):
+        """Get the effective FWHM of each OPD.
+
+        FWHM: Full width at half maximum.
+
+        Returns
+        -------
+        numpy.ndarray
+            Effective FWHM in arcsec.
+        """
+
+        return self._effFwhm
+
+    def getGqEffFwhm(self):
+        """Get the GQ effective FWHM.
+
+        GQ: Gaussian quadrature.
+        FWHM: Full width at half maximum.
+
+        Returns
+        -------
+        float
+            GQ effective FWHM in arcsec.
+        """
+
+        return self._gqEffFwhm
+
+    def getFieldIdx(self):
+        """Get the field index of each OPD.
+
+        Returns
+        -------
+        numpy.ndarray
+            Field index in the PhoSim OPD file name.
+        """
+
+        return self._fieldIdx
+
+    def getRotOpdInDeg(self):
+        """Get the rotation angle of OPD used in the zk.
+
+        Returns
+        -------
+        float
+            Rotation angle in degree in the counter-clockwise direction.
+        """
+
+        return self._rotOpdInDeg
+
+    def getNumOfField(self):
+        """Get the number of field points.
+
+        Returns
+        -------
+        int
+            Number of field points.
+        """
+
+        return len(self._fieldIdx)
+
+    def getPssnData(self):
+        """Get the PSSN and FWHM data in the format of PSSN file.
+
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+        GQ: Gaussian quadrature.
+
+        Returns
+        -------
+        numpy.ndarray
+            The first row is the PSSN and the second one is the FWHM in
+            arcsec. The final element in each row is the GQ value.
+        """
+
+        return np.vstack((np.append(self._pssn, self._gqEffPssn),
+                          np.append(self._effFwhm, self._gqEffFwhm)))
+
+
+if __name__ == "__main__":
+    pass
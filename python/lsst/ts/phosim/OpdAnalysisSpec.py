@@ -0,0 +1,196 @@
+import numpy as np
+
+from lsst.ts.phosim.OpdMetrology import OpdMetrology
+
+
+class OpdAnalysisSpec(object):
+
+    def __init__(self, instName, fieldXInDeg, fieldYInDeg, weight,
+                 refSensorNameList=None):
+        """Initialization of OPD analysis specification class.
+
+        The specification decides the OPD field positions of instrument, the
+        GQ weighting ratio of PSSN and FWHM, and the reference sensor of each
+        field used to map the results to the wavefront errors and FWHM
+        sensor data.
+
+        OPD: Optical path difference.
+        GQ: Gaussian quadrature.
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        instName : str
+            Instrument name (e.g. "comcam").
+        fieldXInDeg : list or numpy.ndarray
+            Field x in degree.
+        fieldYInDeg : list or numpy.ndarray
+            Field y in degree.
+        weight : list or numpy.ndarray
+            GQ weighting ratio of each field. The field with the weight of 0
+            (e.g. wavefront sensor) does not contribute to the GQ values.
+        refSensorNameList : list[str], optional
+            Reference sensor name of each field. (the default is None.)
+
+        Raises
+        ------
+        ValueError
+            The lengths of field x, field y, weight, and reference sensors are
+            different.
+        """
+
+        self.instName = instName
+        self.fieldX = np.array(fieldXInDeg, dtype=float)
+        self.fieldY = np.array(fieldYInDeg, dtype=float)
+        self.weight = np.array(weight, dtype=float)
+        self.refSensorNameList = None if (refSensorNameList is None) \
+            else list(refSensorNameList)
+
+        lengthList = [len(self.fieldX), len(self.fieldY), len(self.weight)]
+        if (self.refSensorNameList is not None):
+            lengthList.append(len(self.refSensorNameList))
+        if (len(set(lengthList)) != 1):
+            raise ValueError("The lengths of field x, field y, weight, and "
+                             "reference sensors (%s) are different."
+                             % lengthList)
+
+    def getInstName(self):
+        """Get the instrument name.
+
+        Returns
+        -------
+        str
+            Instrument name.
+        """
+
+        return self.instName
+
+    def getNumOfField(self):
+        """Get the number of fields.
+
+        Returns
+        -------
+        int
+            Number of fields.
+        """
+
+        return len(self.fieldX)
+
+    def getFieldXY(self):
+        """Get the field X, Y in degree.
+
+        Returns
+        -------
+        numpy.ndarray
+            Field X in degree.
+        numpy.ndarray
+            Field Y in degree.
+        """
+
+        return self.fieldX, self.fieldY
+
+    def getWeightingRatio(self):
+        """Get the GQ weighting ratio.
+
+        GQ: Gaussian quadrature.
+
+        Returns
+        -------
+        numpy.ndarray
+            Weighting ratio of each field.
+        """
+
+        return self.weight
+
+    def getRefSensorNameList(self):
+        """Get the reference sensor name list.
+
+        Returns
+        -------
+        list[str]
+            Reference sensor name of each field. This is None if it is not
+            decided.
+        """
+
+        return self.refSensorNameList
+
+    def setToOpdMetrology(self, metr):
+        """Set the field positions and weighting ratio to the OPD metrology.
+
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        metr : OpdMetrology
+            OPD metrology.
+        """
+
+        metr.setFieldXYinDeg(self.fieldX, self.fieldY)
+        metr.setWeightingRatio(self.weight)
+
+
+def getComCamOpdAnalysisSpec():
+    """Get the OPD analysis specification of ComCam.
+
+    The 9 fields are at the centers of sensors with the unit weight.
+
+    ComCam: Commissioning camera.
+    OPD: Optical path difference.
+
+    Returns
+    -------
+    OpdAnalysisSpec
+        OPD analysis specification.
+    """
+
+    metr = OpdMetrology()
+    metr.setDefaultComcamGQ()
+    fieldX, fieldY = metr.getFieldXY()
+
+    refSensorNameList = ["R22_S00", "R22_S01", "R22_S02", "R22_S10",
+                         "R22_S11", "R22_S12", "R22_S20", "R22_S21",
+                         "R22_S22"]
+
+    return OpdAnalysisSpec("comcam", fieldX, fieldY, np.ones(len(fieldX)),
+                           refSensorNameList=refSensorNameList)
+
+
+def getLsstOpdAnalysisSpec(includeWfs=True):
+    """Get the OPD analysis specification of LSST camera.
+
+    The 31 fields are on the default LSST GQ points. The 4 wavefront sensor
+    fields on the corners are appended with the weight of 0 if needed.
+
+    OPD: Optical path difference.
+    GQ: Gaussian quadrature.
+
+    Parameters
+    ----------
+    includeWfs : bool, optional
+        Include the 4 wavefront sensor fields. (the default is True.)
+
+    Returns
+    -------
+    OpdAnalysisSpec
+        OPD analysis specification. The reference sensors are not decided.
+    """
+
+    metr = OpdMetrology()
+    metr.setDefaultLsstGQ()
+    fieldX, fieldY = metr.getFieldXY()
+    weight = metr.getWeightingRatio()
+
+    if (not includeWfs):
+        return OpdAnalysisSpec("lsst", fieldX, fieldY, weight)
+
+    fieldWfsX, fieldWfsY = metr.getDefaultLsstWfsGQ()
+    fieldX = np.append(fieldX, fieldWfsX)
+    fieldY = np.append(fieldY, fieldWfsY)
+    weight = np.append(weight, np.zeros(len(fieldWfsX)))
+
+    return OpdAnalysisSpec("lsstWfs", fieldX, fieldY, weight)
+
+
+if __name__ == "__main__":
+    pass
@@ -1,12 +1,21 @@
+import os
+import warnings
 import numpy as np
 from astropy.io import fits
 
 from lsst.ts.wep.cwfs.Tool import ZernikeAnnularFit, ZernikeEval
 from lsst.ts.wep.SourceProcessor import SourceProcessor
 
-from lsst.ts.phosim.MetroTool import calc_pssn, psf2eAtmW
+from lsst.ts.phosim.MetroTool import calc_pssn, psf2eAtmW, rebinOpd, r0Wz
+from lsst.ts.phosim.PssnModel import PssnModel
+from lsst.ts.phosim.DoubleZernikeFieldModel import DoubleZernikeFieldModel
+from lsst.ts.phosim.Tracer import traceMethods
 
 
+@traceMethods("getZkFromOpd", "rmPTTfromOPD", "calcPSSN", "calcBandPSSN",
+              "calcFWHMeff", "getPssnModel", "calcPSSNfromZk",
+              "calcFWHMeffFromZk", "fitFieldModel", "calcPSSNfromFieldModel",
+              "calcFWHMeffFromFieldModel", "calcEllip", "calcGQvalue")
 class OpdMetrology(object):
 
     def __init__(self):
@@ -19,6 +28,28 @@ class OpdMetrology(object):
         self.fieldX = np.array([])
         self.fieldY = np.array([])
 
+        # Directory to cache the calibrated PSSN models
+        self._pssnModelCacheDir = None
+
+        # Calibrated PSSN models in the memory. The key is the key of model.
+        self._pssnModels = dict()
+
+        # Tolerance of PSSN and ellipticity in the adaptive resolution. None
+        # means the full resolution of OPD is used.
+        self._adaptiveTol = {"pssn": None, "ellip": None}
+        self._minFovInFwhm = 4.0
+
+        # Calibrated OPD sizes of adaptive resolution. The key is the
+        # quantity, OPD size, wavelength, zenith angle, and tolerance.
+        self._adaptiveOpdSize = dict()
+
+        # Single-precision mode of PSSN and ellipticity, and its validation
+        # against the double precision
+        self._singlePrecision = False
+        self._precisionValidationTol = 1e-4
+        self._numOfPrecisionValidation = 3
+        self._numOfPrecisionValidated = {"pssn": 0, "ellip": 0}
+
     def getFieldXY(self):
         """Get the field X, Y in degree.
 
@@ -334,12 +365,382 @@ class OpdMetrology(object):
         # (2) Make sure outside of pupil are all zeros
         opdRmPTT = self.rmPTTfromOPD(opdFitsFile=opdFitsFile, opdMap=opdMap)[0]
 
+        # Downsample the OPD in the adaptive resolution
+        opdRmPTT = self._rebinOpdByAdaptiveSize("pssn", wavelengthInUm,
+                                                opdRmPTT, zen)
+
         # Calculate the normalized point source sensitivity (PSSN)
-        pssn = calc_pssn(opdRmPTT, wavelengthInUm, zen=zen,
-                         debugLevel=debugLevel)
+        pssn = self._calcInPrecision(
+            "pssn", lambda singlePrecision: calc_pssn(
+                opdRmPTT, wavelengthInUm, zen=zen, debugLevel=debugLevel,
+                singlePrecision=singlePrecision))
 
         return pssn
 
+    def calcBandPSSN(self, bandPssn, opdFitsFile=None, opdMap=None):
+        """Calculate the band-integrated PSSN based on OPD map.
+
+        The PTT-removed OPD and pupil are shared by all sampled wavelengths
+        of band.
+
+        PSSN: Normalized point source sensitivity.
+        OPD: Optical path difference.
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        bandPssn : BandPssn
+            Band-integrated PSSN with the sampled wavelengths and weights.
+        opdFitsFile : str, optional
+            OPD FITS file. (the default is None.)
+        opdMap : numpy.ndarray, optional
+            OPD map data. (the default is None.)
+
+        Returns
+        -------
+        float
+            Band-integrated PSSN.
+        """
+
+        opdRmPTT = self.rmPTTfromOPD(opdFitsFile=opdFitsFile, opdMap=opdMap)[0]
+
+        return bandPssn.calcPssn(opdRmPTT)
+
+    def setSinglePrecision(self, singlePrecision=True, validationTol=1e-4,
+                           numOfValidation=3):
+        """Set the single-precision mode of PSSN and ellipticity.
+
+        The PSF, OTF, and MTF are calculated in float32/complex64, and the
+        sums are still in float64. The first OPDs of each quantity are also
+        calculated in the double precision to validate the single precision,
+        and the double-precision values are returned for them. If the
+        difference is larger than the tolerance, the double precision is
+        used afterwards. The Zernike fittings of OPD are always in the double
+        precision.
+
+        PSSN: Normalized point source sensitivity.
+        PSF: Point spread function.
+        OTF: Optical transfer function.
+        MTF: Modulation transfer function.
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        singlePrecision : bool, optional
+            Use the single precision or not. (the default is True.)
+        validationTol : float, optional
+            Absolute tolerance of the difference between the single and
+            double precisions. (the default is 1e-4.)
+        numOfValidation : int, optional
+            Number of OPDs of each quantity to validate. (the default is 3.)
+        """
+
+        self._singlePrecision = bool(singlePrecision)
+        self._precisionValidationTol = validationTol
+        self._numOfPrecisionValidation = int(numOfValidation)
+        self._numOfPrecisionValidated = {"pssn": 0, "ellip": 0}
+
+    def isSinglePrecision(self):
+        """The single precision is used or not.
+
+        This is False after the fallback to the double precision in the
+        validation.
+
+        Returns
+        -------
+        bool
+            True if the single precision is used.
+        """
+
+        return self._singlePrecision
+
+    def isPrecisionValidated(self, quantity):
+        """The validation of single precision is done or not.
+
+        Parameters
+        ----------
+        quantity : str
+            Quantity to calculate ("pssn" or "ellip").
+
+        Returns
+        -------
+        bool
+            True if the single precision is not used, or the first OPDs of
+            quantity have been validated.
+        """
+
+        return (not self._singlePrecision) or \
+            (self._numOfPrecisionValidated[quantity] >=
+             self._numOfPrecisionValidation)
+
+    def _calcInPrecision(self, quantity, calcFunc):
+        """Calculate the quantity in the single or double precision.
+
+        Parameters
+        ----------
+        quantity : str
+            Quantity to calculate ("pssn" or "ellip").
+        calcFunc : function
+            Function to calculate the quantity. The argument is the
+            singlePrecision (bool).
+
+        Returns
+        -------
+        float
+            Quantity.
+        """
+
+        if (not self._singlePrecision):
+            return calcFunc(False)
+
+        value = calcFunc(True)
+        if (self._numOfPrecisionValidated[quantity] >=
+                self._numOfPrecisionValidation):
+            return value
+
+        valueDouble = calcFunc(False)
+        self._numOfPrecisionValidated[quantity] += 1
+
+        delta = abs(value - valueDouble)
+        if (delta > self._precisionValidationTol):
+            warnings.warn("Difference of %s (%.3e) between the single and "
+                          "double precisions > %.3e. Use the double "
+                          "precision." % (quantity, delta,
+                                          self._precisionValidationTol),
+                          category=RuntimeWarning)
+            self._singlePrecision = False
+
+        return valueDouble
+
+    def setAdaptiveResolution(self, pssnTol=None, ellipTol=None,
+                              minFovInFwhm=4.0):
+        """Set the adaptive resolution of OPD in the calculation of PSSN and
+        ellipticity.
+
+        The PTT-removed OPD is downsampled to the smallest size that keeps the
+        value within the tolerance of the value at full resolution. The size
+        is calibrated by the first OPD of each configuration (quantity, OPD
+        size, wavelength, and zenith angle) and reused for the following
+        OPDs.
+
+        The field of view of PSF is m * wavelength / D for the OPD of m
+        pixels, and the PSF wraps around if the field of view is small
+        compared with the atmosphere FWHM. The PSSN approaches 1 in this case
+        for any OPD, so the downsampled OPD keeps a minimum field of view.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+        PTT: Piston, x-tilt, and y-tilt.
+        PSF: Point spread function.
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        pssnTol : float, optional
+            Absolute tolerance of PSSN. Use the full resolution if this is
+            None. (the default is None.)
+        ellipTol : float, optional
+            Absolute tolerance of ellipticity. Use the full resolution if this
+            is None. (the default is None.)
+        minFovInFwhm : float, optional
+            Minimum field of view of PSF in the unit of atmosphere FWHM. (the
+            default is 4.0.)
+        """
+
+        self._adaptiveTol = {"pssn": pssnTol, "ellip": ellipTol}
+        self._minFovInFwhm = float(minFovInFwhm)
+
+    def getAdaptiveResolution(self):
+        """Get the tolerances of adaptive resolution.
+
+        Returns
+        -------
+        dict
+            Absolute tolerances of "pssn" and "ellip". The value is None if
+            the full resolution is used.
+        """
+
+        return dict(self._adaptiveTol)
+
+    def getAdaptiveOpdSize(self, quantity, wavelengthInUm, opdRmPTT, zen=0):
+        """Get the OPD size of adaptive resolution.
+
+        The size is calibrated if there is no cached one.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        quantity : str
+            Quantity to calculate ("pssn" or "ellip").
+        wavelengthInUm : float
+            Wavelength in microns.
+        opdRmPTT : numpy.ndarray
+            PTT-removed OPD map in um.
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+
+        Returns
+        -------
+        int
+            Dimension of OPD in pixel. This is the full size if the adaptive
+            resolution of quantity is not set.
+
+        Raises
+        ------
+        ValueError
+            The quantity is not supported.
+        """
+
+        if (quantity not in self._adaptiveTol):
+            raise ValueError("The quantity (%s) is not supported." % quantity)
+
+        fullSize = opdRmPTT.shape[0]
+        tol = self._adaptiveTol[quantity]
+        if (tol is None):
+            return fullSize
+
+        key = (quantity, fullSize, float(wavelengthInUm), float(zen),
+               float(tol))
+        if (key not in self._adaptiveOpdSize):
+            self._adaptiveOpdSize[key] = self._calibrateAdaptiveOpdSize(
+                quantity, wavelengthInUm, opdRmPTT, zen, tol)
+
+        return self._adaptiveOpdSize[key]
+
+    def getAdaptiveOpdSizeCache(self):
+        """Get the calibrated OPD sizes of adaptive resolution.
+
+        OPD: Optical path difference.
+
+        Returns
+        -------
+        dict
+            The key is a tuple of quantity, full OPD size, wavelength in um,
+            zenith angle in degree, and tolerance. The value is the chosen
+            OPD size.
+        """
+
+        return dict(self._adaptiveOpdSize)
+
+    def _calibrateAdaptiveOpdSize(self, quantity, wavelengthInUm, opdRmPTT,
+                                  zen, tol):
+        """Calibrate the OPD size of adaptive resolution.
+
+        The candidate sizes are 2^n and 3 * 2^n, which are fast in FFT, from
+        the size of minimum field of view to the full size.
+
+        OPD: Optical path difference.
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        quantity : str
+            Quantity to calculate ("pssn" or "ellip").
+        wavelengthInUm : float
+            Wavelength in microns.
+        opdRmPTT : numpy.ndarray
+            PTT-removed OPD map in um.
+        zen : float
+            Telescope zenith angle in degree.
+        tol : float
+            Absolute tolerance of quantity.
+
+        Returns
+        -------
+        int
+            Smallest dimension of OPD in pixel that the quantity is within the
+            tolerance.
+        """
+
+        fullSize = opdRmPTT.shape[0]
+        valueFull = self._calcQuantityOfOpd(quantity, wavelengthInUm,
+                                            opdRmPTT, zen)
+
+        # Atmosphere FWHM ~ 0.98 * wavelength / r0 and the field of view of
+        # PSF is m * wavelength / D. D = 8.36 m is used in calc_pssn().
+        r0 = r0Wz(0.1382, zen, wavelengthInUm)
+        minSize = self._minFovInFwhm * 0.98 * 8.36 / r0
+
+        sizeList = []
+        size = 1
+        while (size < fullSize):
+            sizeList += [size, 3 * size]
+            size *= 2
+        sizeList = sorted(size for size in set(sizeList)
+                          if minSize <= size < fullSize)
+
+        for size in sizeList:
+            value = self._calcQuantityOfOpd(
+                quantity, wavelengthInUm, rebinOpd(opdRmPTT, size), zen)
+            if (abs(value - valueFull) <= tol):
+                return size
+
+        return fullSize
+
+    def _calcQuantityOfOpd(self, quantity, wavelengthInUm, opdRmPTT, zen):
+        """Calculate the PSSN or ellipticity of PTT-removed OPD.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        quantity : str
+            Quantity to calculate ("pssn" or "ellip").
+        wavelengthInUm : float
+            Wavelength in microns.
+        opdRmPTT : numpy.ndarray
+            PTT-removed OPD map in um.
+        zen : float
+            Telescope zenith angle in degree.
+
+        Returns
+        -------
+        float
+            PSSN or ellipticity.
+        """
+
+        if (quantity == "pssn"):
+            return calc_pssn(opdRmPTT.copy(), wavelengthInUm, zen=zen)
+        else:
+            return psf2eAtmW(opdRmPTT.copy(), wavelengthInUm, zen=zen)[0]
+
+    def _rebinOpdByAdaptiveSize(self, quantity, wavelengthInUm, opdRmPTT,
+                                zen):
+        """Downsample the PTT-removed OPD to the size of adaptive resolution.
+
+        OPD: Optical path difference.
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        quantity : str
+            Quantity to calculate ("pssn" or "ellip").
+        wavelengthInUm : float
+            Wavelength in microns.
+        opdRmPTT : numpy.ndarray
+            PTT-removed OPD map in um.
+        zen : float
+            Telescope zenith angle in degree.
+
+        Returns
+        -------
+        numpy.ndarray
+            Downsampled OPD map. This is the input OPD if the full size is
+            used.
+        """
+
+        size = self.getAdaptiveOpdSize(quantity, wavelengthInUm, opdRmPTT,
+                                       zen=zen)
+        if (size == opdRmPTT.shape[0]):
+            return opdRmPTT
+
+        return rebinOpd(opdRmPTT, size)
+
     def calcFWHMeff(self, pssn):
         """Calculate the effective FWHM.
 
@@ -392,6 +793,263 @@ class OpdMetrology(object):
 
         return dm5
 
+    def setPssnModelCacheDir(self, pssnModelCacheDir):
+        """Set the directory to cache the calibrated PSSN models.
+
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        pssnModelCacheDir : str or None
+            Cache directory. The models are only kept in the memory if this is
+            None.
+        """
+
+        self._pssnModelCacheDir = pssnModelCacheDir
+        if (pssnModelCacheDir is not None):
+            os.makedirs(pssnModelCacheDir, exist_ok=True)
+
+    def getPssnModel(self, wavelengthInUm, zen=0, r0inmRef=0.1382,
+                     znTerms=22, numOfSample=400, maxRmsInUm=0.3):
+        """Get the calibrated PSSN model of zk.
+
+        The model is read from the cache directory if it exists. Otherwise,
+        the model is calibrated by the exact PSSN of synthetic OPD maps and
+        written to the cache directory.
+
+        PSSN: Normalized point source sensitivity.
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        wavelengthInUm : float
+            Wavelength in microns.
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+        znTerms : int, optional
+            Number of terms of annular Zk (z1-z22 by default). The model uses
+            z4-zn. (the default is 22.)
+        numOfSample : int, optional
+            Number of samples in the calibration. (the default is 400.)
+        maxRmsInUm : float, optional
+            Max rms of zk in um in the calibration. (the default is 0.3.)
+
+        Returns
+        -------
+        PssnModel
+            Calibrated PSSN model.
+        """
+
+        pssnModel = PssnModel(wavelengthInUm, zen=zen, r0inmRef=r0inmRef,
+                              znTerms=znTerms)
+        key = pssnModel.getKey()
+        if key in self._pssnModels:
+            return self._pssnModels[key]
+
+        filePath = None
+        if (self._pssnModelCacheDir is not None):
+            filePath = pssnModel.getCacheFilePath(self._pssnModelCacheDir)
+
+        if (filePath is not None) and os.path.exists(filePath):
+            pssnModel.readFromFile(filePath)
+        else:
+            pssnModel.calibrate(numOfSample=numOfSample,
+                                maxRmsInUm=maxRmsInUm)
+
+            # Write to the temporary file first to avoid reading the partial
+            # file in the other process
+            if (filePath is not None):
+                tmpFilePath = "%s.%d.tmp.npz" % (filePath[:-len(".npz")],
+                                                 os.getpid())
+                pssnModel.writeToFile(tmpFilePath)
+                os.replace(tmpFilePath, filePath)
+
+        self._pssnModels[key] = pssnModel
+
+        return pssnModel
+
+    def calcPSSNfromZk(self, wavelengthInUm, zk, zen=0, r0inmRef=0.1382):
+        """Calculate the PSSN based on zk by the calibrated model.
+
+        This is much faster than calcPSSN() and does not need the OPD map.
+        The model is calibrated at the first call of each wavelength, zenith
+        angle, and r0.
+
+        PSSN: Normalized point source sensitivity.
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        wavelengthInUm : float
+            Wavelength in microns.
+        zk : numpy.ndarray
+            Zk (z4-z22) in um. This is a 1D array of one OPD or 2D array with
+            the row as the OPD index (e.g. the data in opd.zer).
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+
+        Returns
+        -------
+        numpy.ndarray or float
+            PSSN.
+        numpy.ndarray or float
+            Error bound of PSSN. This is numpy.inf if the zk is out of the
+            calibration range.
+        """
+
+        znTerms = np.shape(zk)[-1] + PssnModel.ZK_START_IDX
+        pssnModel = self.getPssnModel(wavelengthInUm, zen=zen,
+                                      r0inmRef=r0inmRef, znTerms=znTerms)
+
+        return pssnModel.calcPssn(zk)
+
+    def calcFWHMeffFromZk(self, wavelengthInUm, zk, zen=0, r0inmRef=0.1382):
+        """Calculate the effective FWHM based on zk by the calibrated PSSN
+        model.
+
+        FWHM: Full width at half maximum.
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        wavelengthInUm : float
+            Wavelength in microns.
+        zk : numpy.ndarray
+            Zk (z4-z22) in um. This is a 1D array of one OPD or 2D array with
+            the row as the OPD index (e.g. the data in opd.zer).
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+
+        Returns
+        -------
+        numpy.ndarray or float
+            Effective FWHM in arcsec.
+        numpy.ndarray or float
+            Error bound of effective FWHM in arcsec from the error bound of
+            PSSN.
+        """
+
+        pssn, pssnError = self.calcPSSNfromZk(wavelengthInUm, zk, zen=zen,
+                                              r0inmRef=r0inmRef)
+
+        # The effective FWHM decreases with the PSSN
+        with np.errstate(divide="ignore"):
+            effFwhm = self.calcFWHMeff(pssn)
+            effFwhmLow = self.calcFWHMeff(np.minimum(pssn + pssnError, 1))
+            effFwhmHigh = self.calcFWHMeff(np.maximum(pssn - pssnError, 0))
+
+        effFwhmError = np.maximum(effFwhmHigh - effFwhm,
+                                  effFwhm - effFwhmLow)
+
+        return effFwhm, effFwhmError
+
+    def fitFieldModel(self, zk, numOfFieldTerms=6, fieldRadiusInDeg=None):
+        """Fit the double Zernike field model by the zk at the field
+        positions.
+
+        Parameters
+        ----------
+        zk : numpy.ndarray
+            Zk (z4-z22) in um. The row is the field position in the order of
+            field X, Y (e.g. the data in opd.zer).
+        numOfFieldTerms : int, optional
+            Number of Zernike terms of field. (the default is 6.)
+        fieldRadiusInDeg : float, optional
+            Field radius in degree. Use the max radius of field positions if
+            this is None. (the default is None.)
+
+        Returns
+        -------
+        DoubleZernikeFieldModel
+            Fitted field model.
+        """
+
+        fieldModel = DoubleZernikeFieldModel(
+            numOfFieldTerms=numOfFieldTerms,
+            fieldRadiusInDeg=fieldRadiusInDeg)
+        fieldModel.fit(self.fieldX, self.fieldY, zk)
+
+        return fieldModel
+
+    def calcPSSNfromFieldModel(self, wavelengthInUm, fieldModel,
+                               fieldXInDeg, fieldYInDeg, zen=0,
+                               r0inmRef=0.1382):
+        """Calculate the PSSN at the field positions by the field model.
+
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        wavelengthInUm : float
+            Wavelength in microns.
+        fieldModel : DoubleZernikeFieldModel
+            Fitted field model of z4-z22.
+        fieldXInDeg : float, list, or numpy.ndarray
+            Field x in degree.
+        fieldYInDeg : float, list, or numpy.ndarray
+            Field y in degree.
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+
+        Returns
+        -------
+        numpy.ndarray
+            PSSN of each field position.
+        numpy.ndarray
+            Error bound of PSSN model. This does not include the error of
+            field model.
+        """
+
+        zk = fieldModel.evalZk(fieldXInDeg, fieldYInDeg)
+
+        return self.calcPSSNfromZk(wavelengthInUm, zk, zen=zen,
+                                   r0inmRef=r0inmRef)
+
+    def calcFWHMeffFromFieldModel(self, wavelengthInUm, fieldModel,
+                                  fieldXInDeg, fieldYInDeg, zen=0,
+                                  r0inmRef=0.1382):
+        """Calculate the effective FWHM at the field positions by the field
+        model.
+
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        wavelengthInUm : float
+            Wavelength in microns.
+        fieldModel : DoubleZernikeFieldModel
+            Fitted field model of z4-z22.
+        fieldXInDeg : float, list, or numpy.ndarray
+            Field x in degree.
+        fieldYInDeg : float, list, or numpy.ndarray
+            Field y in degree.
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Effective FWHM of each field position in arcsec.
+        numpy.ndarray
+            Error bound of effective FWHM in arcsec from the PSSN model. This
+            does not include the error of field model.
+        """
+
+        zk = fieldModel.evalZk(fieldXInDeg, fieldYInDeg)
+
+        return self.calcFWHMeffFromZk(wavelengthInUm, zk, zen=zen,
+                                      r0inmRef=r0inmRef)
+
     def calcEllip(self, wavelengthInUm, opdFitsFile=None, opdMap=None, zen=0,
                   debugLevel=0):
         """Calculate the ellipticity.
@@ -420,9 +1078,15 @@ class OpdMetrology(object):
         # from OPD map.
         opdRmPTT = self.rmPTTfromOPD(opdFitsFile=opdFitsFile, opdMap=opdMap)[0]
 
+        # Downsample the OPD in the adaptive resolution
+        opdRmPTT = self._rebinOpdByAdaptiveSize("ellip", wavelengthInUm,
+                                                opdRmPTT, zen)
+
         # Calculate the ellipticity
-        elli = psf2eAtmW(opdRmPTT, wavelengthInUm, zen=zen,
-                         debugLevel=debugLevel)[0]
+        elli = self._calcInPrecision(
+            "ellip", lambda singlePrecision: psf2eAtmW(
+                opdRmPTT, wavelengthInUm, zen=zen, debugLevel=debugLevel,
+                singlePrecision=singlePrecision)[0])
 
         return elli
 
@@ -0,0 +1,276 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+from lsst.ts.phosim.Utility import getConfigDir
+
+
+class PertCache(object):
+
+    def __init__(self, cacheDir):
+        """Initialization of perturbation cache class.
+
+        The perturbation files (pert.cmd, mirror residue maps, fitted zk, and
+        residue map figures) do not depend on the degree of freedom (DOF).
+        They are written once into a shared store keyed by the perturbation
+        parameters and the digests of policy files, and linked into the
+        output directory of each iteration.
+
+        Parameters
+        ----------
+        cacheDir : str
+            Directory of the shared store.
+        """
+
+        self.cacheDir = cacheDir
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+        # Digests of the policy files. The key is (file path, modification
+        # time, file size).
+        self._fileDigest = dict()
+
+    def getCacheDir(self):
+        """Get the directory of the shared store.
+
+        Returns
+        -------
+        str
+            Directory of the shared store.
+        """
+
+        return self.cacheDir
+
+    def getKey(self, tele, seedNum=None, m1m3ForceError=0.05,
+               saveResMapFig=False, pertCmdFileName="pert.cmd"):
+        """Get the key of perturbation files.
+
+        Parameters
+        ----------
+        tele : TeleFacade
+            Telescope instance.
+        seedNum : int, optional
+            Random seed number. (the default is None.)
+        m1m3ForceError : float, optional
+            Ratio of actuator force error. (the default is 0.05.)
+        saveResMapFig : bool, optional
+            Save the figures of mirror residue map. (the default is False.)
+        pertCmdFileName : str, optional
+            Perturbation command file name. (the default is "pert.cmd".)
+
+        Returns
+        -------
+        str
+            Key (SHA-1 hex digest) of perturbation files.
+        """
+
+        pertParam = tele.getPertParam(seedNum=seedNum,
+                                      m1m3ForceError=m1m3ForceError)
+        pertParam["saveResMapFig"] = bool(saveResMapFig)
+        pertParam["pertCmdFileName"] = pertCmdFileName
+
+        policyDigest = dict()
+        for filePath in tele.getPertPolicyFileList():
+            policyDigest[os.path.relpath(filePath, getConfigDir())] = \
+                self._getFileDigest(filePath)
+        pertParam["policyDigest"] = policyDigest
+
+        content = json.dumps(pertParam, sort_keys=True)
+
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def _getFileDigest(self, filePath):
+        """Get the digest of file content.
+
+        Parameters
+        ----------
+        filePath : str
+            File path.
+
+        Returns
+        -------
+        str
+            SHA-1 hex digest of file content.
+        """
+
+        fileStat = os.stat(filePath)
+        fileId = (filePath, fileStat.st_mtime, fileStat.st_size)
+
+        if fileId not in self._fileDigest:
+            sha1 = hashlib.sha1()
+            with open(filePath, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    sha1.update(block)
+            self._fileDigest[fileId] = sha1.hexdigest()
+
+        return self._fileDigest[fileId]
+
+    def getEntryDir(self, key):
+        """Get the directory of cache entry.
+
+        Parameters
+        ----------
+        key : str
+            Key of perturbation files.
+
+        Returns
+        -------
+        str
+            Directory of cache entry.
+        """
+
+        return os.path.join(self.cacheDir, key)
+
+    def hasEntry(self, key):
+        """The cache entry exists or not.
+
+        Parameters
+        ----------
+        key : str
+            Key of perturbation files.
+
+        Returns
+        -------
+        bool
+            True if the cache entry exists.
+        """
+
+        return os.path.isdir(self.getEntryDir(key))
+
+    def writePertFiles(self, tele, pertCmdFileDir, seedNum=None,
+                       m1m3ForceError=0.05, saveResMapFig=False,
+                       pertCmdFileName="pert.cmd"):
+        """Write the perturbation files by the cache.
+
+        The perturbation files are generated by
+        TeleFacade.writePertBaseOnConfigFile() only if there is no cache
+        entry. The files in cache entry are then linked into the
+        "pertCmdFileDir".
+
+        Parameters
+        ----------
+        tele : TeleFacade
+            Telescope instance.
+        pertCmdFileDir : str
+            Directory to the perturbation command file.
+        seedNum : int, optional
+            Random seed number. (the default is None.)
+        m1m3ForceError : float, optional
+            Ratio of actuator force error. (the default is 0.05.)
+        saveResMapFig : bool, optional
+            Save the figures of mirror residue map. (the default is False.)
+        pertCmdFileName : str, optional
+            Perturbation command file name. (the default is "pert.cmd".)
+
+        Returns
+        -------
+        str
+            Perturbation command file path.
+        """
+
+        key = self.getKey(tele, seedNum=seedNum,
+                          m1m3ForceError=m1m3ForceError,
+                          saveResMapFig=saveResMapFig,
+                          pertCmdFileName=pertCmdFileName)
+
+        if (not self.hasEntry(key)):
+            self._addEntry(key, tele, seedNum, m1m3ForceError, saveResMapFig,
+                           pertCmdFileName)
+
+        self._linkEntryTo(key, pertCmdFileDir)
+
+        return os.path.join(pertCmdFileDir, pertCmdFileName)
+
+    def _addEntry(self, key, tele, seedNum, m1m3ForceError, saveResMapFig,
+                  pertCmdFileName):
+        """Add the cache entry.
+
+        The files are written into a temporary directory in the shared store
+        and renamed to the entry directory at the end. Therefore, the other
+        processes never see a partial entry. The plot jobs of residue map
+        figures read the files in the temporary directory, and they are
+        finished by the plot service of telescope before the renaming.
+
+        Parameters
+        ----------
+        key : str
+            Key of perturbation files.
+        tele : TeleFacade
+            Telescope instance.
+        seedNum : int
+            Random seed number.
+        m1m3ForceError : float
+            Ratio of actuator force error.
+        saveResMapFig : bool
+            Save the figures of mirror residue map.
+        pertCmdFileName : str
+            Perturbation command file name.
+        """
+
+        tmpDir = tempfile.mkdtemp(prefix=".tmp_%s_" % key, dir=self.cacheDir)
+        entryDir = self.getEntryDir(key)
+
+        try:
+            pertCmdFilePath = tele.writePertBaseOnConfigFile(
+                tmpDir, seedNum=seedNum, m1m3ForceError=m1m3ForceError,
+                saveResMapFig=saveResMapFig, pertCmdFileName=pertCmdFileName)
+
+            # The residue map figures are plotted from the files in the
+            # temporary directory. Finish the plot jobs before the renaming.
+            plotService = tele.getPlotService()
+            if (saveResMapFig and plotService is not None):
+                plotService.flush()
+
+            # The surface maps in the perturbation command use the absolute
+            # path. Point them to the entry directory.
+            with open(pertCmdFilePath, "r") as file:
+                content = file.read()
+            content = content.replace(os.path.abspath(tmpDir),
+                                      os.path.abspath(entryDir))
+            with open(pertCmdFilePath, "w") as file:
+                file.write(content)
+
+            os.rename(tmpDir, entryDir)
+
+        except OSError:
+            # The same entry might be added by another process already
+            if (not self.hasEntry(key)):
+                raise
+
+        finally:
+            if os.path.isdir(tmpDir):
+                shutil.rmtree(tmpDir)
+
+    def _linkEntryTo(self, key, targetDir):
+        """Link the files in cache entry into the target directory.
+
+        Parameters
+        ----------
+        key : str
+            Key of perturbation files.
+        targetDir : str
+            Target directory.
+        """
+
+        os.makedirs(targetDir, exist_ok=True)
+
+        entryDir = self.getEntryDir(key)
+        for fileName in sorted(os.listdir(entryDir)):
+            srcFilePath = os.path.abspath(os.path.join(entryDir, fileName))
+            dstFilePath = os.path.join(targetDir, fileName)
+
+            if os.path.lexists(dstFilePath):
+                os.remove(dstFilePath)
+            os.symlink(srcFilePath, dstFilePath)
+
+    def clear(self):
+        """Delete all cache entries."""
+
+        for name in os.listdir(self.cacheDir):
+            shutil.rmtree(os.path.join(self.cacheDir, name),
+                          ignore_errors=True)
+
+
+if __name__ == "__main__":
+    pass
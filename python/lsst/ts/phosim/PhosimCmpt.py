@@ -2,7 +2,7 @@ import os
 import re
 import shutil
 import numpy as np
-from scipy import ndimage
+from concurrent.futures import ThreadPoolExecutor
 from astropy.io import fits
 
 from lsst.ts.wep.Utility import runProgram
@@ -14,9 +14,41 @@ from lsst.ts.ofc.ctrlIntf.FWHMSensorData import FWHMSensorData
 
 from lsst.ts.phosim.Utility import getConfigDir, sortOpdFileList
 from lsst.ts.phosim.OpdMetrology import OpdMetrology
+from lsst.ts.phosim.ImgMetrology import ImgMetrology
+from lsst.ts.phosim.OpdAnalysisResult import OpdAnalysisResult
+from lsst.ts.phosim.OpdAnalysisSpec import getComCamOpdAnalysisSpec, \
+    getLsstOpdAnalysisSpec
+from lsst.ts.phosim.PertCache import PertCache
+from lsst.ts.phosim.PhosimRepackager import PhosimRepackager
+from lsst.ts.phosim.PhosimRunCache import PhosimRunCache
+from lsst.ts.phosim.Tracer import traceMethods, getTracer
+
+
+@traceMethods("saveDofInUmFileForNextIter", "runPhoSim",
+              "getComCamOpdArgsAndFilesForPhoSim",
+              "getOpdArgsAndFilesForPhoSim",
+              "getComCamStarArgsAndFilesForPhoSim",
+              "getComCamInFocusStarArgsAndFilesForPhoSim",
+              "getStarArgsAndFilesForPhoSim",
+              "getStarArgsAndFilesForPhoSimBySensor", "runPhoSimInParallel",
+              "analyzeComCamOpdData", "analyzeLsstOpdData", "analyzeOpdData",
+              "getOpdPssnFromFile", "getOpdGqEffFwhmFromFile",
+              "analyzeStarImgData", "repackageComCamAmpImgFromPhoSim",
+              "repackageComCamEimgFromPhoSim", "reorderAndSaveWfErrFile",
+              "waitForResultWriting")
+class PhosimCmpt(object):
 
+    # Eimage file of PhoSim with the sensor name in the group
+    EIMG_SENSOR_FILE_PATTERN = \
+        r"\Alsst_e_\d+_f\d+_(R\d\d_S\d\d)_E\d+\.fits(\.gz)?\Z"
 
-class PhosimCmpt(object):
+    # f-number of the telescope and plate scale in arcsec/um. They give the
+    # radius of defocal donut by the camera piston.
+    F_NUMBER = 1.234
+    PLATE_SCALE_IN_ARCSEC_PER_UM = 0.02
+
+    # Margin of the point spread function beyond the donut in arcsec
+    PSF_MARGIN_IN_ARCSEC = 2.0
 
     def __init__(self, tele):
         """Initialization of PhoSim component class.
@@ -55,6 +87,37 @@ class PhosimCmpt(object):
         # M1M3 force error
         self.m1m3ForceError = 0.05
 
+        # Cache of perturbation files shared by the iterations
+        self.pertCache = None
+
+        # Cache of PhoSim output images shared by the simulations
+        self.phosimRunCache = None
+
+        # Work directory of PhoSim intermediate files
+        self.phosimWorkDir = None
+
+        # Store of the results in the iterations
+        self.resultsStore = None
+
+        # Export the results to the text files or not if there is the store
+        self.exportTextFile = True
+
+        # Iteration number of the results
+        self.iterNum = 0
+
+        # Writer of the results in the background. None means the results
+        # are written in the foreground.
+        self._resultWriter = None
+        self._resultWritingList = []
+
+        # Executor to analyze the OPD maps. None means the OPD maps are
+        # analyzed in this process one by one.
+        self._opdAnalysisExecutor = None
+
+        # Band-integrated PSSN of OPD maps. None means the PSSN is calculated
+        # at the reference wavelength.
+        self._bandPssn = None
+
     def setM1M3ForceError(self, m1m3ForceError):
         """Set the M1M3 force error.
 
@@ -77,6 +140,328 @@ class PhosimCmpt(object):
 
         return self.m1m3ForceError
 
+    def setPertCacheDir(self, pertCacheDir):
+        """Set the directory of perturbation cache.
+
+        The perturbation files (pert.cmd, mirror residue maps, and fitted
+        zk) are written once into this directory and linked into the output
+        directory of each iteration. They are regenerated only if the
+        perturbation parameters or policy files change.
+
+        Parameters
+        ----------
+        pertCacheDir : str or None
+            Directory of perturbation cache. Disable the cache if this is
+            None.
+        """
+
+        if (pertCacheDir is None):
+            self.pertCache = None
+        else:
+            self.pertCache = PertCache(pertCacheDir)
+
+    def getPertCache(self):
+        """Get the perturbation cache.
+
+        Returns
+        -------
+        PertCache or None
+            Perturbation cache. None if there is no cache.
+        """
+
+        return self.pertCache
+
+    def setPhoSimRunCacheDir(self, phosimRunCacheDir):
+        """Set the directory of PhoSim run cache.
+
+        The output images of PhoSim are kept in this directory and reused by
+        the PhoSim runs with the same inputs (e.g. the members of ensemble
+        with the same perturbation).
+
+        Parameters
+        ----------
+        phosimRunCacheDir : str or None
+            Directory of PhoSim run cache. Disable the cache if this is None.
+        """
+
+        if (phosimRunCacheDir is None):
+            self.phosimRunCache = None
+        else:
+            self.phosimRunCache = PhosimRunCache(phosimRunCacheDir)
+
+    def getPhoSimRunCache(self):
+        """Get the PhoSim run cache.
+
+        Returns
+        -------
+        PhosimRunCache or None
+            PhoSim run cache. None if there is no cache.
+        """
+
+        return self.phosimRunCache
+
+    def setPhoSimWorkDir(self, phosimWorkDir):
+        """Set the work directory of PhoSim intermediate files.
+
+        The simulations running at the same time (e.g. the members of
+        ensemble) should have their own work directories. Otherwise, the
+        intermediate files of the same observation Id overwrite each other
+        in the default work directory of PhoSim.
+
+        Parameters
+        ----------
+        phosimWorkDir : str or None
+            Work directory of PhoSim intermediate files. Use the default
+            work directory of PhoSim if this is None.
+        """
+
+        if (phosimWorkDir is not None):
+            self._makeDir(phosimWorkDir)
+        self.phosimWorkDir = phosimWorkDir
+
+    def getPhoSimWorkDir(self):
+        """Get the work directory of PhoSim intermediate files.
+
+        Returns
+        -------
+        str or None
+            Work directory of PhoSim intermediate files. None if the default
+            work directory of PhoSim is used.
+        """
+
+        return self.phosimWorkDir
+
+    def setResultsStore(self, resultsStore, exportTextFile=True):
+        """Set the store of results in the iterations.
+
+        The analyzed results (OPD zk, PSSN, FWHM, wavefront error, and DOF)
+        are added to the store with the iteration number. The getters read
+        them from the in-memory copy of store instead of the text files.
+
+        OPD: optical path difference.
+        PSSN: normalized point source sensitivity.
+        FWHM: full width at half maximum.
+        DOF: degree of freedom.
+
+        Parameters
+        ----------
+        resultsStore : ResultsStore or None
+            Store of results. None means the results are only written to the
+            text files.
+        exportTextFile : bool, optional
+            Export the results to the text files as well. (the default is
+            True.)
+        """
+
+        self.resultsStore = resultsStore
+        self.exportTextFile = exportTextFile
+
+    def getResultsStore(self):
+        """Get the store of results in the iterations.
+
+        Returns
+        -------
+        ResultsStore or None
+            Store of results. None if there is no store.
+        """
+
+        return self.resultsStore
+
+    def setIterNum(self, iterNum):
+        """Set the iteration number of results.
+
+        The iteration number is also used to group the spans of tracer.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        """
+
+        self.iterNum = int(iterNum)
+        getTracer().setIterNum(self.iterNum)
+
+    def getIterNum(self):
+        """Get the iteration number of results.
+
+        Returns
+        -------
+        int
+            Iteration number.
+        """
+
+        return self.iterNum
+
+    def _saveResult(self, quantity, data, filePath, header):
+        """Save the result to the store and text file.
+
+        The text file is written if there is no store or the exporting of
+        text file is on.
+
+        Parameters
+        ----------
+        quantity : str
+            Name of quantity in the store.
+        data : numpy.ndarray
+            Data of result.
+        filePath : str
+            Path of text file.
+        header : str
+            Header of text file.
+        """
+
+        if (self._resultWriter is None):
+            self._writeResult(self.iterNum, quantity, data, filePath, header)
+        else:
+            future = self._resultWriter.submit(
+                self._writeResult, self.iterNum, quantity, np.array(data),
+                filePath, header)
+            self._resultWritingList.append(future)
+
+    def _writeResult(self, iterNum, quantity, data, filePath, header):
+        """Write the result to the store and text file.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        quantity : str
+            Name of quantity in the store.
+        data : numpy.ndarray
+            Data of result.
+        filePath : str
+            Path of text file.
+        header : str
+            Header of text file.
+        """
+
+        if (self.resultsStore is not None):
+            self.resultsStore.addData(iterNum, quantity, data)
+
+        if (self.resultsStore is None) or (self.exportTextFile):
+            np.savetxt(filePath, data, header=header)
+
+    def setWriteResultInBackground(self, writeInBackground):
+        """Set to write the results in the background thread or not.
+
+        The analysis returns the results directly, and the writing of store
+        and text files does not block the closed loop. Call
+        waitForResultWriting() before reading the files by other programs.
+
+        Parameters
+        ----------
+        writeInBackground : bool
+            Write the results in the background thread or not.
+        """
+
+        if (writeInBackground and self._resultWriter is None):
+            self._resultWriter = ThreadPoolExecutor(max_workers=1)
+
+        elif (not writeInBackground and self._resultWriter is not None):
+            self.waitForResultWriting()
+            self._resultWriter.shutdown()
+            self._resultWriter = None
+
+    def setOpdAnalysisExecutor(self, executor):
+        """Set the executor to analyze the OPD maps.
+
+        The zk and PSSN of OPD maps are independent, and all OPD maps are
+        submitted to the executor at the same time. The executor is not shut
+        down by this class.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor or None
+            Executor (e.g. ProcessPoolExecutor). If None, the OPD maps are
+            analyzed in this process one by one.
+        """
+
+        self._opdAnalysisExecutor = executor
+
+    def getOpdAnalysisExecutor(self):
+        """Get the executor to analyze the OPD maps.
+
+        OPD: Optical path difference.
+
+        Returns
+        -------
+        concurrent.futures.Executor or None
+            Executor.
+        """
+
+        return self._opdAnalysisExecutor
+
+    def setBandPssn(self, bandPssn):
+        """Set the band-integrated PSSN used in the analysis of OPD maps.
+
+        The PSSN and effective FWHM of OPD maps are integrated over the
+        sampled wavelengths of band instead of the reference wavelength.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        bandPssn : BandPssn or None
+            Band-integrated PSSN (e.g. getBandPssn(FilterType.R)). If None,
+            the PSSN is calculated at the reference wavelength.
+        """
+
+        self._bandPssn = bandPssn
+
+    def getBandPssn(self):
+        """Get the band-integrated PSSN used in the analysis of OPD maps.
+
+        PSSN: Normalized point source sensitivity.
+
+        Returns
+        -------
+        BandPssn or None
+            Band-integrated PSSN.
+        """
+
+        return self._bandPssn
+
+    def waitForResultWriting(self):
+        """Wait for the writing of results in the background to finish.
+
+        The error of writing is raised if any.
+        """
+
+        futureList = self._resultWritingList
+        self._resultWritingList = []
+        for future in futureList:
+            future.result()
+
+    def _loadResult(self, quantity, filePath):
+        """Load the result from the store or text file.
+
+        Parameters
+        ----------
+        quantity : str
+            Name of quantity in the store.
+        filePath : str
+            Path of text file. This is used if the store does not have the
+            quantity in the current iteration.
+
+        Returns
+        -------
+        numpy.ndarray
+            Data of result.
+        """
+
+        self.waitForResultWriting()
+
+        if (self.resultsStore is not None) and \
+                self.resultsStore.hasData(self.iterNum, quantity):
+            return self.resultsStore.getData(self.iterNum, quantity)
+
+        return np.loadtxt(filePath)
+
     def getSettingFile(self):
         """Get the setting file.
 
@@ -132,6 +517,17 @@ class PhosimCmpt(object):
 
         return self._phosimCmptSettingFile.getSetting("extraDirName")
 
+    def getInFocusDirName(self):
+        """Get the in-focus directory name.
+
+        Returns
+        -------
+        str
+            In-focus directory name.
+        """
+
+        return self._phosimCmptSettingFile.getSetting("inFocusDirName")
+
     def getOpdMetr(self):
         """Get the OPD metrology object.
 
@@ -340,18 +736,24 @@ class PhosimCmpt(object):
 
         filePath = os.path.join(self.outputDir, dofInUmFileName)
         header = "The followings are the DOF in um:"
-        np.savetxt(filePath, np.transpose(dofInUm), header=header)
+        self._saveResult("dofInUm", np.transpose(dofInUm), filePath, header)
 
     def runPhoSim(self, argString):
         """Run the PhoSim program.
 
+        If there is the PhoSim run cache, the output images are reused if
+        PhoSim ran with the same inputs before.
+
         Parameters
         ----------
         argString : str
             Arguments for PhoSim.
         """
 
-        self.tele.runPhoSim(argString)
+        if (self.phosimRunCache is None):
+            self.tele.runPhoSim(argString)
+        else:
+            self.phosimRunCache.runPhoSim(self.tele, argString)
 
     def getComCamOpdArgsAndFilesForPhoSim(
             self, cmdFileName="opd.cmd", instFileName="opd.inst",
@@ -383,8 +785,46 @@ class PhosimCmpt(object):
             Arguments to run the PhoSim.
         """
 
-        # Set the default ComCam OPD field positions
-        self.metr.setDefaultComcamGQ()
+        return self.getOpdArgsAndFilesForPhoSim(
+            getComCamOpdAnalysisSpec(), cmdFileName=cmdFileName,
+            instFileName=instFileName, logFileName=logFileName,
+            cmdSettingFileName=cmdSettingFileName,
+            instSettingFileName=instSettingFileName)
+
+    def getOpdArgsAndFilesForPhoSim(
+            self, opdAnalysisSpec, cmdFileName="opd.cmd",
+            instFileName="opd.inst", logFileName="opdPhoSim.log",
+            cmdSettingFileName="opdDefault.cmd",
+            instSettingFileName="opdDefault.inst"):
+        """Get the OPD calculation arguments and files of instrument for the
+        PhoSim calculation.
+
+        OPD: optical path difference.
+
+        Parameters
+        ----------
+        opdAnalysisSpec : OpdAnalysisSpec
+            OPD analysis specification of instrument.
+        cmdFileName : str, optional
+            Physical command file name. (the default is "opd.cmd".)
+        instFileName : str, optional
+            OPD instance file name. (the default is "opd.inst".)
+        logFileName : str, optional
+            Log file name. (the default is "opdPhoSim.log".)
+        cmdSettingFileName : str, optional
+            Physical command setting file name. (the default is
+            "opdDefault.cmd".)
+        instSettingFileName : str, optional
+            Instance setting file name. (the default is "opdDefault.inst".)
+
+        Returns
+        -------
+        str
+            Arguments to run the PhoSim.
+        """
+
+        # Set the OPD field positions of instrument
+        opdAnalysisSpec.setToOpdMetrology(self.metr)
 
         argString = self._getOpdArgsAndFilesForPhoSim(
             cmdFileName, instFileName, logFileName, cmdSettingFileName,
@@ -454,10 +894,16 @@ class PhosimCmpt(object):
         pertCmdFileName = "pert.cmd"
         pertCmdFilePath = os.path.join(self.outputDir, pertCmdFileName)
         if (not os.path.exists(pertCmdFilePath)):
-            self.tele.writePertBaseOnConfigFile(
-                self.outputDir, seedNum=self.seedNum,
-                m1m3ForceError=self.m1m3ForceError, saveResMapFig=True,
-                pertCmdFileName=pertCmdFileName)
+            if (self.pertCache is None):
+                self.tele.writePertBaseOnConfigFile(
+                    self.outputDir, seedNum=self.seedNum,
+                    m1m3ForceError=self.m1m3ForceError, saveResMapFig=True,
+                    pertCmdFileName=pertCmdFileName)
+            else:
+                self.pertCache.writePertFiles(
+                    self.tele, self.outputDir, seedNum=self.seedNum,
+                    m1m3ForceError=self.m1m3ForceError, saveResMapFig=True,
+                    pertCmdFileName=pertCmdFileName)
 
         # Write the physical command file
         cmdSettingFile = os.path.join(self.configDir, "cmdFile",
@@ -489,7 +935,8 @@ class PhosimCmpt(object):
 
         return instSettingFile
 
-    def _getPhoSimArgs(self, logFileName, instFilePath, cmdFilePath):
+    def _getPhoSimArgs(self, logFileName, instFilePath, cmdFilePath,
+                       sensorName=None, workDir=None, numPro=None):
         """Get the arguments needed to run the PhoSim.
 
         Parameters
@@ -500,6 +947,15 @@ class PhosimCmpt(object):
             Instance file path.
         cmdFilePath : str
             Physical command file path.
+        sensorName : str, optional
+            Sensor chip specification (e.g., R22_S11). (the default is None.)
+        workDir : str, optional
+            Work directory of PhoSim intermediate files. Use the work
+            directory set by setPhoSimWorkDir() if this is None. (the
+            default is None.)
+        numPro : int, optional
+            Number of processors of PhoSim. Use the "numPro" in the setting
+            file if this is None. (the default is None.)
 
         Returns
         -------
@@ -508,20 +964,24 @@ class PhosimCmpt(object):
         """
 
         # PhoSim parameters
-        numPro = int(self._phosimCmptSettingFile.getSetting("numPro"))
+        if (numPro is None):
+            numPro = int(self._phosimCmptSettingFile.getSetting("numPro"))
         e2ADC = int(self._phosimCmptSettingFile.getSetting("e2ADC"))
         logFilePath = os.path.join(self.outputImgDir, logFileName)
+        if (workDir is None):
+            workDir = self.phosimWorkDir
 
         argString = self.tele.getPhoSimArgs(
             instFilePath, extraCommandFile=cmdFilePath, numPro=numPro,
-            outputDir=self.outputImgDir, e2ADC=e2ADC, logFilePath=logFilePath)
+            outputDir=self.outputImgDir, sensorName=sensorName, e2ADC=e2ADC,
+            logFilePath=logFilePath, workDir=workDir)
 
         return argString
 
     def getComCamStarArgsAndFilesForPhoSim(
             self, extraObsId, intraObsId, skySim, simSeed=1000,
             cmdSettingFileName="starDefault.cmd",
-            instSettingFileName="starSingleExp.inst"):
+            instSettingFileName="starSingleExp.inst", splitBySensor=False):
         """Get the star calculation arguments and files of ComCam for the
         PhoSim calculation.
 
@@ -540,6 +1000,10 @@ class PhosimCmpt(object):
             "starDefault.cmd".)
         instSettingFileName : str, optional
             Instance setting file name. (the default is "starSingleExp.inst".)
+        splitBySensor : bool, optional
+            Split the stars by the sensors they land on and get one argument
+            per sensor for each defocal condition. See
+            getStarArgsAndFilesForPhoSimBySensor(). (the default is False.)
 
         Returns
         -------
@@ -583,13 +1047,23 @@ class PhosimCmpt(object):
             self.setOutputImgDir(outputImgDir)
 
             # Get the argument to run the phosim
-            argString = self.getStarArgsAndFilesForPhoSim(
-                skySim, cmdFileName=cmdFileName,
-                instFileName=instFileNameList[str(ii)],
-                logFileName=logFileNameList[str(ii)], simSeed=simSeed,
-                cmdSettingFileName=cmdSettingFileName,
-                instSettingFileName=instSettingFileName)
-            argStringList.append(argString)
+            if (splitBySensor):
+                argStringList.extend(
+                    self.getStarArgsAndFilesForPhoSimBySensor(
+                        skySim, cmdFileName=cmdFileName,
+                        instFileName=instFileNameList[str(ii)],
+                        logFileName=logFileNameList[str(ii)],
+                        simSeed=simSeed,
+                        cmdSettingFileName=cmdSettingFileName,
+                        instSettingFileName=instSettingFileName))
+            else:
+                argString = self.getStarArgsAndFilesForPhoSim(
+                    skySim, cmdFileName=cmdFileName,
+                    instFileName=instFileNameList[str(ii)],
+                    logFileName=logFileNameList[str(ii)], simSeed=simSeed,
+                    cmdSettingFileName=cmdSettingFileName,
+                    instSettingFileName=instSettingFileName)
+                argStringList.append(argString)
 
         # Put the internal state back to the focal plane condition
         self.setDofInUm(onFocalDofInUm)
@@ -597,6 +1071,59 @@ class PhosimCmpt(object):
 
         return argStringList
 
+    def getComCamInFocusStarArgsAndFilesForPhoSim(
+            self, obsId, skySim, simSeed=1000,
+            cmdSettingFileName="starNoAtm.cmd",
+            instSettingFileName="starSingleExp.inst"):
+        """Get the in-focus star calculation arguments and files of ComCam
+        for the PhoSim calculation.
+
+        The stars are simulated without the defocal piston of camera and
+        without the atmosphere, and the images are put in the in-focus
+        directory. These are the eimages analyzed by analyzeStarImgData().
+
+        ComCam: Commissioning camera.
+
+        Parameters
+        ----------
+        obsId : int
+            Observation Id.
+        skySim : SkySim
+            Sky simulator
+        simSeed : int, optional
+            Random number seed. (the default is 1000.)
+        cmdSettingFileName : str, optional
+            Physical command setting file name without the atmosphere. (the
+            default is "starNoAtm.cmd".)
+        instSettingFileName : str, optional
+            Instance setting file name without the atmosphere. (the default
+            is "starSingleExp.inst".)
+
+        Returns
+        -------
+        str
+            Arguments to run the PhoSim.
+        """
+
+        self.setSurveyParam(obsId=obsId)
+
+        # The DOF is not changed, which has no defocal piston of camera
+        onFocalOutputImgDir = self.outputImgDir
+        self.setOutputImgDir(os.path.join(onFocalOutputImgDir,
+                                          self.getInFocusDirName()))
+
+        argString = self.getStarArgsAndFilesForPhoSim(
+            skySim, cmdFileName="starInFocus.cmd",
+            instFileName="starInFocus.inst",
+            logFileName="starInFocusPhoSim.log", simSeed=simSeed,
+            cmdSettingFileName=cmdSettingFileName,
+            instSettingFileName=instSettingFileName)
+
+        # Put the output image directory back
+        self.setOutputImgDir(onFocalOutputImgDir)
+
+        return argString
+
     def getStarArgsAndFilesForPhoSim(self, skySim,
                                      cmdFileName="star.cmd",
                                      instFileName="star.inst",
@@ -646,58 +1173,342 @@ class PhosimCmpt(object):
 
         return argString
 
-    def analyzeComCamOpdData(self, zkFileName="opd.zer",
-                             rotOpdInDeg=0.0,
-                             pssnFileName="PSSN.txt"):
-        """Analyze the ComCam OPD data.
-
-        Rotate OPD to simulate the output by rotated camera. When anaylzing the
-        PSSN, the unrotated OPD is used.
-
-        ComCam: Commissioning camera.
-        OPD: Optical path difference.
-        PSSN: Normalized point source sensitivity.
-
-        Parameters
-        ----------
-        zkFileName : str, optional
-            OPD in zk file name. (the default is "opd.zer".)
-        rotOpdInDeg : float, optional
-            Rotate OPD in degree in the counter-clockwise direction. (the
-            default is 0.0.)
-        pssnFileName : str, optional
-            PSSN file name. (the default is "PSSN.txt".)
-        """
+    def getStarArgsAndFilesForPhoSimBySensor(
+            self, skySim, cmdFileName="star.cmd", instFileName="star.inst",
+            logFileName="starPhoSim.log", simSeed=1000,
+            cmdSettingFileName="starDefault.cmd",
+            instSettingFileName="starSingleExp.inst", sensorNameList=None):
+        """Get the star calculation arguments and files for the PhoSim
+        calculation with one instance file per sensor.
 
-        self._writeOpdZkFile(zkFileName, rotOpdInDeg)
-        self._writeOpdPssnFile(pssnFileName)
+        The stars are split by the sensors they land on (see
+        SkySim.getSensorNameOfStars()), and each PhoSim run only simulates
+        its own sensor with a separate work directory. The runs are
+        independent and can be done at the same time by
+        runPhoSimInParallel(). All images are put in the same output image
+        directory. The stars that do not land on any sensor are skipped.
 
-    def _writeOpdZkFile(self, zkFileName, rotOpdInDeg):
-        """Write the OPD in zk file.
+        Each sensor run uses one PhoSim processor, and runPhoSimInParallel()
+        runs "numPro" of them at the same time, so the total number of
+        PhoSim threads is still "numPro".
 
-        OPD: optical path difference.
+        The donut of star near the chip edge lands on the neighboring
+        sensors as well. Each sensor run includes all stars whose donuts
+        land on that sensor (see getDonutRadiusInDeg()), so the donuts that
+        straddle the chip edges are not truncated.
 
         Parameters
         ----------
-        zkFileName : str
-            OPD in zk file name.
-        rotOpdInDeg : float
-            Rotate OPD in degree in the counter-clockwise direction.
-        """
-
+        skySim : SkySim
+            Sky simulator
+        cmdFileName : str, optional
+            Physical command file name. (the default is "star.cmd".)
+        instFileName : str, optional
+            Star instance file name. The sensor name is appended to the file
+            name of each sensor. (the default is "star.inst".)
+        logFileName : str, optional
+            Log file name. The sensor name is appended to the file name of
+            each sensor. (the default is "starPhoSim.log".)
+        simSeed : int, optional
+            Random number seed. (the default is 1000)
+        cmdSettingFileName : str, optional
+            Physical command setting file name. (the default is
+            "starDefault.cmd".)
+        instSettingFileName : str, optional
+            Instance setting file name. (the default is "starSingleExp.inst".)
+        sensorNameList : list[str], optional
+            Abbreviated names of the sensors to simulate (e.g. ["R22_S11"]).
+            All sensors with the stars are used if this is None. (the
+            default is None.)
+
+        Returns
+        -------
+        list[str]
+            List of arguments to run the PhoSim.
+        """
+
+        # Write the command file
+        cmdFilePath = self._writePertAndCmdFiles(cmdSettingFileName,
+                                                 cmdFileName)
+
+        instSettingFile = self._getInstSettingFilePath(instSettingFileName)
+
+        # Split the stars by the sensors that their donuts land on
+        sensorNameOfDonuts = skySim.getSensorNameOfDonuts(
+            self.getDonutRadiusInDeg())
+        if (sensorNameList is None):
+            sensorNameList = sorted(set(sensorNameOfDonuts.ravel()) -
+                                    set([None]))
+
+        instFileRoot, instFileExt = os.path.splitext(instFileName)
+        logFileRoot, logFileExt = os.path.splitext(logFileName)
+
+        argStringList = []
+        for sensorName in sensorNameList:
+
+            starIdx = np.where(
+                np.any(sensorNameOfDonuts == sensorName, axis=1))[0]
+            if (len(starIdx) == 0):
+                continue
+
+            # Write the instance file of sensor
+            instFilePath = self.tele.writeStarInstFile(
+                self.outputDir, skySim, simSeed=simSeed,
+                sedName="sed_flat.txt", instSettingFile=instSettingFile,
+                instFileName="%s_%s%s" % (instFileRoot, sensorName,
+                                          instFileExt),
+                starIdx=starIdx)
+
+            # Each PhoSim run needs its own work directory
+            workDir = os.path.join(self.outputDir, "work",
+                                   "%s_%s" % (instFileRoot, sensorName))
+            self._makeDir(workDir)
+
+            # Get the argument to run the PhoSim
+            argString = self._getPhoSimArgs(
+                "%s_%s%s" % (logFileRoot, sensorName, logFileExt),
+                instFilePath, cmdFilePath, sensorName=sensorName,
+                workDir=workDir, numPro=1)
+            argStringList.append(argString)
+
+        return argStringList
+
+    def getDonutRadiusInDeg(self):
+        """Get the radius of donut in degree.
+
+        The radius is decided by the camera piston in the current degree of
+        freedom (DOF), and the margin of point spread function is added.
+
+        Returns
+        -------
+        float
+            Radius of donut in degree.
+        """
+
+        pistonInUm = self.getDofInUm()[5]
+        radiusInArcsec = abs(pistonInUm) / self.F_NUMBER / 2 * \
+            self.PLATE_SCALE_IN_ARCSEC_PER_UM
+
+        return (radiusInArcsec + self.PSF_MARGIN_IN_ARCSEC) / 3600
+
+    def runPhoSimInParallel(self, argStringList, numOfProc=None):
+        """Run the PhoSim programs at the same time.
+
+        Parameters
+        ----------
+        argStringList : list[str]
+            List of arguments for PhoSim. Each argument is one PhoSim run.
+        numOfProc : int, optional
+            Number of PhoSim runs at the same time. Use the "numPro" in the
+            setting file if this is None. Each run should use one PhoSim
+            processor (e.g. the arguments of
+            getStarArgsAndFilesForPhoSimBySensor()), or the machine is
+            oversubscribed. (the default is None.)
+        """
+
+        if (numOfProc is None):
+            numOfProc = int(self._phosimCmptSettingFile.getSetting("numPro"))
+
+        with ThreadPoolExecutor(max_workers=max(int(numOfProc), 1)) as pool:
+            futureList = [pool.submit(self.runPhoSim, argString)
+                          for argString in argStringList]
+
+            # Raise the error of PhoSim run if any
+            for future in futureList:
+                future.result()
+
+    def analyzeComCamOpdData(self, zkFileName="opd.zer",
+                             rotOpdInDeg=0.0,
+                             pssnFileName="PSSN.txt"):
+        """Analyze the ComCam OPD data.
+
+        Rotate OPD to simulate the output by rotated camera. When anaylzing the
+        PSSN, the unrotated OPD is used.
+
+        ComCam: Commissioning camera.
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        zkFileName : str, optional
+            OPD in zk file name. (the default is "opd.zer".)
+        rotOpdInDeg : float, optional
+            Rotate OPD in degree in the counter-clockwise direction. (the
+            default is 0.0.)
+        pssnFileName : str, optional
+            PSSN file name. (the default is "PSSN.txt".)
+
+        Returns
+        -------
+        OpdAnalysisResult
+            Result of OPD analysis.
+        """
+
+        return self.analyzeOpdData(getComCamOpdAnalysisSpec(),
+                                   zkFileName=zkFileName,
+                                   rotOpdInDeg=rotOpdInDeg,
+                                   pssnFileName=pssnFileName)
+
+    def analyzeLsstOpdData(self, zkFileName="opd.zer", rotOpdInDeg=0.0,
+                           pssnFileName="PSSN.txt"):
+        """Analyze the LSST OPD data.
+
+        The OPD data should be on the default LSST GQ field points. Rotate
+        OPD to simulate the output by rotated camera. When anaylzing the
+        PSSN, the unrotated OPD is used.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+        GQ: Gaussian quadrature.
+
+        Parameters
+        ----------
+        zkFileName : str, optional
+            OPD in zk file name. (the default is "opd.zer".)
+        rotOpdInDeg : float, optional
+            Rotate OPD in degree in the counter-clockwise direction. (the
+            default is 0.0.)
+        pssnFileName : str, optional
+            PSSN file name. (the default is "PSSN.txt".)
+
+        Returns
+        -------
+        OpdAnalysisResult
+            Result of OPD analysis.
+        """
+
+        return self.analyzeOpdData(getLsstOpdAnalysisSpec(includeWfs=False),
+                                   zkFileName=zkFileName,
+                                   rotOpdInDeg=rotOpdInDeg,
+                                   pssnFileName=pssnFileName)
+
+    def analyzeOpdData(self, opdAnalysisSpec, zkFileName="opd.zer",
+                       rotOpdInDeg=0.0, pssnFileName="PSSN.txt"):
+        """Analyze the OPD data of instrument.
+
+        The OPD data should be on the fields of OPD analysis specification.
+        Rotate OPD to simulate the output by rotated camera. When anaylzing
+        the PSSN, the unrotated OPD is used. The OPD maps are analyzed by the
+        executor set by setOpdAnalysisExecutor() if any.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        opdAnalysisSpec : OpdAnalysisSpec
+            OPD analysis specification of instrument.
+        zkFileName : str, optional
+            OPD in zk file name. (the default is "opd.zer".)
+        rotOpdInDeg : float, optional
+            Rotate OPD in degree in the counter-clockwise direction. (the
+            default is 0.0.)
+        pssnFileName : str, optional
+            PSSN file name. (the default is "PSSN.txt".)
+
+        Returns
+        -------
+        OpdAnalysisResult
+            Result of OPD analysis.
+        """
+
+        opdAnalysisSpec.setToOpdMetrology(self.metr)
+
+        return self._analyzeOpdData(zkFileName, rotOpdInDeg, pssnFileName)
+
+    def _analyzeOpdData(self, zkFileName, rotOpdInDeg, pssnFileName):
+        """Analyze the OPD data with the current weighting ratio.
+
+        Each OPD file is read only once. The zk and PSSN files are written
+        as the side effect, which might be in the background.
+
+        OPD: Optical path difference.
+        PSSN: Normalized point source sensitivity.
+
+        Parameters
+        ----------
+        zkFileName : str
+            OPD in zk file name.
+        rotOpdInDeg : float
+            Rotate OPD in degree in the counter-clockwise direction.
+        pssnFileName : str
+            PSSN file name.
+
+        Returns
+        -------
+        OpdAnalysisResult
+            Result of OPD analysis.
+        """
+
+        opdFileList = self._getOpdFileInDir(self.outputImgDir)
+        opdZk, pssnList = self._analyzeOpdMaps(opdFileList, rotOpdInDeg)
+
+        # Calculate the GQ effectice PSSN
+        gqEffPssn = self.metr.calcGQvalue(pssnList)
+
+        effFwhmList, gqEffFwhm = self._calcOpdEffFwhm(pssnList)
+
+        fieldIdx = [self._getFieldIdxOfOpdFile(opdFile)
+                    for opdFile in opdFileList]
+
+        result = OpdAnalysisResult(opdZk, pssnList, gqEffPssn, effFwhmList,
+                                   gqEffFwhm, fieldIdx,
+                                   rotOpdInDeg=rotOpdInDeg)
+
+        self._writeOpdZkFile(zkFileName, result)
+        self._writeOpdPssnFile(pssnFileName, result)
+
+        return result
+
+    def _getFieldIdxOfOpdFile(self, opdFile):
+        """Get the field index of OPD file.
+
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        opdFile : str
+            OPD file path (e.g. "opd_9006000_3.fits.gz").
+
+        Returns
+        -------
+        int
+            Field index.
+        """
+
+        m = re.match(r"\Aopd_\d+_(\d+).fits", os.path.basename(opdFile))
+
+        return int(m.groups()[0])
+
+    def _writeOpdZkFile(self, zkFileName, result):
+        """Write the OPD in zk file.
+
+        OPD: optical path difference.
+
+        Parameters
+        ----------
+        zkFileName : str
+            OPD in zk file name.
+        result : OpdAnalysisResult
+            Result of OPD analysis.
+        """
+
         filePath = os.path.join(self.outputImgDir, zkFileName)
-        opdData = self._mapOpdToZk(rotOpdInDeg)
         header = "The followings are OPD in rotation angle of %.2f degree in um from z4 to z22:" % (
-            rotOpdInDeg)
-        np.savetxt(filePath, opdData, header=header)
+            result.getRotOpdInDeg())
+        self._saveResult("opdZk", result.getOpdZk(), filePath, header)
 
-    def _mapOpdToZk(self, rotOpdInDeg):
-        """Map the OPD to the basis of annular Zernike polynomial (Zk).
+    def _analyzeOpdMaps(self, opdFileList, rotOpdInDeg):
+        """Analyze the zk and PSSN of OPD maps.
 
         OPD: optical path difference.
+        PSSN: Normalized point source sensitivity.
 
         Parameters
         ----------
+        opdFileList : list[str]
+            List of sorted OPD files.
         rotOpdInDeg : float
             Rotate OPD in degree in the counter-clockwise direction.
 
@@ -707,32 +1518,58 @@ class PhosimCmpt(object):
             Zk data from OPD. This is a 2D array. The row is the OPD index and
             the column is z4 to z22 in um. The order of OPD index is based on
             the file name.
+        list
+            PSSN list.
         """
 
-        # Get the sorted OPD file list
-        opdFileList = self._getOpdFileInDir(self.outputImgDir)
-
-        # Map the OPD to the Zk basis and do the collection
+        wavelengthInUm = self.tele.getRefWaveLength() * 1e-3
         numOfZk = self.getNumOfZk()
-        opdData = np.zeros((len(opdFileList), numOfZk))
-        for idx, opdFile in enumerate(opdFileList):
-            opd = fits.getdata(opdFile)
-
-            # Rotate OPD if needed
-            if (rotOpdInDeg != 0):
-                opdRot = ndimage.rotate(opd, rotOpdInDeg, reshape=False)
-                opdRot[opd == 0] = 0
-            else:
-                opdRot = opd
-
-            # z1 to z22 (22 terms)
-            zk = self.metr.getZkFromOpd(opdMap=opdRot)[0]
 
-            # Only need to collect z4 to z22
-            initIdx = 3
-            opdData[idx, :] = zk[initIdx:initIdx + numOfZk]
+        if (self._opdAnalysisExecutor is None):
+            resultList = [
+                analyzeOpdMap(fits.getdata(opdFile), rotOpdInDeg,
+                              wavelengthInUm, numOfZk, metr=self.metr,
+                              bandPssn=self._bandPssn)
+                for opdFile in opdFileList]
+        else:
+            # Calibrate the adaptive resolution of OPD metrology before the
+            # submission to share the chosen OPD size with the workers
+            isAdaptive = \
+                (self.metr.getAdaptiveResolution()["pssn"] is not None)
+            if (isAdaptive and self._bandPssn is None and
+                    len(opdFileList) != 0):
+                opdRmPTT = self.metr.rmPTTfromOPD(
+                    opdFitsFile=opdFileList[0])[0]
+                self.metr.getAdaptiveOpdSize("pssn", wavelengthInUm,
+                                             opdRmPTT)
+
+            # Validate the single precision of OPD metrology before the
+            # submission. The workers get the validated or fallen-back
+            # precision, and do not calculate in both precisions.
+            resultList = []
+            submittedOpdFileList = list(opdFileList)
+            while (self._bandPssn is None and
+                    len(submittedOpdFileList) != 0 and
+                    not self.metr.isPrecisionValidated("pssn")):
+                resultList.append(
+                    analyzeOpdMap(submittedOpdFileList.pop(0), rotOpdInDeg,
+                                  wavelengthInUm, numOfZk, metr=self.metr))
+
+            # The OPD files are read in the workers
+            futureList = [
+                self._opdAnalysisExecutor.submit(
+                    analyzeOpdMap, opdFile, rotOpdInDeg, wavelengthInUm,
+                    numOfZk, metr=self.metr, bandPssn=self._bandPssn)
+                for opdFile in submittedOpdFileList]
+            resultList += [future.result() for future in futureList]
+
+        opdZk = np.zeros((len(opdFileList), numOfZk))
+        pssnList = []
+        for idx, (zk, pssn) in enumerate(resultList):
+            opdZk[idx, :] = zk
+            pssnList.append(pssn)
 
-        return opdData
+        return opdZk, pssnList
 
     def _getOpdFileInDir(self, opdDir):
         """Get the sorted OPD files in the directory.
@@ -786,7 +1623,7 @@ class PhosimCmpt(object):
 
         return fileList
 
-    def _writeOpdPssnFile(self, pssnFileName):
+    def _writeOpdPssnFile(self, pssnFileName, result):
         """Write the OPD PSSN in file.
 
         OPD: Optical path difference.
@@ -796,70 +1633,21 @@ class PhosimCmpt(object):
         ----------
         pssnFileName : str
             PSSN file name.
+        result : OpdAnalysisResult
+            Result of OPD analysis.
         """
 
         filePath = os.path.join(self.outputImgDir, pssnFileName)
 
-        # Calculate the PSSN
-        pssnList, gqEffPssn = self._calcComCamOpdPssn()
-
-        # Calculate the FWHM
-        effFwhmList, gqEffFwhm = self._calcComCamOpdEffFwhm(pssnList)
-
-        # Append the list to write the data into file
-        pssnList.append(gqEffPssn)
-        effFwhmList.append(gqEffFwhm)
-
-        # Stack the data
-        data = np.vstack((pssnList, effFwhmList))
-
         # Write to file
         header = "The followings are PSSN and FWHM (in arcsec) data. The final number is the GQ value."
-        np.savetxt(filePath, data, header=header)
-
-    def _calcComCamOpdPssn(self):
-        """Calculate the ComCam PSSN of OPD.
-
-        ComCam: Commissioning camera.
-        OPD: Optical path difference.
-        PSSN: Normalized point source sensitivity.
-        GQ: Gaussian quadrature.
-
-        Returns
-        -------
-        list
-            PSSN list.
-        float
-            GQ effective PSSN.
-        """
-
-        opdFileList = self._getOpdFileInDir(self.outputImgDir)
-
-        wavelengthInUm = self.tele.getRefWaveLength() * 1e-3
-        pssnList = []
-        for opdFile in opdFileList:
-            pssn = self.metr.calcPSSN(wavelengthInUm, opdFitsFile=opdFile)
-            pssnList.append(pssn)
+        self._saveResult("pssn", result.getPssnData(), filePath, header)
 
-        # Calculate the GQ effectice PSSN
-        self._setComCamWgtRatio()
-        gqEffPssn = self.metr.calcGQvalue(pssnList)
-
-        return pssnList, gqEffPssn
+    def _calcOpdEffFwhm(self, pssnList):
+        """Calculate the effective FWHM of OPD.
 
-    def _setComCamWgtRatio(self):
-        """Set the ComCam weighting ratio.
-
-        ComCam: Commissioning camera.
-        """
+        The weighting ratio of OPD metrology should be set already.
 
-        comcamWtRatio = np.ones(9)
-        self.metr.setWeightingRatio(comcamWtRatio)
-
-    def _calcComCamOpdEffFwhm(self, pssnList):
-        """Calculate the ComCam effective FWHM of OPD.
-
-        ComCam: Commissioning camera.
         FWHM: Full width and half maximum.
         PSSN: Normalized point source sensitivity.
         GQ: Gaussian quadrature.
@@ -874,7 +1662,7 @@ class PhosimCmpt(object):
         list
             Effective FWHM list.
         float
-            GQ effective FWHM of ComCam.
+            GQ effective FWHM.
         """
 
         # Calculate the list of effective FWHM
@@ -884,7 +1672,6 @@ class PhosimCmpt(object):
             effFwhmList.append(effFwhm)
 
         # Calculate the GQ effectice FWHM
-        self._setComCamWgtRatio()
         gqEffFwhm = self.metr.calcGQvalue(effFwhmList)
 
         return effFwhmList, gqEffFwhm
@@ -909,6 +1696,47 @@ class PhosimCmpt(object):
 
         opdZk = self._getZkFromFile(opdZkFileName)
 
+        return self._mapZkToListOfWfErr(opdZk, refSensorNameList)
+
+    def mapOpdResultToListOfWfErr(self, opdResult, refSensorNameList):
+        """Map the OPD analysis result to the list of wavefront error.
+
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        opdResult : OpdAnalysisResult
+            Result of OPD analysis.
+        refSensorNameList : list
+            Reference sensor name list.
+
+        Returns
+        -------
+        list [lsst.ts.wep.ctrlIntf.SensorWavefrontError]
+            List of SensorWavefrontError object.
+        """
+
+        return self._mapZkToListOfWfErr(opdResult.getOpdZk(),
+                                        refSensorNameList)
+
+    def _mapZkToListOfWfErr(self, opdZk, refSensorNameList):
+        """Map the zk of OPD to the list of wavefront error.
+
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        opdZk : numpy.ndarray
+            zk matrix. The colunm is z4-z22. The raw is each data point.
+        refSensorNameList : list
+            Reference sensor name list.
+
+        Returns
+        -------
+        list [lsst.ts.wep.ctrlIntf.SensorWavefrontError]
+            List of SensorWavefrontError object.
+        """
+
         mapSensorNameAndId = MapSensorNameAndId()
         sensorIdList = mapSensorNameAndId.mapSensorNameToId(refSensorNameList)
 
@@ -939,7 +1767,7 @@ class PhosimCmpt(object):
         """
 
         filePath = os.path.join(self.outputImgDir, zkFileName)
-        zk = np.loadtxt(filePath)
+        zk = self._loadResult("opdZk", filePath)
 
         return zk
 
@@ -982,7 +1810,7 @@ class PhosimCmpt(object):
         """
 
         filePath = os.path.join(self.outputImgDir, pssnFileName)
-        data = np.loadtxt(filePath)
+        data = self._loadResult("pssn", filePath)
 
         return data
 
@@ -1036,6 +1864,49 @@ class PhosimCmpt(object):
         data = self._getDataOfPssnFile(pssnFileName)
         fwhmData = data[1, :-1]
 
+        return self._getListOfFwhmSensorData(fwhmData, refSensorNameList)
+
+    def getListOfFwhmSensorDataOfOpdResult(self, opdResult,
+                                           refSensorNameList):
+        """Get the list of FWHM sensor data based on the OPD analysis result.
+
+        FWHM: Full width at half maximum.
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        opdResult : OpdAnalysisResult
+            Result of OPD analysis.
+        refSensorNameList : list
+            Reference sensor name list.
+
+        Returns
+        -------
+        list [lsst.ts.ofc.ctrlIntf.FWHMSensorData]
+            List of FWHMSensorData which contains the sensor Id and FWHM data.
+        """
+
+        return self._getListOfFwhmSensorData(opdResult.getEffFwhm(),
+                                             refSensorNameList)
+
+    def _getListOfFwhmSensorData(self, fwhmData, refSensorNameList):
+        """Get the list of FWHM sensor data.
+
+        FWHM: Full width at half maximum.
+
+        Parameters
+        ----------
+        fwhmData : numpy.ndarray
+            FWHM data in arcsec of each sensor.
+        refSensorNameList : list
+            Reference sensor name list.
+
+        Returns
+        -------
+        list [lsst.ts.ofc.ctrlIntf.FWHMSensorData]
+            List of FWHMSensorData which contains the sensor Id and FWHM data.
+        """
+
         mapSensorNameAndId = MapSensorNameAndId()
         sensorIdList = mapSensorNameAndId.mapSensorNameToId(refSensorNameList)
 
@@ -1046,6 +1917,99 @@ class PhosimCmpt(object):
 
         return listOfFWHMSensorData
 
+    def analyzeStarImgData(self, skySim, imgDir=None, stampSizeInPixel=64):
+        """Analyze the PSSN, effective FWHM, and ellipticity of stars in the
+        PhoSim eimages.
+
+        The stars are located by the positions in the sky simulator, and the
+        postage stamps of all sensors are analyzed in the processes of
+        "numPro" in the setting file. The eimages should be simulated in
+        focus and without the atmosphere by
+        getComCamInFocusStarArgsAndFilesForPhoSim(). The compressed eimages
+        are decompressed in the image directory to be memory-mapped. This
+        gives the image-domain quality of each sensor without the OPD.
+
+        PSSN: Normalized point source sensitivity.
+        FWHM: Full width at half maximum.
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        skySim : SkySim
+            Sky simulator with the same observation metadata as the PhoSim
+            simulation.
+        imgDir : str, optional
+            Directory of in-focus eimages. Use the in-focus directory in the
+            output image directory if this is None. (the default is None.)
+        stampSizeInPixel : int, optional
+            Dimension of postage stamp in pixel. (the default is 64.)
+
+        Returns
+        -------
+        dict
+            The key is the sensor name. The value is an array of the median
+            PSSN, effective FWHM in arcsec, and ellipticity of the stars on
+            the sensor. The values are nan if there is no valid star.
+
+        Raises
+        ------
+        ValueError
+            The stars in the eimages are not in focus.
+        """
+
+        if (imgDir is None):
+            imgDir = os.path.join(self.outputImgDir, self.getInFocusDirName())
+
+        # Decompress the eimages to be memory-mapped
+        numPro = int(self._phosimCmptSettingFile.getSetting("numPro"))
+        repackager = PhosimRepackager(numOfThread=max(numPro, 4),
+                                      compress=False)
+        eimgFilePathList = repackager.repackageEimg(imgDir, rmInputFile=True)
+
+        eimgFileMap = dict()
+        for eimgFilePath in sorted(eimgFilePathList):
+            m = re.match(self.EIMG_SENSOR_FILE_PATTERN,
+                         os.path.basename(eimgFilePath))
+            if (m is not None):
+                eimgFileMap[m.group(1)] = eimgFilePath
+
+        imgQuality = dict()
+        sensorNameList = list(eimgFileMap.keys())
+        if (len(sensorNameList) == 0):
+            return imgQuality
+
+        starPixelPos = skySim.getStarPixelPosBySensor(sensorNameList)
+
+        imgMetr = ImgMetrology(
+            wavelengthInUm=self.tele.getRefWaveLength() * 1e-3,
+            stampSizeInPixel=stampSizeInPixel, numOfProc=numPro)
+
+        # Cut the stamps of all sensors and analyze them together
+        stampsList = []
+        isValidList = []
+        for sensorName in sensorNameList:
+            xInPixel, yInPixel = starPixelPos[sensorName][1:]
+            stamps, isValid = imgMetr.cutStamps(eimgFileMap[sensorName],
+                                                xInPixel, yInPixel)
+            stampsList.append(stamps)
+            isValidList.append(isValid)
+
+        pssn, effFwhm, ellip = imgMetr.analyzeStamps(
+            np.concatenate(stampsList), isValid=np.concatenate(isValidList))
+
+        idxStart = 0
+        for sensorName, stamps in zip(sensorNameList, stampsList):
+            idxEnd = idxStart + len(stamps)
+            data = np.array([pssn[idxStart:idxEnd], effFwhm[idxStart:idxEnd],
+                             ellip[idxStart:idxEnd]])
+            if (np.any(np.isfinite(data[0]))):
+                imgQuality[sensorName] = np.nanmedian(data, axis=1)
+            else:
+                imgQuality[sensorName] = np.full(3, np.nan)
+            idxStart = idxEnd
+
+        return imgQuality
+
     def repackageComCamAmpImgFromPhoSim(self):
         """Repackage the ComCam amplifier images from PhoSim to the single 16
         extension MEFs for processing.
@@ -1059,6 +2023,67 @@ class PhosimCmpt(object):
     def _repackageComCamImages(self, isEimg=False):
         """Repackage the ComCam images from PhoSim for processing.
 
+        The repackager is decided by the "repackager" in the setting file.
+
+        Parameters
+        ----------
+        isEimg : bool, optional
+            Is eimage or not. (the default is False.)
+
+        Raises
+        ------
+        ValueError
+            The repackager is not supported.
+        """
+
+        repackager = self._phosimCmptSettingFile.getSetting("repackager")
+        if (repackager == "native"):
+            self._repackageComCamImagesInProc(isEimg=isEimg)
+        elif (repackager == "phosim_utils"):
+            self._repackageComCamImagesByPhosimUtils(isEimg=isEimg)
+        else:
+            raise ValueError("The repackager (%s) is not supported."
+                             % repackager)
+
+    def _repackageComCamImagesInProc(self, isEimg=False):
+        """Repackage the ComCam images from PhoSim in the process.
+
+        The repackaged images are written into the original directory
+        directly, and the other PhoSim images there are removed.
+
+        Parameters
+        ----------
+        isEimg : bool, optional
+            Is eimage or not. (the default is False.)
+        """
+
+        numPro = int(self._phosimCmptSettingFile.getSetting("numPro"))
+        repackager = PhosimRepackager(numOfThread=max(numPro, 4),
+                                      compress=False)
+
+        intraFocalDirName = self.getIntraFocalDirName()
+        extraFocalDirName = self.getExtraFocalDirName()
+        for imgType in (intraFocalDirName, extraFocalDirName):
+
+            phosimImgDir = os.path.join(self.outputImgDir, imgType)
+            if (isEimg):
+                outputFilePathList = repackager.repackageEimg(phosimImgDir)
+            else:
+                outputFilePathList = repackager.repackageAmpImg(phosimImgDir)
+
+            # Remove the other PhoSim images in the original directory. The
+            # repackaged images of a previous partial run are kept.
+            for fileName in os.listdir(phosimImgDir):
+                filePath = os.path.join(phosimImgDir, fileName)
+                isPhosimImg = (
+                    re.match(PhosimRepackager.AMP_FILE_PATTERN, fileName) or
+                    re.match(PhosimRepackager.EIMG_FILE_PATTERN, fileName))
+                if (isPhosimImg and (filePath not in outputFilePathList)):
+                    os.remove(filePath)
+
+    def _repackageComCamImagesByPhosimUtils(self, isEimg=False):
+        """Repackage the ComCam images from PhoSim by phosim_utils.
+
         Parameters
         ----------
         isEimg : bool, optional
@@ -1137,7 +2162,7 @@ class PhosimCmpt(object):
         filePath = os.path.join(self.outputImgDir, zkFileName)
         wfsData = self._getWfErrValuesAndStackToMatrix(reorderedWfErrMap)
         header = "The followings are ZK in um from z4 to z22:"
-        np.savetxt(filePath, wfsData, header=header)
+        self._saveResult("wfsZk", wfsData, filePath, header)
 
     def _transListOfWfErrToMap(self, listOfWfErr):
         """Transform the list of wavefront error to map.
@@ -1195,5 +2220,69 @@ class PhosimCmpt(object):
         return valueMatrix
 
 
+def analyzeOpdMap(opd, rotOpdInDeg, wavelengthInUm, numOfZk, metr=None,
+                  bandPssn=None):
+    """Analyze the zk and PSSN of OPD map.
+
+    This is a module function to be run in the other processes.
+
+    OPD: optical path difference.
+    PSSN: Normalized point source sensitivity.
+
+    Parameters
+    ----------
+    opd : numpy.ndarray or str
+        OPD map or the OPD FITS file path.
+    rotOpdInDeg : float
+        Rotate OPD in degree in the counter-clockwise direction. This is only
+        applied to the zk.
+    wavelengthInUm : float
+        Wavelength in microns.
+    numOfZk : int
+        Number of zk from z4.
+    metr : OpdMetrology, optional
+        OPD metrology. A new one is used if this is None. (the default is
+        None.)
+    bandPssn : BandPssn, optional
+        Band-integrated PSSN. The PSSN is calculated at wavelengthInUm if
+        this is None. (the default is None.)
+
+    Returns
+    -------
+    numpy.ndarray
+        z4 to z(3 + numOfZk) in um.
+    float
+        PSSN of unrotated OPD.
+    """
+
+    if isinstance(opd, str):
+        opd = fits.getdata(opd)
+
+    if (metr is None):
+        metr = OpdMetrology()
+
+    # Rotate OPD if needed
+    if (rotOpdInDeg != 0):
+        # scipy.ndimage is imported at the first use because most OPDs are
+        # not rotated
+        from scipy import ndimage
+        opdRot = ndimage.rotate(opd, rotOpdInDeg, reshape=False)
+        opdRot[opd == 0] = 0
+    else:
+        opdRot = opd
+
+    # z1 to z22 (22 terms). Only need to collect z4 to z22.
+    zk = metr.getZkFromOpd(opdMap=opdRot)[0]
+    initIdx = 3
+    zk = zk[initIdx:initIdx + numOfZk]
+
+    if (bandPssn is None):
+        pssn = metr.calcPSSN(wavelengthInUm, opdMap=opd)
+    else:
+        pssn = metr.calcBandPSSN(bandPssn, opdMap=opd)
+
+    return zk, pssn
+
+
 if __name__ == "__main__":
     pass
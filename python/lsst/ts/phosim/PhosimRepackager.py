@@ -0,0 +1,420 @@
+import os
+import re
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from astropy.io import fits
+from astropy.time import Time
+
+from lsst.ts.wep.Utility import expandDetectorName
+
+
+class PhosimRepackager(object):
+
+    # File name of PhoSim amplifier image. For example,
+    # "lsst_a_9005001_f1_R22_S10_C00_E000.fits.gz".
+    AMP_FILE_PATTERN = r"(lsst_a_\d+_f\d+_R\d\d_S\d\d)_C(\d\d)_(E\d+)\.fits(\.gz)?\Z"
+
+    # File name of PhoSim eimage. For example,
+    # "lsst_e_9005001_f1_R22_S10_E000.fits.gz".
+    EIMG_FILE_PATTERN = r"(lsst_e_\d+_f\d+_(R\d\d_S\d\d)_E\d+)\.fits(\.gz)?\Z"
+
+    def __init__(self, numOfThread=4, compress=False, camera=None):
+        """Initialization of PhoSim repackager class.
+
+        This class repackages the PhoSim amplifier images into the single
+        multi-extension frames (MEFs) of sensors, and the PhoSim eimages, in
+        the process. The headers are translated as the phosim_repackager.py
+        in phosim_utils. The output is written to a temporary file in the
+        output directory and renamed to the final file name.
+
+        Parameters
+        ----------
+        numOfThread : int, optional
+            Number of threads to process the sensors. (the default is 4.)
+        compress : bool, optional
+            Compress the output files by gzip or not. (the default is
+            False.)
+        camera : Camera, optional
+            DM camera object with the amplifier geometry. The camera of LSST
+            is constructed at the first use if this is None. (the default is
+            None.)
+        """
+
+        self.numOfThread = int(numOfThread)
+        self.compress = compress
+
+        self._camera = camera
+
+    def repackageAmpImg(self, imgDir, outputDir=None, rmInputFile=True):
+        """Repackage the PhoSim amplifier images to the MEFs.
+
+        MEF: multi-extension frames.
+
+        Parameters
+        ----------
+        imgDir : str
+            Directory of PhoSim amplifier images.
+        outputDir : str, optional
+            Output directory. Use the imgDir if this is None. (the default is
+            None.)
+        rmInputFile : bool, optional
+            Remove the input amplifier images after the repackaging. (the
+            default is True.)
+
+        Returns
+        -------
+        list[str]
+            List of output file paths.
+        """
+
+        ampFileMap = self._groupFilesBySensor(imgDir, self.AMP_FILE_PATTERN)
+
+        outputDir = imgDir if (outputDir is None) else outputDir
+        outputFilePathList = self._runInPool(
+            self._writeAmpImgToMef, ampFileMap, outputDir)
+
+        if (rmInputFile):
+            self._rmFiles(ampFileMap, outputFilePathList)
+
+        return outputFilePathList
+
+    def repackageEimg(self, imgDir, outputDir=None, rmInputFile=True):
+        """Repackage the PhoSim eimages.
+
+        The eimages are already one file per sensor. The primary headers are
+        translated as the amplifier images, and the files are decompressed
+        or compressed if necessary.
+
+        Parameters
+        ----------
+        imgDir : str
+            Directory of PhoSim eimages.
+        outputDir : str, optional
+            Output directory. Use the imgDir if this is None. (the default is
+            None.)
+        rmInputFile : bool, optional
+            Remove the input eimages after the repackaging. (the default is
+            True.)
+
+        Returns
+        -------
+        list[str]
+            List of output file paths.
+        """
+
+        eimgFileMap = self._groupFilesBySensor(imgDir, self.EIMG_FILE_PATTERN)
+
+        outputDir = imgDir if (outputDir is None) else outputDir
+        outputFilePathList = self._runInPool(
+            self._writeEimg, eimgFileMap, outputDir)
+
+        if (rmInputFile):
+            self._rmFiles(eimgFileMap, outputFilePathList)
+
+        return outputFilePathList
+
+    def _groupFilesBySensor(self, imgDir, filePattern):
+        """Group the image files by the sensor.
+
+        Parameters
+        ----------
+        imgDir : str
+            Image directory.
+        filePattern : str
+            Regular expression of file name. The first group is the name of
+            output file without the extension.
+
+        Returns
+        -------
+        dict
+            Image file paths of each sensor. The key is the output file name
+            without the extension.
+        """
+
+        fileMap = dict()
+        for fileName in sorted(os.listdir(imgDir)):
+            m = re.match(filePattern, fileName)
+            if (m is None):
+                continue
+
+            outputFileRoot = m.groups()[0]
+            if (filePattern == self.AMP_FILE_PATTERN):
+                outputFileRoot = "%s_%s" % (outputFileRoot, m.groups()[2])
+
+            fileMap.setdefault(outputFileRoot, []).append(
+                os.path.join(imgDir, fileName))
+
+        return fileMap
+
+    def _runInPool(self, func, fileMap, outputDir):
+        """Run the function of each sensor in the thread pool.
+
+        Parameters
+        ----------
+        func : function
+            Function to write the output file with the arguments of (output
+            file path, list of input file paths).
+        fileMap : dict
+            Image file paths of each sensor.
+        outputDir : str
+            Output directory.
+
+        Returns
+        -------
+        list[str]
+            List of output file paths.
+        """
+
+        os.makedirs(outputDir, exist_ok=True)
+
+        ext = ".fits.gz" if (self.compress) else ".fits"
+        outputFilePathList = [os.path.join(outputDir, outputFileRoot + ext)
+                              for outputFileRoot in fileMap.keys()]
+
+        with ThreadPoolExecutor(max_workers=max(self.numOfThread, 1)) as pool:
+            futureList = [
+                pool.submit(func, outputFilePath, inputFileList)
+                for outputFilePath, inputFileList in zip(outputFilePathList,
+                                                         fileMap.values())]
+            for future in futureList:
+                future.result()
+
+        return outputFilePathList
+
+    def _getCamera(self):
+        """Get the camera object.
+
+        The camera of LSST is constructed at the first call if there is no
+        camera set.
+
+        Returns
+        -------
+        Camera
+            A collection of Detectors with the amplifier geometry.
+        """
+
+        if (self._camera is None):
+            mapper = importlib.import_module(
+                "lsst.obs.lsstSim").LsstSimMapper()
+            self._camera = mapper.camera
+
+        return self._camera
+
+    def _writeAmpImgToMef(self, outputFilePath, ampFileList):
+        """Write the amplifier images of a sensor to the MEF.
+
+        The headers are translated as the phosim_repackager.py in
+        phosim_utils. The primary header is the header of first amplifier
+        image without the amplifier keywords, and has the raft, sensor, test
+        type, and image type used by the DM ingestion. Each amplifier image
+        is an extension named "Segment" + channel (e.g. "Segment10") in the
+        order of amplifiers in the camera, and the DATASEC and DETSEC are
+        from the amplifier geometry of camera.
+
+        MEF: multi-extension frames.
+
+        Parameters
+        ----------
+        outputFilePath : str
+            Output file path.
+        ampFileList : list[str]
+            List of amplifier image file paths.
+
+        Raises
+        ------
+        ValueError
+            The amplifier images do not match the amplifiers of sensor.
+        """
+
+        ampFileMap = dict()
+        for ampFilePath in ampFileList:
+            channel = re.match(self.AMP_FILE_PATTERN,
+                               os.path.basename(ampFilePath)).groups()[1]
+            ampFileMap[channel] = ampFilePath
+
+        with fits.open(ampFileList[0]) as hdul:
+            primaryHeader = hdul[0].header.copy(strip=True)
+
+        detector = self._getCamera()[
+            expandDetectorName(primaryHeader["CCDID"])]
+        ampList = [(_getChannel(amp.getName()), amp) for amp in detector]
+        if (sorted(ampFileMap.keys()) !=
+                sorted([channel for channel, amp in ampList])):
+            raise ValueError("The amplifier images of %s do not match the "
+                             "amplifiers of sensor."
+                             % os.path.basename(outputFilePath))
+
+        hduList = fits.HDUList()
+        hduList.append(fits.PrimaryHDU(
+            header=self._getPrimaryHeader(primaryHeader, outputFilePath,
+                                          primaryHeader["CCDID"])))
+        for channel, amp in ampList:
+
+            with fits.open(ampFileMap[channel]) as hdul:
+                header = hdul[0].header.copy(strip=True)
+                data = hdul[0].data
+
+            header["EXTNAME"] = "Segment%s" % channel
+            header["DATASEC"] = _getNoaoSection(amp.getRawDataBBox())
+            header["DETSEC"] = _getNoaoSection(
+                amp.getBBox(), flipX=amp.getRawFlipX(),
+                flipY=amp.getRawFlipY())
+            hduList.append(fits.ImageHDU(data=data, header=header))
+
+        tmpFilePath = self._getTmpFilePath(outputFilePath)
+        hduList.writeto(tmpFilePath, overwrite=True)
+        os.replace(tmpFilePath, outputFilePath)
+
+    def _getPrimaryHeader(self, ampHeader, outputFilePath, sensorName):
+        """Get the primary header of MEF or eimage from the PhoSim header.
+
+        MEF: multi-extension frames.
+
+        Parameters
+        ----------
+        ampHeader : astropy.io.fits.Header
+            Header of amplifier image or eimage.
+        outputFilePath : str
+            Output file path.
+        sensorName : str
+            Abbreviated sensor name (e.g. "R22_S10").
+
+        Returns
+        -------
+        astropy.io.fits.Header
+            Primary header.
+        """
+
+        primaryHeader = ampHeader.copy()
+        for keyword in ("AMPID", "DATASEC", "BIASSEC", "TRIMSEC", "DETSEC"):
+            primaryHeader.remove(keyword, ignore_missing=True)
+
+        primaryHeader["OUTFILE"] = os.path.basename(
+            outputFilePath).split(".")[0]
+        primaryHeader["RUNNUM"] = ampHeader["OBSID"]
+        primaryHeader["DATE-OBS"] = Time(ampHeader["MJD-OBS"],
+                                         format="mjd", scale="tai").isot
+
+        raftName, sensName = sensorName.split("_")
+        primaryHeader["RAFTNAME"] = raftName
+        primaryHeader["SENSNAME"] = sensName
+        primaryHeader["TESTTYPE"] = "PHOSIM"
+        primaryHeader["IMGTYPE"] = "SKYEXP"
+
+        return primaryHeader
+
+    def _writeEimg(self, outputFilePath, eimgFileList):
+        """Write the eimage of a sensor.
+
+        The primary header is translated as the amplifier images by
+        _getPrimaryHeader(). The output is compressed by gzip if the file
+        name ends with ".gz".
+
+        Parameters
+        ----------
+        outputFilePath : str
+            Output file path.
+        eimgFileList : list[str]
+            List of eimage file path. There should be only one file.
+        """
+
+        eimgFilePath = eimgFileList[0]
+        sensorName = re.match(self.EIMG_FILE_PATTERN,
+                              os.path.basename(eimgFilePath)).groups()[1]
+
+        with fits.open(eimgFilePath, memmap=False) as hdul:
+            header = self._getPrimaryHeader(hdul[0].header, outputFilePath,
+                                            sensorName)
+            data = hdul[0].data
+
+        tmpFilePath = self._getTmpFilePath(outputFilePath)
+        fits.PrimaryHDU(data=data, header=header).writeto(tmpFilePath,
+                                                          overwrite=True)
+        os.replace(tmpFilePath, outputFilePath)
+
+    def _getTmpFilePath(self, outputFilePath):
+        """Get the temporary file path in the same directory of output file.
+
+        The same directory makes sure the renaming is atomic.
+
+        Parameters
+        ----------
+        outputFilePath : str
+            Output file path.
+
+        Returns
+        -------
+        str
+            Temporary file path.
+        """
+
+        outputDir, outputFileName = os.path.split(outputFilePath)
+
+        return os.path.join(outputDir, ".tmp_%s" % outputFileName)
+
+    def _rmFiles(self, fileMap, keptFilePathList):
+        """Remove the input files.
+
+        Parameters
+        ----------
+        fileMap : dict
+            Image file paths of each sensor.
+        keptFilePathList : list[str]
+            List of file paths to keep.
+        """
+
+        keptFilePathList = [os.path.abspath(filePath)
+                            for filePath in keptFilePathList]
+        for fileList in fileMap.values():
+            for filePath in fileList:
+                if (os.path.abspath(filePath) not in keptFilePathList):
+                    os.remove(filePath)
+
+
+def _getChannel(ampName):
+    """Get the channel of amplifier from the amplifier name in the camera.
+
+    Parameters
+    ----------
+    ampName : str
+        Amplifier name (e.g. "C10" or "C1,0").
+
+    Returns
+    -------
+    str
+        Channel (e.g. "10").
+    """
+
+    return "".join(re.findall(r"\d", ampName))
+
+
+def _getNoaoSection(bbox, flipX=False, flipY=False):
+    """Get the NOAO section keyword of a bounding box.
+
+    Parameters
+    ----------
+    bbox : lsst.geom.Box2I
+        Bounding box in the 0-based pixel.
+    flipX : bool, optional
+        Flip the x-axis or not. (the default is False.)
+    flipY : bool, optional
+        Flip the y-axis or not. (the default is False.)
+
+    Returns
+    -------
+    str
+        Section keyword in the 1-based pixel (e.g. "[4:512,1:2000]").
+    """
+
+    xMin, xMax = bbox.getMinX() + 1, bbox.getMaxX() + 1
+    yMin, yMax = bbox.getMinY() + 1, bbox.getMaxY() + 1
+    if (flipX):
+        xMin, xMax = xMax, xMin
+    if (flipY):
+        yMin, yMax = yMax, yMin
+
+    return "[%d:%d,%d:%d]" % (xMin, xMax, yMin, yMax)
+
+
+if __name__ == "__main__":
+    pass
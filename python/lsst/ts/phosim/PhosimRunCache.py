@@ -0,0 +1,325 @@
+import os
+import re
+import json
+import shlex
+import shutil
+import hashlib
+import tempfile
+
+
+class PhosimRunCache(object):
+
+    # Options of PhoSim that do not change the output images
+    IGNORED_OPTIONS = ("-o", "-w", "-t", "-p")
+
+    def __init__(self, cacheDir):
+        """Initialization of PhoSim run cache class.
+
+        The output images of PhoSim are kept in a shared store keyed by the
+        content of instance and command files, the files referred by the
+        command file (e.g. mirror surface maps), the PhoSim options, and the
+        PhoSim directory. The simulations with the same inputs (e.g. the
+        first iteration of ensemble members with the same perturbation) run
+        PhoSim only once.
+
+        Parameters
+        ----------
+        cacheDir : str
+            Directory of the shared store.
+        """
+
+        self.cacheDir = cacheDir
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+        # Digests of the files. The key is (file path, modification time,
+        # file size).
+        self._fileDigest = dict()
+
+    def getCacheDir(self):
+        """Get the directory of the shared store.
+
+        Returns
+        -------
+        str
+            Directory of the shared store.
+        """
+
+        return self.cacheDir
+
+    def getKey(self, argString, phosimDir=""):
+        """Get the key of PhoSim run.
+
+        Parameters
+        ----------
+        argString : str
+            Arguments for PhoSim.
+        phosimDir : str, optional
+            Directory of PhoSim. (the default is "".)
+
+        Returns
+        -------
+        str
+            Key (SHA-1 hex digest) of PhoSim run.
+        """
+
+        instFilePath, options = self._parseArgString(argString)
+
+        if (phosimDir != ""):
+            phosimDir = os.path.abspath(phosimDir)
+        content = {"phosimDir": phosimDir,
+                   "instance": self._getFileDigest(instFilePath)}
+
+        for option, value in options.items():
+            if option in self.IGNORED_OPTIONS:
+                continue
+            elif (option == "-c"):
+                content["command"] = self._getFileDigest(value)
+                content["commandRef"] = self._getDigestOfRefFiles(value)
+            else:
+                content[option] = value
+
+        return hashlib.sha1(
+            json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _parseArgString(self, argString):
+        """Parse the arguments for PhoSim.
+
+        Parameters
+        ----------
+        argString : str
+            Arguments for PhoSim.
+
+        Returns
+        -------
+        str
+            Instance file path.
+        dict
+            PhoSim options. The key is the option (e.g. "-c").
+        """
+
+        tokens = shlex.split(argString)
+
+        # Remove the redirection of log
+        if ">" in tokens:
+            tokens = tokens[:tokens.index(">")]
+
+        instFilePath = tokens[0]
+        options = dict(zip(tokens[1::2], tokens[2::2]))
+
+        return instFilePath, options
+
+    def _getFileDigest(self, filePath):
+        """Get the digest of file content.
+
+        Parameters
+        ----------
+        filePath : str
+            File path.
+
+        Returns
+        -------
+        str
+            SHA-1 hex digest of file content.
+        """
+
+        fileStat = os.stat(filePath)
+        fileId = (os.path.abspath(filePath), fileStat.st_mtime,
+                  fileStat.st_size)
+
+        if fileId not in self._fileDigest:
+            sha1 = hashlib.sha1()
+            with open(filePath, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    sha1.update(block)
+            self._fileDigest[fileId] = sha1.hexdigest()
+
+        return self._fileDigest[fileId]
+
+    def _getDigestOfRefFiles(self, cmdFilePath):
+        """Get the digests of files referred by the command file.
+
+        Parameters
+        ----------
+        cmdFilePath : str
+            Physical command file path.
+
+        Returns
+        -------
+        list[str]
+            SHA-1 hex digests of the referred files by the order in the
+            command file.
+        """
+
+        digestList = []
+        with open(cmdFilePath, "r") as file:
+            for line in file:
+                for token in line.split():
+                    if os.path.isabs(token) and os.path.isfile(token):
+                        digestList.append(self._getFileDigest(token))
+
+        return digestList
+
+    def getEntryDir(self, key):
+        """Get the directory of cache entry.
+
+        Parameters
+        ----------
+        key : str
+            Key of PhoSim run.
+
+        Returns
+        -------
+        str
+            Directory of cache entry.
+        """
+
+        return os.path.join(self.cacheDir, key)
+
+    def hasEntry(self, key):
+        """The cache entry exists or not.
+
+        Parameters
+        ----------
+        key : str
+            Key of PhoSim run.
+
+        Returns
+        -------
+        bool
+            True if the cache entry exists.
+        """
+
+        return os.path.isdir(self.getEntryDir(key))
+
+    def runPhoSim(self, tele, argString):
+        """Run the PhoSim by the cache.
+
+        The PhoSim runs only if there is no cache entry. The output images of
+        run are added to the cache entry, and the images in cache entry are
+        linked (or copied) into the output directory.
+
+        Parameters
+        ----------
+        tele : TeleFacade
+            Telescope instance.
+        argString : str
+            Arguments for PhoSim.
+
+        Returns
+        -------
+        bool
+            True if the output images are from the cache.
+
+        Raises
+        ------
+        ValueError
+            There is no output directory in the arguments.
+        """
+
+        instFilePath, options = self._parseArgString(argString)
+        if "-o" not in options:
+            raise ValueError("No output directory in the PhoSim arguments.")
+        outputDir = options["-o"]
+
+        key = self.getKey(argString, phosimDir=tele.getPhoSimDir())
+        isFromCache = self.hasEntry(key)
+        if (not isFromCache):
+            self._addEntry(key, tele, argString)
+
+        self._linkEntryTo(key, outputDir)
+
+        return isFromCache
+
+    def _addEntry(self, key, tele, argString):
+        """Run the PhoSim and add the output images to the cache entry.
+
+        PhoSim writes the output images into a private temporary directory
+        in the shared store instead of the output directory, and the
+        temporary directory is renamed to the cache entry. The concurrent
+        runs into the same output directory (e.g. the runs of each sensor)
+        do not see the images of each other, and the entry only has the
+        images of this run.
+
+        Parameters
+        ----------
+        key : str
+            Key of PhoSim run.
+        tele : TeleFacade
+            Telescope instance.
+        argString : str
+            Arguments for PhoSim.
+        """
+
+        tmpDir = tempfile.mkdtemp(prefix=".tmp_%s_" % key, dir=self.cacheDir)
+        try:
+            tele.runPhoSim(self._replaceOutputDir(argString, tmpDir))
+            os.rename(tmpDir, self.getEntryDir(key))
+
+        except OSError:
+            # The same entry might be added by another process already
+            if (not self.hasEntry(key)):
+                raise
+
+        finally:
+            if os.path.isdir(tmpDir):
+                shutil.rmtree(tmpDir)
+
+    def _replaceOutputDir(self, argString, outputDir):
+        """Replace the output directory in the arguments for PhoSim.
+
+        Parameters
+        ----------
+        argString : str
+            Arguments for PhoSim.
+        outputDir : str
+            New output directory.
+
+        Returns
+        -------
+        str
+            Arguments for PhoSim with the new output directory.
+        """
+
+        return re.sub(r"(\s-o\s+)\S+", lambda m: m.groups()[0] + outputDir,
+                      argString, count=1)
+
+    def _linkEntryTo(self, key, targetDir):
+        """Link the files in cache entry into the target directory.
+
+        The hard link is used if possible. Otherwise, the file is copied.
+        The later processing (e.g. repackaging) might remove the files in the
+        target directory, which does not affect the cache entry.
+
+        Parameters
+        ----------
+        key : str
+            Key of PhoSim run.
+        targetDir : str
+            Target directory.
+        """
+
+        os.makedirs(targetDir, exist_ok=True)
+
+        entryDir = self.getEntryDir(key)
+        for fileName in sorted(os.listdir(entryDir)):
+            srcFilePath = os.path.join(entryDir, fileName)
+            dstFilePath = os.path.join(targetDir, fileName)
+
+            if os.path.lexists(dstFilePath):
+                os.remove(dstFilePath)
+
+            try:
+                os.link(srcFilePath, dstFilePath)
+            except OSError:
+                shutil.copy2(srcFilePath, dstFilePath)
+
+    def clear(self):
+        """Delete all cache entries."""
+
+        for name in os.listdir(self.cacheDir):
+            shutil.rmtree(os.path.join(self.cacheDir, name),
+                          ignore_errors=True)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,135 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from lsst.ts.phosim.Utility import PlotMode
+
+
+class PlotService(object):
+
+    def __init__(self, plotMode=PlotMode.Background, numOfProc=1):
+        """Initialization of plot service class.
+
+        The figures are the side products of closed loop. The plot jobs are
+        run in the background processes, deferred to the end of run, or
+        skipped, so that the rendering does not add to the latency of
+        iteration.
+
+        Parameters
+        ----------
+        plotMode : PlotMode, optional
+            Mode to run the plot jobs. Foreground runs the job in the
+            submission. Background runs the job in the process pool at
+            once. Deferred keeps the job until flush(). Disabled skips the
+            job. (the default is PlotMode.Background.)
+        numOfProc : int, optional
+            Number of processes to run the plot jobs. (the default is 1.)
+        """
+
+        self.plotMode = plotMode
+        self.numOfProc = max(int(numOfProc), 1)
+
+        # Process pool is created at the first job in the background
+        self._executor = None
+
+        # Submitted futures and deferred jobs
+        self._futureList = []
+        self._deferredJobList = []
+
+    def getPlotMode(self):
+        """Get the mode to run the plot jobs.
+
+        Returns
+        -------
+        PlotMode
+            Mode to run the plot jobs.
+        """
+
+        return self.plotMode
+
+    def submit(self, plotFunc, *args, **kwargs):
+        """Submit the plot job.
+
+        The arguments are pickled to the other process in the background.
+        The job should not depend on the state of figure in this process.
+
+        Parameters
+        ----------
+        plotFunc : function
+            Module-level plot function (e.g. plotResMap()).
+        *args
+            Arguments of plot function.
+        **kwargs
+            Keyword arguments of plot function.
+        """
+
+        if (self.plotMode == PlotMode.Foreground):
+            plotFunc(*args, **kwargs)
+
+        elif (self.plotMode == PlotMode.Background):
+            self._submitToExecutor(plotFunc, args, kwargs)
+
+        elif (self.plotMode == PlotMode.Deferred):
+            self._deferredJobList.append((plotFunc, args, kwargs))
+
+    def _submitToExecutor(self, plotFunc, args, kwargs):
+        """Submit the plot job to the process pool.
+
+        Parameters
+        ----------
+        plotFunc : function
+            Module-level plot function.
+        args : tuple
+            Arguments of plot function.
+        kwargs : dict
+            Keyword arguments of plot function.
+        """
+
+        if (self._executor is None):
+            self._executor = ProcessPoolExecutor(max_workers=self.numOfProc)
+
+        self._futureList.append(
+            self._executor.submit(plotFunc, *args, **kwargs))
+
+    def getNumOfPendingJob(self):
+        """Get the number of jobs not finished yet.
+
+        Returns
+        -------
+        int
+            Number of deferred and running jobs.
+        """
+
+        numOfRunningJob = len([future for future in self._futureList
+                               if (not future.done())])
+
+        return numOfRunningJob + len(self._deferredJobList)
+
+    def flush(self):
+        """Run the deferred jobs and wait for all jobs to finish.
+
+        The deferred jobs are run in the process pool. The error of plot is
+        raised if any.
+        """
+
+        deferredJobList = self._deferredJobList
+        self._deferredJobList = []
+        for plotFunc, args, kwargs in deferredJobList:
+            self._submitToExecutor(plotFunc, args, kwargs)
+
+        futureList = self._futureList
+        self._futureList = []
+        for future in futureList:
+            future.result()
+
+    def close(self):
+        """Flush the jobs and shut down the process pool."""
+
+        try:
+            self.flush()
+        finally:
+            if (self._executor is not None):
+                self._executor.shutdown()
+                self._executor = None
+
+
+if __name__ == "__main__":
+    pass
@@ -1,8 +1,26 @@
 import numpy as np
 from lsst.ts.wep.SourceProcessor import SourceProcessor
 
-import matplotlib.pyplot as plt
-plt.switch_backend('Agg')
+
+def _getPyplot():
+    """Get the module of matplotlib.pyplot.
+
+    The pyplot is imported at the first plot with the backend of Agg to save
+    the startup time of modules (e.g. M1M3Sim) that do not plot.
+
+    Returns
+    -------
+    module
+        Module of matplotlib.pyplot.
+    """
+
+    # This does nothing if the backend is Agg already
+    import matplotlib
+    matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+
+    return plt
 
 
 def plotResMap(zfInMm, xfInMm, yfInMm, outerRinMm, resFile=None,
@@ -29,6 +47,7 @@ def plotResMap(zfInMm, xfInMm, yfInMm, outerRinMm, resFile=None,
     """
 
     # Plot the figure
+    plt = _getPyplot()
     fig, ax = plt.subplots(1, 2, figsize=(10, 5))
 
     # The input data to gridSamp.m is in mm (zemax default)
@@ -48,28 +67,19 @@ def plotResMap(zfInMm, xfInMm, yfInMm, outerRinMm, resFile=None,
         NUM_X_PIXELS = int(NUM_X_PIXELS)
         NUM_Y_PIXELS = int(NUM_Y_PIXELS)
 
-        # Get the zp data
-        zpTemp = data[1:, 0]
-        zp = np.zeros((NUM_X_PIXELS, NUM_Y_PIXELS))
-        for jj in range(1, NUM_X_PIXELS + 1):
-            for ii in range(1, NUM_Y_PIXELS + 1):
-                zp[NUM_X_PIXELS+1-jj-1, ii-1] = zpTemp[(jj-1)*NUM_X_PIXELS +
-                                                       (ii-1)]
+        # Get the zp data. The file is written from (-x, -y) with the rows
+        # inverted from top to bottom, so the rows are flipped back here.
+        zp = data[1:, 0].reshape((NUM_X_PIXELS, NUM_Y_PIXELS))[::-1, :]
 
         # Minimum x and y
         minx = -0.5*(NUM_X_PIXELS-1)*delxInMm
         miny = -0.5*(NUM_Y_PIXELS-1)*delyInMm
 
-        xx = np.linspace(minx, -minx, NUM_X_PIXELS)
-        yy = np.linspace(miny, -miny, NUM_Y_PIXELS)
-        xp, yp = np.meshgrid(xx, yy)
-
-        xp = xp.reshape((NUM_X_PIXELS*NUM_Y_PIXELS, 1))
-        yp = yp.reshape((NUM_X_PIXELS*NUM_Y_PIXELS, 1))
-        zp = zp.reshape((NUM_X_PIXELS*NUM_Y_PIXELS, 1))
-
-        sc = ax[0].scatter(xp, yp, s=25, c=zp*1e6, marker=".",
-                           edgecolor="none")
+        # The grid is regular and rendered as a raster
+        extent = [minx - 0.5*delxInMm, -minx + 0.5*delxInMm,
+                  miny - 0.5*delyInMm, -miny + 0.5*delyInMm]
+        sc = ax[0].imshow(zp*1e6, origin="lower", extent=extent,
+                          interpolation="nearest")
 
     ax[0].axis("equal")
     ax[0].set_title("grid input to ZEMAX (nm)")
@@ -122,6 +132,7 @@ def showFieldMap(fieldX=None, fieldY=None, saveToFilePath=None, dpi=None):
     """
 
     # Declare the figure
+    plt = _getPyplot()
     plt.figure()
 
     # Get the focal plane information
@@ -225,26 +236,84 @@ def plotFwhmOfIters(pssnFiles, saveToFilePath=None, dpi=None):
         The resolution in dots per inch. (the default is None.)
     """
 
-    # Collect the FWHM data. The row is the FWHM for each field. The final row
-    # is the GQ FWHM. The column is the iterations.
-    numOfIter = len(pssnFiles)
+    # Collect the FWHM data. The second row of PSSN file is the FWHM for each
+    # field. The final number is the GQ FWHM.
+    fwhmData = np.array([np.loadtxt(pssnFile)[1, :] for pssnFile in pssnFiles])
+
+    plotFwhmData(fwhmData, saveToFilePath=saveToFilePath, dpi=dpi)
+
+
+def plotFwhmOfItersInStore(resultsStore, saveToFilePath=None, dpi=None):
+    """Plot the FWHM of iteration in the store of results.
+
+    FWHM: Full width at half maximum.
+    PSSN: Normalized point source sensitivity.
+
+    Parameters
+    ----------
+    resultsStore : ResultsStore
+        Store of results with the quantity of "pssn".
+    saveToFilePath : str, optional
+        File path to save the figure. If None, the figure will be showed. (the
+        default is None.)
+    dpi : int, optional
+        The resolution in dots per inch. (the default is None.)
+    """
+
+    fwhmData = getFwhmDataInStore(resultsStore)
+
+    plotFwhmData(fwhmData, saveToFilePath=saveToFilePath, dpi=dpi)
+
+
+def getFwhmDataInStore(resultsStore):
+    """Get the FWHM data of iteration in the store of results.
+
+    The data can be plotted by plotFwhmData() in the other process, while
+    the store can not be pickled.
+
+    FWHM: Full width at half maximum.
+
+    Parameters
+    ----------
+    resultsStore : ResultsStore
+        Store of results with the quantity of "pssn".
+
+    Returns
+    -------
+    numpy.ndarray
+        FWHM data in arcsec. The row is the iteration. The column is the FWHM
+        for each field and the final column is the GQ FWHM.
+    """
+
+    # The data of PSSN is the same as the PSSN file
+    return resultsStore.getDataOfIters("pssn")[:, 1, :]
 
-    numOfFwhmData = 0
-    fwhmDataAll = np.array([])
-    for pssnFile in pssnFiles:
 
-        fwhmData = np.loadtxt(pssnFile)[1, :]
-        if (numOfFwhmData == 0):
-            numOfFwhmData = len(fwhmData)
+def plotFwhmData(fwhmData, saveToFilePath=None, dpi=None):
+    """Plot the FWHM data of iteration.
 
-        fwhmDataAll = np.append(fwhmDataAll, fwhmData)
+    FWHM: Full width at half maximum.
+    GQ: Gaussian quadrature.
+
+    Parameters
+    ----------
+    fwhmData : numpy.ndarray
+        FWHM data in arcsec. The row is the iteration. The column is the FWHM
+        for each field and the final column is the GQ FWHM.
+    saveToFilePath : str, optional
+        File path to save the figure. If None, the figure will be showed. (the
+        default is None.)
+    dpi : int, optional
+        The resolution in dots per inch. (the default is None.)
+    """
 
-    reshapedFwhmData = fwhmDataAll.reshape((numOfIter, numOfFwhmData)).T
+    fwhmData = np.atleast_2d(fwhmData)
 
     # Plot the figure
+    plt = _getPyplot()
     plt.figure()
-    plt.plot(reshapedFwhmData[:-1, :].T, "bx-")
-    plt.plot(reshapedFwhmData[-1, :], "ro-", label="GQ FWHM_eff")
+    plt.plot(fwhmData[:, :-1], "bx-")
+    plt.plot(fwhmData[:, -1], "ro-", label="GQ FWHM_eff")
     plt.xlabel("Iteration")
     plt.ylabel("Arcsec")
     plt.legend()
@@ -0,0 +1,464 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+from lsst.ts.wep.cwfs.Tool import ZernikeAnnularEval
+
+from lsst.ts.phosim.MetroTool import calc_pssn
+
+
+class PssnModel(object):
+
+    # Index of z4 in the annular Zernike polynomials
+    ZK_START_IDX = 3
+
+    def __init__(self, wavelengthInUm, zen=0, r0inmRef=0.1382, znTerms=22,
+                 opdSize=255, obscuration=0.61):
+        """Initialization of PSSN model class.
+
+        For the small aberration, 1/PSSN^2 - 1 is well approximated by a
+        quadratic form of the annular Zernike polynomials (z4-zn) of OPD:
+        1/PSSN^2 - 1 = zk^T Q zk. The symmetric matrix Q is calibrated by the
+        exact calc_pssn() of the synthetic OPD maps, and the PSSN of zk is
+        evaluated without the OPD map and FFT. The calibration depends on the
+        wavelength, zenith angle, and r0.
+
+        PSSN: Normalized point source sensitivity.
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        wavelengthInUm : float
+            Wavelength in um.
+        zen : float, optional
+            Telescope zenith angle in degree. (the default is 0.)
+        r0inmRef : float, optional
+            Fidicial atmosphere r0 @ 500nm in meter. (the default is 0.1382.)
+        znTerms : int, optional
+            Number of terms of annular Zk (z1-z22 by default). The model uses
+            z4-zn. (the default is 22.)
+        opdSize : int, optional
+            Dimension of the synthetic OPD map in pixel. (the default is
+            255.)
+        obscuration : float, optional
+            Obscuration of annular Zernike polynomial. (the default is 0.61.)
+        """
+
+        self.wavelengthInUm = float(wavelengthInUm)
+        self.zen = float(zen)
+        self.r0inmRef = float(r0inmRef)
+        self.znTerms = int(znTerms)
+        self.opdSize = int(opdSize)
+        self.obscuration = float(obscuration)
+
+        # Quadratic form of z4-zn
+        self._qMat = None
+
+        # Ratio of the absolute PSSN error to the square of zk rms in the
+        # validation samples
+        self._errorCoef = np.inf
+
+        # Max rms of zk in um in the calibration. The error bound does not
+        # hold out of this range.
+        self._maxRmsInUm = 0.0
+
+    def getNumOfZk(self):
+        """Get the number of zk used in the model.
+
+        Returns
+        -------
+        int
+            Number of zk (z4-zn).
+        """
+
+        return self.znTerms - self.ZK_START_IDX
+
+    def getKey(self):
+        """Get the key of model parameters.
+
+        Returns
+        -------
+        str
+            Key (SHA-1 hex digest) of model parameters.
+        """
+
+        param = {"wavelengthInUm": self.wavelengthInUm, "zen": self.zen,
+                 "r0inmRef": self.r0inmRef, "znTerms": self.znTerms,
+                 "opdSize": self.opdSize, "obscuration": self.obscuration}
+        content = json.dumps(param, sort_keys=True)
+
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def isCalibrated(self):
+        """The model is calibrated or not.
+
+        Returns
+        -------
+        bool
+            True if the model is calibrated.
+        """
+
+        return (self._qMat is not None)
+
+    def getQuadraticForm(self):
+        """Get the quadratic form of zk.
+
+        Returns
+        -------
+        numpy.ndarray
+            Symmetric matrix Q of z4-zn in um^-2. This is None if the model
+            is not calibrated.
+        """
+
+        return self._qMat
+
+    def getErrorBound(self):
+        """Get the error bound of PSSN.
+
+        The error bound of zk is errorCoef * rms^2 if the rms of zk is in the
+        calibration range. The error of model grows faster than rms^2, so
+        the bound from the validation samples holds for the small rms.
+
+        Returns
+        -------
+        float
+            Max ratio of the absolute PSSN error to the square of zk rms in
+            the validation samples in um^-2.
+        float
+            Max rms of zk in um in the calibration.
+        """
+
+        return self._errorCoef, self._maxRmsInUm
+
+    def calibrate(self, numOfSample=400, maxRmsInUm=0.3, validRatio=0.2,
+                  seedNum=0):
+        """Calibrate the model by the exact PSSN of synthetic OPD maps.
+
+        The zk of samples are in the random directions with the rms uniform
+        between 0 and maxRmsInUm.
+
+        Parameters
+        ----------
+        numOfSample : int, optional
+            Number of samples. (the default is 400.)
+        maxRmsInUm : float, optional
+            Max rms of zk in um. (the default is 0.3.)
+        validRatio : float, optional
+            Ratio of samples for the validation, which are not used in the
+            fitting. (the default is 0.2.)
+        seedNum : int, optional
+            Random seed number. (the default is 0.)
+
+        Raises
+        ------
+        ValueError
+            The number of samples is not enough to fit the quadratic form.
+        """
+
+        numOfFitSample = numOfSample - int(numOfSample * validRatio)
+        numOfCoef = int(np.sum(np.triu(self._getCouplingMask())))
+        if (numOfFitSample < numOfCoef):
+            raise ValueError("The number of samples (%d) for the fitting is "
+                             "less than the number of coefficients (%d)."
+                             % (numOfFitSample, numOfCoef))
+
+        zk = self._getSampleZk(numOfSample, maxRmsInUm, seedNum)
+        pssn = self.calcExactPssn(zk)
+
+        self._qMat = self._fitQuadraticForm(zk[:numOfFitSample],
+                                            1 / pssn[:numOfFitSample]**2 - 1)
+
+        # Use all samples to estimate the error if there is no validation
+        # sample
+        validIdx = slice(numOfFitSample, None) \
+            if (numOfFitSample < numOfSample) else slice(None)
+        pssnModel = self._calcPssn(zk[validIdx])
+        rmsInUm = np.linalg.norm(zk[validIdx], axis=1)
+        isNonZero = (rmsInUm > 0)
+        self._errorCoef = float(np.max(
+            np.abs(pssnModel - pssn[validIdx])[isNonZero] /
+            rmsInUm[isNonZero]**2))
+
+        self._maxRmsInUm = float(maxRmsInUm)
+
+    def _getSampleZk(self, numOfSample, maxRmsInUm, seedNum):
+        """Get the zk of samples.
+
+        Parameters
+        ----------
+        numOfSample : int
+            Number of samples.
+        maxRmsInUm : float
+            Max rms of zk in um.
+        seedNum : int
+            Random seed number.
+
+        Returns
+        -------
+        numpy.ndarray
+            Zk (z4-zn) in um. The row is the sample.
+        """
+
+        rng = np.random.RandomState(seedNum)
+
+        direction = rng.normal(size=(numOfSample, self.getNumOfZk()))
+        direction /= np.linalg.norm(direction, axis=1)[:, np.newaxis]
+        rmsInUm = rng.uniform(0, maxRmsInUm, size=numOfSample)
+
+        return direction * rmsInUm[:, np.newaxis]
+
+    def calcExactPssn(self, zk):
+        """Calculate the exact PSSN of zk by the OPD map.
+
+        Parameters
+        ----------
+        zk : numpy.ndarray
+            Zk (z4-zn) in um. The row is the sample.
+
+        Returns
+        -------
+        numpy.ndarray
+            PSSN of each sample.
+        """
+
+        zk = np.atleast_2d(zk)
+
+        opdGrid1d = np.linspace(-1, 1, self.opdSize)
+        opdx, opdy = np.meshgrid(opdGrid1d, opdGrid1d)
+        r2 = opdx**2 + opdy**2
+        idx = (r2 <= 1) & (r2 >= self.obscuration**2)
+
+        zkAll = np.zeros(self.znTerms)
+        pssn = np.zeros(len(zk))
+        for sampleIdx, zkSample in enumerate(zk):
+            zkAll[self.ZK_START_IDX:] = zkSample
+
+            opd = np.zeros((self.opdSize, self.opdSize))
+            opd[idx] = ZernikeAnnularEval(zkAll, opdx[idx], opdy[idx],
+                                          self.obscuration)
+
+            # Remove the piston and tilts as OpdMetrology.calcPSSN()
+            opd[idx] -= self._getPttInPupil(opd[idx], opdx[idx], opdy[idx])
+
+            pssn[sampleIdx] = calc_pssn(opd, self.wavelengthInUm,
+                                        r0inmRef=self.r0inmRef, zen=self.zen)
+
+        return pssn
+
+    def _getPttInPupil(self, opdInPupil, x, y):
+        """Get the piston and tilts of OPD in the pupil.
+
+        PTT: Piston, x-tilt, and y-tilt.
+
+        Parameters
+        ----------
+        opdInPupil : numpy.ndarray
+            OPD values in the pupil.
+        x : numpy.ndarray
+            x of OPD values.
+        y : numpy.ndarray
+            y of OPD values.
+
+        Returns
+        -------
+        numpy.ndarray
+            PTT at the OPD values.
+        """
+
+        design = np.column_stack((np.ones(len(x)), x, y))
+        coef = np.linalg.lstsq(design, opdInPupil, rcond=None)[0]
+
+        return design.dot(coef)
+
+    def _getCouplingMask(self):
+        """Get the mask of coupled zk in the quadratic form.
+
+        The atmosphere is isotropic and the PSSN does not change with the
+        rotation of OPD. Therefore, only the zk with the same azimuthal order
+        and the same parity (cos or sin) are coupled.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            Mask of coupled z4-zn.
+        """
+
+        azimuthalOrder = []
+        for nollIdx in range(self.ZK_START_IDX + 1, self.znTerms + 1):
+
+            # Radial order and the position in the row of radial order
+            radialOrder = 0
+            while ((radialOrder + 1) * (radialOrder + 2) // 2 < nollIdx):
+                radialOrder += 1
+            pos = nollIdx - radialOrder * (radialOrder + 1) // 2 - 1
+
+            if (radialOrder % 2 == 0):
+                order = 2 * ((pos + 1) // 2)
+            else:
+                order = 2 * (pos // 2) + 1
+
+            # The even Noll index is cos and the odd one is sin
+            if (order != 0) and (nollIdx % 2 == 1):
+                order = -order
+            azimuthalOrder.append(order)
+
+        azimuthalOrder = np.array(azimuthalOrder)
+
+        return (azimuthalOrder[:, np.newaxis] == azimuthalOrder[np.newaxis, :])
+
+    def _fitQuadraticForm(self, zk, value):
+        """Fit the symmetric quadratic form.
+
+        Parameters
+        ----------
+        zk : numpy.ndarray
+            Zk in um. The row is the sample.
+        value : numpy.ndarray
+            Value of quadratic form of each sample.
+
+        Returns
+        -------
+        numpy.ndarray
+            Symmetric matrix Q.
+        """
+
+        numOfZk = zk.shape[1]
+        rowIdx, colIdx = np.nonzero(np.triu(self._getCouplingMask()))
+
+        # The off-diagonal terms appear twice in zk^T Q zk
+        design = zk[:, rowIdx] * zk[:, colIdx]
+        design[:, rowIdx != colIdx] *= 2
+
+        coef = np.linalg.lstsq(design, value, rcond=None)[0]
+
+        qMat = np.zeros((numOfZk, numOfZk))
+        qMat[rowIdx, colIdx] = coef
+        qMat[colIdx, rowIdx] = coef
+
+        return qMat
+
+    def calcPssn(self, zk):
+        """Calculate the PSSN of zk by the model.
+
+        Parameters
+        ----------
+        zk : numpy.ndarray
+            Zk (z4-zn) in um. This is a 1D array of one sample or 2D array
+            with the row as the sample (e.g. the data in opd.zer).
+
+        Returns
+        -------
+        numpy.ndarray or float
+            PSSN.
+        numpy.ndarray or float
+            Error bound of PSSN. This is numpy.inf if the rms of zk is out of
+            the calibration range.
+
+        Raises
+        ------
+        RuntimeError
+            The model is not calibrated.
+        """
+
+        if (not self.isCalibrated()):
+            raise RuntimeError("The PSSN model is not calibrated.")
+
+        zkArray = np.atleast_2d(np.asarray(zk, dtype=float))
+        pssn = self._calcPssn(zkArray)
+
+        rmsInUm = np.linalg.norm(zkArray, axis=1)
+        errorBound = np.where(rmsInUm <= self._maxRmsInUm,
+                              self._errorCoef * rmsInUm**2, np.inf)
+
+        if (np.ndim(zk) == 1):
+            return float(pssn[0]), float(errorBound[0])
+        else:
+            return pssn, errorBound
+
+    def _calcPssn(self, zk):
+        """Calculate the PSSN of zk by the quadratic form.
+
+        Parameters
+        ----------
+        zk : numpy.ndarray
+            Zk in um. The row is the sample.
+
+        Returns
+        -------
+        numpy.ndarray
+            PSSN of each sample.
+        """
+
+        value = np.einsum("ij,jk,ik->i", zk, self._qMat, zk)
+
+        # The quadratic form is positive for a physical model, but the fitted
+        # one might be slightly negative close to 0.
+        return 1 / np.sqrt(1 + np.maximum(value, 0))
+
+    def writeToFile(self, filePath):
+        """Write the model to file.
+
+        Parameters
+        ----------
+        filePath : str
+            File path (.npz).
+
+        Raises
+        ------
+        RuntimeError
+            The model is not calibrated.
+        """
+
+        if (not self.isCalibrated()):
+            raise RuntimeError("The PSSN model is not calibrated.")
+
+        np.savez(filePath, key=self.getKey(), qMat=self._qMat,
+                 errorCoef=self._errorCoef, maxRmsInUm=self._maxRmsInUm)
+
+    def readFromFile(self, filePath):
+        """Read the model from file.
+
+        Parameters
+        ----------
+        filePath : str
+            File path (.npz).
+
+        Raises
+        ------
+        ValueError
+            The model parameters in file are different.
+        """
+
+        with np.load(filePath) as data:
+            if (str(data["key"]) != self.getKey()):
+                raise ValueError("The model parameters in %s are different."
+                                 % filePath)
+
+            qMat = data["qMat"]
+            errorCoef = float(data["errorCoef"])
+            maxRmsInUm = float(data["maxRmsInUm"])
+
+        self._qMat = qMat
+        self._errorCoef = errorCoef
+        self._maxRmsInUm = maxRmsInUm
+
+    def getCacheFilePath(self, cacheDir):
+        """Get the file path of model in the cache directory.
+
+        Parameters
+        ----------
+        cacheDir : str
+            Cache directory.
+
+        Returns
+        -------
+        str
+            File path.
+        """
+
+        return os.path.join(cacheDir, "pssnModel_%s.npz" % self.getKey())
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,456 @@
+import os
+import re
+import json
+import base64
+import zipfile
+import threading
+import numpy as np
+
+
+class ResultsStore(object):
+
+    # Member name of the data in the container. For example, "iter0/pssn.npy".
+    MEMBER_NAME_FORMAT = "iter%d/%s.npy"
+    MEMBER_NAME_PATTERN = r"\Aiter(\d+)/(\w+)\.npy\Z"
+
+    def __init__(self, filePath):
+        """Initialization of results store class.
+
+        The results of closed-loop iterations are kept in a single binary
+        container with one dataset per (iteration, quantity). The container
+        is an uncompressed zip archive of .npy members, which is the same
+        format as numpy.savez(). It can be read by numpy.load() directly.
+
+        The data are appended to the end of container without rewriting the
+        existed members. After each appending, a small index file next to
+        the container commits the end of members and the central directory
+        of zip. If the process is killed in the appending, the container is
+        restored to the committed state at the next opening. The data
+        written or read are kept in the memory, and the later reading will
+        not touch the file again.
+
+        Parameters
+        ----------
+        filePath : str
+            File path of the container. The container will be constructed if
+            there is no existed one.
+        """
+
+        self.filePath = filePath
+
+        # Data in the memory. The key is (iteration number, quantity).
+        self._data = dict()
+
+        # Keys of the data in the container
+        self._keyList = []
+
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.filePath):
+            if os.path.exists(self._getIndexFilePath()):
+                self._restoreCommittedState()
+            else:
+                self._commitIndex()
+
+            with zipfile.ZipFile(self.filePath, mode="r") as zf:
+                for memberName in zf.namelist():
+                    key = self._getKeyOfMemberName(memberName)
+                    if (key is not None):
+                        self._keyList.append(key)
+
+        elif os.path.exists(self._getIndexFilePath()):
+            # The index of a removed container
+            os.remove(self._getIndexFilePath())
+
+    def _getKeyOfMemberName(self, memberName):
+        """Get the key of the member name in the container.
+
+        Parameters
+        ----------
+        memberName : str
+            Member name.
+
+        Returns
+        -------
+        tuple or None
+            (iteration number, quantity). None if the member name does not
+            follow the format.
+        """
+
+        m = re.match(self.MEMBER_NAME_PATTERN, memberName)
+        if (m is None):
+            return None
+
+        return (int(m.groups()[0]), m.groups()[1])
+
+    def getFilePath(self):
+        """Get the file path of the container.
+
+        Returns
+        -------
+        str
+            File path of the container.
+        """
+
+        return self.filePath
+
+    def addData(self, iterNum, quantity, data):
+        """Add the data of quantity in the iteration.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        quantity : str
+            Name of quantity (e.g. "pssn").
+        data : numpy.ndarray
+            Data.
+
+        Raises
+        ------
+        ValueError
+            The data of quantity in the iteration exists already.
+        """
+
+        key = (int(iterNum), quantity)
+        data = np.array(data)
+
+        with self._lock:
+            if key in self._keyList:
+                raise ValueError("The data of %s in iteration %d exists."
+                                 % (quantity, iterNum))
+
+            self._append(key, data)
+
+            self._keyList.append(key)
+            self._data[key] = data
+
+    def hasData(self, iterNum, quantity):
+        """The data of quantity in the iteration exists or not.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        quantity : str
+            Name of quantity.
+
+        Returns
+        -------
+        bool
+            True if the data exists.
+        """
+
+        return (int(iterNum), quantity) in self._keyList
+
+    def getData(self, iterNum, quantity):
+        """Get the data of quantity in the iteration.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+        quantity : str
+            Name of quantity.
+
+        Returns
+        -------
+        numpy.ndarray
+            Data.
+
+        Raises
+        ------
+        ValueError
+            The data of quantity in the iteration does not exist.
+        """
+
+        key = (int(iterNum), quantity)
+        if key not in self._keyList:
+            raise ValueError("No data of %s in iteration %d."
+                             % (quantity, iterNum))
+
+        if key not in self._data:
+            self._readData([key])
+
+        return self._data[key]
+
+    def getIterNumList(self, quantity=None):
+        """Get the list of iteration numbers.
+
+        Parameters
+        ----------
+        quantity : str, optional
+            Name of quantity. If not None, only the iterations with this
+            quantity are listed. (the default is None.)
+
+        Returns
+        -------
+        list[int]
+            Sorted list of iteration numbers.
+        """
+
+        iterNumList = set()
+        for iterNum, quantityInStore in self._keyList:
+            if (quantity is None) or (quantityInStore == quantity):
+                iterNumList.add(iterNum)
+
+        return sorted(iterNumList)
+
+    def getQuantityList(self, iterNum):
+        """Get the list of quantities in the iteration.
+
+        Parameters
+        ----------
+        iterNum : int
+            Iteration number.
+
+        Returns
+        -------
+        list[str]
+            Sorted list of quantities.
+        """
+
+        return sorted([quantity for iterNumInStore, quantity in self._keyList
+                       if iterNumInStore == int(iterNum)])
+
+    def getDataOfIters(self, quantity, iterNumList=None):
+        """Get the data of quantity in the iterations.
+
+        The data not in the memory yet are read in a single pass of the
+        container.
+
+        Parameters
+        ----------
+        quantity : str
+            Name of quantity.
+        iterNumList : list[int], optional
+            List of iteration numbers. If None, all iterations with this
+            quantity are used. (the default is None.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Data stacked along the first axis by the order of iterations.
+        """
+
+        if (iterNumList is None):
+            iterNumList = self.getIterNumList(quantity=quantity)
+
+        keyList = [(int(iterNum), quantity) for iterNum in iterNumList]
+        for iterNum, key in zip(iterNumList, keyList):
+            if key not in self._keyList:
+                raise ValueError("No data of %s in iteration %d."
+                                 % (quantity, iterNum))
+
+        self._readData([key for key in keyList if key not in self._data])
+
+        return np.stack([self._data[key] for key in keyList])
+
+    def _readData(self, keyList):
+        """Read the data from the container to the memory.
+
+        Parameters
+        ----------
+        keyList : list[tuple]
+            List of (iteration number, quantity).
+        """
+
+        if (len(keyList) == 0):
+            return
+
+        with self._lock:
+            with zipfile.ZipFile(self.filePath, mode="r") as zf:
+                for key in keyList:
+                    with zf.open(self.MEMBER_NAME_FORMAT % key) as file:
+                        self._data[key] = np.lib.format.read_array(
+                            file, allow_pickle=False)
+
+    def truncate(self, iterNum):
+        """Remove the data of iterations since the iteration number.
+
+        This is used to resume the closed loop from an unfinished iteration.
+        The container is rewritten into a temporary file and renamed, and
+        the index is committed again.
+
+        Parameters
+        ----------
+        iterNum : int
+            The data of iterations >= iterNum are removed.
+        """
+
+        removedKeyList = [key for key in self._keyList
+                          if key[0] >= int(iterNum)]
+        if (len(removedKeyList) == 0):
+            return
+
+        with self._lock:
+            keptKeyList = [key for key in self._keyList
+                           if key not in removedKeyList]
+
+            # The index of the old container is removed first. The renamed
+            # container is always complete and indexed again at the opening.
+            os.remove(self._getIndexFilePath())
+            self._rewrite(keptKeyList)
+            self._commitIndex()
+
+            self._keyList = keptKeyList
+            for key in removedKeyList:
+                self._data.pop(key, None)
+
+    def _append(self, key, data):
+        """Append the data to the container and commit the index.
+
+        The container is restored to the committed state if the appending
+        fails.
+
+        Parameters
+        ----------
+        key : tuple
+            (iteration number, quantity) of the data.
+        data : numpy.ndarray
+            Data.
+        """
+
+        # Commit the empty container first. Then there is always a
+        # committed state to restore.
+        if (not os.path.exists(self.filePath)):
+            self._rewrite([])
+            self._commitIndex()
+
+        try:
+            with zipfile.ZipFile(self.filePath, mode="a",
+                                 compression=zipfile.ZIP_STORED,
+                                 allowZip64=True) as zf:
+                with zf.open(self.MEMBER_NAME_FORMAT % key, mode="w",
+                             force_zip64=True) as file:
+                    np.lib.format.write_array(file, data, allow_pickle=False)
+
+            _fsyncFile(self.filePath)
+            self._commitIndex()
+
+        except BaseException:
+            self._restoreCommittedState()
+            raise
+
+    def _getIndexFilePath(self):
+        """Get the path of index file.
+
+        Returns
+        -------
+        str
+            Path of index file.
+        """
+
+        outputDir, fileName = os.path.split(os.path.abspath(self.filePath))
+
+        return os.path.join(outputDir, ".%s.index" % fileName)
+
+    def _commitIndex(self):
+        """Commit the index of container.
+
+        The index keeps the end of members (the offset of central directory)
+        and the bytes after it. It is written into a temporary file and
+        renamed.
+        """
+
+        with zipfile.ZipFile(self.filePath, mode="r") as zf:
+            endOfMember = zf.start_dir
+
+        with open(self.filePath, "rb") as file:
+            file.seek(endOfMember)
+            tail = file.read()
+
+        content = json.dumps({"endOfMember": endOfMember,
+                              "tail": base64.b64encode(tail).decode("ascii")})
+
+        indexFilePath = self._getIndexFilePath()
+        tmpFilePath = indexFilePath + ".tmp"
+        with open(tmpFilePath, "w") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmpFilePath, indexFilePath)
+
+    def _restoreCommittedState(self):
+        """Restore the container to the state in the committed index.
+
+        The bytes after the end of committed members (the partial member and
+        central directory of a killed appending) are replaced by the
+        committed central directory.
+        """
+
+        with open(self._getIndexFilePath(), "r") as file:
+            index = json.load(file)
+
+        endOfMember = index["endOfMember"]
+        tail = base64.b64decode(index["tail"])
+
+        with open(self.filePath, "r+b") as file:
+            file.seek(endOfMember)
+            if (file.read() == tail):
+                return
+
+            file.seek(endOfMember)
+            file.truncate()
+            file.write(tail)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _rewrite(self, keptKeyList):
+        """Rewrite the container with the kept data.
+
+        The container is written into a temporary file and renamed, which is
+        atomic. The existed container is not changed if the writing fails.
+
+        Parameters
+        ----------
+        keptKeyList : list[tuple]
+            List of (iteration number, quantity) of the data kept from the
+            existed container.
+        """
+
+        outputDir, fileName = os.path.split(os.path.abspath(self.filePath))
+        tmpFilePath = os.path.join(outputDir, ".tmp_%s" % fileName)
+
+        try:
+            with zipfile.ZipFile(tmpFilePath, mode="w",
+                                 compression=zipfile.ZIP_STORED,
+                                 allowZip64=True) as zfOut:
+
+                if (len(keptKeyList) != 0):
+                    with zipfile.ZipFile(self.filePath, mode="r") as zfIn:
+                        for key in keptKeyList:
+                            memberName = self.MEMBER_NAME_FORMAT % key
+                            zfOut.writestr(memberName, zfIn.read(memberName))
+
+            _fsyncFile(tmpFilePath)
+
+        except BaseException:
+            if os.path.exists(tmpFilePath):
+                os.remove(tmpFilePath)
+            raise
+
+        os.replace(tmpFilePath, self.filePath)
+
+    def load(self):
+        """Load all data in the container to the memory."""
+
+        self._readData([key for key in self._keyList
+                        if key not in self._data])
+
+
+def _fsyncFile(filePath):
+    """Flush the file content to the disk.
+
+    Parameters
+    ----------
+    filePath : str
+        File path.
+    """
+
+    with open(filePath, "rb+") as file:
+        os.fsync(file.fileno())
+
+
+if __name__ == "__main__":
+    pass
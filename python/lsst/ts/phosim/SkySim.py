@@ -1,11 +1,16 @@
+import itertools
+import importlib
 import numpy as np
 
-from lsst.obs.lsstSim import LsstSimMapper
-from lsst.sims.utils import ObservationMetaData
-from lsst.sims.coordUtils.CameraUtils import raDecFromPixelCoords
-
 from lsst.ts.wep.SourceProcessor import SourceProcessor
-from lsst.ts.wep.Utility import expandDetectorName
+from lsst.ts.wep.Utility import expandDetectorName, abbrevDectectorName
+
+# Module of the coordinate transformation in SIMS
+CAMERA_UTILS = "lsst.sims.coordUtils.CameraUtils"
+
+# Data type of the binary star catalog
+STAR_CATALOG_DTYPE = np.dtype([("id", np.int64), ("ra", np.float64),
+                               ("decl", np.float64), ("mag", np.float64)])
 
 
 class SkySim(object):
@@ -26,11 +31,12 @@ class SkySim(object):
         self.mag = np.array([])
 
         # DM camera object contains the information to do the coordinate
-        # transformation
-        self._camera = LsstSimMapper().camera
+        # transformation. It is constructed at the first use.
+        self._camera = None
 
-        # SIMS observation metadata object
-        self._obs = ObservationMetaData()
+        # SIMS observation metadata object. It is constructed at the first
+        # use.
+        self._obs = None
 
         # Source processor in ts_wep
         self._sourProc = SourceProcessor()
@@ -85,6 +91,42 @@ class SkySim(object):
 
         self._camera = camera
 
+    def _getCamera(self):
+        """Get the camera object.
+
+        The camera of LSST is constructed at the first call if there is no
+        camera set.
+
+        Returns
+        -------
+        Camera
+            A collection of Detectors that also supports coordinate
+            transformation.
+        """
+
+        if (self._camera is None):
+            mapper = _importModule("lsst.obs.lsstSim").LsstSimMapper()
+            self._camera = mapper.camera
+
+        return self._camera
+
+    def _getObs(self):
+        """Get the observation meta data.
+
+        The default observation meta data is constructed at the first call
+        if there is no meta data set.
+
+        Returns
+        -------
+        ObservationMetaData
+            Observation meta data of SIMS.
+        """
+
+        if (self._obs is None):
+            self._obs = _importModule("lsst.sims.utils").ObservationMetaData()
+
+        return self._obs
+
     def setObservationMetaData(self, ra, decl, rotSkyPos, mjd):
         """Set the observation meta data.
 
@@ -100,6 +142,8 @@ class SkySim(object):
             Camera MJD.
         """
 
+        ObservationMetaData = _importModule(
+            "lsst.sims.utils").ObservationMetaData
         self._obs = ObservationMetaData(pointingRA=ra, pointingDec=decl,
                                         rotSkyPos=rotSkyPos,
                                         mjd=mjd)
@@ -119,61 +163,68 @@ class SkySim(object):
             Star magnitude.
         """
 
-        # Check the inputs are list or not, and change the type if necessary
-        starIdList = self._changeToListIfNecessary(starId)
-        raInDegList = self._changeToListIfNecessary(raInDeg)
-        declInDegList = self._changeToListIfNecessary(declInDeg)
-        magList = self._changeToListIfNecessary(mag)
+        # Change the inputs to the 1D arrays
+        starIdList = np.atleast_1d(np.asarray(starId, dtype=int))
+        raInDegList = self._broadcastToStarNum(raInDeg, len(starIdList))
+        declInDegList = self._broadcastToStarNum(declInDeg, len(starIdList))
+        magList = self._broadcastToStarNum(mag, len(starIdList))
+
+        # Only keep the first appearance of each star Id in the inputs and
+        # the Ids that do not exist yet. The input order is kept.
+        isUniq = self._isUniqStarId(starIdList)
 
         # Add the stars
-        for ii in range(len(starIdList)):
-            intStarId = int(starIdList[ii])
-            if (self._isUniqStarId(intStarId)):
-                self.starId = np.append(self.starId, intStarId)
-                self.ra = np.append(self.ra, raInDegList[ii])
-                self.decl = np.append(self.decl, declInDegList[ii])
-                self.mag = np.append(self.mag, magList[ii])
+        self.starId = np.append(self.starId, starIdList[isUniq])
+        self.ra = np.append(self.ra, raInDegList[isUniq])
+        self.decl = np.append(self.decl, declInDegList[isUniq])
+        self.mag = np.append(self.mag, magList[isUniq])
 
-    def _changeToListIfNecessary(self, variable):
-        """Change the data type to list.
+    def _broadcastToStarNum(self, variable, numOfStar):
+        """Broadcast the variable to the 1D array with the number of stars.
 
         Parameters
         ----------
-        variable : int, float, list, or numpy.ndarray
+        variable : float, list, or numpy.ndarray
             Variable.
+        numOfStar : int
+            Number of stars.
 
         Returns
         -------
-        list
-            Variable as the list.
+        numpy.ndarray
+            Variable as the 1D array.
         """
 
-        if isinstance(variable, (int, float)):
-            return [variable]
-        else:
-            return variable
+        return np.broadcast_to(np.asarray(variable, dtype=float),
+                               (numOfStar,))
 
-    def _isUniqStarId(self, starId):
-        """Check the star ID is unique or not.
+    def _isUniqStarId(self, starIdList):
+        """Check the star IDs are unique or not.
+
+        The star Id is unique if it does not exist in the sky and does not
+        appear earlier in the input array.
 
         Parameters
         ----------
-        starId : int
-            Star Id.
+        starIdList : numpy.ndarray[int]
+            Star Id array.
 
         Returns
         -------
-        bool
+        numpy.ndarray[bool]
             True if the unique Id.
         """
 
-        if starId in self.starId:
-            isUnique = False
+        isUniq = np.zeros(len(starIdList), dtype=bool)
+        _, idxFirst = np.unique(starIdList, return_index=True)
+        isUniq[idxFirst] = True
+
+        isUniq &= ~np.isin(starIdList, self.starId)
+
+        for starId in starIdList[~isUniq]:
             print("StarId=%d is not unique." % starId)
-        else:
-            isUnique = True
 
-        return isUnique
+        return isUniq
 
     def resetSky(self):
         """Reset the sky information and delete all existed stars."""
@@ -198,50 +249,297 @@ class SkySim(object):
         self.resetSky()
         self.addStarByRaDecInDeg(starId, raInDeg, declInDeg, mag)
 
-    def addStarByFile(self, readFilePath, skiprows=0):
+    def addStarByFile(self, readFilePath, skiprows=0, chunkSize=100000):
         """Add the star data by reading the file.
 
+        The file is streamed in the blocks of "chunkSize" lines. Each block
+        is parsed in a vectorized way and its columns are kept in the lists.
+        The columns are concatenated and the star Ids are deduplicated once
+        at the end, so the time and memory are linear in the catalog size.
+
+        Parameters
+        ----------
+        readFilePath : str
+            Star data file path.
+        skiprows : int, optional
+            Skip the first "skiprows" lines. (the default is 0.)
+        chunkSize : int, optional
+            Number of lines to read in each block. (the default is 100000.)
+        """
+
+        self._addStarByChunks(self.readStarFileInChunks(
+            readFilePath, skiprows=skiprows, chunkSize=chunkSize))
+
+    def _addStarByChunks(self, chunks):
+        """Add the stars in the blocks.
+
+        Each column of block is copied into its own list as it is read, so
+        the block itself is released. The columns are concatenated and
+        their lists are released one by one, and the uniqueness of star Id
+        is checked once for the existed stars and all blocks. The peak memory
+        in the ingestion is about 1.5 times of the catalog, instead of the
+        blocks plus their concatenation.
+
+        Parameters
+        ----------
+        chunks : iterable
+            Blocks of (star Id, ra in degree, decl in degree, magnitude).
+        """
+
+        # The existed stars are unique and come first
+        dtypeList = (int, float, float, float)
+        columnLists = [[self.starId], [self.ra], [self.decl], [self.mag]]
+        for chunk in chunks:
+            for columnList, values, dtype in zip(columnLists, chunk,
+                                                 dtypeList):
+                columnList.append(np.array(values, dtype=dtype))
+
+        # Only keep the first appearance of each star Id
+        starId = self._concatenateColumn(columnLists[0])
+        isUniq = self._isFirstAppearance(starId)
+        for repeatedStarId in starId[~isUniq]:
+            print("StarId=%d is not unique." % repeatedStarId)
+
+        self.starId = starId[isUniq]
+        del starId
+
+        self.ra = self._concatenateColumn(columnLists[1])[isUniq]
+        self.decl = self._concatenateColumn(columnLists[2])[isUniq]
+        self.mag = self._concatenateColumn(columnLists[3])[isUniq]
+
+    def _isFirstAppearance(self, values):
+        """Check each value is the first appearance or not.
+
+        This needs less memory than numpy.unique(), which keeps several
+        sorted copies of values.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Values.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            True if the value is the first appearance.
+        """
+
+        # The stable sort keeps the first appearance ahead of the repeated
+        # ones
+        order = np.argsort(values, kind="stable")
+        sortedValues = values[order]
+        isRepeated = (sortedValues[1:] == sortedValues[:-1])
+        del sortedValues
+
+        isFirst = np.ones(len(values), dtype=bool)
+        isFirst[order[1:][isRepeated]] = False
+
+        return isFirst
+
+    def _concatenateColumn(self, columnList):
+        """Concatenate the blocks of column and release them.
+
+        Parameters
+        ----------
+        columnList : list[numpy.ndarray]
+            Blocks of column. The list is emptied.
+
+        Returns
+        -------
+        numpy.ndarray
+            Column.
+        """
+
+        column = np.concatenate(columnList)
+        columnList.clear()
+
+        return column
+
+    @staticmethod
+    def readStarFileInChunks(readFilePath, skiprows=0, chunkSize=100000):
+        """Read the star data file in the blocks.
+
+        The comment lines beginning with "#" and the empty lines are
+        skipped.
+
         Parameters
         ----------
         readFilePath : str
             Star data file path.
         skiprows : int, optional
             Skip the first "skiprows" lines. (the default is 0.)
+        chunkSize : int, optional
+            Number of lines to read in each block. (the default is 100000.)
+
+        Yields
+        ------
+        numpy.ndarray[int]
+            Star Id.
+        numpy.ndarray
+            Star ra in degree.
+        numpy.ndarray
+            Star decl in degree.
+        numpy.ndarray
+            Star magnitude.
+        """
+
+        with open(readFilePath, "r") as file:
+
+            for line in itertools.islice(file, skiprows):
+                pass
+
+            while True:
+                lines = list(itertools.islice(file, chunkSize))
+                if (len(lines) == 0):
+                    break
+
+                lines = [line for line in lines
+                         if (line.strip() != "") and
+                         (not line.lstrip().startswith("#"))]
+                if (len(lines) == 0):
+                    continue
+
+                data = np.loadtxt(lines, ndmin=2)
+                yield (data[:, 0].astype(int), data[:, 1], data[:, 2],
+                       data[:, 3])
+
+    def addStarByNpyFile(self, readFilePath, chunkSize=100000):
+        """Add the star data by reading the binary catalog file.
+
+        The catalog is the numpy structured array written by
+        exportSkyToNpyFile(). It is memory-mapped and read in the blocks of
+        "chunkSize" stars.
+
+        Parameters
+        ----------
+        readFilePath : str
+            Binary catalog (.npy) file path.
+        chunkSize : int, optional
+            Number of stars to add in each block. (the default is 100000.)
         """
 
-        data = np.loadtxt(readFilePath, skiprows=skiprows)
+        self._addStarByChunks(self.readStarNpyFileInChunks(
+            readFilePath, chunkSize=chunkSize))
 
-        # Only consider the non-empty data
-        if (len(data) != 0):
+    @staticmethod
+    def readStarNpyFileInChunks(readFilePath, chunkSize=100000):
+        """Read the binary catalog file in the blocks.
 
-            # Change to 2D array if the input is 1D array
-            if (data.ndim == 1):
-                data = np.expand_dims(data, axis=0)
+        Parameters
+        ----------
+        readFilePath : str
+            Binary catalog (.npy) file path.
+        chunkSize : int, optional
+            Number of stars to read in each block. (the default is 100000.)
+
+        Yields
+        ------
+        numpy.ndarray[int]
+            Star Id.
+        numpy.ndarray
+            Star ra in degree.
+        numpy.ndarray
+            Star decl in degree.
+        numpy.ndarray
+            Star magnitude.
+
+        Raises
+        ------
+        ValueError
+            The data type of catalog is not supported.
+        """
+
+        catalog = np.load(readFilePath, mmap_mode="r")
+        if (catalog.dtype.names != STAR_CATALOG_DTYPE.names):
+            raise ValueError("The data type of %s is not supported."
+                             % readFilePath)
+
+        for idxStart in range(0, len(catalog), chunkSize):
+            chunk = np.array(catalog[idxStart:idxStart + chunkSize])
+            yield chunk["id"], chunk["ra"], chunk["decl"], chunk["mag"]
+
+    def iterStarsInChunks(self, chunkSize=100000):
+        """Iterate the stars in the sky in the blocks.
+
+        Parameters
+        ----------
+        chunkSize : int, optional
+            Number of stars in each block. (the default is 100000.)
+
+        Yields
+        ------
+        numpy.ndarray[int]
+            Star Id.
+        numpy.ndarray
+            Star ra in degree.
+        numpy.ndarray
+            Star decl in degree.
+        numpy.ndarray
+            Star magnitude.
+        """
 
-            for star in data:
-                self.addStarByRaDecInDeg(star[0], star[1], star[2], star[3])
+        for idxStart in range(0, len(self.starId), chunkSize):
+            idxEnd = idxStart + chunkSize
+            yield (self.starId[idxStart:idxEnd], self.ra[idxStart:idxEnd],
+                   self.decl[idxStart:idxEnd], self.mag[idxStart:idxEnd])
 
-    def exportSkyToFile(self, outputFilePath):
+    def exportSkyToFile(self, outputFilePath, chunkSize=100000):
         """Export the star information into the file.
 
         Parameters
         ----------
         outputFilePath : str
             Output file path.
+        chunkSize : int, optional
+            Number of stars to write in each block. (the default is
+            100000.)
         """
 
-        # Add the header (star ID, ra, decl, magnitude)
-        content = "# Id\t Ra\t\t Decl\t\t Mag\n"
+        with open(outputFilePath, "w") as file:
+
+            # Add the header (star ID, ra, decl, magnitude)
+            file.write("# Id\t Ra\t\t Decl\t\t Mag\n")
 
-        # Add the star information
-        for ii in range(len(self.starId)):
-            content += "%d\t %3.6f\t %3.6f\t %3.6f\n" % (
-                self.starId[ii], self.ra[ii], self.decl[ii], self.mag[ii])
+            # Add the star information
+            lineFormat = "%d\t %3.6f\t %3.6f\t %3.6f\n"
+            for starId, ra, decl, mag in self.iterStarsInChunks(
+                    chunkSize=chunkSize):
+                file.write("".join(map(lineFormat.__mod__, zip(
+                    starId.tolist(), ra.tolist(), decl.tolist(),
+                    mag.tolist()))))
+
+    def exportSkyToNpyFile(self, outputFilePath, chunkSize=100000):
+        """Export the star information into the binary catalog file.
+
+        The catalog is a numpy structured array with the fields of "id",
+        "ra", "decl", and "mag". It can be memory-mapped by
+        addStarByNpyFile().
+
+        Parameters
+        ----------
+        outputFilePath : str
+            Output binary catalog (.npy) file path.
+        chunkSize : int, optional
+            Number of stars to write in each block. (the default is
+            100000.)
+        """
 
-        # Write into file
-        fid = open(outputFilePath, "w")
-        fid.write(content)
-        fid.close()
+        catalog = np.lib.format.open_memmap(
+            outputFilePath, mode="w+", dtype=STAR_CATALOG_DTYPE,
+            shape=(len(self.starId),))
+
+        idxStart = 0
+        for starId, ra, decl, mag in self.iterStarsInChunks(
+                chunkSize=chunkSize):
+            idxEnd = idxStart + len(starId)
+            catalog["id"][idxStart:idxEnd] = starId
+            catalog["ra"][idxStart:idxEnd] = ra
+            catalog["decl"][idxStart:idxEnd] = decl
+            catalog["mag"][idxStart:idxEnd] = mag
+            idxStart = idxEnd
+
+        catalog.flush()
+        del catalog
 
     def addStarByChipPos(self, sensorName, starId, xInpixelInCam,
                          yInPixelInCam, starMag, epoch=2000.0,
@@ -280,6 +578,227 @@ class SkySim(object):
         # Add the star
         self.addStarByRaDecInDeg(starId, raInDeg, declInDeg, starMag)
 
+    def addStarsByChipPos(self, sensorNameList, starIdList, xInpixelInCam,
+                          yInPixelInCam, starMag, epoch=2000.0,
+                          includeDistortion=True):
+        """Add the stars based on the chip positions in a batch.
+
+        The stars are grouped by the sensor. Each sensor is configured once
+        and the pixel positions of its stars are transformed to the sky
+        positions in a single vectorized call.
+
+        Parameters
+        ----------
+        sensorNameList : str, list[str], or numpy.ndarray[str]
+            Abbreviated sensor name (e.g. "R22_S11") of each star. If a
+            single name is given, all stars are on this sensor.
+        starIdList : list[int] or numpy.ndarray[int]
+            Star Id.
+        xInpixelInCam : list or numpy.ndarray
+            Pixel position x on camera coordinate.
+        yInPixelInCam : list or numpy.ndarray
+            Pixel position y on camera coordinate.
+        starMag : float, list, or numpy.ndarray
+            Star magnitude.
+        epoch : float, optional
+            Epoch is the mean epoch in years of the celestial coordinate
+            system. (the default is 2000.0.)
+        includeDistortion : bool, optional
+            If True (default), then this method will expect the true pixel
+            coordinates with optical distortion included.  If False, this
+            method will expect TAN_PIXEL coordinates, which are the pixel
+            coordinates with estimated optical distortion removed.  See
+            the documentation in afw.cameraGeom for more details. (the
+            default is True.)
+
+        Raises
+        ------
+        ValueError
+            The lengths of inputs do not match.
+        """
+
+        starIdList = np.atleast_1d(np.asarray(starIdList, dtype=int))
+        numOfStar = len(starIdList)
+
+        xInpixelInCam = np.atleast_1d(np.asarray(xInpixelInCam, dtype=float))
+        yInPixelInCam = np.atleast_1d(np.asarray(yInPixelInCam, dtype=float))
+        starMag = self._broadcastToStarNum(starMag, numOfStar)
+        sensorNameList = np.broadcast_to(np.asarray(sensorNameList),
+                                         (numOfStar,))
+
+        if (len(xInpixelInCam) != numOfStar) or \
+           (len(yInPixelInCam) != numOfStar):
+            raise ValueError("The lengths of star Id (%d), x (%d), and y (%d) do not match."
+                             % (numOfStar, len(xInpixelInCam),
+                                len(yInPixelInCam)))
+
+        # Get the sky positions sensor by sensor
+        raInDeg = np.zeros(numOfStar)
+        declInDeg = np.zeros(numOfStar)
+        for sensorName in np.unique(sensorNameList):
+            idxStar = np.where(sensorNameList == sensorName)[0]
+            raInDeg[idxStar], declInDeg[idxStar] = self._getSkyPosByChipPos(
+                str(sensorName), xInpixelInCam[idxStar],
+                yInPixelInCam[idxStar], epoch=epoch,
+                includeDistortion=includeDistortion)
+
+        # Add the stars
+        self.addStarByRaDecInDeg(starIdList, raInDeg, declInDeg, starMag)
+
+    def getSensorNameOfStars(self, epoch=2000.0):
+        """Get the sensor name that each star lands on.
+
+        The observation metadata should be the same as the telescope
+        boresight and rotation used in the PhoSim simulation.
+
+        Parameters
+        ----------
+        epoch : float, optional
+            Epoch is the mean epoch in years of the celestial coordinate
+            system. (the default is 2000.0.)
+
+        Returns
+        -------
+        numpy.ndarray[object]
+            Abbreviated sensor name (e.g. "R22_S11") of each star. The value
+            is None if the star does not land on any sensor.
+        """
+
+        return self._getSensorNameByRaDec(self.ra, self.decl, epoch=epoch)
+
+    def getSensorNameOfDonuts(self, radiusInDeg, epoch=2000.0, numOfPoint=16):
+        """Get the sensor names that the donut of each star lands on.
+
+        The donut of star near the chip edge lands on the neighboring
+        sensors as well. The sensors are decided by the center of star and
+        the points on the circle of donut.
+
+        Parameters
+        ----------
+        radiusInDeg : float
+            Radius of donut in degree.
+        epoch : float, optional
+            Epoch is the mean epoch in years of the celestial coordinate
+            system. (the default is 2000.0.)
+        numOfPoint : int, optional
+            Number of points on the circle of donut. (the default is 16.)
+
+        Returns
+        -------
+        numpy.ndarray[object]
+            Abbreviated sensor names (e.g. "R22_S11") with the dimension of
+            (number of stars, numOfPoint + 1). The first column is the
+            sensor of star center. The value is None if the point does not
+            land on any sensor.
+        """
+
+        sensorNameList = np.empty((len(self.starId), numOfPoint + 1),
+                                  dtype=object)
+        sensorNameList[:, 0] = self.getSensorNameOfStars(epoch=epoch)
+
+        cosDecl = np.cos(np.radians(self.decl))
+        for idx in range(numOfPoint):
+            angle = 2 * np.pi * idx / numOfPoint
+            ra = self.ra + radiusInDeg * np.cos(angle) / cosDecl
+            decl = self.decl + radiusInDeg * np.sin(angle)
+            sensorNameList[:, idx + 1] = self._getSensorNameByRaDec(
+                ra, decl, epoch=epoch)
+
+        return sensorNameList
+
+    def _getSensorNameByRaDec(self, raInDeg, declInDeg, epoch=2000.0):
+        """Get the sensor name of each sky position.
+
+        Parameters
+        ----------
+        raInDeg : numpy.ndarray
+            Right ascension in degree.
+        declInDeg : numpy.ndarray
+            Declination in degree.
+        epoch : float, optional
+            Epoch is the mean epoch in years of the celestial coordinate
+            system. (the default is 2000.0.)
+
+        Returns
+        -------
+        numpy.ndarray[object]
+            Abbreviated sensor name (e.g. "R22_S11") of each position. The
+            value is None if the position does not land on any sensor.
+        """
+
+        sensorNameList = np.empty(len(raInDeg), dtype=object)
+        if (len(raInDeg) == 0):
+            return sensorNameList
+
+        chipNameList = _importModule(CAMERA_UTILS).chipNameFromRaDec(
+            raInDeg, declInDeg, obs_metadata=self._getObs(),
+            camera=self._getCamera(), epoch=epoch)
+
+        for idx, chipName in enumerate(np.atleast_1d(chipNameList)):
+            if (chipName is not None):
+                sensorNameList[idx] = abbrevDectectorName(chipName)
+
+        return sensorNameList
+
+    def getStarPixelPosBySensor(self, sensorNameList, epoch=2000.0,
+                                includeDistortion=True):
+        """Get the pixel positions of stars on the sensors.
+
+        The sensor of each star is decided once, and the sky positions of
+        stars on each sensor are transformed to the pixel positions in a
+        single vectorized call. The observation metadata should be the same
+        as the telescope boresight and rotation used in the PhoSim
+        simulation.
+
+        Parameters
+        ----------
+        sensorNameList : list[str]
+            List of abbreviated sensor names (e.g. "R22_S11").
+        epoch : float, optional
+            Epoch is the mean epoch in years of the celestial coordinate
+            system. (the default is 2000.0.)
+        includeDistortion : bool, optional
+            If True (default), then this method will return the true pixel
+            coordinates with optical distortion included.  If False, this
+            method will return TAN_PIXEL coordinates, which are the pixel
+            coordinates with estimated optical distortion removed.  See
+            the documentation in afw.cameraGeom for more details. (the
+            default is True.)
+
+        Returns
+        -------
+        dict
+            The key is the sensor name and the value is a tuple of the star
+            indexes in this object, pixel positions x and y on camera
+            coordinate.
+        """
+
+        sensorNameOfStars = self.getSensorNameOfStars(epoch=epoch)
+
+        starPixelPos = dict()
+        for sensorName in sensorNameList:
+            starIdx = np.where(sensorNameOfStars == sensorName)[0]
+            if (len(starIdx) == 0):
+                starPixelPos[sensorName] = (starIdx, np.array([]),
+                                            np.array([]))
+                continue
+
+            pixelDmX, pixelDmY = _importModule(
+                CAMERA_UTILS).pixelCoordsFromRaDec(
+                self.ra[starIdx], self.decl[starIdx],
+                chipName=expandDetectorName(sensorName),
+                camera=self._getCamera(), obs_metadata=self._getObs(),
+                epoch=epoch, includeDistortion=includeDistortion)
+
+            self._sourProc.config(sensorName=sensorName)
+            xInpixelInCam, yInPixelInCam = self._sourProc.dmXY2CamXY(
+                pixelDmX, pixelDmY)
+
+            starPixelPos[sensorName] = (starIdx, np.asarray(xInpixelInCam),
+                                        np.asarray(yInPixelInCam))
+
+        return starPixelPos
+
     def _getSkyPosByChipPos(self, sensorName, xInpixelInCam, yInPixelInCam,
                             epoch=2000.0, includeDistortion=True):
         """Get the sky position in (ra, dec) based on the chip pixel positions.
@@ -288,9 +807,9 @@ class SkySim(object):
         ----------
         sensorName : str
             Abbreviated sensor name (e.g. "R22_S11").
-        xInpixelInCam : float
+        xInpixelInCam : float or numpy.ndarray
             Pixel position x on camera coordinate.
-        yInPixelInCam : float
+        yInPixelInCam : float or numpy.ndarray
             Pixel position y on camera coordinate.
         epoch : float, optional
             Epoch is the mean epoch in years of the celestial coordinate
@@ -305,9 +824,9 @@ class SkySim(object):
 
         Returns
         -------
-        float
+        float or numpy.ndarray
             Ra in degree.
-        float
+        float or numpy.ndarray
             Decl in degree.
         """
 
@@ -320,13 +839,35 @@ class SkySim(object):
         expendedSensorName = expandDetectorName(sensorName)
 
         # Get the sky position in (ra, decl)
-        raInDeg, declInDeg = raDecFromPixelCoords(
-            pixelDmX, pixelDmY, expendedSensorName, camera=self._camera,
-            obs_metadata=self._obs, epoch=epoch,
-            includeDistortion=includeDistortion)
+        raInDeg, declInDeg = _importModule(
+            CAMERA_UTILS).raDecFromPixelCoords(
+            pixelDmX, pixelDmY, expendedSensorName,
+            camera=self._getCamera(), obs_metadata=self._getObs(),
+            epoch=epoch, includeDistortion=includeDistortion)
 
         return raInDeg, declInDeg
 
 
+def _importModule(moduleName):
+    """Import the module of obs or sims at the first use.
+
+    These camera stacks take seconds to import. They are only needed for the
+    coordinate transformation, and the processes that do not transform
+    (e.g. pool workers of OPD analysis) should not pay it.
+
+    Parameters
+    ----------
+    moduleName : str
+        Full module name (e.g. "lsst.sims.utils").
+
+    Returns
+    -------
+    module
+        Imported module.
+    """
+
+    return importlib.import_module(moduleName)
+
+
 if __name__ == "__main__":
     pass
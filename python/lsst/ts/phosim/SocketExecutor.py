@@ -0,0 +1,219 @@
+import queue
+import threading
+from concurrent.futures import Executor, Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+
+class SocketExecutor(Executor):
+
+    def __init__(self, addressList, authkey=b""):
+        """Initialization of socket executor class.
+
+        The tasks are dispatched to the SocketWorker instances over the
+        sockets. There is one connection and one dispatching thread for each
+        worker, and a worker runs one task at a time. The function and
+        arguments of task should be pickleable and importable by the
+        workers.
+
+        Parameters
+        ----------
+        addressList : list[tuple]
+            List of (host, port) of workers.
+        authkey : bytes, optional
+            Authentication key shared with the workers. (the default is
+            b"".)
+
+        Raises
+        ------
+        ValueError
+            There is no worker address or the authentication key is empty.
+        """
+
+        if (len(addressList) == 0):
+            raise ValueError("There is no worker address.")
+
+        if (len(authkey) == 0):
+            raise ValueError("The authentication key should not be empty.")
+
+        self._authkey = authkey
+
+        # Queue of (future, function, args, kwargs). None means no more task.
+        self._taskQueue = queue.Queue()
+
+        self._lock = threading.Lock()
+        self._isShutdown = False
+        self._numOfAliveThread = len(addressList)
+
+        # Error of the last lost worker
+        self._lastWorkerError = None
+
+        self._threadList = []
+        for address in addressList:
+            thread = threading.Thread(target=self._dispatch,
+                                      args=(tuple(address),), daemon=True)
+            thread.start()
+            self._threadList.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit the task.
+
+        Parameters
+        ----------
+        fn : function
+            Function of task.
+        *args : tuple
+            Positional arguments of function.
+        **kwargs : dict
+            Keyword arguments of function.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future of task.
+
+        Raises
+        ------
+        RuntimeError
+            The executor is shut down or all workers are lost.
+        """
+
+        with self._lock:
+            if (self._isShutdown):
+                raise RuntimeError("Cannot submit the task after shutdown.")
+            if (self._numOfAliveThread == 0):
+                raise RuntimeError(self._getLostWorkersMessage())
+
+            future = Future()
+            self._taskQueue.put((future, fn, args, kwargs))
+
+        return future
+
+    def _dispatch(self, address):
+        """Dispatch the tasks to the worker.
+
+        If the connection to worker is lost, the running task fails and the
+        other workers take the remaining tasks. The remaining tasks fail if
+        all workers are lost.
+
+        Parameters
+        ----------
+        address : tuple
+            (host, port) of worker.
+        """
+
+        conn = None
+        try:
+            conn = Client(address, authkey=self._authkey)
+            while True:
+                task = self._taskQueue.get()
+                if (task is None):
+                    break
+
+                future, fn, args, kwargs = task
+                if (not future.set_running_or_notify_cancel()):
+                    continue
+
+                try:
+                    conn.send((fn, args, kwargs))
+                    isOk, value = conn.recv()
+                except (EOFError, OSError) as error:
+                    future.set_exception(RuntimeError(
+                        "Lost the worker %s: %s" % (address, error)))
+                    with self._lock:
+                        self._lastWorkerError = "%s: %r" % (address, error)
+                    break
+                except Exception as error:
+                    # For example, the task is not pickleable
+                    future.set_exception(error)
+                    continue
+
+                if (isOk):
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+        except (EOFError, OSError, AuthenticationError) as error:
+            with self._lock:
+                self._lastWorkerError = "%s: %r" % (address, error)
+
+        finally:
+            if (conn is not None):
+                conn.close()
+            self._removeThread()
+
+    def _removeThread(self):
+        """Remove the finished dispatching thread.
+
+        The queued tasks fail if this is the last thread.
+        """
+
+        with self._lock:
+            self._numOfAliveThread -= 1
+            if (self._numOfAliveThread > 0):
+                return
+
+        while True:
+            try:
+                task = self._taskQueue.get_nowait()
+            except queue.Empty:
+                break
+
+            if (task is not None) and \
+                    task[0].set_running_or_notify_cancel():
+                task[0].set_exception(RuntimeError(
+                    self._getLostWorkersMessage()))
+
+    def _getLostWorkersMessage(self):
+        """Get the message of all workers lost.
+
+        Returns
+        -------
+        str
+            Message with the error of last lost worker.
+        """
+
+        if (self._lastWorkerError is None):
+            return "All workers are lost."
+
+        return "All workers are lost. The last error is from %s." \
+            % self._lastWorkerError
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """Shut down the executor.
+
+        The connections to workers are closed after the submitted tasks are
+        done.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Wait for the submitted tasks to be done. (the default is True.)
+        cancel_futures : bool, optional
+            Cancel the tasks not started yet. (the default is False.)
+        """
+
+        with self._lock:
+            if (self._isShutdown):
+                return
+            self._isShutdown = True
+
+            if (cancel_futures):
+                while True:
+                    try:
+                        task = self._taskQueue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if (task is not None):
+                        task[0].cancel()
+
+            for thread in self._threadList:
+                self._taskQueue.put(None)
+
+        if (wait):
+            for thread in self._threadList:
+                thread.join()
+
+
+if __name__ == "__main__":
+    pass
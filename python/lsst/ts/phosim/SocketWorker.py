@@ -0,0 +1,139 @@
+import pickle
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+
+class SocketWorker(object):
+
+    def __init__(self, address=("localhost", 0), authkey=b""):
+        """Initialization of socket worker class.
+
+        The worker listens on a socket and runs the tasks sent by the
+        SocketExecutor. Each task is a pickled (function, args, kwargs), and
+        the reply is (True, returned value) or (False, raised error). The
+        task that can not be unpickled (e.g. the function is not importable
+        by the worker) and the reply that can not be pickled fail with the
+        error in the reply, and the worker keeps serving. The connection is
+        authenticated by the key because the pickled data can run any code.
+
+        This is the reference worker of multi-node execution. Run one worker
+        on each node (e.g. by ensembleWorker.py) and give the addresses to
+        the executor.
+
+        Parameters
+        ----------
+        address : tuple, optional
+            (host, port) to listen. The port is chosen by the system if it is
+            0. (the default is ("localhost", 0).)
+        authkey : bytes, optional
+            Authentication key shared with the executor. (the default is
+            b"".)
+
+        Raises
+        ------
+        ValueError
+            The authentication key is empty.
+        """
+
+        if (len(authkey) == 0):
+            raise ValueError("The authentication key should not be empty.")
+
+        self._listener = Listener(address, authkey=authkey)
+
+    def getAddress(self):
+        """Get the address of worker.
+
+        Returns
+        -------
+        tuple
+            (host, port) of worker.
+        """
+
+        return self._listener.address
+
+    def serve(self, numOfConn=None):
+        """Serve the connections from the executors.
+
+        The connections are served one by one. A connection is served until
+        the executor closes it. The connection failed in the authentication
+        is dropped and not counted.
+
+        Parameters
+        ----------
+        numOfConn : int, optional
+            Number of connections to serve. Serve forever if this is None.
+            (the default is None.)
+        """
+
+        connCount = 0
+        while (numOfConn is None) or (connCount < numOfConn):
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError:
+                continue
+
+            with conn:
+                self._serveConn(conn)
+            connCount += 1
+
+    def _serveConn(self, conn):
+        """Serve the tasks from the connection.
+
+        Parameters
+        ----------
+        conn : multiprocessing.connection.Connection
+            Connection to the executor.
+        """
+
+        while True:
+            try:
+                data = conn.recv_bytes()
+            except EOFError:
+                return
+
+            try:
+                task = pickle.loads(data)
+            except Exception as error:
+                self._sendReply(conn, (False, error))
+                continue
+
+            # The executor has no more task
+            if (task is None):
+                return
+
+            try:
+                func, args, kwargs = task
+                reply = (True, func(*args, **kwargs))
+            except Exception as error:
+                reply = (False, error)
+
+            self._sendReply(conn, reply)
+
+    def _sendReply(self, conn, reply):
+        """Send the reply to the executor.
+
+        Parameters
+        ----------
+        conn : multiprocessing.connection.Connection
+            Connection to the executor.
+        reply : tuple
+            (True, returned value) or (False, raised error). If it can not be
+            pickled, (False, RuntimeError) with the representation of value
+            or error is sent instead.
+        """
+
+        try:
+            data = pickle.dumps(reply)
+        except Exception:
+            data = pickle.dumps((False, RuntimeError(repr(reply[1]))))
+
+        conn.send_bytes(data)
+
+    def close(self):
+        """Close the worker."""
+
+        self._listener.close()
+
+
+if __name__ == "__main__":
+    pass
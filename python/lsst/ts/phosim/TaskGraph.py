@@ -0,0 +1,290 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class TaskGraph(object):
+
+    def __init__(self):
+        """Initialization of task graph class.
+
+        The task graph is a directed acyclic graph (DAG) of tasks. A task
+        runs after all the tasks it depends on finish, and the independent
+        tasks run concurrently in the threads under a budget of CPU. Most of
+        the expensive tasks (e.g. PhoSim) run in the subprocesses, so the
+        threads are enough to overlap them.
+
+        The start and end time of each task are recorded, so the elapsed
+        time can be compared with the critical path.
+        """
+
+        # Tasks by the order of addition. The item is a dictionary of "func",
+        # "args", "kwargs", "dependOn", and "numOfCpu".
+        self._tasks = dict()
+
+        # Results of finished tasks
+        self._results = dict()
+
+        # Start and end time in second of tasks relative to the start of run
+        self._timeOfTask = dict()
+
+        # Elapsed time in second of the last run
+        self._elapsedTime = 0.0
+
+    def addTask(self, taskName, func, args=(), kwargs=None, dependOn=None,
+                numOfCpu=1):
+        """Add the task.
+
+        The tasks depended on should be added already. This keeps the graph
+        acyclic.
+
+        Parameters
+        ----------
+        taskName : str
+            Name of task.
+        func : function
+            Function of task.
+        args : tuple, optional
+            Positional arguments of function. (the default is ().)
+        kwargs : dict, optional
+            Keyword arguments of function. (the default is None.)
+        dependOn : list[str], optional
+            Names of tasks this task depends on. (the default is None.)
+        numOfCpu : int, optional
+            Number of CPU used by the task. (the default is 1.)
+
+        Raises
+        ------
+        ValueError
+            The task exists already.
+        ValueError
+            The task depended on does not exist.
+        """
+
+        if taskName in self._tasks:
+            raise ValueError("The task (%s) exists already." % taskName)
+
+        dependOn = [] if (dependOn is None) else list(dependOn)
+        for depTaskName in dependOn:
+            if depTaskName not in self._tasks:
+                raise ValueError("The task (%s) depended on by %s does not exist."
+                                 % (depTaskName, taskName))
+
+        self._tasks[taskName] = {
+            "func": func, "args": tuple(args),
+            "kwargs": dict() if (kwargs is None) else dict(kwargs),
+            "dependOn": dependOn, "numOfCpu": max(int(numOfCpu), 1)}
+
+    def getTaskNameList(self):
+        """Get the list of task names.
+
+        Returns
+        -------
+        list[str]
+            Task names by the order of addition.
+        """
+
+        return list(self._tasks.keys())
+
+    def run(self, cpuBudget=None):
+        """Run the tasks.
+
+        A task is started when the tasks it depends on finish and there is
+        enough CPU in the budget. A task needing more CPU than the budget
+        runs when no other task is running. If a task fails, no new task is
+        started and the error is raised after the running tasks finish.
+
+        Parameters
+        ----------
+        cpuBudget : int, optional
+            Number of CPU to use. If None, all CPUs are used. (the default is
+            None.)
+        """
+
+        if (cpuBudget is None):
+            cpuBudget = os.cpu_count() or 1
+        cpuBudget = max(int(cpuBudget), 1)
+
+        self._results = dict()
+        self._timeOfTask = dict()
+
+        pendingTaskNameList = self.getTaskNameList()
+        runningTasks = dict()
+        usedCpu = 0
+        error = None
+
+        startTime = time.monotonic()
+        with ThreadPoolExecutor(
+                max_workers=max(len(pendingTaskNameList), 1)) as pool:
+
+            while (len(pendingTaskNameList) + len(runningTasks) > 0):
+
+                # Start the ready tasks
+                if (error is None):
+                    for taskName in list(pendingTaskNameList):
+                        task = self._tasks[taskName]
+                        isReady = all([depTaskName in self._results
+                                       for depTaskName in task["dependOn"]])
+                        numOfCpu = min(task["numOfCpu"], cpuBudget)
+                        if (not isReady) or \
+                                (usedCpu + numOfCpu > cpuBudget):
+                            continue
+
+                        pendingTaskNameList.remove(taskName)
+                        usedCpu += numOfCpu
+
+                        self._timeOfTask[taskName] = [
+                            time.monotonic() - startTime, None]
+                        future = pool.submit(task["func"], *task["args"],
+                                             **task["kwargs"])
+                        runningTasks[future] = (taskName, numOfCpu)
+                else:
+                    pendingTaskNameList = []
+
+                if (len(runningTasks) == 0):
+                    break
+
+                # Collect the finished tasks
+                doneFutures = wait(runningTasks,
+                                   return_when=FIRST_COMPLETED)[0]
+                for future in doneFutures:
+                    taskName, numOfCpu = runningTasks.pop(future)
+                    usedCpu -= numOfCpu
+                    self._timeOfTask[taskName][1] = \
+                        time.monotonic() - startTime
+
+                    try:
+                        self._results[taskName] = future.result()
+                    except Exception as taskError:
+                        if (error is None):
+                            error = taskError
+
+        self._elapsedTime = time.monotonic() - startTime
+
+        if (error is not None):
+            raise error
+
+    def getResult(self, taskName):
+        """Get the result of task in the last run.
+
+        Parameters
+        ----------
+        taskName : str
+            Name of task.
+
+        Returns
+        -------
+        object
+            Returned value of the task function.
+
+        Raises
+        ------
+        ValueError
+            The task is not finished.
+        """
+
+        if taskName not in self._results:
+            raise ValueError("The task (%s) is not finished." % taskName)
+
+        return self._results[taskName]
+
+    def getTimeOfTask(self, taskName):
+        """Get the start and end time of task in the last run.
+
+        Parameters
+        ----------
+        taskName : str
+            Name of task.
+
+        Returns
+        -------
+        float
+            Start time in second relative to the start of run.
+        float
+            End time in second relative to the start of run.
+        """
+
+        startTime, endTime = self._timeOfTask[taskName]
+
+        return startTime, endTime
+
+    def getDurationOfTask(self, taskName):
+        """Get the duration of task in the last run.
+
+        Parameters
+        ----------
+        taskName : str
+            Name of task.
+
+        Returns
+        -------
+        float
+            Duration in second.
+        """
+
+        startTime, endTime = self.getTimeOfTask(taskName)
+
+        return endTime - startTime
+
+    def getElapsedTime(self):
+        """Get the elapsed time of the last run.
+
+        Returns
+        -------
+        float
+            Elapsed time in second.
+        """
+
+        return self._elapsedTime
+
+    def getCriticalPathTime(self):
+        """Get the time of critical path in the last run.
+
+        The critical path is the path of dependency with the longest sum of
+        task durations.
+
+        Returns
+        -------
+        float
+            Time of critical path in second.
+        """
+
+        pathTime = dict()
+        for taskName, task in self._tasks.items():
+            if taskName not in self._results:
+                continue
+
+            depPathTime = [pathTime.get(depTaskName, 0.0)
+                           for depTaskName in task["dependOn"]]
+            pathTime[taskName] = self.getDurationOfTask(taskName) + \
+                max(depPathTime + [0.0])
+
+        return max(list(pathTime.values()) + [0.0])
+
+    def getTimingSummary(self):
+        """Get the summary of timing in the last run.
+
+        Returns
+        -------
+        str
+            Summary of timing.
+        """
+
+        lines = []
+        for taskName in self.getTaskNameList():
+            if taskName not in self._timeOfTask or \
+                    self._timeOfTask[taskName][1] is None:
+                continue
+
+            startTime, endTime = self.getTimeOfTask(taskName)
+            lines.append("%-20s %10.2f %10.2f %10.2f" % (
+                taskName, startTime, endTime, endTime - startTime))
+
+        lines.append("Elapsed time: %.2f sec. Critical path: %.2f sec." % (
+            self.getElapsedTime(), self.getCriticalPathTime()))
+
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,379 @@
+import os
+import json
+import time
+import inspect
+import functools
+import threading
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+class Tracer(object):
+
+    def __init__(self):
+        """Initialization of tracer class.
+
+        The tracer records the spans of stages (e.g. the stage-level methods of
+        PhosimCmpt and TeleFacade). Each span has the wall time, CPU time of
+        the thread and the finished child processes (e.g. PhoSim), bytes read
+        and written by the process, and peak resident set size (RSS) of the
+        process at the end. The I/O and RSS are process-wide, so they include
+        the concurrent spans in other threads.
+
+        The tracer is disabled by default, and a disabled span costs only a
+        flag check.
+        """
+
+        self._isEnabled = False
+
+        # Finished spans. The item is a dictionary of "name", "iterNum",
+        # "tid", "depth", "start", "wall", "cpu", "childCpu", "readBytes",
+        # "writeBytes", and "peakRssInKb".
+        self._spanList = []
+
+        # Iteration number of the new spans
+        self._iterNum = None
+
+        # Start of tracer in second
+        self._startTime = time.perf_counter()
+
+        self._lock = threading.Lock()
+
+        # Depth of nested spans in each thread
+        self._local = threading.local()
+
+    def enable(self):
+        """Enable the tracer."""
+
+        self._isEnabled = True
+
+    def disable(self):
+        """Disable the tracer."""
+
+        self._isEnabled = False
+
+    def isEnabled(self):
+        """The tracer is enabled or not.
+
+        Returns
+        -------
+        bool
+            True if the tracer is enabled.
+        """
+
+        return self._isEnabled
+
+    def setIterNum(self, iterNum):
+        """Set the iteration number of the new spans.
+
+        Parameters
+        ----------
+        iterNum : int or None
+            Iteration number. None means the span is not in any iteration.
+        """
+
+        self._iterNum = None if (iterNum is None) else int(iterNum)
+
+    def getIterNum(self):
+        """Get the iteration number of the new spans.
+
+        Returns
+        -------
+        int or None
+            Iteration number.
+        """
+
+        return self._iterNum
+
+    @contextlib.contextmanager
+    def span(self, name):
+        """Context manager of a span.
+
+        Parameters
+        ----------
+        name : str
+            Name of span (e.g. "PhosimCmpt.runPhoSim").
+        """
+
+        if (not self._isEnabled):
+            yield
+            return
+
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+
+        iterNum = self._iterNum
+        readBytes, writeBytes = self._getIoBytes()
+        childCpu = self._getChildCpuTime()
+        cpu = time.thread_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu
+            childCpu = self._getChildCpuTime() - childCpu
+            readBytesEnd, writeBytesEnd = self._getIoBytes()
+
+            self._local.depth = depth
+
+            record = {"name": name, "iterNum": iterNum,
+                      "tid": threading.get_ident(), "depth": depth,
+                      "start": start - self._startTime, "wall": wall,
+                      "cpu": cpu, "childCpu": childCpu,
+                      "readBytes": readBytesEnd - readBytes,
+                      "writeBytes": writeBytesEnd - writeBytes,
+                      "peakRssInKb": self._getPeakRssInKb()}
+            with self._lock:
+                self._spanList.append(record)
+
+    def _getIoBytes(self):
+        """Get the bytes read and written by the process.
+
+        Returns
+        -------
+        int
+            Bytes read. 0 if not available.
+        int
+            Bytes written. 0 if not available.
+        """
+
+        try:
+            with open("/proc/self/io", "r") as file:
+                ioStat = dict([line.split(":") for line in file])
+            return int(ioStat["rchar"]), int(ioStat["wchar"])
+        except (OSError, KeyError, ValueError):
+            return 0, 0
+
+    def _getChildCpuTime(self):
+        """Get the CPU time of the finished child processes.
+
+        Returns
+        -------
+        float
+            CPU time in second. 0 if not available.
+        """
+
+        if (resource is None):
+            return 0.0
+
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    def _getPeakRssInKb(self):
+        """Get the peak RSS of the process.
+
+        RSS: Resident set size.
+
+        Returns
+        -------
+        int
+            Peak RSS in KB. 0 if not available.
+        """
+
+        if (resource is None):
+            return 0
+
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+    def getSpanList(self):
+        """Get the finished spans.
+
+        Returns
+        -------
+        list[dict]
+            Finished spans by the order of finishing.
+        """
+
+        with self._lock:
+            return list(self._spanList)
+
+    def clear(self):
+        """Clear the finished spans."""
+
+        with self._lock:
+            self._spanList = []
+
+    def writeChromeTrace(self, filePath):
+        """Write the spans in the Chrome trace format.
+
+        The file can be opened by chrome://tracing or Perfetto.
+
+        Parameters
+        ----------
+        filePath : str
+            File path of the trace in JSON.
+        """
+
+        pid = os.getpid()
+        eventList = []
+        for record in self.getSpanList():
+            args = dict([(key, record[key]) for key in (
+                "iterNum", "cpu", "childCpu", "readBytes", "writeBytes",
+                "peakRssInKb")])
+            eventList.append({
+                "name": record["name"], "ph": "X", "pid": pid,
+                "tid": record["tid"], "ts": record["start"] * 1e6,
+                "dur": record["wall"] * 1e6, "args": args})
+
+        with open(filePath, "w") as file:
+            json.dump({"traceEvents": eventList, "displayTimeUnit": "ms"},
+                      file)
+
+    def getSummary(self):
+        """Get the summary table of spans in each iteration.
+
+        The spans with the same name in the same iteration are aggregated.
+        The nested spans are counted in both the inner and outer spans.
+
+        Returns
+        -------
+        str
+            Summary table.
+        """
+
+        aggregate = dict()
+        for record in self.getSpanList():
+            key = (-1 if (record["iterNum"] is None) else record["iterNum"],
+                   record["name"])
+            if key not in aggregate:
+                aggregate[key] = {"count": 0, "wall": 0.0, "cpu": 0.0,
+                                  "childCpu": 0.0, "readBytes": 0,
+                                  "writeBytes": 0, "peakRssInKb": 0}
+
+            item = aggregate[key]
+            item["count"] += 1
+            for field in ("wall", "cpu", "childCpu", "readBytes",
+                          "writeBytes"):
+                item[field] += record[field]
+            item["peakRssInKb"] = max(item["peakRssInKb"],
+                                      record["peakRssInKb"])
+
+        lines = ["%4s %-45s %6s %10s %10s %10s %10s %10s %10s" % (
+            "iter", "span", "count", "wall(s)", "cpu(s)", "child(s)",
+            "read(MB)", "write(MB)", "rss(MB)")]
+        for key in sorted(aggregate.keys()):
+            iterNum, name = key
+            item = aggregate[key]
+            lines.append("%4s %-45s %6d %10.3f %10.3f %10.3f %10.2f %10.2f "
+                         "%10.1f" % (
+                             "-" if (iterNum < 0) else iterNum, name,
+                             item["count"], item["wall"], item["cpu"],
+                             item["childCpu"], item["readBytes"] / 2**20,
+                             item["writeBytes"] / 2**20,
+                             item["peakRssInKb"] / 2**10))
+
+        return "\n".join(lines)
+
+    def writeSummary(self, filePath):
+        """Write the summary table of spans in each iteration.
+
+        Parameters
+        ----------
+        filePath : str
+            File path of the summary.
+        """
+
+        with open(filePath, "w") as file:
+            file.write(self.getSummary() + "\n")
+
+
+# Tracer shared by the module
+_tracer = Tracer()
+
+
+def getTracer():
+    """Get the tracer shared by the module.
+
+    Returns
+    -------
+    Tracer
+        Tracer.
+    """
+
+    return _tracer
+
+
+def traced(name):
+    """Decorator to record the function as a span of the shared tracer.
+
+    Parameters
+    ----------
+    name : str
+        Name of span.
+
+    Returns
+    -------
+    function
+        Decorator.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if (not _tracer.isEnabled()):
+                return func(*args, **kwargs)
+
+            with _tracer.span(name):
+                return func(*args, **kwargs)
+
+        wrapper._isTraced = True
+
+        return wrapper
+
+    return decorator
+
+
+def traceMethods(*methodNames):
+    """Class decorator to record the stage-level methods as spans.
+
+    Only the listed methods are decorated. The accessors (e.g. getters and
+    setters) are left out, so that they do not pay the cost of span and do
+    not crowd the summary. The methods must be defined in the class, and
+    the inherited methods keep the name of parent class (e.g.
+    "MirrorSim.getActForce"). The span name is
+    "<class name>.<method name>".
+
+    Parameters
+    ----------
+    *methodNames : str
+        Names of the methods to trace.
+
+    Returns
+    -------
+    function
+        Class decorator.
+
+    Raises
+    ------
+    ValueError
+        The method is not defined in the class.
+    """
+
+    def decorator(cls):
+
+        for methodName in methodNames:
+            method = vars(cls).get(methodName)
+            if (not inspect.isfunction(method)):
+                raise ValueError("%s is not a method defined in %s." % (
+                    methodName, cls.__name__))
+
+            if getattr(method, "_isTraced", False):
+                continue
+
+            spanName = "%s.%s" % (cls.__name__, methodName)
+            setattr(cls, methodName, traced(spanName)(method))
+
+        return cls
+
+    return decorator
+
+
+if __name__ == "__main__":
+    pass
@@ -31,6 +31,13 @@ class SurfaceType(Enum):
     Chip = 13
 
 
+class PlotMode(Enum):
+    Foreground = 1
+    Background = 2
+    Deferred = 3
+    Disabled = 4
+
+
 def getModulePath():
     """Get the path of module.
 
@@ -158,6 +165,21 @@ def getPhoSimPath(phosimPathVar="PHOSIMPATH"):
                            % phosimPathVar)
 
 
+def getFakePhoSimDir():
+    """Get the directory of fake PhoSim.
+
+    The phosim.py in this directory runs the FakePhosim class, which can
+    replace PhoSim for the pipeline tests and benchmarks.
+
+    Returns
+    -------
+    str
+        Directory of fake PhoSim.
+    """
+
+    return os.path.join(getModulePath(), "fakePhosim")
+
+
 def getAoclcOutputPath(aoclcOutputPathVar="AOCLCOUTPUTPATH"):
     """Get the AOCLC output path.
 
@@ -184,6 +206,34 @@ def getAoclcOutputPath(aoclcOutputPathVar="AOCLCOUTPUTPATH"):
     return outputPath
 
 
+def getEnsembleAuthkey(authkeyFilePath="", authkeyVar="ENSEMBLEAUTHKEY"):
+    """Get the authentication key of ensemble workers.
+
+    The key is read from the key file or the environment variable instead of
+    the command line, which is visible to the other users (e.g. by ps).
+
+    Parameters
+    ----------
+    authkeyFilePath : str, optional
+        Path of key file. The trailing newline is removed. Use the
+        environment variable if this is "". (the default is "".)
+    authkeyVar : str, optional
+        Authentication key variable name. (the default is
+        "ENSEMBLEAUTHKEY".)
+
+    Returns
+    -------
+    bytes
+        Authentication key. It is empty if there is no key.
+    """
+
+    if (authkeyFilePath != ""):
+        with open(authkeyFilePath, "rb") as file:
+            return file.read().rstrip(b"\r\n")
+
+    return os.environ.get(authkeyVar, "").encode("utf-8")
+
+
 def sortOpdFileList(opdFileList):
     """Sort the OPD file list.
 
@@ -1,7 +1,43 @@
 # -*- coding: utf-8 -*-
-from .PhosimCmpt import PhosimCmpt
-from .OpdMetrology import OpdMetrology
-from .SkySim import SkySim
+import sys
+import types
+import importlib
+
+# The classes are imported at the first access (PEP 562). Importing any
+# submodule imports this package first, and the eager imports would pull in
+# PhosimCmpt with ts_wep, ts_ofc, and astropy in every worker process.
+_LAZY_ATTR = ("PhosimCmpt", "OpdMetrology", "SkySim")
+
+
+class _Package(types.ModuleType):
+
+    def __setattr__(self, name, value):
+
+        # The import of submodule binds the submodule to the same name in
+        # this package. Bind the class instead as the eager imports did, so
+        # the attribute does not depend on the order of imports.
+        if (name in _LAZY_ATTR) and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name):
+
+    if (name in _LAZY_ATTR):
+        importlib.import_module("." + name, __name__)
+        return globals()[name]
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+
+    return sorted(set(globals()) | set(_LAZY_ATTR))
+
 
 # The version file is gotten by the scons. However, the scons does not support
 # the build without unit tests. This is a needed function for the Jenkins to
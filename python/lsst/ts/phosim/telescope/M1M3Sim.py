@@ -1,17 +1,22 @@
 import os
 import numpy as np
-from scipy.interpolate import Rbf
 
-from lsst.ts.phosim.telescope.MirrorSim import MirrorSim
+from lsst.ts.phosim.telescope.MirrorSim import MirrorSim, \
+    gridSampInMnInZemax
+from lsst.ts.phosim.telescope.RbfInterpolator import RbfInterpolator
 
 from lsst.ts.phosim.Utility import opt2ZemaxCoorTrans
 from lsst.ts.phosim.PlotUtil import plotResMap
 from lsst.ts.phosim.Utility import getConfigDir
+from lsst.ts.phosim.Tracer import traceMethods
 
 from lsst.ts.wep.cwfs.Tool import ZernikeAnnularFit, ZernikeAnnularEval
 from lsst.ts.wep.ParamReader import ParamReader
 
 
+@traceMethods("getPrintthz", "getTempCorr", "getMirrorResInMmInZemax",
+              "writeMirZkAndGridResInZemax", "showMirResMap",
+              "genMirSurfRandErr")
 class M1M3Sim(MirrorSim):
 
     def __init__(self):
@@ -96,10 +101,12 @@ class M1M3Sim(MirrorSim):
         """
 
         numTerms = self._m1m3SettingFile.getSetting("numTerms")
+        numOfRbfNeighbor = self._m1m3SettingFile.getSetting("numOfRbfNeighbor")
 
         super(M1M3Sim, self).config(numTerms=numTerms,
                                     actForceFileName=actForceFileName,
-                                    lutFileName=lutFileName)
+                                    lutFileName=lutFileName,
+                                    numOfRbfNeighbor=numOfRbfNeighbor)
 
         mirrorDataDir = self.getMirrorDataDir()
 
@@ -407,7 +414,10 @@ class M1M3Sim(MirrorSim):
         return tempCorrInUm
 
     def _fitData(self, dataX, dataY, data, x, y):
-        """Fit the data by radial basis function.
+        """Fit the data by radial basis function (RBF).
+
+        The local RBF is used if the number of nearest nodes is not 0 in the
+        setting file.
 
         Parameters
         ----------
@@ -429,10 +439,11 @@ class M1M3Sim(MirrorSim):
         """
 
         # Construct the fitting model
-        rbfi = Rbf(dataX, dataY, data)
+        rbfi = RbfInterpolator(numOfNeighbor=self.getNumOfRbfNeighbor())
+        rbfi.fit(dataX, dataY, data)
 
         # Return the fitted data
-        return rbfi(x, y)
+        return rbfi.evaluate(x, y)
 
     def getMirrorResInMmInZemax(self, writeZcInMnToFilePath=None):
         """Get the residue of surface (mirror print along z-axis) in mm under
@@ -484,7 +495,8 @@ class M1M3Sim(MirrorSim):
         return resInMmInZemax, bxInMmInZemax, byInMmInZemax, zcInMmInZemax
 
     def writeMirZkAndGridResInZemax(self, resFile=[], surfaceGridN=200,
-                                    writeZcInMnToFilePath=None):
+                                    writeZcInMnToFilePath=None,
+                                    executor=None):
         """Write the grid residue in mm of mirror surface after the fitting
         with Zk under the Zemax coordinate.
 
@@ -497,6 +509,10 @@ class M1M3Sim(MirrorSim):
             Surface grid number. (the default is 200.)
         writeZcInMnToFilePath : str, optional
             File path to write the fitted zk in mm. (the default is None.)
+        executor : concurrent.futures.Executor, optional
+            Executor (e.g. ProcessPoolExecutor) to sample the grids of M1 and
+            M3 at the same time. If None, the grids are sampled in this
+            process one by one. (the default is None.)
 
         Returns
         -------
@@ -515,27 +531,34 @@ class M1M3Sim(MirrorSim):
         idx1, idx3 = self._getMirCoor()[0:2]
 
         # Grid sample map for M1 and M3
+        argList = []
         for ii, idx in zip((0, 1), (idx1, idx3)):
 
             # Change the unit from m to mm
             innerRinMm = self.getInnerRinM()[ii] * 1e3
             outerRinMm = self.getOuterRinM()[ii] * 1e3
 
-            # Get the residue map used in Zemax
-            # Content header: (NUM_X_PIXELS, NUM_Y_PIXELS, delta x, delta y)
-            # Content: (z, dx, dy, dxdy)
-            content = self._gridSampInMnInZemax(
-                resInMmInZemax[idx], bxInMmInZemax[idx], byInMmInZemax[idx],
-                innerRinMm, outerRinMm, surfaceGridN, surfaceGridN,
-                resFile=resFile[ii])
-            if (ii == 0):
-                contentM1 = content
-            elif (ii == 1):
-                contentM3 = content
+            argList.append((resInMmInZemax[idx], bxInMmInZemax[idx],
+                            byInMmInZemax[idx], innerRinMm, outerRinMm,
+                            surfaceGridN, surfaceGridN, resFile[ii],
+                            self.getNumOfRbfNeighbor()))
+
+        # Get the residue map used in Zemax
+        # Content header: (NUM_X_PIXELS, NUM_Y_PIXELS, delta x, delta y)
+        # Content: (z, dx, dy, dxdy)
+        if (executor is None):
+            contentM1, contentM3 = [gridSampInMnInZemax(*args)
+                                    for args in argList]
+        else:
+            futureList = [executor.submit(gridSampInMnInZemax, *args)
+                          for args in argList]
+            contentM1, contentM3 = [future.result()
+                                    for future in futureList]
 
         return contentM1, contentM3
 
-    def showMirResMap(self, resFile, writeToResMapFilePath=[]):
+    def showMirResMap(self, resFile, writeToResMapFilePath=[],
+                      plotService=None):
         """Show the mirror residue map.
 
         Parameters
@@ -544,6 +567,9 @@ class M1M3Sim(MirrorSim):
             File path of the grid surface residue map.
         writeToResMapFilePath : list, optional
             File path to save the residue map. (the default is [].)
+        plotService : PlotService, optional
+            Service to run the plot jobs. If None, the maps are plotted in
+            this call. (the default is None.)
         """
 
         # Get the residure map
@@ -558,9 +584,15 @@ class M1M3Sim(MirrorSim):
 
         for ii, RinM, idx in zip((0, 1), RinMtuple, (idx1, idx3)):
             outerRinMm = RinM * 1e3
-            plotResMap(resInMmInZemax[idx], bxInMmInZemax[idx],
-                       byInMmInZemax[idx], outerRinMm, resFile=resFile[ii],
-                       writeToResMapFilePath=writeToResMapFilePath[ii])
+            argList = (resInMmInZemax[idx], bxInMmInZemax[idx],
+                       byInMmInZemax[idx], outerRinMm)
+            if (plotService is None):
+                plotResMap(*argList, resFile=resFile[ii],
+                           writeToResMapFilePath=writeToResMapFilePath[ii])
+            else:
+                plotService.submit(
+                    plotResMap, *argList, resFile=resFile[ii],
+                    writeToResMapFilePath=writeToResMapFilePath[ii])
 
     def genMirSurfRandErr(self, zAngleInRadian, m1m3ForceError=0.05,
                           seedNum=0):
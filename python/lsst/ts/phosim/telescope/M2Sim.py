@@ -6,10 +6,13 @@ from lsst.ts.phosim.telescope.MirrorSim import MirrorSim
 from lsst.ts.phosim.Utility import opt2ZemaxCoorTrans
 from lsst.ts.phosim.PlotUtil import plotResMap
 from lsst.ts.phosim.Utility import getConfigDir
+from lsst.ts.phosim.Tracer import traceMethods
 
 from lsst.ts.wep.ParamReader import ParamReader
 
 
+@traceMethods("getPrintthz", "getTempCorr", "getMirrorResInMmInZemax",
+              "writeMirZkAndGridResInZemax", "showMirResMap")
 class M2Sim(MirrorSim):
 
     def __init__(self):
@@ -54,10 +57,12 @@ class M2Sim(MirrorSim):
         """
 
         numTerms = self._m2SettingFile.getSetting("numTerms")
+        numOfRbfNeighbor = self._m2SettingFile.getSetting("numOfRbfNeighbor")
 
         super(M2Sim, self).config(numTerms=numTerms,
                                   actForceFileName=actForceFileName,
-                                  lutFileName=lutFileName)
+                                  lutFileName=lutFileName,
+                                  numOfRbfNeighbor=numOfRbfNeighbor)
 
         mirrorDataDir = self.getMirrorDataDir()
 
@@ -233,7 +238,8 @@ class M2Sim(MirrorSim):
 
         return content
 
-    def showMirResMap(self, resFile, writeToResMapFilePath=None):
+    def showMirResMap(self, resFile, writeToResMapFilePath=None,
+                      plotService=None):
         """Show the mirror residue map.
 
         Parameters
@@ -242,6 +248,9 @@ class M2Sim(MirrorSim):
             File path of the grid surface residue map.
         writeToResMapFilePath : str, optional
             File path to save the residue map. (the default is None.)
+        plotService : PlotService, optional
+            Service to run the plot jobs. If None, the map is plotted in this
+            call. (the default is None.)
         """
 
         # Get the residure map
@@ -250,9 +259,13 @@ class M2Sim(MirrorSim):
 
         # Change the unit
         outerRinMm = self.getOuterRinM() * 1e3
-        plotResMap(resInMmInZemax, bxInMmInZemax, byInMmInZemax,
-                   outerRinMm, resFile=resFile,
-                   writeToResMapFilePath=writeToResMapFilePath)
+        argList = (resInMmInZemax, bxInMmInZemax, byInMmInZemax, outerRinMm)
+        if (plotService is None):
+            plotResMap(*argList, resFile=resFile,
+                       writeToResMapFilePath=writeToResMapFilePath)
+        else:
+            plotService.submit(plotResMap, *argList, resFile=resFile,
+                               writeToResMapFilePath=writeToResMapFilePath)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,16 @@
 import os
 import numpy as np
-from scipy.interpolate import Rbf
 
 from lsst.ts.wep.cwfs.Tool import ZernikeFit, ZernikeEval
 from lsst.ts.wep.ParamReader import ParamReader
 
+from lsst.ts.phosim.telescope.RbfInterpolator import RbfInterpolator
+from lsst.ts.phosim.Tracer import traceMethods
 
+
+@traceMethods("getLUTforce", "getActForce", "getPrintthz", "getTempCorr",
+              "getMirrorResInMmInZemax", "writeMirZkAndGridResInZemax",
+              "showMirResMap")
 class MirrorSim(object):
 
     def __init__(self, innerRinM, outerRinM, mirrorDataDir):
@@ -42,10 +47,16 @@ class MirrorSim(object):
         # Number of Zernike terms to fit.
         self._numTerms = 0
 
-    def config(self, numTerms=28, actForceFileName="", lutFileName=""):
+        # Number of nearest nodes of local radial basis function (RBF) to
+        # interpolate the FEA data. The global RBF is used if this is 0.
+        self._numOfRbfNeighbor = 0
+
+    def config(self, numTerms=28, actForceFileName="", lutFileName="",
+               numOfRbfNeighbor=0):
         """Do the configuration.
 
         LUT: Look-up table.
+        RBF: Radial basis function.
 
         Parameters
         ----------
@@ -55,9 +66,13 @@ class MirrorSim(object):
             Actuator force file name. (the default is "".)
         lutFileName : str, optional
             LUT file name. (the default is "".)
+        numOfRbfNeighbor : int, optional
+            Number of nearest nodes of local RBF to interpolate the FEA data.
+            Use the global RBF of all nodes if this is 0. (the default is 0.)
         """
 
         self._numTerms = int(numTerms)
+        self._numOfRbfNeighbor = int(numOfRbfNeighbor)
 
         if (actForceFileName != ""):
             actForceFilePath = os.path.join(self.mirrorDataDir,
@@ -79,6 +94,19 @@ class MirrorSim(object):
 
         return self._numTerms
 
+    def getNumOfRbfNeighbor(self):
+        """Get the number of nearest nodes of local radial basis function
+        (RBF).
+
+        Returns
+        -------
+        int
+            Number of nearest nodes of local RBF. This is 0 for the global
+            RBF.
+        """
+
+        return self._numOfRbfNeighbor
+
     def getInnerRinM(self):
         """Get the inner radius of mirror in meter.
 
@@ -236,95 +264,9 @@ class MirrorSim(object):
             Grid residue map related data.
         """
 
-        # Radial basis function approximation/interpolation of surface
-        Ff = Rbf(xfInMm, yfInMm, zfInMm)
-
-        # Number of grid points on x-, y-axis.
-        # Alway extend 2 points on each side
-        # Do not want to cover the edge? change 4->2 on both lines
-        NUM_X_PIXELS = nx+4
-        NUM_Y_PIXELS = ny+4
-
-        # This is spatial extension factor, which is calculated by the slope
-        # at edge
-        extFx = (NUM_X_PIXELS-1) / (nx-1)
-        extFy = (NUM_Y_PIXELS-1) / (ny-1)
-        extFr = np.sqrt(extFx * extFy)
-
-        # Delta x and y
-        delx = outerRinMm*2*extFx / (NUM_X_PIXELS-1)
-        dely = outerRinMm*2*extFy / (NUM_Y_PIXELS-1)
-
-        # Minimum x and y
-        minx = -0.5*(NUM_X_PIXELS-1)*delx
-        miny = -0.5*(NUM_Y_PIXELS-1)*dely
-
-        # Calculate the epsilon
-        epsilon = 1e-4*min(delx, dely)
-
-        # Write four numbers for the header line
-        content = "%d %d %.9E %.9E\n" % (NUM_X_PIXELS, NUM_Y_PIXELS, delx,
-                                         dely)
-
-        #  Write the rows and columns
-        for jj in range(1, NUM_X_PIXELS + 1):
-            for ii in range(1, NUM_Y_PIXELS + 1):
-
-                # x and y positions
-                x = minx + (ii - 1) * delx
-                y = miny + (jj - 1) * dely
-
-                # Invert top to bottom, because Zemax reads (-x,-y) first
-                y = -y
-
-                # Calculate the radius
-                r = np.sqrt(x**2 + y**2)
-
-                # Set the value as zero when the radius is not between the
-                # inner and outer radius.
-                if (r < innerRinMm/extFr) or (r > outerRinMm*extFr):
-
-                    z = 0
-                    dx = 0
-                    dy = 0
-                    dxdy = 0
-
-                # Get the value by the fitting
-                else:
-
-                    # Get the z
-                    z = Ff(x, y)
-
-                    # Compute the dx
-                    tem1 = Ff((x+epsilon), y)
-                    tem2 = Ff((x-epsilon), y)
-                    dx = (tem1 - tem2)/(2.0*epsilon)
-
-                    # Compute the dy
-                    tem1 = Ff(x, (y+epsilon))
-                    tem2 = Ff(x, (y-epsilon))
-                    dy = (tem1 - tem2)/(2.0*epsilon)
-
-                    # Compute the dxdy
-                    tem1 = Ff((x+epsilon), (y+epsilon))
-                    tem2 = Ff((x-epsilon), (y+epsilon))
-                    tem3 = (tem1 - tem2)/(2.0*epsilon)
-
-                    tem1 = Ff((x+epsilon), (y-epsilon))
-                    tem2 = Ff((x-epsilon), (y-epsilon))
-                    tem4 = (tem1 - tem2)/(2.0*epsilon)
-
-                    dxdy = (tem3 - tem4)/(2.0*epsilon)
-
-                content += "%.9E %.9E %.9E %.9E\n" % (z, dx, dy, dxdy)
-
-        # Write the surface residue data into the file
-        if (resFile is not None):
-            outid = open(resFile, "w")
-            outid.write(content)
-            outid.close()
-
-        return content
+        return gridSampInMnInZemax(zfInMm, xfInMm, yfInMm, innerRinMm,
+                                   outerRinMm, nx, ny, resFile=resFile,
+                                   numOfNeighbor=self._numOfRbfNeighbor)
 
     def _getMirrorResInNormalizedCoor(self, surf, x, y):
         """Get the residue of surface (mirror print along z-axis) after the
@@ -477,5 +419,123 @@ class MirrorSim(object):
         raise NotImplementedError("Child class should implemented this.")
 
 
+def gridSampInMnInZemax(zfInMm, xfInMm, yfInMm, innerRinMm, outerRinMm, nx,
+                        ny, resFile=None, numOfNeighbor=0):
+    """Get the grid residue map used in Zemax.
+
+    This is a module function to be run in the other processes.
+
+    Parameters
+    ----------
+    zfInMm : numpy.ndarray
+        Surface map in mm.
+    xfInMm : numpy.ndarray
+        X position in mm.
+    yfInMm : numpy.ndarray
+        Y position in mm.
+    innerRinMm : float
+        Inner radius in mm.
+    outerRinMm : float
+        Outer radius in mm.
+    nx : int
+        Number of pixel along x-axis of surface residue map. It is noted
+        that the real pixel number is nx + 4.
+    ny : int
+        Number of pixel along y-axis of surface residue map. It is noted
+        that the real pixel number is ny + 4.
+    resFile : str, optional
+        File path to write the surface residue map. (the default is None.)
+    numOfNeighbor : int, optional
+        Number of nearest nodes of local radial basis function (RBF). Use
+        the global RBF if this is 0. (the default is 0.)
+
+    Returns
+    -------
+    str
+        Grid residue map related data.
+    """
+
+    # Radial basis function approximation/interpolation of surface
+    Ff = RbfInterpolator(numOfNeighbor=numOfNeighbor)
+    Ff.fit(xfInMm, yfInMm, zfInMm)
+
+    # Number of grid points on x-, y-axis.
+    # Alway extend 2 points on each side
+    # Do not want to cover the edge? change 4->2 on both lines
+    NUM_X_PIXELS = nx+4
+    NUM_Y_PIXELS = ny+4
+
+    # This is spatial extension factor, which is calculated by the slope
+    # at edge
+    extFx = (NUM_X_PIXELS-1) / (nx-1)
+    extFy = (NUM_Y_PIXELS-1) / (ny-1)
+    extFr = np.sqrt(extFx * extFy)
+
+    # Delta x and y
+    delx = outerRinMm*2*extFx / (NUM_X_PIXELS-1)
+    dely = outerRinMm*2*extFy / (NUM_Y_PIXELS-1)
+
+    # Minimum x and y
+    minx = -0.5*(NUM_X_PIXELS-1)*delx
+    miny = -0.5*(NUM_Y_PIXELS-1)*dely
+
+    # Calculate the epsilon
+    epsilon = 1e-4*min(delx, dely)
+
+    # Write four numbers for the header line
+    content = "%d %d %.9E %.9E\n" % (NUM_X_PIXELS, NUM_Y_PIXELS, delx,
+                                     dely)
+
+    # x and y positions of the rows and columns. The column index (ii) runs
+    # faster than the row index (jj) in the file.
+    jj, ii = np.meshgrid(np.arange(1, NUM_X_PIXELS + 1),
+                         np.arange(1, NUM_Y_PIXELS + 1), indexing="ij")
+    x = (minx + (ii - 1) * delx).ravel()
+    y = (miny + (jj - 1) * dely).ravel()
+
+    # Invert top to bottom, because Zemax reads (-x,-y) first
+    y = -y
+
+    # Calculate the radius
+    r = np.sqrt(x**2 + y**2)
+
+    # Set the value as zero when the radius is not between the inner and
+    # outer radius. Get the value by the fitting otherwise.
+    inMirror = (r >= innerRinMm/extFr) & (r <= outerRinMm*extFr)
+    xIn = x[inMirror]
+    yIn = y[inMirror]
+
+    # Evaluate the center and its neighbors of finite difference at the same
+    # time. They share the same local fitting if any.
+    offsetX = np.array([0, 1, -1, 0, 0, 1, -1, 1, -1]) * epsilon
+    offsetY = np.array([0, 0, 0, 1, -1, 1, 1, -1, -1]) * epsilon
+    zStencil = Ff.evaluate(xIn[:, None] + offsetX, yIn[:, None] + offsetY,
+                           centerX=np.repeat(xIn[:, None], 9, axis=1),
+                           centerY=np.repeat(yIn[:, None], 9, axis=1))
+
+    # Compute the dx, dy, and dxdy
+    z = zStencil[:, 0]
+    dx = (zStencil[:, 1] - zStencil[:, 2])/(2.0*epsilon)
+    dy = (zStencil[:, 3] - zStencil[:, 4])/(2.0*epsilon)
+
+    tem3 = (zStencil[:, 5] - zStencil[:, 6])/(2.0*epsilon)
+    tem4 = (zStencil[:, 7] - zStencil[:, 8])/(2.0*epsilon)
+    dxdy = (tem3 - tem4)/(2.0*epsilon)
+
+    # Write the rows and columns
+    gridData = np.zeros((len(x), 4))
+    gridData[inMirror, :] = np.column_stack((z, dx, dy, dxdy))
+    content += "".join(["%.9E %.9E %.9E %.9E\n" % tuple(row)
+                        for row in gridData])
+
+    # Write the surface residue data into the file
+    if (resFile is not None):
+        outid = open(resFile, "w")
+        outid.write(content)
+        outid.close()
+
+    return content
+
+
 if __name__ == "__main__":
     pass
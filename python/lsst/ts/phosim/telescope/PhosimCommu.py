@@ -1,11 +1,16 @@
 import os
+import itertools
 import subprocess
+import numpy as np
 
 from lsst.ts.wep.Utility import FilterType
 
 from lsst.ts.phosim.Utility import SurfaceType
+from lsst.ts.phosim.Tracer import traceMethods
 
 
+@traceMethods("generateOpds", "generateStars", "writeStarsToFile",
+              "writeToFile", "writeSedFile", "runPhoSim")
 class PhosimCommu(object):
 
     DOF_START_IDX = 5
@@ -162,13 +167,33 @@ class PhosimCommu(object):
         # idx 35-54: M2 20 bending modes
 
         # Write the perturbation of degree of freedom
-        content = ""
         idxRange = range(self.DOF_START_IDX, self.DOF_START_IDX+self.DOF_NUM)
-        for idx, dof in zip(idxRange, dofInUm):
-            content += "move %d %7.4f \n" % (idx, dof)
+        content = self._formatColumns("move %d %7.4f \n", idxRange, dofInUm)
 
         return content
 
+    def _formatColumns(self, lineFormat, *columns):
+        """Format the columns into the lines of content.
+
+        The whole block is formatted in a single pass and joined once
+        instead of concatenating the string line by line.
+
+        Parameters
+        ----------
+        lineFormat : str
+            "%"-style format of a single line.
+        *columns : iterable
+            Columns of values. The i-th line is formatted by the i-th value of
+            each column.
+
+        Returns
+        -------
+        str
+            Formatted content.
+        """
+
+        return "".join(map(lineFormat.__mod__, zip(*columns)))
+
     def doSurfPert(self, surfId, zkInMm):
         """Do the perturbation of surface in the basis of Zernike polynomial.
 
@@ -185,9 +210,9 @@ class PhosimCommu(object):
             Perturbation command used in PhoSim.
         """
 
-        content = ""
-        for ii in range(len(zkInMm)):
-            content += "izernike %d %d %s \n" % (surfId, ii, zkInMm[ii])
+        content = self._formatColumns(
+            "izernike %d %d %s \n", itertools.repeat(surfId),
+            range(len(zkInMm)), zkInMm)
 
         return content
 
@@ -293,6 +318,36 @@ class PhosimCommu(object):
 
         return content
 
+    def generateOpds(self, opdId, fieldXInDeg, fieldYInDeg, wavelengthInNm):
+        """Generate the sources of OPD in a block.
+
+        OPD: Optical path difference.
+
+        Parameters
+        ----------
+        opdId : list[int] or numpy.ndarray[int]
+            OPD Id.
+        fieldXInDeg : list or numpy.ndarray
+            Field X in degree.
+        fieldYInDeg : list or numpy.ndarray
+            Field Y in degree.
+        wavelengthInNm : float
+            Wavelength of the OPD source in nm.
+
+        Returns
+        -------
+        str
+            Perturbation command used in PhoSim.
+        """
+
+        content = self._formatColumns(
+            "opd %2d\t%9.6f\t%9.6f %5.1f \n", np.asarray(opdId).tolist(),
+            np.asarray(fieldXInDeg).tolist(),
+            np.asarray(fieldYInDeg).tolist(),
+            itertools.repeat(wavelengthInNm))
+
+        return content
+
     def generateStar(self, starId, ra, dec, magNorm, sedName, redshift=0,
                      gamma1=0, gamma2=0, kappa=0, deltaRa=0, deltaDec=0,
                      sourceType="star", spatialPars=0):
@@ -358,6 +413,104 @@ class PhosimCommu(object):
 
         return content
 
+    def generateStars(self, starId, ra, dec, magNorm, sedName, redshift=0,
+                      gamma1=0, gamma2=0, kappa=0, deltaRa=0, deltaDec=0,
+                      sourceType="star"):
+        """Generate the star sources in a block.
+
+        The output is the same as calling generateStar() for each star, but
+        the whole block is formatted at once.
+
+        Parameters
+        ----------
+        starId : list[int] or numpy.ndarray[int]
+            Star Id.
+        ra : list or numpy.ndarray
+            The right ascension of the center of the object or image in
+            decimal degrees.
+        dec : list or numpy.ndarray
+            The declination of the center of the object in decimal degrees.
+        magNorm : list or numpy.ndarray
+            The normalization of the flux of the object in AB magnitudes
+            at (500 nm)/(1+z) (which is roughly equivalent to V (AB) or
+            g (AB)).
+        sedName : str
+            The name of the SED file with a file path that is relative to the
+            data directory in PhoSim.
+        redshift : float, optional
+            The redshift (or blueshift) of the objects. (the default is 0.)
+        gamma1 : float, optional
+            The value of the shear parameter gamma1 used in weak lensing.
+            (the default is 0.)
+        gamma2 : float, optional
+            The value of the shear parameter gamma2 used in weak lensing.
+            (the default is 0.)
+        kappa : float, optional
+            The value of the magnification parameter in weak lensing. (the
+            default is 0.)
+        deltaRa : float, optional
+            The value of the declination offset in radians. (the default is
+            0.)
+        deltaDec : float, optional
+            The value of the declination offset in radians. (the default is
+            0.)
+        sourceType : str, optional
+            The name of the spatial model. (the default is "star".)
+
+        Returns
+        -------
+        str
+            Perturbation command used in PhoSim.
+        """
+
+        # The parameters shared by all stars are formatted once
+        sharedPars = "%.1f %.1f %.1f %.1f %.1f %.1f %s" % (
+            redshift, gamma1, gamma2, kappa, deltaRa, deltaDec, sourceType)
+        lineFormat = "object %2d\t%9.6f\t%9.6f %9.6f ../sky/" + \
+            sedName.replace("%", "%%") + " " + \
+            sharedPars.replace("%", "%%") + " %.1f none none \n"
+
+        starId = np.asarray(starId).tolist()
+        content = self._formatColumns(
+            lineFormat, starId, np.asarray(ra).tolist(),
+            np.asarray(dec).tolist(), np.asarray(magNorm).tolist(), starId)
+
+        return content
+
+    def writeStarsToFile(self, filePath, starChunks, sedName, mode="a"):
+        """Write the star sources into the file block by block.
+
+        The file is opened once and each block of stars is formatted and
+        written before the next one is read, so the memory is bounded by the
+        block size.
+
+        Parameters
+        ----------
+        filePath : str
+            File path to write.
+        starChunks : iterable
+            Blocks of (starId, ra, dec, magNorm) arrays. See
+            SkySim.iterStarsInChunks().
+        sedName : str
+            The name of the SED file with a file path that is relative to the
+            data directory in PhoSim.
+        mode : str, optional
+            Overwrite ("w") or append ("a") the file. (the default is "a".)
+
+        Raises
+        ------
+        ValueError
+            Mode is not supported.
+        """
+
+        if mode not in ("w", "a"):
+            raise ValueError("Mode: %s is not supported." % mode)
+
+        with open(filePath, mode) as file:
+            for starId, ra, dec, magNorm in starChunks:
+                file.write(self.generateStars(starId, ra, dec, magNorm,
+                                              sedName))
+
     def getStarInstance(self, obsId, aFilterId, ra=0, dec=0, rot=0,
                         mjd=49552.3, simSeed=1000, filePath=None):
         """Get the star instance catalog.
@@ -528,7 +681,8 @@ class PhosimCommu(object):
 
     def getPhoSimArgs(self, instanceFile, extraCommandFile=None, numProc=1,
                       numThread=1, outputDir=None, instrument="lsst",
-                      sensorName=None, e2ADC=1, logFilePath=None):
+                      sensorName=None, e2ADC=1, logFilePath=None,
+                      workDir=None):
         """Get the arguments needed to run the PhoSim.
 
         Parameters
@@ -553,6 +707,10 @@ class PhosimCommu(object):
             default is 1.)
         logFilePath : str, optional
             Log file path of PhoSim calculation. (the default is None.)
+        workDir : str, optional
+            Work directory of PhoSim intermediate files. This is needed if
+            several PhoSim processes run at the same time. (the default is
+            None.)
 
         Returns
         -------
@@ -565,6 +723,7 @@ class PhosimCommu(object):
         extraCommandFile = self._getAbsPathIfNotNone(extraCommandFile)
         outputDir = self._getAbsPathIfNotNone(outputDir)
         logFilePath = self._getAbsPathIfNotNone(logFilePath)
+        workDir = self._getAbsPathIfNotNone(workDir)
 
         # Prepare the argument list
         argString = "%s -i %s -e %d" % (instanceFile, instrument, e2ADC)
@@ -584,6 +743,9 @@ class PhosimCommu(object):
         if (outputDir is not None):
             argString += " -o %s" % outputDir
 
+        if (workDir is not None):
+            argString += " -w %s" % workDir
+
         if (logFilePath is not None):
             argString += " > %s 2>&1" % logFilePath
 
@@ -0,0 +1,336 @@
+import numpy as np
+
+
+class RbfInterpolator(object):
+
+    # Max number of elements in the temporary arrays of one evaluation chunk
+    MAX_NUM_OF_ELEMENT_IN_CHUNK = 2**22
+
+    def __init__(self, numOfNeighbor=0):
+        """Initialization of radial basis function (RBF) interpolator class.
+
+        The global RBF (numOfNeighbor=0) fits all nodes by the
+        scipy.interpolate.Rbf. It solves the dense N x N system of N nodes,
+        and the memory is O(N^2) and the time is O(N^3).
+
+        The local RBF fits the nearest nodes of each evaluated point found by
+        the KD-tree. The kernel is the same multiquadric as the global RBF
+        with the same shape parameter (the mean spacing of nodes), and it is
+        augmented with the linear polynomial. The points with the same
+        nearest nodes share one local system, and the memory and time are
+        nearly linear in the number of nodes and evaluated points.
+
+        Parameters
+        ----------
+        numOfNeighbor : int, optional
+            Number of nearest nodes of local RBF. Use the global RBF if this
+            is 0. (the default is 0.)
+        """
+
+        self.numOfNeighbor = max(int(numOfNeighbor), 0)
+
+        # Nodes and data in the fitting
+        self._nodeX = None
+        self._nodeY = None
+        self._data = None
+
+        # Shape parameter of multiquadric kernel
+        self._epsilon = None
+
+        # Global RBF or KD-tree of nodes of local RBF
+        self._rbf = None
+        self._tree = None
+
+    def getNumOfNeighbor(self):
+        """Get the number of nearest nodes of local RBF.
+
+        Returns
+        -------
+        int
+            Number of nearest nodes. This is 0 for the global RBF.
+        """
+
+        return self.numOfNeighbor
+
+    def isFitted(self):
+        """The interpolator is fitted or not.
+
+        Returns
+        -------
+        bool
+            True if the interpolator is fitted.
+        """
+
+        return (self._data is not None)
+
+    def fit(self, nodeX, nodeY, data):
+        """Fit the data on the nodes.
+
+        The global RBF solves the system of all nodes here. The local RBF
+        only builds the KD-tree, and the local systems are solved in the
+        evaluation.
+
+        Parameters
+        ----------
+        nodeX : numpy.ndarray
+            x coordinate of nodes.
+        nodeY : numpy.ndarray
+            y coordinate of nodes.
+        data : numpy.ndarray
+            Data on the nodes.
+
+        Raises
+        ------
+        ValueError
+            The number of nodes != the number of data.
+        """
+
+        nodeX = np.asarray(nodeX, dtype=float).ravel()
+        nodeY = np.asarray(nodeY, dtype=float).ravel()
+        data = np.asarray(data, dtype=float).ravel()
+        if (len(nodeX) != len(data)) or (len(nodeY) != len(data)):
+            raise ValueError("The number of nodes (%d) != the number of "
+                             "data (%d)." % (len(nodeX), len(data)))
+
+        self._nodeX = nodeX
+        self._nodeY = nodeY
+        self._data = data
+
+        # scipy.interpolate and scipy.spatial are imported at the first use
+        # to save the startup time of processes that do not fit the surface
+        if (self.numOfNeighbor == 0):
+            from scipy.interpolate import Rbf
+            self._rbf = Rbf(nodeX, nodeY, data)
+            self._epsilon = self._rbf.epsilon
+        else:
+            from scipy.spatial import cKDTree
+            self._tree = cKDTree(np.column_stack((nodeX, nodeY)))
+            self._epsilon = self._calcEpsilon(nodeX, nodeY)
+
+    def _calcEpsilon(self, nodeX, nodeY):
+        """Calculate the shape parameter of multiquadric kernel.
+
+        This is the mean spacing of nodes in the bounding box, which is the
+        default of scipy.interpolate.Rbf.
+
+        Parameters
+        ----------
+        nodeX : numpy.ndarray
+            x coordinate of nodes.
+        nodeY : numpy.ndarray
+            y coordinate of nodes.
+
+        Returns
+        -------
+        float
+            Shape parameter.
+        """
+
+        edges = np.array([np.ptp(nodeX), np.ptp(nodeY)])
+        edges = edges[np.nonzero(edges)]
+
+        return np.power(np.prod(edges) / len(nodeX), 1.0 / edges.size)
+
+    def evaluate(self, x, y, centerX=None, centerY=None):
+        """Evaluate the interpolated data.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            x coordinate.
+        y : numpy.ndarray
+            y coordinate.
+        centerX : numpy.ndarray, optional
+            x coordinate to search the nearest nodes of local RBF. The points
+            with the same center share one local system, which keeps the
+            finite difference around the center smooth. Use x if this is
+            None. This is not used by the global RBF. (the default is None.)
+        centerY : numpy.ndarray, optional
+            y coordinate to search the nearest nodes of local RBF. Use y if
+            this is None. (the default is None.)
+
+        Returns
+        -------
+        numpy.ndarray
+            Interpolated data in the shape of x.
+
+        Raises
+        ------
+        RuntimeError
+            The interpolator is not fitted.
+        """
+
+        if (not self.isFitted()):
+            raise RuntimeError("The interpolator is not fitted.")
+
+        shape = np.shape(x)
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+
+        if (self.numOfNeighbor == 0):
+            values = self._evalGlobal(x, y)
+        else:
+            centerX = x if (centerX is None) \
+                else np.asarray(centerX, dtype=float).ravel()
+            centerY = y if (centerY is None) \
+                else np.asarray(centerY, dtype=float).ravel()
+            values = self._evalLocal(x, y, centerX, centerY)
+
+        return values.reshape(shape)
+
+    def _evalGlobal(self, x, y):
+        """Evaluate the global RBF.
+
+        The points are evaluated in chunks to limit the memory of distance
+        matrix between the points and nodes.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            x coordinate.
+        y : numpy.ndarray
+            y coordinate.
+
+        Returns
+        -------
+        numpy.ndarray
+            Interpolated data.
+        """
+
+        numOfPointInChunk = max(
+            self.MAX_NUM_OF_ELEMENT_IN_CHUNK // len(self._data), 1)
+
+        values = np.zeros(len(x))
+        for start in range(0, len(x), numOfPointInChunk):
+            end = start + numOfPointInChunk
+            values[start:end] = self._rbf(x[start:end], y[start:end])
+
+        return values
+
+    def _evalLocal(self, x, y, centerX, centerY):
+        """Evaluate the local RBF.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            x coordinate.
+        y : numpy.ndarray
+            y coordinate.
+        centerX : numpy.ndarray
+            x coordinate to search the nearest nodes.
+        centerY : numpy.ndarray
+            y coordinate to search the nearest nodes.
+
+        Returns
+        -------
+        numpy.ndarray
+            Interpolated data.
+        """
+
+        values = np.zeros(len(x))
+        if (len(x) == 0):
+            return values
+
+        # Group the points by the sorted indexes of nearest nodes
+        numOfNeighbor = min(self.numOfNeighbor, len(self._data))
+        idxNode = self._tree.query(np.column_stack((centerX, centerY)),
+                                   k=numOfNeighbor)[1]
+        idxNode = np.sort(idxNode.reshape(len(x), numOfNeighbor), axis=1)
+        idxNodeOfGroup, idxGroup = np.unique(idxNode, axis=0,
+                                             return_inverse=True)
+        idxGroup = idxGroup.ravel()
+
+        # Solve and evaluate the groups in chunks
+        idxPointSorted = np.argsort(idxGroup, kind="stable")
+        idxGroupSorted = idxGroup[idxPointSorted]
+
+        numOfGroup = len(idxNodeOfGroup)
+        numOfGroupInChunk = max(
+            self.MAX_NUM_OF_ELEMENT_IN_CHUNK // (numOfNeighbor + 3)**2, 1)
+        for start in range(0, numOfGroup, numOfGroupInChunk):
+            end = min(start + numOfGroupInChunk, numOfGroup)
+
+            idxPoint = idxPointSorted[
+                np.searchsorted(idxGroupSorted, start):
+                np.searchsorted(idxGroupSorted, end)]
+
+            values[idxPoint] = self._solveAndEvalLocalSystem(
+                idxNodeOfGroup[start:end], x[idxPoint], y[idxPoint],
+                idxGroup[idxPoint] - start)
+
+        return values
+
+    def _solveAndEvalLocalSystem(self, idxNodeOfGroup, x, y, idxGroup):
+        """Solve the local systems and evaluate them on the points.
+
+        The coordinate of each group is shifted to the mean of nodes and
+        scaled by the max distance to the mean for the conditioning. The
+        multiquadric kernel is invariant under this transform if the shape
+        parameter is scaled as well.
+
+        Parameters
+        ----------
+        idxNodeOfGroup : numpy.ndarray
+            Indexes of nearest nodes of each group.
+        x : numpy.ndarray
+            x coordinate of points.
+        y : numpy.ndarray
+            y coordinate of points.
+        idxGroup : numpy.ndarray
+            Index of group of each point.
+
+        Returns
+        -------
+        numpy.ndarray
+            Interpolated data on the points.
+        """
+
+        numOfGroup, numOfNeighbor = idxNodeOfGroup.shape
+
+        # Normalized coordinate of nodes
+        nodeX = self._nodeX[idxNodeOfGroup]
+        nodeY = self._nodeY[idxNodeOfGroup]
+        meanX = nodeX.mean(axis=1, keepdims=True)
+        meanY = nodeY.mean(axis=1, keepdims=True)
+        scale = np.sqrt(np.max((nodeX - meanX)**2 + (nodeY - meanY)**2,
+                               axis=1, keepdims=True))
+        scale[scale == 0] = 1.0
+        nodeX = (nodeX - meanX) / scale
+        nodeY = (nodeY - meanY) / scale
+        epsilon = self._epsilon / scale
+
+        # Kernel matrix augmented with the linear polynomial
+        dist = np.hypot(nodeX[:, :, None] - nodeX[:, None, :],
+                        nodeY[:, :, None] - nodeY[:, None, :])
+
+        matrix = np.zeros((numOfGroup, numOfNeighbor + 3, numOfNeighbor + 3))
+        matrix[:, :numOfNeighbor, :numOfNeighbor] = np.sqrt(
+            1 + (dist / epsilon[:, :, None])**2)
+        for idx, basis in enumerate((np.ones_like(nodeX), nodeX, nodeY)):
+            matrix[:, :numOfNeighbor, numOfNeighbor + idx] = basis
+            matrix[:, numOfNeighbor + idx, :numOfNeighbor] = basis
+
+        rhs = np.zeros((numOfGroup, numOfNeighbor + 3, 1))
+        rhs[:, :numOfNeighbor, 0] = self._data[idxNodeOfGroup]
+
+        coef = np.linalg.solve(matrix, rhs)[:, :, 0]
+
+        # Evaluate on the points
+        pointX = (x - meanX[idxGroup, 0]) / scale[idxGroup, 0]
+        pointY = (y - meanY[idxGroup, 0]) / scale[idxGroup, 0]
+
+        distToNode = np.hypot(pointX[:, None] - nodeX[idxGroup],
+                              pointY[:, None] - nodeY[idxGroup])
+        kernel = np.sqrt(1 + (distToNode / epsilon[idxGroup])**2)
+
+        coefOfPoint = coef[idxGroup]
+        values = np.sum(kernel * coefOfPoint[:, :numOfNeighbor], axis=1) + \
+            coefOfPoint[:, numOfNeighbor] + \
+            coefOfPoint[:, numOfNeighbor + 1] * pointX + \
+            coefOfPoint[:, numOfNeighbor + 2] * pointY
+
+        return values
+
+
+if __name__ == "__main__":
+    pass
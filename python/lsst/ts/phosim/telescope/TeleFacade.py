@@ -9,12 +9,16 @@ from lsst.ts.phosim.telescope.M2Sim import M2Sim
 from lsst.ts.phosim.telescope.PhosimCommu import PhosimCommu
 
 from lsst.ts.phosim.Utility import SurfaceType, CamDistType, getConfigDir, \
-    mapSurfNameToEnum
+    mapSurfNameToEnum, PlotMode
+from lsst.ts.phosim.Tracer import traceMethods
 
 from lsst.ts.wep.Utility import FilterType, CamType, mapFilterRefToG
 from lsst.ts.wep.ParamReader import ParamReader
 
 
+@traceMethods("runPhoSim", "writeAccDofFile", "writeCmdFile",
+              "writeStarInstFile", "writeOpdInstFile",
+              "writePertBaseOnConfigFile")
 class TeleFacade(object):
 
     def __init__(self):
@@ -61,6 +65,66 @@ class TeleFacade(object):
                          "wfSensorOn": True,
                          "guidSensorOn": False}
 
+        # Service to plot the mirror residue maps. None means the maps are
+        # plotted in the writing of perturbation files.
+        self._plotService = None
+
+        # Executor to calculate the perturbation of subsystems. None means
+        # the subsystems are calculated in this process one by one.
+        self._pertExecutor = None
+
+    def setPertExecutor(self, executor):
+        """Set the executor to calculate the perturbation of subsystems.
+
+        The M1M3 surface, M2 surface, and grid residue maps of M1 and M3 are
+        submitted to the executor at the same time in the writing of
+        perturbation files, and the time is the slowest subsystem instead
+        of the sum. The executor is not shut down by this class.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor or None
+            Executor (e.g. ProcessPoolExecutor with 3 workers). If None, the
+            subsystems are calculated in this process one by one.
+        """
+
+        self._pertExecutor = executor
+
+    def getPertExecutor(self):
+        """Get the executor to calculate the perturbation of subsystems.
+
+        Returns
+        -------
+        concurrent.futures.Executor or None
+            Executor.
+        """
+
+        return self._pertExecutor
+
+    def setPlotService(self, plotService):
+        """Set the service to plot the mirror residue maps.
+
+        Parameters
+        ----------
+        plotService : PlotService or None
+            Service to run the plot jobs (e.g. in the background processes).
+            If None, the maps are plotted in the writing of perturbation
+            files.
+        """
+
+        self._plotService = plotService
+
+    def getPlotService(self):
+        """Get the service to plot the mirror residue maps.
+
+        Returns
+        -------
+        PlotService or None
+            Service to run the plot jobs.
+        """
+
+        return self._plotService
+
     def getDofInUm(self):
         """Get the accumulated degree of freedom (DOF) in um.
 
@@ -217,7 +281,7 @@ class TeleFacade(object):
 
     def getPhoSimArgs(self, instFilePath, extraCommandFile=None, numPro=1,
                       numThread=1, outputDir=None, sensorName=None,
-                      e2ADC=1, logFilePath=None):
+                      e2ADC=1, logFilePath=None, workDir=None):
         """Get the arguments needed to run the PhoSim.
 
         Parameters
@@ -240,6 +304,9 @@ class TeleFacade(object):
             default is 1.)
         logFilePath : str, optional
             Log file path of PhoSim calculation. (the default is None.)
+        workDir : str, optional
+            Work directory of PhoSim intermediate files. (the default is
+            None.)
 
         Returns
         -------
@@ -251,7 +318,8 @@ class TeleFacade(object):
         argString = self.phoSimCommu.getPhoSimArgs(
             instFilePath, extraCommandFile=extraCommandFile, numProc=numPro,
             numThread=numThread, outputDir=outputDir, instrument=instName,
-            sensorName=sensorName, e2ADC=e2ADC, logFilePath=logFilePath)
+            sensorName=sensorName, e2ADC=e2ADC, logFilePath=logFilePath,
+            workDir=workDir)
 
         return argString
 
@@ -396,6 +464,17 @@ class TeleFacade(object):
 
         self.phoSimCommu.setPhoSimDir(phosimDir)
 
+    def getPhoSimDir(self):
+        """Get the directory of PhoSim.
+
+        Returns
+        -------
+        str
+            Directory of PhoSim.
+        """
+
+        return self.phoSimCommu.getPhoSimDir()
+
     def writeAccDofFile(self, outputFileDir, dofFileName="pert.mat"):
         """Write the accumulated degree of freedom (DOF) in um to file.
 
@@ -457,7 +536,7 @@ class TeleFacade(object):
 
     def writeStarInstFile(self, instFileDir, skySim, simSeed=1000,
                           sedName="sed_flat.txt", instSettingFile=None,
-                          instFileName="star.inst"):
+                          instFileName="star.inst", starIdx=None):
         """Write the star instance file.
 
         Parameters
@@ -475,6 +554,9 @@ class TeleFacade(object):
             Instance setting file. (the default is None.)
         instFileName : str, optional
             Star instance file name. (the default is "star.inst".)
+        starIdx : list[int] or numpy.ndarray[int], optional
+            Indexes of the stars in skySim to write. All stars are written if
+            this is None. (the default is None.)
 
         Returns
         -------
@@ -524,16 +606,45 @@ class TeleFacade(object):
             self._writeSedFileIfPhoSimDirSet()
             sedName = "sed_%s.txt" % int(self.getRefWaveLength())
 
-        # Write the star source
+        self.phoSimCommu.writeToFile(instFilePath, content=content)
+
+        # Write the star source block by block
+        self.phoSimCommu.writeStarsToFile(
+            instFilePath, self._getStarChunks(skySim, starIdx), sedName)
+
+        return instFilePath
+
+    def _getStarChunks(self, skySim, starIdx, chunkSize=100000):
+        """Get the blocks of stars to write.
+
+        Parameters
+        ----------
+        skySim : SkySim
+            SkySim object.
+        starIdx : list[int] or numpy.ndarray[int]
+            Indexes of the stars in skySim. All stars are used if this is
+            None.
+        chunkSize : int, optional
+            Number of stars in each block. (the default is 100000.)
+
+        Yields
+        ------
+        tuple
+            Star Id, ra, decl, and magnitude arrays.
+        """
+
+        if (starIdx is None):
+            yield from skySim.iterStarsInChunks(chunkSize=chunkSize)
+            return
+
         starId = skySim.getStarId()
         ra, decl = skySim.getRaDecInDeg()
         mag = skySim.getStarMag()
-        for idx in range(len(starId)):
-            content += self.phoSimCommu.generateStar(
-                starId[idx], ra[idx], decl[idx], mag[idx], sedName)
-        self.phoSimCommu.writeToFile(instFilePath, content=content)
 
-        return instFilePath
+        starIdx = np.asarray(starIdx, dtype=int)
+        for idxStart in range(0, len(starIdx), chunkSize):
+            idxChunk = starIdx[idxStart:idxStart + chunkSize]
+            yield starId[idxChunk], ra[idxChunk], decl[idxChunk], mag[idxChunk]
 
     def _getFilterIdInPhoSim(self):
         """Get the active filter Id used in PhoSim.
@@ -610,9 +721,8 @@ class TeleFacade(object):
 
         # Write the OPD source
         fieldX, fieldY = opdMetr.getFieldXY()
-        for idx in range(len(fieldX)):
-            content += self.phoSimCommu.generateOpd(
-                idx, fieldX[idx], fieldY[idx], self.getRefWaveLength())
+        content += self.phoSimCommu.generateOpds(
+            np.arange(len(fieldX)), fieldX, fieldY, self.getRefWaveLength())
         self.phoSimCommu.writeToFile(instFilePath, content=content)
 
         # Write the OPD SED file if necessary
@@ -636,7 +746,8 @@ class TeleFacade(object):
         m1m3ForceError : float, optional
             Ratio of actuator force error. (the default is 0.05.)
         saveResMapFig : bool, optional
-            Save the mirror surface residue map or not. (the default is False.)
+            Save the mirror surface residue map or not. The maps are plotted
+            by the plot service if it is set. (the default is False.)
         pertCmdFileName : str, optional
             Perturbation command file name. (the default is "pert.cmd".)
 
@@ -646,29 +757,57 @@ class TeleFacade(object):
             Perturbation command file path.
         """
 
+        # Files of the mirror residue maps and fitted zk
+        m1ResFilePath = os.path.join(pertCmdFileDir, "M1res.txt")
+        m3ResFilePath = os.path.join(pertCmdFileDir, "M3res.txt")
+        m1m3ZcFilePath = os.path.join(pertCmdFileDir, "M1M3zlist.txt")
+        m2ResFilePath = os.path.join(pertCmdFileDir, "M2res.txt")
+        m2ZcFilePath = os.path.join(pertCmdFileDir, "M2zlist.txt")
+
+        # The subsystems are independent. With the executor, the M1M3
+        # surface and the whole M2 are calculated in the other processes at
+        # the same time, and the command is assembled in the same order as
+        # the serial one.
+        zAngleInRad = self._getZenAngleInRad()
+        surfaceGridN = self.getSurfGridN()
+        executor = self._pertExecutor
+        if (executor is not None):
+            if (self.m1m3 is not None):
+                futureM1M3Surf = executor.submit(
+                    calcM1M3SurfInUm, self.m1m3, zAngleInRad,
+                    self._getM1M3TempCorrParam(),
+                    m1m3ForceError=m1m3ForceError, seedNum=seedNum)
+
+            if (self.m2 is not None):
+                futureM2Surf = executor.submit(
+                    writeM2ZkAndGridRes, self.m2, zAngleInRad,
+                    self._getM2TempCorrParam(), m2ResFilePath, m2ZcFilePath,
+                    surfaceGridN)
+
         # Get the perturbation of subsystems
         content = ""
         if (self.m1m3 is not None):
-            m1ResFileName = "M1res.txt"
-            m3ResFileName = "M3res.txt"
-            m1m3ZcFileName = "M1M3zlist.txt"
-
-            m1ResFilePath = os.path.join(pertCmdFileDir, m1ResFileName)
-            m3ResFilePath = os.path.join(pertCmdFileDir, m3ResFileName)
-            m1m3ZcFilePath = os.path.join(pertCmdFileDir, m1m3ZcFileName)
+            if (executor is None):
+                mirrorSurfInUm = calcM1M3SurfInUm(
+                    self.m1m3, zAngleInRad, self._getM1M3TempCorrParam(),
+                    m1m3ForceError=m1m3ForceError, seedNum=seedNum)
+            else:
+                mirrorSurfInUm = futureM1M3Surf.result()
 
             content = self._addPertM1M3(m1ResFilePath, m3ResFilePath,
                                         m1m3ZcFilePath, content,
-                                        m1m3ForceError, seedNum=seedNum)
+                                        mirrorSurfInUm)
 
         if (self.m2 is not None):
-            m2ResFileName = "M2res.txt"
-            m2ZcFileName = "M2zlist.txt"
-
-            m2ResFilePath = os.path.join(pertCmdFileDir, m2ResFileName)
-            m2ZcFilePath = os.path.join(pertCmdFileDir, m2ZcFileName)
+            if (executor is None):
+                mirrorSurfInUm = writeM2ZkAndGridRes(
+                    self.m2, zAngleInRad, self._getM2TempCorrParam(),
+                    m2ResFilePath, m2ZcFilePath, surfaceGridN)
+            else:
+                mirrorSurfInUm = futureM2Surf.result()
 
-            content = self._addPertM2(m2ResFilePath, m2ZcFilePath, content)
+            content = self._addPertM2(m2ResFilePath, m2ZcFilePath, content,
+                                      mirrorSurfInUm)
 
         if (self.cam is not None):
             content = self._addPertCam(content)
@@ -678,7 +817,12 @@ class TeleFacade(object):
         self.phoSimCommu.writeToFile(pertCmdFilePath, content=content,
                                      mode="w")
 
-        # Save the mirror residue map if necessary
+        # Save the mirror residue map if necessary. The residue maps are not
+        # even collected if the plot is disabled.
+        if (self._plotService is not None and
+                self._plotService.getPlotMode() == PlotMode.Disabled):
+            saveResMapFig = False
+
         if (saveResMapFig):
 
             if (self.m1m3 is not None):
@@ -689,10 +833,89 @@ class TeleFacade(object):
 
         return pertCmdFilePath
 
+    def getPertParam(self, seedNum=None, m1m3ForceError=0.05):
+        """Get the parameters that the perturbation files depend on.
+
+        The perturbation files written by writePertBaseOnConfigFile() only
+        depend on these parameters and the policy files (see
+        getPertPolicyFileList()). They do not depend on the degree of
+        freedom (DOF).
+
+        Parameters
+        ----------
+        seedNum : int, optional
+            Random seed number. (the default is None.)
+        m1m3ForceError : float, optional
+            Ratio of actuator force error. (the default is 0.05.)
+
+        Returns
+        -------
+        dict
+            Perturbation parameters.
+        """
+
+        pertParam = {"addCam": (self.cam is not None),
+                     "addM1M3": (self.m1m3 is not None),
+                     "addM2": (self.m2 is not None),
+                     "zAngleInDeg": float(self.surveyParam["zAngleInDeg"]),
+                     "surfaceGridN": self.getSurfGridN()}
+
+        if (self.m1m3 is not None):
+            pertParam["seedNum"] = seedNum if (seedNum is None) \
+                else int(seedNum)
+            pertParam["m1m3ForceError"] = float(m1m3ForceError)
+            for settingName in ("m1m3TBulk", "m1m3TxGrad", "m1m3TyGrad",
+                                "m1m3TzGrad", "m1m3TrGrad"):
+                pertParam[settingName] = float(
+                    self._teleSettingFile.getSetting(settingName))
+
+        if (self.m2 is not None):
+            for settingName in ("m2TzGrad", "m2TrGrad"):
+                pertParam[settingName] = float(
+                    self._teleSettingFile.getSetting(settingName))
+
+        if (self.cam is not None):
+            pertParam["rotAngInDeg"] = float(self.surveyParam["rotAngInDeg"])
+            pertParam["camTB"] = float(
+                self._teleSettingFile.getSetting("camTB"))
+
+        return pertParam
+
+    def getPertPolicyFileList(self):
+        """Get the policy files that the perturbation files depend on.
+
+        Returns
+        -------
+        list[str]
+            List of policy file paths.
+        """
+
+        configDir = getConfigDir()
+        policyFileList = [os.path.join(configDir, "teleSetting.yaml")]
+
+        subSysDirList = []
+        if (self.m1m3 is not None):
+            subSysDirList.append(self.m1m3.getMirrorDataDir())
+        if (self.m2 is not None):
+            subSysDirList.append(self.m2.getMirrorDataDir())
+        if (self.cam is not None):
+            subSysDirList.append(os.path.join(configDir, "camera"))
+
+        for subSysDir in subSysDirList:
+            for fileName in sorted(os.listdir(subSysDir)):
+                filePath = os.path.join(subSysDir, fileName)
+                if os.path.isfile(filePath):
+                    policyFileList.append(filePath)
+
+        return policyFileList
+
     def _addPertM1M3(self, m1ResFilePath, m3ResFilePath, m1m3ZcFilePath,
-                     content, m1m3ForceError, seedNum=None):
+                     content, mirrorSurfInUm):
         """Add the perturbation of M1M3.
 
+        The grid residue maps of M1 and M3 are sampled in the executor of
+        perturbation if any.
+
         Parameters
         ----------
         m1ResFilePath : str
@@ -703,11 +926,8 @@ class TeleFacade(object):
             M1M3 fitted zk file path.
         content : str
             Perturbation without M1M3.
-        m1m3ForceError : float
-            Ratio of actuator force error.
-        seedNum : int, optional
-            Random seed number. If the value is not None, the M1M3 mirror
-            will generate a random surface error. (the default is None.)
+        mirrorSurfInUm : numpy.ndarray
+            M1M3 surface along z in um (see calcM1M3SurfInUm()).
 
         Returns
         -------
@@ -715,40 +935,14 @@ class TeleFacade(object):
             Perturbation with M1M3.
         """
 
-        # Do the gravity correction
-        zAngleInRad = self._getZenAngleInRad()
-        printthzInM = self.m1m3.getPrintthz(zAngleInRad)
-
-        # Add the surface error if necessary
-        randSurfInM = None
-        if (seedNum is not None):
-            randSurfInM = self.m1m3.genMirSurfRandErr(
-                zAngleInRad, m1m3ForceError=m1m3ForceError,
-                seedNum=seedNum)
-
-        # Do the temperature correction
-        m1m3TBulk = self._teleSettingFile.getSetting("m1m3TBulk")
-        m1m3TxGrad = self._teleSettingFile.getSetting("m1m3TxGrad")
-        m1m3TyGrad = self._teleSettingFile.getSetting("m1m3TyGrad")
-        m1m3TzGrad = self._teleSettingFile.getSetting("m1m3TzGrad")
-        m1m3TrGrad = self._teleSettingFile.getSetting("m1m3TrGrad")
-        tempCorrInUm = self.m1m3.getTempCorr(m1m3TBulk, m1m3TxGrad,
-                                             m1m3TyGrad, m1m3TzGrad,
-                                             m1m3TrGrad)
-
-        # Set the mirror surface in mm
-        if (randSurfInM is not None):
-            mirrorSurfInUm = (printthzInM + randSurfInM) * 1e6 + \
-                tempCorrInUm
-        else:
-            mirrorSurfInUm = printthzInM * 1e6 + tempCorrInUm
         self.m1m3.setSurfAlongZ(mirrorSurfInUm)
 
         resFile = [m1ResFilePath, m3ResFilePath]
         surfaceGridN = self.getSurfGridN()
         self.m1m3.writeMirZkAndGridResInZemax(
             resFile=resFile, surfaceGridN=surfaceGridN,
-            writeZcInMnToFilePath=m1m3ZcFilePath)
+            writeZcInMnToFilePath=m1m3ZcFilePath,
+            executor=self._pertExecutor)
 
         # Get the Zk in mm
         zkInMm = np.loadtxt(m1m3ZcFilePath)
@@ -776,6 +970,32 @@ class TeleFacade(object):
 
         return contentWithPert
 
+    def _getM1M3TempCorrParam(self):
+        """Get the parameters of M1M3 temperature correction.
+
+        Returns
+        -------
+        list[float]
+            Bulk temperature and x, y, z, r temperature gradients in the
+            order of M1M3Sim.getTempCorr().
+        """
+
+        return [self._teleSettingFile.getSetting(name)
+                for name in ("m1m3TBulk", "m1m3TxGrad", "m1m3TyGrad",
+                             "m1m3TzGrad", "m1m3TrGrad")]
+
+    def _getM2TempCorrParam(self):
+        """Get the parameters of M2 temperature correction.
+
+        Returns
+        -------
+        list[float]
+            z and r temperature gradients in the order of M2Sim.getTempCorr().
+        """
+
+        return [self._teleSettingFile.getSetting(name)
+                for name in ("m2TzGrad", "m2TrGrad")]
+
     def _getZenAngleInRad(self):
         """Get the zenith angle in radian.
 
@@ -790,17 +1010,20 @@ class TeleFacade(object):
 
         return zAngleInRad
 
-    def _addPertM2(self, m2ResFilePath, m2ZcFilePath, content):
+    def _addPertM2(self, m2ResFilePath, m2ZcFilePath, content,
+                   mirrorSurfInUm):
         """Add the perturbation of M2.
 
         Parameters
         ----------
         m2ResFilePath : str
-            M2 residue file path.
+            M2 residue file path written by writeM2ZkAndGridRes().
         m2ZcFilePath : str
-            M2 fitted zk file path.
+            M2 fitted zk file path written by writeM2ZkAndGridRes().
         content : str
             Perturbation without M2.
+        mirrorSurfInUm : numpy.ndarray
+            M2 surface along z in um.
 
         Returns
         -------
@@ -808,24 +1031,9 @@ class TeleFacade(object):
             Perturbation with M2.
         """
 
-        # Do the gravity correction
-        zAngleInRad = self._getZenAngleInRad()
-        printthzInUm = self.m2.getPrintthz(zAngleInRad)
-
-        # Do the temperature correction
-        m2TzGrad = self._teleSettingFile.getSetting("m2TzGrad")
-        m2TrGrad = self._teleSettingFile.getSetting("m2TrGrad")
-        tempCorrInUm = self.m2.getTempCorr(m2TzGrad, m2TrGrad)
-
-        # Set the mirror surface in mm
-        mirrorSurfInUm = printthzInUm + tempCorrInUm
+        # The surface might be calculated in the other process
         self.m2.setSurfAlongZ(mirrorSurfInUm)
 
-        surfaceGridN = self.getSurfGridN()
-        self.m2.writeMirZkAndGridResInZemax(
-            resFile=m2ResFilePath, surfaceGridN=surfaceGridN,
-            writeZcInMnToFilePath=m2ZcFilePath)
-
         # Get the Zk in mm
         zkInMm = np.loadtxt(m2ZcFilePath)
 
@@ -899,7 +1107,8 @@ class TeleFacade(object):
 
         self.m1m3.showMirResMap(
             resFile=resFile,
-            writeToResMapFilePath=writeToResMapFilePath)
+            writeToResMapFilePath=writeToResMapFilePath,
+            plotService=self._plotService)
 
     def _getImgPathFromDataFilePath(self, dataFilePath, imgType=".png"):
         """Get the image path from the data file path.
@@ -935,7 +1144,8 @@ class TeleFacade(object):
 
         self.m2.showMirResMap(
             resFile=m2ResFilePath,
-            writeToResMapFilePath=writeToResMapFilePath)
+            writeToResMapFilePath=writeToResMapFilePath,
+            plotService=self._plotService)
 
     def _getPhoSimCamSurf(self, camSurfName):
         """Get the camera surface used in PhoSim.
@@ -969,5 +1179,86 @@ class TeleFacade(object):
         return mapSurfNameToEnum(surfName)
 
 
+def calcM1M3SurfInUm(m1m3, zAngleInRad, tempCorrParam, m1m3ForceError=0.05,
+                     seedNum=None):
+    """Calculate the M1M3 surface along z with the gravity, random surface
+    error, and temperature correction.
+
+    This is a module function to be run in the other processes.
+
+    Parameters
+    ----------
+    m1m3 : M1M3Sim
+        M1M3 simulator.
+    zAngleInRad : float
+        Zenith angle in radian.
+    tempCorrParam : list[float]
+        Parameters of M1M3Sim.getTempCorr().
+    m1m3ForceError : float, optional
+        Ratio of actuator force error. (the default is 0.05.)
+    seedNum : int, optional
+        Random seed number. If the value is not None, the M1M3 mirror will
+        generate a random surface error. (the default is None.)
+
+    Returns
+    -------
+    numpy.ndarray
+        Mirror surface along z in um.
+    """
+
+    # Do the gravity correction
+    printthzInM = m1m3.getPrintthz(zAngleInRad)
+
+    # Add the surface error if necessary
+    if (seedNum is not None):
+        printthzInM = printthzInM + m1m3.genMirSurfRandErr(
+            zAngleInRad, m1m3ForceError=m1m3ForceError, seedNum=seedNum)
+
+    # Do the temperature correction
+    tempCorrInUm = m1m3.getTempCorr(*tempCorrParam)
+
+    return printthzInM * 1e6 + tempCorrInUm
+
+
+def writeM2ZkAndGridRes(m2, zAngleInRad, tempCorrParam, m2ResFilePath,
+                        m2ZcFilePath, surfaceGridN):
+    """Calculate the M2 surface along z and write the fitted zk and grid
+    residue map.
+
+    This is a module function to be run in the other processes.
+
+    Parameters
+    ----------
+    m2 : M2Sim
+        M2 simulator.
+    zAngleInRad : float
+        Zenith angle in radian.
+    tempCorrParam : list[float]
+        Parameters of M2Sim.getTempCorr().
+    m2ResFilePath : str
+        M2 residue file path.
+    m2ZcFilePath : str
+        M2 fitted zk file path.
+    surfaceGridN : int
+        Surface grid number.
+
+    Returns
+    -------
+    numpy.ndarray
+        Mirror surface along z in um.
+    """
+
+    # Do the gravity and temperature correction
+    mirrorSurfInUm = m2.getPrintthz(zAngleInRad) + \
+        m2.getTempCorr(*tempCorrParam)
+    m2.setSurfAlongZ(mirrorSurfInUm)
+
+    m2.writeMirZkAndGridResInZemax(resFile=m2ResFilePath,
+                                   surfaceGridN=surfaceGridN,
+                                   writeZcInMnToFilePath=m2ZcFilePath)
+
+    return mirrorSurfInUm
+
+
 if __name__ == "__main__":
     pass
@@ -2,7 +2,8 @@ import os
 import unittest
 import numpy as np
 
-from lsst.ts.phosim.telescope.MirrorSim import MirrorSim
+from lsst.ts.phosim.telescope.MirrorSim import MirrorSim, \
+    gridSampInMnInZemax
 
 from lsst.ts.phosim.Utility import getConfigDir
 
@@ -32,6 +33,10 @@ class TestMirrorSim(unittest.TestCase):
 
         self.assertEqual(self.mirror.getNumTerms(), 28)
 
+    def testGetNumOfRbfNeighbor(self):
+
+        self.assertEqual(self.mirror.getNumOfRbfNeighbor(), 0)
+
     def testSetAndGetSurfAlongZ(self):
 
         surfAlongZinUm = np.random.rand(3, 3)
@@ -78,6 +83,49 @@ class TestMirrorSim(unittest.TestCase):
         self.assertRaises(NotImplementedError,
                           self.mirror.showMirResMap, "")
 
+    def testGridSampInMnInZemaxWithLocalRbf(self):
+
+        # Smooth surface on the nodes in the annulus
+        rng = np.random.RandomState(0)
+        innerRinMm = self.innerRinM * 1e3
+        outerRinMm = self.outerRinM * 1e3
+        radius = np.sqrt(rng.uniform(innerRinMm**2, outerRinMm**2, 2000))
+        theta = rng.uniform(0, 2 * np.pi, 2000)
+        xInMm = radius * np.cos(theta)
+        yInMm = radius * np.sin(theta)
+        zInMm = 1e-5 * (radius / outerRinMm)**2 * np.cos(2 * theta)
+
+        surfaceGridN = 30
+        content = gridSampInMnInZemax(zInMm, xInMm, yInMm, innerRinMm,
+                                      outerRinMm, surfaceGridN, surfaceGridN)
+        contentLocal = gridSampInMnInZemax(
+            zInMm, xInMm, yInMm, innerRinMm, outerRinMm, surfaceGridN,
+            surfaceGridN, numOfNeighbor=50)
+
+        # Same header and grid points out of the mirror
+        self.assertEqual(content.splitlines()[0],
+                         contentLocal.splitlines()[0])
+
+        data = np.loadtxt(content.splitlines()[1:])
+        dataLocal = np.loadtxt(contentLocal.splitlines()[1:])
+        self.assertEqual(data.shape, ((surfaceGridN + 4)**2, 4))
+        self.assertTrue(np.array_equal(data[:, 0] == 0,
+                                       dataLocal[:, 0] == 0))
+
+        # Surface and slopes are close to the global RBF in the mirror. The
+        # extrapolation out of the nodes is not compared.
+        numOfPixel = surfaceGridN + 4
+        delx = float(content.split()[2])
+        pos = (np.arange(numOfPixel) - 0.5 * (numOfPixel - 1)) * delx
+        xx, yy = np.meshgrid(pos, pos)
+        radius = np.hypot(xx, yy).ravel()
+        inMirror = (radius > innerRinMm) & (radius < outerRinMm)
+
+        for idx in range(3):
+            diff = dataLocal[inMirror, idx] - data[inMirror, idx]
+            rms = np.sqrt(np.mean(diff**2))
+            self.assertLess(rms / np.max(np.abs(data[:, idx])), 1e-2)
+
 
 if __name__ == "__main__":
 
@@ -101,6 +101,62 @@ class TestPhosimCommu(unittest.TestCase):
         ansContent += "none none \n"
         self.assertEqual(content, ansContent)
 
+    def testGenerateOpds(self):
+
+        opdId = np.arange(3)
+        fieldXInDeg = np.array([1.0, 0.0, -1.0])
+        fieldYInDeg = np.array([2.0, 0.5, 0.0])
+        wavelengthInNm = 500.0
+        content = self.phosimCom.generateOpds(opdId, fieldXInDeg,
+                                              fieldYInDeg, wavelengthInNm)
+
+        ansContent = ""
+        for idx in opdId:
+            ansContent += self.phosimCom.generateOpd(
+                idx, fieldXInDeg[idx], fieldYInDeg[idx], wavelengthInNm)
+        self.assertEqual(content, ansContent)
+
+    def testGenerateStars(self):
+
+        starId, ra, dec, magNorm = self._getStarData()
+        sedName = "flat.txt"
+        content = self.phosimCom.generateStars(starId, ra, dec, magNorm,
+                                               sedName)
+
+        ansContent = ""
+        for idx in range(len(starId)):
+            ansContent += self.phosimCom.generateStar(
+                starId[idx], ra[idx], dec[idx], magNorm[idx], sedName)
+        self.assertEqual(content, ansContent)
+
+    def _getStarData(self):
+
+        starId = np.arange(5)
+        ra = np.linspace(-1, 1, 5)
+        dec = np.linspace(0, 1, 5)
+        magNorm = np.linspace(15, 17, 5)
+
+        return starId, ra, dec, magNorm
+
+    def testWriteStarsToFile(self):
+
+        filePath = os.path.join(getModulePath(), "tests", "temp.inst")
+        self.assertFalse(os.path.exists(filePath))
+
+        starId, ra, dec, magNorm = self._getStarData()
+        starChunks = [(starId[:3], ra[:3], dec[:3], magNorm[:3]),
+                      (starId[3:], ra[3:], dec[3:], magNorm[3:])]
+        self.phosimCom.writeStarsToFile(filePath, starChunks, "flat.txt",
+                                        mode="w")
+
+        with open(filePath, "r") as file:
+            contentInFile = file.read()
+        os.remove(filePath)
+
+        ansContent = self.phosimCom.generateStars(starId, ra, dec, magNorm,
+                                                  "flat.txt")
+        self.assertEqual(contentInFile, ansContent)
+
     def testGetStarInstance(self):
 
         obsId = 100
@@ -151,6 +207,16 @@ class TestPhosimCommu(unittest.TestCase):
 
         self.assertEqual(argString, ansArgString)
 
+    def testGetPhoSimArgsWithWorkDir(self):
+
+        instFile = "temp.inst"
+        workDir = "work"
+        argString = self.phosimCom.getPhoSimArgs(instFile, workDir=workDir)
+
+        ansArgString = "%s -i lsst -e 1 -w %s" % (os.path.abspath(instFile),
+                                                  os.path.abspath(workDir))
+        self.assertEqual(argString, ansArgString)
+
     def testFunc(self):
 
         try:
@@ -0,0 +1,141 @@
+import unittest
+import numpy as np
+
+from lsst.ts.phosim.telescope.RbfInterpolator import RbfInterpolator
+
+
+class TestRbfInterpolator(unittest.TestCase):
+    """ Test the RbfInterpolator class."""
+
+    def setUp(self):
+
+        # Nodes in the annulus of M2
+        rng = np.random.RandomState(0)
+        radius = np.sqrt(rng.uniform(0.9**2, 1.71**2, 1000))
+        theta = rng.uniform(0, 2 * np.pi, 1000)
+        self.nodeX = radius * np.cos(theta)
+        self.nodeY = radius * np.sin(theta)
+
+        # Points in the annulus
+        radius = np.sqrt(rng.uniform(1.0**2, 1.6**2, 200))
+        theta = rng.uniform(0, 2 * np.pi, 200)
+        self.x = radius * np.cos(theta)
+        self.y = radius * np.sin(theta)
+
+    def _getSurf(self, x, y):
+
+        return 0.3 * (x**2 - y**2) + 0.1 * x * y**2 + 0.05 * np.sin(2 * x)
+
+    def testGetNumOfNeighbor(self):
+
+        self.assertEqual(RbfInterpolator().getNumOfNeighbor(), 0)
+        self.assertEqual(RbfInterpolator(numOfNeighbor=30).getNumOfNeighbor(),
+                         30)
+
+    def testFit(self):
+
+        rbfi = RbfInterpolator()
+        self.assertFalse(rbfi.isFitted())
+
+        rbfi.fit(self.nodeX, self.nodeY, self._getSurf(self.nodeX,
+                                                       self.nodeY))
+        self.assertTrue(rbfi.isFitted())
+
+    def testFitWithWrongNumOfData(self):
+
+        rbfi = RbfInterpolator()
+        self.assertRaises(ValueError, rbfi.fit, self.nodeX, self.nodeY,
+                          np.zeros(10))
+
+    def testEvaluateWithoutFit(self):
+
+        rbfi = RbfInterpolator()
+        self.assertRaises(RuntimeError, rbfi.evaluate, self.x, self.y)
+
+    def testEvaluateGlobalRbf(self):
+
+        from scipy.interpolate import Rbf
+
+        data = self._getSurf(self.nodeX, self.nodeY)
+        rbfi = RbfInterpolator()
+        rbfi.fit(self.nodeX, self.nodeY, data)
+
+        x = self.x.reshape(10, 20)
+        y = self.y.reshape(10, 20)
+        values = rbfi.evaluate(x, y)
+
+        self.assertEqual(values.shape, (10, 20))
+
+        ansValues = Rbf(self.nodeX, self.nodeY, data)(x, y)
+        self.assertLess(np.max(np.abs(values - ansValues)), 1e-8)
+
+    def testEvaluateLocalRbfWithLinearData(self):
+
+        # The linear polynomial is reproduced by the local RBF
+        rbfi = RbfInterpolator(numOfNeighbor=20)
+        rbfi.fit(self.nodeX, self.nodeY,
+                 1.0 + 2.0 * self.nodeX - 3.0 * self.nodeY)
+
+        values = rbfi.evaluate(self.x, self.y)
+        ansValues = 1.0 + 2.0 * self.x - 3.0 * self.y
+        self.assertLess(np.max(np.abs(values - ansValues)), 1e-8)
+
+    def testEvaluateLocalRbf(self):
+
+        data = self._getSurf(self.nodeX, self.nodeY)
+        globalRbf = RbfInterpolator()
+        globalRbf.fit(self.nodeX, self.nodeY, data)
+        localRbf = RbfInterpolator(numOfNeighbor=50)
+        localRbf.fit(self.nodeX, self.nodeY, data)
+
+        valuesGlobal = globalRbf.evaluate(self.x, self.y)
+        valuesLocal = localRbf.evaluate(self.x, self.y)
+
+        rms = np.sqrt(np.mean((valuesLocal - valuesGlobal)**2))
+        self.assertLess(rms / np.ptp(valuesGlobal), 1e-3)
+
+        ansValues = self._getSurf(self.x, self.y)
+        self.assertLess(np.max(np.abs(valuesLocal - ansValues)), 1e-3)
+
+    def testEvaluateLocalRbfWithMoreNeighborThanNode(self):
+
+        rbfi = RbfInterpolator(numOfNeighbor=2000)
+        rbfi.fit(self.nodeX, self.nodeY, self._getSurf(self.nodeX,
+                                                       self.nodeY))
+
+        values = rbfi.evaluate(self.x, self.y)
+        ansValues = self._getSurf(self.x, self.y)
+        self.assertLess(np.max(np.abs(values - ansValues)), 1e-3)
+
+    def testEvaluateLocalRbfWithCenter(self):
+
+        rbfi = RbfInterpolator(numOfNeighbor=20)
+        rbfi.fit(self.nodeX, self.nodeY, self._getSurf(self.nodeX,
+                                                       self.nodeY))
+
+        # The points of same center share one local system, so the finite
+        # difference is the derivative of one smooth function.
+        epsilon = 1e-6
+        x = np.column_stack((self.x + epsilon, self.x - epsilon))
+        y = np.column_stack((self.y, self.y))
+        centerX = np.column_stack((self.x, self.x))
+        centerY = np.column_stack((self.y, self.y))
+        values = rbfi.evaluate(x, y, centerX=centerX, centerY=centerY)
+
+        dx = (values[:, 0] - values[:, 1]) / (2 * epsilon)
+        ansDx = 0.6 * self.x + 0.1 * self.y**2 + 0.1 * np.cos(2 * self.x)
+        self.assertLess(np.max(np.abs(dx - ansDx)), 0.05)
+
+        # The center itself gives the same value as the evaluation without
+        # center
+        values = rbfi.evaluate(self.x, self.y, centerX=self.x,
+                               centerY=self.y)
+        self.assertLess(np.max(np.abs(values - rbfi.evaluate(self.x,
+                                                             self.y))),
+                        1e-12)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -2,6 +2,7 @@ import os
 import shutil
 import numpy as np
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 
 from lsst.ts.wep.Utility import FilterType, CamType
 
@@ -9,8 +10,9 @@ from lsst.ts.phosim.telescope.TeleFacade import TeleFacade
 
 from lsst.ts.phosim.OpdMetrology import OpdMetrology
 from lsst.ts.phosim.SkySim import SkySim
+from lsst.ts.phosim.PlotService import PlotService
 
-from lsst.ts.phosim.Utility import getModulePath, getConfigDir
+from lsst.ts.phosim.Utility import getModulePath, getConfigDir, PlotMode
 
 
 class TestTeleFacade(unittest.TestCase):
@@ -213,6 +215,42 @@ class TestTeleFacade(unittest.TestCase):
         numOfLineInFile = self._getNumOfLineInFile(pertCmdFilePath)
         self.assertEqual(numOfLineInFile, 256)
 
+    def testWritePertBaseOnConfigFileWithExecutor(self):
+
+        pertCmdFilePath = self._writePertBaseOnConfigFile(self.outputDir)
+        with open(pertCmdFilePath, "r") as file:
+            content = file.read()
+        m1ResMap = np.loadtxt(os.path.join(self.outputDir, "M1res.txt"))
+        m2Surf = self.tele.m2.getSurfAlongZ().copy()
+
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            self.tele.setPertExecutor(executor)
+            self.assertEqual(self.tele.getPertExecutor(), executor)
+
+            pertCmdFilePath = self._writePertBaseOnConfigFile(self.outputDir)
+            self.tele.setPertExecutor(None)
+
+        with open(pertCmdFilePath, "r") as file:
+            self.assertEqual(file.read(), content)
+        self.assertTrue(np.array_equal(
+            np.loadtxt(os.path.join(self.outputDir, "M1res.txt")), m1ResMap))
+        self.assertTrue(np.array_equal(self.tele.m2.getSurfAlongZ(), m2Surf))
+
+    def testWritePertBaseOnConfigFileWithPlotService(self):
+
+        m2ResMapFilePath = os.path.join(self.outputDir, "M2res.png")
+        for plotMode, hasFig in ((PlotMode.Disabled, False),
+                                 (PlotMode.Background, True)):
+            plotService = PlotService(plotMode=plotMode)
+            self.tele.setPlotService(plotService)
+            self._writePertBaseOnConfigFile(self.outputDir)
+            plotService.close()
+
+            self.assertEqual(os.path.exists(m2ResMapFilePath), hasFig)
+
+        self.tele.setPlotService(None)
+        self.assertIsNone(self.tele.getPlotService())
+
     def _writePertBaseOnConfigFile(self, outputDir):
 
         iSim = 6
@@ -0,0 +1,88 @@
+import pickle
+import unittest
+import numpy as np
+
+from lsst.ts.wep.Utility import FilterType
+
+from lsst.ts.phosim.BandPssn import BandPssn, getBandPssn
+from lsst.ts.phosim.MetroTool import calc_pssn
+
+
+class TestBandPssn(unittest.TestCase):
+    """ Test the BandPssn class."""
+
+    def setUp(self):
+
+        self.bandPssn = BandPssn([0.55, 0.62, 0.68], [1, 2, 1])
+
+    def _getOpd(self, m=127):
+
+        # Annular pupil with the defocus and astigmatism in um
+        grid = np.linspace(-1, 1, m)
+        x, y = np.meshgrid(grid, grid)
+        r2 = x**2 + y**2
+
+        opd = 0.08 * (2 * r2 - 1) + 0.05 * (x**2 - y**2) + 1e-4
+        opd[(r2 > 1) | (r2 < 0.61**2)] = 0
+
+        return opd
+
+    def testInitWithWrongWeight(self):
+
+        self.assertRaises(ValueError, BandPssn, [0.5, 0.6], [1])
+        self.assertRaises(ValueError, BandPssn, [0.5, 0.6], [0, 0])
+
+    def testGetWeight(self):
+
+        self.assertTrue(np.allclose(self.bandPssn.getWeight(),
+                                    [0.25, 0.5, 0.25]))
+        self.assertAlmostEqual(self.bandPssn.getEffWavelength(), 0.6175)
+
+    def testCalcMonoPssn(self):
+
+        opd = self._getOpd()
+        pssn = self.bandPssn.calcMonoPssn(opd)
+
+        pssnAns = [calc_pssn(opd.copy(), wavelength)
+                   for wavelength in self.bandPssn.getWavelength()]
+        self.assertTrue(np.allclose(pssn, pssnAns, rtol=1e-10))
+
+        self.assertTrue(np.all(pssn < 1))
+
+    def testCalcPssn(self):
+
+        opd = self._getOpd()
+        pssn = self.bandPssn.calcPssn(opd)
+
+        monoPssn = self.bandPssn.calcMonoPssn(opd)
+        self.assertAlmostEqual(pssn, np.sum(self.bandPssn.getWeight() *
+                                            monoPssn))
+        self.assertLess(pssn, 1)
+
+        self.assertAlmostEqual(self.bandPssn.calcPssn(np.zeros_like(opd) +
+                                                      (opd != 0) * 1e-4), 1)
+
+    def testPickleWithoutCache(self):
+
+        self.bandPssn.calcPssn(self._getOpd())
+        self.assertEqual(len(self.bandPssn._mtfAtm), 1)
+
+        bandPssn = pickle.loads(pickle.dumps(self.bandPssn))
+        self.assertEqual(len(bandPssn._mtfAtm), 0)
+        self.assertTrue(np.array_equal(bandPssn.getWeight(),
+                                       self.bandPssn.getWeight()))
+
+    def testGetBandPssn(self):
+
+        bandPssn = getBandPssn(FilterType.REF)
+        self.assertTrue(np.array_equal(bandPssn.getWavelength(), [0.5]))
+
+        bandPssn = getBandPssn(FilterType.R)
+        self.assertEqual(len(bandPssn.getWavelength()), 5)
+        self.assertAlmostEqual(np.sum(bandPssn.getWeight()), 1)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
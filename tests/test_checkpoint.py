@@ -0,0 +1,90 @@
+import os
+import shutil
+import numpy as np
+import unittest
+
+from lsst.ts.phosim.Checkpoint import Checkpoint
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class TestCheckpoint(unittest.TestCase):
+    """ Test the Checkpoint class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output",
+                                      "tmpCheckpoint")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+        self.filePath = os.path.join(self.outputDir, "checkpoint.json")
+        self.checkpoint = Checkpoint(self.filePath)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def testGetFilePath(self):
+
+        self.assertEqual(self.checkpoint.getFilePath(), self.filePath)
+
+    def testSetIterState(self):
+
+        self.assertFalse(self.checkpoint.hasIter(0))
+
+        self.checkpoint.setIterState(0, 9006000, np.arange(50), seedNum=6)
+        self.assertTrue(self.checkpoint.hasIter(0))
+        self.assertTrue(os.path.exists(self.filePath))
+
+        iterState = self.checkpoint.getIterState(0)
+        self.assertEqual(iterState["obsId"], 9006000)
+        self.assertEqual(iterState["seedNum"], 6)
+        self.assertTrue(np.array_equal(iterState["dofInUm"], np.arange(50)))
+
+    def testGetIterStateWithNoIter(self):
+
+        self.assertRaises(ValueError, self.checkpoint.getIterState, 0)
+
+    def testMarkStageDone(self):
+
+        self.checkpoint.setIterState(0, 9006000, np.zeros(50))
+        self.assertFalse(self.checkpoint.isStageDone(0, "opdPhoSim"))
+
+        self.checkpoint.markStageDone(0, "opdPhoSim")
+        self.checkpoint.markStageDone(0, "wep", data=[[94, [0.1, 0.2]]])
+
+        checkpoint = Checkpoint(self.filePath)
+        self.assertTrue(checkpoint.isStageDone(0, "opdPhoSim"))
+        self.assertEqual(checkpoint.getStageData(0, "wep"), [[94, [0.1, 0.2]]])
+        self.assertRaises(ValueError, checkpoint.getStageData, 0, "ofc")
+
+    def testFinishIter(self):
+
+        self.checkpoint.setIterState(0, 9006000, np.zeros(50), seedNum=6)
+        self.checkpoint.markStageDone(0, "opdPhoSim")
+        self.assertEqual(self.checkpoint.getResumeIterNum(), 0)
+
+        self.checkpoint.finishIter(0, 9006010, np.ones(50))
+        self.assertTrue(self.checkpoint.isIterFinished(0))
+
+        checkpoint = Checkpoint(self.filePath)
+        self.assertEqual(checkpoint.getResumeIterNum(), 1)
+
+        iterState = checkpoint.getIterState(1)
+        self.assertEqual(iterState["obsId"], 9006010)
+        self.assertEqual(iterState["seedNum"], 6)
+        self.assertTrue(np.array_equal(iterState["dofInUm"], np.ones(50)))
+        self.assertFalse(checkpoint.isStageDone(1, "opdPhoSim"))
+
+    def testClear(self):
+
+        self.checkpoint.setIterState(0, 9006000, np.zeros(50))
+        self.checkpoint.clear()
+
+        self.assertFalse(self.checkpoint.hasIter(0))
+        self.assertFalse(os.path.exists(self.filePath))
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
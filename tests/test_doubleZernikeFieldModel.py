@@ -0,0 +1,99 @@
+import unittest
+import numpy as np
+
+from lsst.ts.phosim.DoubleZernikeFieldModel import DoubleZernikeFieldModel
+
+
+class TestDoubleZernikeFieldModel(unittest.TestCase):
+    """ Test the DoubleZernikeFieldModel class."""
+
+    def setUp(self):
+
+        self.fieldModel = DoubleZernikeFieldModel(numOfFieldTerms=6)
+
+        rng = np.random.RandomState(0)
+        radius = 1.75 * np.sqrt(rng.uniform(0, 1, 31))
+        theta = rng.uniform(0, 2 * np.pi, 31)
+        self.fieldX = radius * np.cos(theta)
+        self.fieldY = radius * np.sin(theta)
+
+    def _getZk(self, fieldX, fieldY):
+
+        # Field-constant defocus, linear coma, and quadratic astigmatism
+        zk = np.zeros((len(fieldX), 19))
+        zk[:, 0] = 0.1
+        zk[:, 4] = 0.05 * fieldX
+        zk[:, 1] = 0.02 * (fieldX**2 - fieldY**2)
+        zk[:, 2] = 0.04 * fieldX * fieldY
+
+        return zk
+
+    def testFit(self):
+
+        zk = self._getZk(self.fieldX, self.fieldY)
+        self.fieldModel.fit(self.fieldX, self.fieldY, zk)
+
+        self.assertTrue(self.fieldModel.isFitted())
+        self.assertEqual(self.fieldModel.getCoef().shape, (6, 19))
+        self.assertAlmostEqual(self.fieldModel.getFieldRadiusInDeg(),
+                               np.max(np.hypot(self.fieldX, self.fieldY)))
+
+        looResidual = self.fieldModel.getLeaveOneOutResidual()
+        self.assertEqual(looResidual.shape, (31, 19))
+        self.assertLess(np.max(np.abs(looResidual)), 1e-10)
+
+    def testFitWithWrongNumOfField(self):
+
+        zk = self._getZk(self.fieldX, self.fieldY)
+        self.assertRaises(ValueError, self.fieldModel.fit, self.fieldX[:-1],
+                          self.fieldY[:-1], zk)
+        self.assertRaises(ValueError, self.fieldModel.fit, self.fieldX[:5],
+                          self.fieldY[:5], zk[:5])
+
+    def testGetLeaveOneOutResidual(self):
+
+        zk = self._getZk(self.fieldX, self.fieldY)
+        zk[0, 0] += 0.01
+        self.fieldModel.fit(self.fieldX, self.fieldY, zk)
+
+        # The held-out error is larger than the fitting residual
+        looResidual = self.fieldModel.getLeaveOneOutResidual()
+        residual = self.fieldModel.calcResidual(self.fieldX, self.fieldY, zk)
+        self.assertGreater(np.abs(looResidual[0, 0]), np.abs(residual[0, 0]))
+
+        modelWithoutFirst = DoubleZernikeFieldModel(
+            numOfFieldTerms=6,
+            fieldRadiusInDeg=self.fieldModel.getFieldRadiusInDeg())
+        modelWithoutFirst.fit(self.fieldX[1:], self.fieldY[1:], zk[1:])
+        residualOfFirst = modelWithoutFirst.calcResidual(
+            self.fieldX[0], self.fieldY[0], zk[0])
+        self.assertTrue(np.allclose(looResidual[0], residualOfFirst[0]))
+
+    def testEvalZk(self):
+
+        zk = self._getZk(self.fieldX, self.fieldY)
+        self.fieldModel.fit(self.fieldX, self.fieldY, zk)
+
+        fieldX, fieldY = self.fieldModel.getFieldGrid(numOfPointInDiameter=11)
+        zkOnGrid = self.fieldModel.evalZk(fieldX, fieldY)
+        self.assertTrue(np.allclose(zkOnGrid, self._getZk(fieldX, fieldY)))
+
+        zkOnPoint = self.fieldModel.evalZk(0.5, 0.2)
+        self.assertEqual(zkOnPoint.shape, (1, 19))
+
+    def testEvalZkNotFitted(self):
+
+        self.assertRaises(RuntimeError, self.fieldModel.evalZk, 0, 0)
+
+    def testGetFieldGrid(self):
+
+        fieldModel = DoubleZernikeFieldModel(fieldRadiusInDeg=1.0)
+        fieldX, fieldY = fieldModel.getFieldGrid(numOfPointInDiameter=5)
+        self.assertEqual(len(fieldX), 13)
+        self.assertLessEqual(np.max(np.hypot(fieldX, fieldY)), 1.0)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
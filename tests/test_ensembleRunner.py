@@ -0,0 +1,132 @@
+import os
+import csv
+import shutil
+import unittest
+import numpy as np
+
+from lsst.ts.phosim.EnsembleRunner import EnsembleRunner, \
+    readEnsembleMemberResult
+from lsst.ts.phosim.ResultsStore import ResultsStore
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class TestEnsembleRunner(unittest.TestCase):
+    """ Test the EnsembleRunner class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output",
+                                      "tmpEnsemble")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+        self.ensembleRunner = EnsembleRunner(self.outputDir)
+        self.ensembleRunner.setSpec(
+            baseParam={"iterNum": 2, "isEimg": True},
+            sweepParam={"seedNum": [6, 7], "starMag": [15, 16, 17]})
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def testReadSpecFile(self):
+
+        specFilePath = os.path.join(self.outputDir, "spec.yaml")
+        with open(specFilePath, "w") as file:
+            file.write("base:\n  iterNum: 3\nsweep:\n  rotAngInDeg: [0, 10]\n")
+
+        self.ensembleRunner.readSpecFile(specFilePath)
+        memberList = self.ensembleRunner.getMemberList()
+
+        self.assertEqual(memberList, [{"iterNum": 3, "rotAngInDeg": 0},
+                                      {"iterNum": 3, "rotAngInDeg": 10}])
+
+    def testSetSpecWithUnsupportedParam(self):
+
+        self.assertRaises(ValueError, self.ensembleRunner.setSpec,
+                          sweepParam={"iterNum": [1, 2]})
+        self.assertRaises(ValueError, self.ensembleRunner.setSpec,
+                          baseParam={"filter": "r"})
+
+    def testGetMemberList(self):
+
+        memberList = self.ensembleRunner.getMemberList()
+
+        self.assertEqual(len(memberList), 6)
+        self.assertEqual(memberList[0], {"iterNum": 2, "isEimg": True,
+                                         "seedNum": 6, "starMag": 15})
+        self.assertEqual(memberList[-1]["seedNum"], 7)
+        self.assertEqual(memberList[-1]["starMag"], 17)
+
+    def testGetMemberArgString(self):
+
+        member = self.ensembleRunner.getMemberList()[1]
+        argString = self.ensembleRunner.getMemberArgString(1, member)
+        argList = argString.split()
+
+        self.assertEqual(argList[argList.index("--output") + 1],
+                         self.ensembleRunner.getMemberDir(1))
+        self.assertEqual(argList[argList.index("--seedNum") + 1], "6")
+        self.assertEqual(argList[argList.index("--starMag") + 1], "16")
+        self.assertEqual(argList[argList.index("--iterNum") + 1], "2")
+        self.assertIn("--eimage", argList)
+        self.assertNotIn("--fakeFlatDir", argList)
+        self.assertEqual(
+            argList[argList.index("--phosimRunCacheDir") + 1],
+            self.ensembleRunner.getSharedDir("phosimRunCache"))
+        self.assertEqual(argList[argList.index("--cpuBudget") + 1], "3")
+        self.assertEqual(
+            argList[argList.index("--phosimWorkDir") + 1],
+            os.path.join(self.ensembleRunner.getMemberDir(1), "phosimWork"))
+
+    def testGetNumOfCpuOfMember(self):
+
+        self.assertEqual(self.ensembleRunner.getNumOfCpuOfMember(dict()), 3)
+        self.assertEqual(
+            self.ensembleRunner.getNumOfCpuOfMember({"numOfProc": 4}), 12)
+
+    def testGetNumOfLocalWorker(self):
+
+        memberList = self.ensembleRunner.getMemberList()
+        self.assertEqual(
+            self.ensembleRunner.getNumOfLocalWorker(memberList, numOfCpu=16),
+            5)
+
+        memberList[0]["numOfProc"] = 8
+        self.assertEqual(
+            self.ensembleRunner.getNumOfLocalWorker(memberList, numOfCpu=16),
+            1)
+
+    def testReadMemberResultAndWriteTable(self):
+
+        member = self.ensembleRunner.getMemberList()[0]
+        memberDir = self.ensembleRunner.getMemberDir(0)
+        os.makedirs(memberDir)
+
+        resultsStore = ResultsStore(os.path.join(memberDir, "results.npz"))
+        for iterNum in range(2):
+            pssnData = np.array([[0.8, 0.9, 0.85 + 0.1 * iterNum],
+                                 [0.3, 0.2, 0.25 - 0.1 * iterNum]])
+            resultsStore.addData(iterNum, "pssn", pssnData)
+
+        result = readEnsembleMemberResult(0, member, memberDir)
+        self.assertEqual(result["iterNum"], [0, 1])
+        np.testing.assert_allclose(result["gqEffPssn"], [0.85, 0.95])
+        np.testing.assert_allclose(result["gqEffFwhm"], [0.25, 0.15])
+
+        tableFilePath = os.path.join(self.outputDir, "results.csv")
+        self.ensembleRunner.writeResultsTable(tableFilePath,
+                                              results=[result])
+        with open(tableFilePath, "r") as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(rows[0], ["member", "seedNum", "starMag",
+                                   "iteration", "gqEffPssn", "gqEffFwhm"])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][:4], ["0", "6", "15", "1"])
+        self.assertAlmostEqual(float(rows[2][4]), 0.95)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import shutil
+import unittest
+import numpy as np
+from astropy.io import fits
+
+from lsst.ts.phosim.FakePhosim import FakePhosim
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class TestFakePhosim(unittest.TestCase):
+    """ Test the FakePhosim class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output",
+                                      "tmpFakePhosim")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+        self.fakePhosim = FakePhosim()
+
+        settingFile = self.fakePhosim.getSettingFile()
+        settingFile.updateSetting("opdSize", 31)
+        settingFile.updateSetting("sensorRows", 200)
+        settingFile.updateSetting("sensorCols", 160)
+
+        self.instFilePath = os.path.join(self.outputDir, "test.inst")
+        self.cmdFilePath = os.path.join(self.outputDir, "test.cmd")
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def _writeInstFile(self, lineList):
+
+        with open(self.instFilePath, "w") as file:
+            file.write("Opsim_obshistid 9006000\n")
+            file.write("Opsim_filter 0\n")
+            file.write("SIM_SEED 1000\n")
+            file.write("rightascension 0.000000\n")
+            file.write("declination 0.000000\n")
+            file.write("rotskypos 0.000000\n")
+            for line in lineList:
+                file.write(line + "\n")
+
+    def _writeCmdFile(self, lineList):
+
+        with open(self.cmdFilePath, "w") as file:
+            for line in lineList:
+                file.write(line + "\n")
+
+    def testReadCmdFile(self):
+
+        self._writeCmdFile(["backgroundmode 0", "move 10 1500.0000",
+                            "izernike 0 3 0.0001"])
+        cmd = self.fakePhosim.readCmdFile(self.cmdFilePath)
+
+        self.assertEqual(cmd["move"], {10: 1500.0})
+        self.assertEqual(cmd["izernike"], {(0, 3): 0.0001})
+        self.assertEqual(cmd["surfacemap"], [])
+
+    def testRunOpd(self):
+
+        self._writeInstFile(["opd 0 0.000000 0.000000 500.0",
+                             "opd 1 1.000000 0.000000 500.0"])
+        self._writeCmdFile(["move 5 1.0000"])
+
+        outputFileList = self.fakePhosim.run(
+            [self.instFilePath, "-c", self.cmdFilePath, "-o",
+             self.outputDir])
+
+        fileNameList = [os.path.basename(filePath)
+                        for filePath in outputFileList]
+        self.assertEqual(fileNameList, ["opd_9006000_0.fits.gz",
+                                        "opd_9006000_1.fits.gz"])
+
+        opd0 = fits.getdata(outputFileList[0])
+        opd1 = fits.getdata(outputFileList[1])
+        self.assertEqual(opd0.shape, (31, 31))
+        self.assertEqual(opd0[15, 15], 0)
+        self.assertFalse(np.allclose(opd0, opd1))
+
+    def testRunOpdIsDeterministic(self):
+
+        self._writeInstFile(["opd 0 0.500000 0.200000 500.0"])
+        self._writeCmdFile(["move 6 10.0000", "izernike 0 4 0.0001"])
+
+        argList = [self.instFilePath, "-c", self.cmdFilePath, "-o",
+                   self.outputDir]
+        opd = fits.getdata(self.fakePhosim.run(argList)[0])
+
+        fakePhosimAgain = FakePhosim()
+        fakePhosimAgain.getSettingFile().updateSetting("opdSize", 31)
+        opdAgain = fits.getdata(fakePhosimAgain.run(argList)[0])
+
+        self.assertTrue(np.array_equal(opd, opdAgain))
+
+    def testRunStarImg(self):
+
+        self._writeInstFile([
+            "object 0 0.000000 0.000000 15.000000 ../sky/sed_flat.txt "
+            "0.0 0.0 0.0 0.0 0.0 0.0 star 0.0 none none"])
+        self._writeCmdFile(["move 10 1500.0000"])
+
+        outputFileList = self.fakePhosim.run(
+            [self.instFilePath, "-c", self.cmdFilePath, "-e", "1", "-s",
+             "R22_S11|R22_S10", "-p", "2", "-o", self.outputDir])
+
+        # 1 eimage, 1 centroid file, and 16 amplifier images per sensor
+        self.assertEqual(len(outputFileList), 36)
+
+        eimgFilePath = os.path.join(
+            self.outputDir, "lsst_e_9006000_f0_R22_S11_E000.fits.gz")
+        img = fits.getdata(eimgFilePath)
+        self.assertEqual(img.shape, (200, 160))
+        self.assertAlmostEqual(np.sum(img), 1e6, delta=10)
+
+        # The center of donut is empty
+        self.assertEqual(img[100, 80], 0)
+
+        centroidFilePath = os.path.join(
+            self.outputDir, "centroid_lsst_e_9006000_f0_R22_S11_E000.txt")
+        centroid = np.loadtxt(centroidFilePath, skiprows=1, ndmin=2)
+        self.assertEqual(centroid.shape, (1, 4))
+        self.assertAlmostEqual(centroid[0, 2], 80)
+        self.assertAlmostEqual(centroid[0, 3], 100)
+
+        # The star is out of the neighboring sensor
+        img = fits.getdata(os.path.join(
+            self.outputDir, "lsst_e_9006000_f0_R22_S10_E000.fits.gz"))
+        self.assertEqual(np.sum(img), 0)
+
+        ampFilePath = os.path.join(
+            self.outputDir, "lsst_a_9006000_f0_R22_S11_C00_E000.fits.gz")
+        ampImg = fits.getdata(ampFilePath)
+        self.assertEqual(ampImg.shape, (100, 20))
+
+    def testGetSensorCenterInDeg(self):
+
+        self.assertEqual(self.fakePhosim.getSensorCenterInDeg("R22_S11"),
+                         (0, 0))
+        self.assertRaises(ValueError, self.fakePhosim.getSensorCenterInDeg,
+                          "R22_S11_C0")
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import shutil
+import unittest
+import numpy as np
+from astropy.io import fits
+
+from lsst.ts.phosim.ImgMetrology import ImgMetrology
+from lsst.ts.phosim.MetroTool import calc_pssn_img
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class TestImgMetrology(unittest.TestCase):
+    """ Test the ImgMetrology class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output",
+                                      "tmpImgMetrology")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+        self.imgMetr = ImgMetrology(stampSizeInPixel=32)
+
+        # Stars with the FWHM of 0.2 and 0.6 arcsec, and one on the edge
+        self.xInPixel = np.array([100.0, 300.0, 5.0])
+        self.yInPixel = np.array([120.0, 200.0, 200.0])
+        self.eimgFilePath = self._writeEimg([1.0, 3.0, 3.0])
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def _writeEimg(self, fwhmInPixelList):
+
+        img = np.full((400, 400), 10.0, dtype=np.float32)
+        grid = np.arange(400)
+        x, y = np.meshgrid(grid, grid)
+        for xc, yc, fwhm in zip(self.xInPixel, self.yInPixel,
+                                fwhmInPixelList):
+            sigma = fwhm / 2.355
+            img += 1e4 * np.exp(-((x - xc)**2 + (y - yc)**2) / 2 / sigma**2)
+
+        filePath = os.path.join(self.outputDir, "eimage.fits")
+        fits.writeto(filePath, img, overwrite=True)
+
+        return filePath
+
+    def testGetStampSizeInPixel(self):
+
+        self.assertEqual(self.imgMetr.getStampSizeInPixel(), 32)
+
+    def testCutStamps(self):
+
+        stamps, isValid = self.imgMetr.cutStamps(
+            self.eimgFilePath, self.xInPixel, self.yInPixel)
+
+        self.assertEqual(stamps.shape, (3, 32, 32))
+        self.assertEqual(isValid.tolist(), [True, True, False])
+
+        # Background is subtracted and the star is in the center
+        self.assertEqual(stamps[0, 0, 0], 0)
+        self.assertEqual(np.argmax(stamps[1]), 16 * 32 + 16)
+        self.assertEqual(np.sum(stamps[2]), 0)
+
+    def testAnalyzeImg(self):
+
+        pssn, effFwhm, ellip = self.imgMetr.analyzeImg(
+            self.eimgFilePath, self.xInPixel, self.yInPixel)
+
+        self.assertGreater(pssn[0], pssn[1])
+        self.assertLess(pssn[0], 1)
+        self.assertLess(effFwhm[0], effFwhm[1])
+        self.assertTrue(np.all(ellip[:2] < 0.05))
+        self.assertTrue(np.isnan(pssn[2]))
+
+        stamps = self.imgMetr.cutStamps(self.eimgFilePath, self.xInPixel,
+                                        self.yInPixel)[0]
+        self.assertAlmostEqual(pssn[1], calc_pssn_img(stamps[1], 0.5))
+
+    def testCutStampsWithCompressedImg(self):
+
+        gzFilePath = os.path.join(self.outputDir, "eimage.fits.gz")
+        fits.writeto(gzFilePath, fits.getdata(self.eimgFilePath))
+
+        self.assertRaises(ValueError, self.imgMetr.cutStamps, gzFilePath,
+                          self.xInPixel, self.yInPixel)
+
+    def testAnalyzeStampsWithDefocalImg(self):
+
+        # Donuts with the radii between 10 and 14 pixels
+        grid = np.arange(32) - 15.5
+        x, y = np.meshgrid(grid, grid)
+        radius = np.sqrt(x**2 + y**2)
+        donut = ((radius > 10) & (radius < 14)).astype(float)
+
+        self.assertLess(self.imgMetr.getCentralFluxRatio([donut])[0],
+                        ImgMetrology.MIN_CENTRAL_FLUX_RATIO)
+        self.assertRaises(ValueError, self.imgMetr.analyzeStamps,
+                          np.array([donut, donut]))
+
+    def testGetCentralFluxRatio(self):
+
+        stamps, isValid = self.imgMetr.cutStamps(
+            self.eimgFilePath, self.xInPixel, self.yInPixel)
+        centralFluxRatio = self.imgMetr.getCentralFluxRatio(stamps[isValid])
+
+        self.assertTrue(np.all(centralFluxRatio > 0.99))
+
+    def testAnalyzeStampsInProc(self):
+
+        stamps, isValid = self.imgMetr.cutStamps(
+            self.eimgFilePath, self.xInPixel, self.yInPixel)
+        pssn = self.imgMetr.analyzeStamps(stamps, isValid=isValid)[0]
+
+        imgMetr = ImgMetrology(stampSizeInPixel=32, numOfProc=2)
+        pssnInProc = imgMetr.analyzeStamps(stamps, isValid=isValid)[0]
+
+        self.assertTrue(np.allclose(pssnInProc, pssn, equal_nan=True))
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import subprocess
+import unittest
+
+
+class TestInit(unittest.TestCase):
+    """Test the lazy classes of package."""
+
+    def _runInNewProcess(self, script):
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+        output = subprocess.check_output([sys.executable, "-c", script],
+                                         env=env, universal_newlines=True)
+
+        return output.strip()
+
+    def testImportSubmoduleWithoutPhosimCmpt(self):
+
+        output = self._runInNewProcess(
+            "import sys; import lsst.ts.phosim.MetroTool; "
+            "print('lsst.ts.phosim.PhosimCmpt' in sys.modules)")
+
+        self.assertEqual(output, "False")
+
+    def testImportClassAfterSubmodule(self):
+
+        # The class is gotten even if the submodule of the same name is
+        # imported before
+        output = self._runInNewProcess(
+            "import lsst.ts.phosim.OpdMetrology; "
+            "from lsst.ts.phosim import OpdMetrology; "
+            "print(isinstance(OpdMetrology, type))")
+
+        self.assertEqual(output, "True")
+
+    def testImportClass(self):
+
+        output = self._runInNewProcess(
+            "import lsst.ts.phosim; "
+            "print(lsst.ts.phosim.SkySim.__name__)")
+
+        self.assertEqual(output, "SkySim")
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,57 @@
+import numpy as np
+import unittest
+
+from lsst.ts.phosim.OpdAnalysisResult import OpdAnalysisResult
+
+
+class TestOpdAnalysisResult(unittest.TestCase):
+    """ Test the OpdAnalysisResult class."""
+
+    def setUp(self):
+
+        self.opdZk = np.random.rand(9, 19)
+        self.pssn = np.random.rand(9)
+        self.effFwhm = np.random.rand(9)
+
+        self.opdResult = OpdAnalysisResult(
+            self.opdZk, self.pssn, 0.5, self.effFwhm, 0.6, np.arange(9),
+            rotOpdInDeg=30.0)
+
+    def testGetters(self):
+
+        self.assertTrue(np.array_equal(self.opdResult.getOpdZk(),
+                                       self.opdZk))
+        self.assertTrue(np.array_equal(self.opdResult.getPssn(), self.pssn))
+        self.assertEqual(self.opdResult.getGqEffPssn(), 0.5)
+        self.assertTrue(np.array_equal(self.opdResult.getEffFwhm(),
+                                       self.effFwhm))
+        self.assertEqual(self.opdResult.getGqEffFwhm(), 0.6)
+        self.assertTrue(np.array_equal(self.opdResult.getFieldIdx(),
+                                       np.arange(9)))
+        self.assertEqual(self.opdResult.getRotOpdInDeg(), 30.0)
+        self.assertEqual(self.opdResult.getNumOfField(), 9)
+
+    def testImmutable(self):
+
+        # The input data is copied
+        self.opdZk[0, 0] = -1.0
+        self.assertNotEqual(self.opdResult.getOpdZk()[0, 0], -1.0)
+
+        pssn = self.opdResult.getPssn()
+        self.assertRaises(ValueError, pssn.__setitem__, 0, 1.0)
+
+    def testGetPssnData(self):
+
+        pssnData = self.opdResult.getPssnData()
+
+        self.assertEqual(pssnData.shape, (2, 10))
+        self.assertTrue(np.array_equal(pssnData[0, :-1], self.pssn))
+        self.assertEqual(pssnData[0, -1], 0.5)
+        self.assertTrue(np.array_equal(pssnData[1, :-1], self.effFwhm))
+        self.assertEqual(pssnData[1, -1], 0.6)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+
+from lsst.ts.phosim.OpdAnalysisSpec import OpdAnalysisSpec, \
+    getComCamOpdAnalysisSpec, getLsstOpdAnalysisSpec
+from lsst.ts.phosim.OpdMetrology import OpdMetrology
+
+
+class TestOpdAnalysisSpec(unittest.TestCase):
+    """ Test the OpdAnalysisSpec class and functions."""
+
+    def testInitWithDifferentLength(self):
+
+        self.assertRaises(ValueError, OpdAnalysisSpec, "test", [0, 1], [0, 1],
+                          [1])
+        self.assertRaises(ValueError, OpdAnalysisSpec, "test", [0, 1], [0, 1],
+                          [1, 1], refSensorNameList=["R22_S11"])
+
+    def testGetComCamOpdAnalysisSpec(self):
+
+        spec = getComCamOpdAnalysisSpec()
+        self.assertEqual(spec.getInstName(), "comcam")
+        self.assertEqual(spec.getNumOfField(), 9)
+        self.assertEqual(np.sum(spec.getWeightingRatio()), 9)
+        self.assertEqual(len(spec.getRefSensorNameList()), 9)
+        self.assertEqual(spec.getRefSensorNameList()[4], "R22_S11")
+
+    def testGetLsstOpdAnalysisSpec(self):
+
+        spec = getLsstOpdAnalysisSpec(includeWfs=False)
+        self.assertEqual(spec.getNumOfField(), 31)
+        self.assertEqual(spec.getRefSensorNameList(), None)
+
+        specWithWfs = getLsstOpdAnalysisSpec()
+        self.assertEqual(specWithWfs.getNumOfField(), 35)
+
+        # The wavefront sensors do not contribute to the GQ values
+        weight = specWithWfs.getWeightingRatio()
+        self.assertTrue(np.array_equal(weight[31:], np.zeros(4)))
+        self.assertTrue(np.array_equal(weight[:31],
+                                       spec.getWeightingRatio()))
+
+    def testSetToOpdMetrology(self):
+
+        spec = getLsstOpdAnalysisSpec()
+        metr = OpdMetrology()
+        spec.setToOpdMetrology(metr)
+
+        fieldX, fieldY = metr.getFieldXY()
+        self.assertTrue(np.array_equal(fieldX, spec.getFieldXY()[0]))
+        self.assertEqual(len(metr.getWeightingRatio()), 35)
+        self.assertAlmostEqual(np.sum(metr.getWeightingRatio()), 1)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
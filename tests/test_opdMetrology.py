@@ -1,8 +1,11 @@
 import os
+import shutil
 import numpy as np
 import unittest
 
 from lsst.ts.phosim.OpdMetrology import OpdMetrology
+from lsst.ts.phosim.BandPssn import BandPssn
+from lsst.ts.phosim.MetroTool import rebinOpd
 from lsst.ts.phosim.Utility import getModulePath
 
 
@@ -144,6 +147,90 @@ class TestOpdMetrology(unittest.TestCase):
 
         return allData
 
+    def _getLargeOpd(self, m=1023):
+
+        grid = np.linspace(-1, 1, m)
+        x, y = np.meshgrid(grid, grid)
+        r2 = x**2 + y**2
+
+        opd = 0.1 * (2 * r2 - 1) + 0.05 * (x**2 - y**2) + \
+            0.03 * (3 * r2 - 2) * x + 1e-3
+        opd[(r2 > 1) | (r2 < 0.61**2)] = 0
+
+        return opd
+
+    def testRebinOpd(self):
+
+        opd = self._getLargeOpd(m=255)
+        opd[opd != 0] = 0.2
+
+        opdRebin = rebinOpd(opd, 64)
+        self.assertEqual(opdRebin.shape, (64, 64))
+        self.assertTrue(np.allclose(opdRebin[opdRebin != 0], 0.2))
+
+        # Half of the pupil area is kept at least
+        self.assertLess(abs(np.sum(opdRebin != 0) / 64**2 -
+                            np.sum(opd != 0) / 255**2), 0.02)
+
+        self.assertRaises(ValueError, rebinOpd, opd, 256)
+
+    def testCalcPSSNWithAdaptiveResolution(self):
+
+        opd = self._getLargeOpd()
+        pssn = self.metr.calcPSSN(0.5, opdMap=opd)
+
+        pssnTol = 1e-3
+        self.metr.setAdaptiveResolution(pssnTol=pssnTol)
+        self.assertEqual(self.metr.getAdaptiveResolution(),
+                         {"pssn": pssnTol, "ellip": None})
+
+        pssnAdaptive = self.metr.calcPSSN(0.5, opdMap=opd)
+        self.assertLessEqual(abs(pssnAdaptive - pssn), pssnTol)
+
+        opdSizeCache = self.metr.getAdaptiveOpdSizeCache()
+        self.assertEqual(len(opdSizeCache), 1)
+        self.assertLess(opdSizeCache[("pssn", 1023, 0.5, 0.0, pssnTol)], 1023)
+
+        # The ellipticity uses the full resolution
+        self.assertEqual(self.metr.getAdaptiveOpdSize("ellip", 0.5, opd),
+                         1023)
+        self.assertRaises(ValueError, self.metr.getAdaptiveOpdSize, "fwhm",
+                          0.5, opd)
+
+    def testCalcPSSNInSinglePrecision(self):
+
+        pssn = self._calcPssn()
+
+        self.metr.setSinglePrecision(numOfValidation=1)
+        self.assertTrue(self.metr.isSinglePrecision())
+        self.assertFalse(self.metr.isPrecisionValidated("pssn"))
+
+        # The first OPD is validated and the double precision is returned
+        self.assertEqual(self._calcPssn(), pssn)
+        self.assertTrue(self.metr.isPrecisionValidated("pssn"))
+        self.assertFalse(self.metr.isPrecisionValidated("ellip"))
+
+        pssnSingle = self._calcPssn()
+        self.assertTrue(self.metr.isSinglePrecision())
+        self.assertLess(abs(pssnSingle - pssn), 1e-4)
+
+    def testSinglePrecisionFallback(self):
+
+        self.metr.setSinglePrecision(validationTol=0)
+        with self.assertWarns(RuntimeWarning):
+            self._calcPssn()
+
+        self.assertFalse(self.metr.isSinglePrecision())
+        self.assertTrue(self.metr.isPrecisionValidated("ellip"))
+
+    def testCalcBandPSSN(self):
+
+        opdFilePath = self._getOpdFilePath()
+        bandPssn = BandPssn([0.5], [1])
+        pssn = self.metr.calcBandPSSN(bandPssn, opdFitsFile=opdFilePath)
+
+        self.assertAlmostEqual(pssn, self._calcPssn())
+
     def testCalcFWHMeff(self):
 
         pssn = self._calcPssn()
@@ -180,6 +267,57 @@ class TestOpdMetrology(unittest.TestCase):
         GQvalue = self.metr.calcGQvalue(valueList)
         self.assertAlmostEqual(GQvalue, allData[0, -1])
 
+    def testGetPssnModelWithCache(self):
+
+        cacheDir = os.path.join(getModulePath(), "output", "tmpPssnModel")
+        self.metr.setPssnModelCacheDir(cacheDir)
+
+        pssnModel = self.metr.getPssnModel(0.5, znTerms=11, numOfSample=80,
+                                           maxRmsInUm=0.2)
+        self.assertTrue(os.path.exists(pssnModel.getCacheFilePath(cacheDir)))
+        self.assertIs(self.metr.getPssnModel(0.5, znTerms=11), pssnModel)
+
+        # The new instance reads the model from the cache directory
+        metr = OpdMetrology()
+        metr.setPssnModelCacheDir(cacheDir)
+        pssnModelInCache = metr.getPssnModel(0.5, znTerms=11)
+        self.assertTrue(np.array_equal(pssnModelInCache.getQuadraticForm(),
+                                       pssnModel.getQuadraticForm()))
+
+        zk = np.zeros(8)
+        zk[0] = 0.1
+        pssn, pssnError = metr.calcPSSNfromZk(0.5, zk)
+        self.assertLess(pssn, 1)
+        self.assertLess(pssnError, 1 - pssn)
+
+        effFwhm, effFwhmError = metr.calcFWHMeffFromZk(0.5, zk)
+        self.assertAlmostEqual(effFwhm, metr.calcFWHMeff(pssn))
+        self.assertGreater(effFwhmError, 0)
+
+        shutil.rmtree(cacheDir)
+
+    def testFitFieldModel(self):
+
+        self.metr.setDefaultComcamGQ()
+        fieldX, fieldY = self.metr.getFieldXY()
+
+        zk = np.zeros((len(fieldX), 8))
+        zk[:, 0] = 0.05 + 0.1 * fieldX
+        fieldModel = self.metr.fitFieldModel(zk, numOfFieldTerms=3)
+        self.assertTrue(np.allclose(fieldModel.evalZk(fieldX, fieldY), zk))
+
+        # Calibrate the PSSN model of z4-z11 with less samples
+        self.metr.getPssnModel(0.5, znTerms=11, numOfSample=80,
+                               maxRmsInUm=0.2)
+
+        pssn = self.metr.calcPSSNfromFieldModel(0.5, fieldModel, fieldX,
+                                                fieldY)[0]
+        self.assertTrue(np.allclose(pssn,
+                                    self.metr.calcPSSNfromZk(0.5, zk)[0]))
+
+        effFwhm = self.metr.calcFWHMeffFromFieldModel(0.5, fieldModel, 0, 0)[0]
+        self.assertEqual(effFwhm.shape, (1,))
+
 
 if __name__ == "__main__":
 
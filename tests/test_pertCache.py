@@ -0,0 +1,98 @@
+import os
+import shutil
+import unittest
+
+from lsst.ts.phosim.telescope.TeleFacade import TeleFacade
+from lsst.ts.phosim.PertCache import PertCache
+from lsst.ts.phosim.PlotService import PlotService
+from lsst.ts.phosim.Utility import getModulePath, PlotMode
+
+
+class TestPertCache(unittest.TestCase):
+    """ Test the PertCache class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output", "tmpCache")
+        self.pertCache = PertCache(os.path.join(self.outputDir, "cache"))
+
+        # Only the camera is used for the fast speed
+        self.tele = TeleFacade()
+        self.tele.addSubSys(addCam=True)
+        self.tele.setSurveyParam(zAngleInDeg=27.0912, rotAngInDeg=10.0)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def testGetCacheDir(self):
+
+        cacheDir = self.pertCache.getCacheDir()
+        self.assertEqual(cacheDir, os.path.join(self.outputDir, "cache"))
+        self.assertTrue(os.path.isdir(cacheDir))
+
+    def testGetKey(self):
+
+        key = self.pertCache.getKey(self.tele, seedNum=6)
+        self.assertEqual(key, self.pertCache.getKey(self.tele, seedNum=6))
+
+        self.tele.setSurveyParam(rotAngInDeg=20.0)
+        self.assertNotEqual(key, self.pertCache.getKey(self.tele, seedNum=6))
+
+    def testWritePertFiles(self):
+
+        iterDir0 = os.path.join(self.outputDir, "iter0")
+        pertCmdFilePath = self.pertCache.writePertFiles(self.tele, iterDir0)
+
+        self.assertEqual(pertCmdFilePath, os.path.join(iterDir0, "pert.cmd"))
+        self.assertTrue(os.path.islink(pertCmdFilePath))
+
+        key = self.pertCache.getKey(self.tele)
+        self.assertTrue(self.pertCache.hasEntry(key))
+
+        # The second iteration reuses the same entry
+        entryDir = self.pertCache.getEntryDir(key)
+        timeOfEntry = os.path.getmtime(os.path.join(entryDir, "pert.cmd"))
+
+        iterDir1 = os.path.join(self.outputDir, "iter1")
+        pertCmdFilePath = self.pertCache.writePertFiles(self.tele, iterDir1)
+
+        self.assertEqual(os.path.realpath(pertCmdFilePath),
+                         os.path.join(os.path.realpath(entryDir),
+                                      "pert.cmd"))
+        self.assertEqual(
+            os.path.getmtime(os.path.join(entryDir, "pert.cmd")),
+            timeOfEntry)
+        self.assertEqual(len(os.listdir(self.pertCache.getCacheDir())), 1)
+
+    def testWritePertFilesWithPlotInBackground(self):
+
+        tele = TeleFacade()
+        tele.addSubSys(addM2=True)
+        tele.setSurveyParam(zAngleInDeg=27.0912, rotAngInDeg=10.0)
+
+        plotService = PlotService(plotMode=PlotMode.Background)
+        tele.setPlotService(plotService)
+
+        try:
+            iterDir = os.path.join(self.outputDir, "iter0")
+            self.pertCache.writePertFiles(tele, iterDir, saveResMapFig=True)
+        finally:
+            plotService.close()
+
+        # The figure is plotted before the entry is renamed
+        self.assertTrue(os.path.isfile(os.path.join(iterDir, "M2res.png")))
+
+    def testClear(self):
+
+        self.pertCache.writePertFiles(
+            self.tele, os.path.join(self.outputDir, "iter0"))
+        self.pertCache.clear()
+
+        self.assertEqual(len(os.listdir(self.pertCache.getCacheDir())), 0)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -1,8 +1,10 @@
 import os
+import re
 import shutil
 import numpy as np
 import warnings
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from lsst.ts.wep.Utility import FilterType, CamType
 from lsst.ts.wep.ParamReader import ParamReader
@@ -15,6 +17,9 @@ from lsst.ts.phosim.SkySim import SkySim
 from lsst.ts.phosim.OpdMetrology import OpdMetrology
 from lsst.ts.phosim.Utility import getModulePath
 from lsst.ts.phosim.PhosimCmpt import PhosimCmpt
+from lsst.ts.phosim.ResultsStore import ResultsStore
+from lsst.ts.phosim.OpdAnalysisSpec import getComCamOpdAnalysisSpec
+from lsst.ts.phosim.BandPssn import getBandPssn
 
 
 class TestPhosimCmpt(unittest.TestCase):
@@ -110,6 +115,11 @@ class TestPhosimCmpt(unittest.TestCase):
         dirName = self.phosimCmpt.getExtraFocalDirName()
         self.assertEqual(dirName, "extra")
 
+    def testGetInFocusDirName(self):
+
+        dirName = self.phosimCmpt.getInFocusDirName()
+        self.assertEqual(dirName, "focus")
+
     def testGetOutputDir(self):
 
         outputDir = self.phosimCmpt.getOutputDir()
@@ -165,6 +175,19 @@ class TestPhosimCmpt(unittest.TestCase):
         numOfLine = self._getNumOfLineInFile(instFilePath)
         self.assertEqual(numOfLine, 67)
 
+    def testSetPhoSimWorkDir(self):
+
+        self.assertEqual(self.phosimCmpt.getPhoSimWorkDir(), None)
+
+        phosimWorkDir = os.path.join(self.outputDir, "phosimWork")
+        self.phosimCmpt.setPhoSimWorkDir(phosimWorkDir)
+        self.assertEqual(self.phosimCmpt.getPhoSimWorkDir(), phosimWorkDir)
+        self.assertTrue(os.path.isdir(phosimWorkDir))
+
+        with self.assertWarns(UserWarning):
+            argString = self.phosimCmpt.getComCamOpdArgsAndFilesForPhoSim()
+        self.assertIn("-w %s" % os.path.abspath(phosimWorkDir), argString)
+
     def _getNumOfFileInFolder(self, folder):
 
         return len([name for name in os.listdir(folder)
@@ -191,6 +214,71 @@ class TestPhosimCmpt(unittest.TestCase):
         numOfLine = self._getNumOfLineInFile(instFilePath)
         self.assertEqual(numOfLine, 63)
 
+    def testGetStarArgsAndFilesForPhoSimBySensor(self):
+
+        skySim = SkySim()
+        skySim.setObservationMetaData(0.2, 0.3, 0.0,
+                                      self.tele.getCamMjd())
+        skySim.addStarByRaDecInDeg(0, 0.2, 0.3, 5.0)
+
+        # Each sensor run uses one PhoSim processor
+        self.phosimCmpt._phosimCmptSettingFile.updateSetting("numPro", 4)
+
+        with self.assertWarns(UserWarning):
+            argStringList = \
+                self.phosimCmpt.getStarArgsAndFilesForPhoSimBySensor(
+                    skySim, instFileName="star.inst")
+
+        self.assertEqual(len(argStringList), 1)
+        self.assertTrue("-s R22_S11" in argStringList[0])
+        self.assertTrue("-w " in argStringList[0])
+        self.assertFalse("-p " in argStringList[0])
+
+        instFilePath = os.path.join(self.outputDir, "star_R22_S11.inst")
+        numOfLine = self._getNumOfLineInFile(instFilePath)
+        self.assertEqual(numOfLine, 63)
+
+    def testGetStarArgsAndFilesForPhoSimBySensorWithDonutOnChipEdge(self):
+
+        # The star is 5 pixels from the edge of R22_S11
+        skySim = SkySim()
+        skySim.setObservationMetaData(0, 0, 0, self.tele.getCamMjd())
+        skySim.addStarByChipPos("R22_S11", 0, 5, 2036, 5.0)
+
+        # The defocal donut is much larger than the gap between the sensors
+        dofInUm = np.zeros(50)
+        dofInUm[5] = 1500
+        self.phosimCmpt.setDofInUm(dofInUm)
+
+        with self.assertWarns(UserWarning):
+            argStringList = \
+                self.phosimCmpt.getStarArgsAndFilesForPhoSimBySensor(
+                    skySim, instFileName="star.inst")
+
+        # The star is simulated on the neighboring sensor as well
+        self.assertEqual(len(argStringList), 2)
+        self.assertTrue("-s R22_S11" in "".join(argStringList))
+
+        for argString in argStringList:
+            sensorName = re.search(r"-s (R\d\d_S\d\d)", argString).group(1)
+            instFilePath = os.path.join(self.outputDir,
+                                        "star_%s.inst" % sensorName)
+            numOfLine = self._getNumOfLineInFile(instFilePath)
+            self.assertEqual(numOfLine, 63)
+
+    def testGetDonutRadiusInDeg(self):
+
+        self.assertAlmostEqual(self.phosimCmpt.getDonutRadiusInDeg(),
+                               2.0 / 3600)
+
+        dofInUm = np.zeros(50)
+        dofInUm[5] = -1500
+        self.phosimCmpt.setDofInUm(dofInUm)
+
+        radiusInArcsec = 1500 / 1.234 / 2 * 0.02 + 2.0
+        self.assertAlmostEqual(self.phosimCmpt.getDonutRadiusInDeg(),
+                               radiusInArcsec / 3600)
+
     def _addSglStarToSkySim(self):
 
         skySim = SkySim()
@@ -242,7 +330,7 @@ class TestPhosimCmpt(unittest.TestCase):
     def _analyzeComCamOpdData(self, rotOpdInDeg=0.0):
 
         self._copyOpdToImgDirFromTestData()
-        self.phosimCmpt.analyzeComCamOpdData(
+        return self.phosimCmpt.analyzeComCamOpdData(
             zkFileName=self.zkFileName, rotOpdInDeg=rotOpdInDeg,
             pssnFileName=self.pssnFileName)
 
@@ -260,6 +348,84 @@ class TestPhosimCmpt(unittest.TestCase):
 
         return opdFileDir
 
+    def testAnalyzeComCamOpdDataWithResult(self):
+
+        opdResult = self._analyzeComCamOpdData()
+
+        zk = np.loadtxt(os.path.join(self.outputImgDir, self.zkFileName))
+        self.assertTrue(np.array_equal(opdResult.getOpdZk(), zk))
+
+        pssnData = np.loadtxt(os.path.join(self.outputImgDir,
+                                           self.pssnFileName))
+        self.assertLess(np.sum(np.abs(opdResult.getPssnData() - pssnData)),
+                        1e-10)
+
+        self.assertTrue(np.array_equal(opdResult.getFieldIdx(),
+                                       np.arange(9)))
+
+    def testAnalyzeOpdDataWithExecutor(self):
+
+        opdResult = self._analyzeComCamOpdData()
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            self.phosimCmpt.setOpdAnalysisExecutor(executor)
+            self.assertIs(self.phosimCmpt.getOpdAnalysisExecutor(), executor)
+
+            opdResultByExecutor = self.phosimCmpt.analyzeOpdData(
+                getComCamOpdAnalysisSpec(), zkFileName=self.zkFileName,
+                pssnFileName=self.pssnFileName)
+
+        self.phosimCmpt.setOpdAnalysisExecutor(None)
+
+        self.assertTrue(np.array_equal(opdResultByExecutor.getOpdZk(),
+                                       opdResult.getOpdZk()))
+        self.assertTrue(np.array_equal(opdResultByExecutor.getPssnData(),
+                                       opdResult.getPssnData()))
+
+    def testAnalyzeOpdDataWithExecutorInSinglePrecision(self):
+
+        # Record the validation of precision in the submitted metrology
+        isValidatedList = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+
+            def submit(self, fn, *args, **kwargs):
+                isValidatedList.append(
+                    kwargs["metr"].isPrecisionValidated("pssn"))
+                return super().submit(fn, *args, **kwargs)
+
+        self._copyOpdToImgDirFromTestData()
+
+        metr = self.phosimCmpt.getOpdMetr()
+        metr.setSinglePrecision(numOfValidation=2)
+        with RecordingExecutor(max_workers=3) as executor:
+            self.phosimCmpt.setOpdAnalysisExecutor(executor)
+            opdResult = self.phosimCmpt.analyzeOpdData(
+                getComCamOpdAnalysisSpec(), zkFileName=self.zkFileName,
+                pssnFileName=self.pssnFileName)
+
+        self.phosimCmpt.setOpdAnalysisExecutor(None)
+        metr.setSinglePrecision(singlePrecision=False)
+
+        # The first 2 OPDs are validated before the submission
+        self.assertEqual(isValidatedList, [True] * 7)
+        self.assertEqual(opdResult.getOpdZk().shape[0], 9)
+
+    def testAnalyzeOpdDataWithBandPssn(self):
+
+        opdResult = self._analyzeComCamOpdData()
+
+        # The reference band is the single reference wavelength
+        bandPssn = getBandPssn(FilterType.REF)
+        self.phosimCmpt.setBandPssn(bandPssn)
+        self.assertIs(self.phosimCmpt.getBandPssn(), bandPssn)
+
+        opdResultOfBand = self._analyzeComCamOpdData()
+        self.phosimCmpt.setBandPssn(None)
+
+        self.assertTrue(np.allclose(opdResultOfBand.getPssnData(),
+                                    opdResult.getPssnData()))
+
     def testAnalyzeComCamOpdDataWithNonZeroAngle(self):
 
         self._analyzeComCamOpdData(rotOpdInDeg=30.0)
@@ -296,6 +462,19 @@ class TestPhosimCmpt(unittest.TestCase):
             delta = np.sum(np.abs(zkInWfErr - zk))
             self.assertEqual(delta, 0)
 
+    def testMapOpdResultToListOfWfErr(self):
+
+        opdResult = self._analyzeComCamOpdData()
+
+        refSensorNameList = self._getRefSensorNameList()
+        listOfWfErr = self.phosimCmpt.mapOpdResultToListOfWfErr(
+            opdResult, refSensorNameList)
+
+        self.assertEqual(len(listOfWfErr), len(refSensorNameList))
+        for wfErr, zk in zip(listOfWfErr, opdResult.getOpdZk()):
+            self.assertTrue(np.array_equal(wfErr.getAnnularZernikePoly(),
+                                           zk))
+
     def _getRefSensorNameList(self):
 
         refSensorNameList = ["R22_S00", "R22_S01", "R22_S02", "R22_S10",
@@ -350,6 +529,55 @@ class TestPhosimCmpt(unittest.TestCase):
             self.assertEqual(fwhmSensorData.getSensorId(), sensorId)
             self.assertEqual(fwhmSensorData.getFwhmValues()[0], fwhm)
 
+    def testGetListOfFwhmSensorDataOfOpdResult(self):
+
+        opdResult = self._analyzeComCamOpdData()
+        refSensorNameList = self._getRefSensorNameList()
+
+        listOfFWHMSensorData = \
+            self.phosimCmpt.getListOfFwhmSensorDataOfOpdResult(
+                opdResult, refSensorNameList)
+        self.assertEqual(len(listOfFWHMSensorData), len(refSensorNameList))
+
+        for fwhmSensorData, fwhm in zip(listOfFWHMSensorData,
+                                        opdResult.getEffFwhm()):
+            self.assertEqual(fwhmSensorData.getFwhmValues()[0], fwhm)
+
+    def testSetWriteResultInBackground(self):
+
+        self.phosimCmpt.setWriteResultInBackground(True)
+        opdResult = self._analyzeComCamOpdData()
+        self.phosimCmpt.waitForResultWriting()
+        self.phosimCmpt.setWriteResultInBackground(False)
+
+        pssnData = np.loadtxt(os.path.join(self.outputImgDir,
+                                           self.pssnFileName))
+        self.assertLess(np.sum(np.abs(opdResult.getPssnData() - pssnData)),
+                        1e-10)
+
+    def testAnalyzeComCamOpdDataWithResultsStore(self):
+
+        resultsStore = ResultsStore(
+            os.path.join(self.outputDir, "results.npz"))
+        self.phosimCmpt.setResultsStore(resultsStore, exportTextFile=False)
+        self.phosimCmpt.setIterNum(2)
+        self.assertEqual(self.phosimCmpt.getResultsStore(), resultsStore)
+        self.assertEqual(self.phosimCmpt.getIterNum(), 2)
+
+        self._analyzeComCamOpdData()
+
+        # The text files are not exported
+        self.assertFalse(os.path.exists(
+            os.path.join(self.outputImgDir, self.pssnFileName)))
+        self.assertEqual(resultsStore.getQuantityList(2), ["opdZk", "pssn"])
+
+        zk = self.phosimCmpt._getZkFromFile(self.zkFileName)
+        self.assertEqual(zk.shape, (9, 19))
+
+        gqEffFwhm = self.phosimCmpt.getOpdGqEffFwhmFromFile(
+            self.pssnFileName)
+        self.assertAlmostEqual(gqEffFwhm, 0.5534, places=3)
+
     def testGetOpdMetr(self):
 
         metr = self.phosimCmpt.getOpdMetr()
@@ -415,6 +643,27 @@ class TestPhosimCmpt(unittest.TestCase):
         numOfLine = self._getNumOfLineInFile(instFilePath)
         self.assertEqual(numOfLine, 63)
 
+    def testGetComCamInFocusStarArgsAndFilesForPhoSim(self):
+
+        obsId = 9006000
+        skySim = self._addSglStarToSkySim()
+
+        outputImgDir = self.phosimCmpt.getOutputImgDir()
+        argString = \
+            self.phosimCmpt.getComCamInFocusStarArgsAndFilesForPhoSim(
+                obsId, skySim, simSeed=1000)
+
+        self.assertTrue(isinstance(argString, str))
+        inFocusDir = os.path.join(outputImgDir,
+                                  self.phosimCmpt.getInFocusDirName())
+        self.assertIn(inFocusDir, argString)
+        self.assertEqual(self.phosimCmpt.getOutputImgDir(), outputImgDir)
+
+        cmdFilePath = os.path.join(self.phosimCmpt.getOutputDir(),
+                                   "starInFocus.cmd")
+        with open(cmdFilePath, "r") as file:
+            self.assertIn("clearturbulence", file.read())
+
     def testRepackageComCamAmpImgFromPhoSim(self):
 
         self._copyComCamFiles()
@@ -0,0 +1,170 @@
+import os
+import shutil
+import unittest
+import numpy as np
+from astropy.io import fits
+
+from lsst.ts.wep.Utility import runProgram
+
+from lsst.ts.phosim.PhosimRepackager import PhosimRepackager
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class TestPhosimRepackager(unittest.TestCase):
+    """ Test the PhosimRepackager class."""
+
+    def setUp(self):
+
+        self.testDataDir = os.path.join(getModulePath(), "tests", "testData",
+                                        "comcamPhosimData", "intra")
+
+        self.outputDir = os.path.join(getModulePath(), "output", "tmpRepack")
+        shutil.copytree(self.testDataDir, self.outputDir)
+
+        self.repackager = PhosimRepackager(numOfThread=2)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def testRepackageAmpImg(self):
+
+        ampFileList = sorted(
+            [fileName for fileName in os.listdir(self.outputDir)
+             if fileName.startswith("lsst_a_")])
+
+        outputFilePathList = self.repackager.repackageAmpImg(self.outputDir)
+
+        self.assertEqual(len(outputFilePathList), 1)
+        outputFileName = os.path.basename(outputFilePathList[0])
+        self.assertEqual(outputFileName,
+                         "lsst_a_9005001_f1_R22_S10_E000.fits")
+
+        # The amplifier images are removed
+        for ampFileName in ampFileList:
+            self.assertFalse(
+                os.path.exists(os.path.join(self.outputDir, ampFileName)))
+
+        with fits.open(outputFilePathList[0]) as hdul:
+            self.assertEqual(len(hdul), len(ampFileList) + 1)
+            self.assertEqual(hdul[0].header["OUTFILE"],
+                             "lsst_a_9005001_f1_R22_S10_E000")
+            self.assertEqual(hdul[0].header["RAFTNAME"], "R22")
+            self.assertEqual(hdul[0].header["SENSNAME"], "S10")
+            self.assertEqual(hdul[0].header["TESTTYPE"], "PHOSIM")
+            self.assertEqual(hdul[0].header["IMGTYPE"], "SKYEXP")
+
+            ampFilePath = os.path.join(self.testDataDir, ampFileList[0])
+            ampData = fits.getdata(ampFilePath)
+            self.assertTrue(np.array_equal(hdul["Segment00"].data, ampData))
+            self.assertEqual(hdul["Segment00"].header["DATASEC"],
+                             "[4:512,1:2000]")
+
+    def testRepackageEimg(self):
+
+        outputFilePathList = self.repackager.repackageEimg(self.outputDir)
+
+        self.assertEqual(len(outputFilePathList), 1)
+        self.assertTrue(outputFilePathList[0].endswith(".fits"))
+
+        data = fits.getdata(outputFilePathList[0])
+        self.assertEqual(data.shape, (4072, 4000))
+
+    def testRepackageEimgHeader(self):
+
+        outputFilePath = self.repackager.repackageEimg(self.outputDir)[0]
+
+        header = fits.getheader(outputFilePath)
+        self.assertEqual(header["OUTFILE"], "lsst_e_9005001_f1_R22_S10_E000")
+        self.assertEqual(header["RUNNUM"], "9005001")
+        self.assertTrue(header["DATE-OBS"].startswith("2021-12-31T23:59"))
+        self.assertEqual(header["RAFTNAME"], "R22")
+        self.assertEqual(header["SENSNAME"], "S10")
+        self.assertEqual(header["TESTTYPE"], "PHOSIM")
+        self.assertEqual(header["IMGTYPE"], "SKYEXP")
+
+    def testRepackageEimgWithCompression(self):
+
+        repackager = PhosimRepackager(compress=True)
+        outputFilePathList = repackager.repackageEimg(self.outputDir)
+
+        self.assertTrue(outputFilePathList[0].endswith(".fits.gz"))
+        self.assertTrue(os.path.exists(outputFilePathList[0]))
+
+    @unittest.skipIf(shutil.which("phosim_repackager.py") is None,
+                     "phosim_utils is not available.")
+    def testRepackageAmpImgHeaderWithPhosimUtils(self):
+
+        # Repackage the same input by phosim_utils
+        ansOutputDir = os.path.join(getModulePath(), "output",
+                                    "tmpRepackPhosimUtils")
+        os.makedirs(ansOutputDir, exist_ok=True)
+        self.addCleanup(shutil.rmtree, ansOutputDir)
+        runProgram("phosim_repackager.py",
+                   argstring="%s --out_dir=%s" % (self.testDataDir,
+                                                  ansOutputDir))
+
+        ansFileNameList = [fileName for fileName in os.listdir(ansOutputDir)
+                           if fileName.endswith(".fits")]
+        self.assertEqual(len(ansFileNameList), 1)
+        ansFilePath = os.path.join(ansOutputDir, ansFileNameList[0])
+
+        outputFilePath = self.repackager.repackageAmpImg(self.outputDir)[0]
+
+        # Keywords translated by phosim_utils
+        primaryKeywords = ("RAFTNAME", "SENSNAME", "TESTTYPE", "IMGTYPE")
+        ampKeywords = ("EXTNAME", "DATASEC", "DETSEC")
+        with fits.open(outputFilePath) as hdul, \
+                fits.open(ansFilePath) as ansHdul:
+
+            for keyword in primaryKeywords:
+                self.assertEqual(hdul[0].header.get(keyword),
+                                 ansHdul[0].header.get(keyword), keyword)
+
+            self.assertEqual(len(hdul), len(ansHdul))
+            for ansHdu in ansHdul[1:]:
+                hdu = hdul[ansHdu.name]
+                for keyword in ampKeywords:
+                    self.assertEqual(hdu.header.get(keyword),
+                                     ansHdu.header.get(keyword),
+                                     "%s of %s" % (keyword, ansHdu.name))
+                self.assertTrue(np.array_equal(hdu.data, ansHdu.data))
+
+    @unittest.skipIf(shutil.which("phosim_repackager.py") is None,
+                     "phosim_utils is not available.")
+    def testRepackageEimgHeaderWithPhosimUtils(self):
+
+        # Repackage the same input by phosim_utils
+        ansOutputDir = os.path.join(getModulePath(), "output",
+                                    "tmpRepackEimgPhosimUtils")
+        os.makedirs(ansOutputDir, exist_ok=True)
+        self.addCleanup(shutil.rmtree, ansOutputDir)
+        runProgram("phosim_repackager.py",
+                   argstring="%s --out_dir=%s --eimage" % (self.testDataDir,
+                                                           ansOutputDir))
+
+        ansFileNameList = [fileName for fileName in os.listdir(ansOutputDir)
+                           if fileName.endswith(".fits")]
+        self.assertEqual(len(ansFileNameList), 1)
+        ansFilePath = os.path.join(ansOutputDir, ansFileNameList[0])
+
+        outputFilePath = self.repackager.repackageEimg(self.outputDir)[0]
+
+        # Keywords translated by phosim_utils
+        primaryKeywords = ("RAFTNAME", "SENSNAME", "TESTTYPE", "IMGTYPE",
+                           "RUNNUM", "DATE-OBS")
+        with fits.open(outputFilePath) as hdul, \
+                fits.open(ansFilePath) as ansHdul:
+
+            for keyword in primaryKeywords:
+                self.assertEqual(str(hdul[0].header.get(keyword)),
+                                 str(ansHdul[0].header.get(keyword)),
+                                 keyword)
+
+            self.assertTrue(np.array_equal(hdul[0].data, ansHdul[0].data))
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import shutil
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from lsst.ts.phosim.PhosimRunCache import PhosimRunCache
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class FakeTele(object):
+    """Telescope with a fake PhoSim run writing the output images."""
+
+    def __init__(self, barrier=None):
+
+        self.numOfRun = 0
+
+        # Barrier to make the concurrent runs write the images at the same
+        # time
+        self.barrier = barrier
+        self._lock = threading.Lock()
+
+    def getPhoSimDir(self):
+
+        return "phosim"
+
+    def runPhoSim(self, argString):
+
+        with self._lock:
+            self.numOfRun += 1
+            numOfRun = self.numOfRun
+
+        tokens = argString.split()
+        outputDir = tokens[tokens.index("-o") + 1]
+        os.makedirs(outputDir, exist_ok=True)
+
+        if "-s" in tokens:
+            sensorName = tokens[tokens.index("-s") + 1]
+            fileNameList = ["lsst_a_9006000_f1_%s_C%s_E000.fits.gz"
+                            % (sensorName, channel)
+                            for channel in ("00", "01")]
+        else:
+            fileNameList = ["opd_9006000_0.fits.gz", "opd_9006000_1.fits.gz"]
+
+        for fileName in fileNameList:
+            with open(os.path.join(outputDir, fileName), "w") as file:
+                file.write("run %d" % numOfRun)
+
+        if (self.barrier is not None):
+            self.barrier.wait(timeout=10)
+
+
+class TestPhosimRunCache(unittest.TestCase):
+    """ Test the PhosimRunCache class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output",
+                                      "tmpRunCache")
+        self.phosimRunCache = PhosimRunCache(
+            os.path.join(self.outputDir, "cache"))
+
+        self.instFilePath = os.path.join(self.outputDir, "opd.inst")
+        with open(self.instFilePath, "w") as file:
+            file.write("Opsim_obshistid 9006000 \n")
+
+        self.mapFilePath = os.path.join(self.outputDir, "M1res.txt")
+        with open(self.mapFilePath, "w") as file:
+            file.write("0.0 0.0\n")
+
+        self.cmdFilePath = os.path.join(self.outputDir, "opd.cmd")
+        with open(self.cmdFilePath, "w") as file:
+            file.write("surfacemap 0 %s 1\n" % self.mapFilePath)
+
+        self.tele = FakeTele()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def _getArgString(self, iterName, sensorName=None):
+
+        outputImgDir = os.path.join(self.outputDir, iterName, "img")
+        logFilePath = os.path.join(outputImgDir, "opdPhoSim.log")
+
+        argString = "%s -c %s -p 1" % (self.instFilePath, self.cmdFilePath)
+        if (sensorName is not None):
+            argString += " -s %s" % sensorName
+
+        return "%s -o %s > %s 2>&1" % (argString, outputImgDir, logFilePath)
+
+    def testGetKey(self):
+
+        key = self.phosimRunCache.getKey(self._getArgString("iter0"))
+
+        # The output directory and number of processors do not matter
+        argString = self._getArgString("iter1").replace("-p 1", "-p 8")
+        self.assertEqual(key, self.phosimRunCache.getKey(argString))
+
+        # The referred file in the command file matters
+        with open(self.mapFilePath, "w") as file:
+            file.write("1.0 0.0\n")
+        self.assertNotEqual(key, self.phosimRunCache.getKey(argString))
+
+    def testRunPhoSim(self):
+
+        isFromCache = self.phosimRunCache.runPhoSim(
+            self.tele, self._getArgString("iter0"))
+        self.assertFalse(isFromCache)
+        self.assertEqual(self.tele.numOfRun, 1)
+
+        isFromCache = self.phosimRunCache.runPhoSim(
+            self.tele, self._getArgString("iter1"))
+        self.assertTrue(isFromCache)
+        self.assertEqual(self.tele.numOfRun, 1)
+
+        outputImgDir = os.path.join(self.outputDir, "iter1", "img")
+        self.assertEqual(sorted(os.listdir(outputImgDir)),
+                         ["opd_9006000_0.fits.gz", "opd_9006000_1.fits.gz"])
+
+        # Removing the linked file does not affect the cache
+        os.remove(os.path.join(outputImgDir, "opd_9006000_0.fits.gz"))
+        key = self.phosimRunCache.getKey(self._getArgString("iter1"),
+                                         phosimDir=self.tele.getPhoSimDir())
+        self.assertEqual(
+            len(os.listdir(self.phosimRunCache.getEntryDir(key))), 2)
+
+    def testRunPhoSimConcurrentlyBySensor(self):
+
+        sensorNameList = ["R22_S00", "R22_S11", "R22_S22"]
+        tele = FakeTele(barrier=threading.Barrier(len(sensorNameList)))
+
+        argStringList = [self._getArgString("iter0", sensorName=sensorName)
+                         for sensorName in sensorNameList]
+        with ThreadPoolExecutor(max_workers=len(sensorNameList)) as pool:
+            isFromCacheList = list(pool.map(
+                lambda argString: self.phosimRunCache.runPhoSim(tele,
+                                                                argString),
+                argStringList))
+
+        self.assertEqual(isFromCacheList, [False] * len(sensorNameList))
+        self.assertEqual(tele.numOfRun, len(sensorNameList))
+
+        # Each entry only has the images of its own sensor
+        for sensorName, argString in zip(sensorNameList, argStringList):
+            key = self.phosimRunCache.getKey(argString,
+                                             phosimDir=tele.getPhoSimDir())
+            fileNameList = os.listdir(self.phosimRunCache.getEntryDir(key))
+            self.assertEqual(len(fileNameList), 2)
+            for fileName in fileNameList:
+                self.assertIn(sensorName, fileName)
+
+        outputImgDir = os.path.join(self.outputDir, "iter0", "img")
+        fileNameList = [fileName for fileName in os.listdir(outputImgDir)
+                        if fileName.startswith("lsst_a_")]
+        self.assertEqual(len(fileNameList), 2 * len(sensorNameList))
+
+    def testRunPhoSimWithoutOutputDir(self):
+
+        argString = "%s -c %s" % (self.instFilePath, self.cmdFilePath)
+        self.assertRaises(ValueError, self.phosimRunCache.runPhoSim,
+                          self.tele, argString)
+
+    def testClear(self):
+
+        self.phosimRunCache.runPhoSim(self.tele, self._getArgString("iter0"))
+        self.phosimRunCache.clear()
+
+        self.assertEqual(
+            len(os.listdir(self.phosimRunCache.getCacheDir())), 0)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
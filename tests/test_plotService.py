@@ -0,0 +1,87 @@
+import os
+import shutil
+import unittest
+import numpy as np
+
+from lsst.ts.phosim.PlotService import PlotService
+from lsst.ts.phosim.PlotUtil import plotFwhmData
+from lsst.ts.phosim.Utility import getModulePath, PlotMode
+
+
+class TestPlotService(unittest.TestCase):
+    """ Test the PlotService class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output",
+                                      "tmpPlotService")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+        self.figFilePath = os.path.join(self.outputDir, "fwhm.png")
+        self.fwhmData = np.array([[0.3, 0.4, 0.35], [0.2, 0.25, 0.22]])
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def _submit(self, plotService):
+
+        plotService.submit(plotFwhmData, self.fwhmData,
+                           saveToFilePath=self.figFilePath)
+
+    def testForeground(self):
+
+        plotService = PlotService(plotMode=PlotMode.Foreground)
+        self._submit(plotService)
+
+        self.assertTrue(os.path.exists(self.figFilePath))
+        self.assertEqual(plotService.getNumOfPendingJob(), 0)
+
+        plotService.close()
+
+    def testBackground(self):
+
+        plotService = PlotService(plotMode=PlotMode.Background)
+        self.assertEqual(plotService.getPlotMode(), PlotMode.Background)
+
+        self._submit(plotService)
+        plotService.flush()
+
+        self.assertTrue(os.path.exists(self.figFilePath))
+        self.assertEqual(plotService.getNumOfPendingJob(), 0)
+
+        plotService.close()
+
+    def testDeferred(self):
+
+        plotService = PlotService(plotMode=PlotMode.Deferred)
+        self._submit(plotService)
+
+        self.assertFalse(os.path.exists(self.figFilePath))
+        self.assertEqual(plotService.getNumOfPendingJob(), 1)
+
+        plotService.close()
+        self.assertTrue(os.path.exists(self.figFilePath))
+
+    def testDisabled(self):
+
+        plotService = PlotService(plotMode=PlotMode.Disabled)
+        self._submit(plotService)
+        plotService.close()
+
+        self.assertFalse(os.path.exists(self.figFilePath))
+
+    def testRaiseErrorOfPlot(self):
+
+        plotService = PlotService(plotMode=PlotMode.Background)
+        plotService.submit(plotFwhmData, self.fwhmData,
+                           saveToFilePath=os.path.join(self.outputDir,
+                                                       "noDir", "fwhm.png"))
+
+        self.assertRaises(FileNotFoundError, plotService.close)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -1,8 +1,12 @@
 import os
+import sys
+import subprocess
 import numpy as np
 import unittest
 
-from lsst.ts.phosim.PlotUtil import showFieldMap, plotFwhmOfIters
+from lsst.ts.phosim.PlotUtil import showFieldMap, plotFwhmOfIters, \
+    plotFwhmOfItersInStore, plotResMap
+from lsst.ts.phosim.ResultsStore import ResultsStore
 from lsst.ts.phosim.Utility import getModulePath
 
 
@@ -38,6 +42,60 @@ class TestPlotUtil(unittest.TestCase):
         plotFwhmOfIters(pssnFiles, saveToFilePath=self.outFigFilePath)
         self.assertTrue(os.path.exists(self.outFigFilePath))
 
+    def testPlotFwhmOfItersInStore(self):
+
+        storeFilePath = os.path.join(os.path.dirname(self.outFigFilePath),
+                                     "results.npz")
+        resultsStore = ResultsStore(storeFilePath)
+
+        iterDataDir = os.path.join(self.testData, "iterData")
+        for num in range(5):
+            pssnFile = os.path.join(iterDataDir, "iter%d" % num, "img",
+                                    "PSSN.txt")
+            resultsStore.addData(num, "pssn", np.loadtxt(pssnFile))
+
+        plotFwhmOfItersInStore(resultsStore,
+                               saveToFilePath=self.outFigFilePath)
+        self.assertTrue(os.path.exists(self.outFigFilePath))
+
+        os.remove(storeFilePath)
+
+    def testPlotResMap(self):
+
+        # Grid residue map in the format of MirrorSim: the header is
+        # (NUM_X_PIXELS, NUM_Y_PIXELS, delta x, delta y) and the rows are
+        # (z, dx, dy, dxdy) from (-x, +y)
+        numOfPixel = 24
+        resFilePath = os.path.join(os.path.dirname(self.outFigFilePath),
+                                   "res.txt")
+        content = np.zeros((numOfPixel**2 + 1, 4))
+        content[0, :] = [numOfPixel, numOfPixel, 100.0, 100.0]
+        content[1:, 0] = np.linspace(-1e-6, 1e-6, numOfPixel**2)
+        np.savetxt(resFilePath, content)
+
+        xfInMm, yfInMm = np.random.RandomState(0).uniform(-1000, 1000,
+                                                          (2, 100))
+        plotResMap(xfInMm * 1e-9, xfInMm, yfInMm, 1000.0,
+                   resFile=resFilePath,
+                   writeToResMapFilePath=self.outFigFilePath)
+        self.assertTrue(os.path.exists(self.outFigFilePath))
+
+        os.remove(resFilePath)
+
+    def testImportWithoutPyplot(self):
+
+        # The pyplot should be imported at the first plot but not the import
+        # of module in a new process
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+        output = subprocess.check_output(
+            [sys.executable, "-c",
+             "import sys; import lsst.ts.phosim.PlotUtil; "
+             "print('matplotlib.pyplot' in sys.modules)"],
+            env=env, universal_newlines=True)
+
+        self.assertEqual(output.strip(), "False")
+
 
 if __name__ == "__main__":
 
@@ -0,0 +1,101 @@
+import os
+import shutil
+import unittest
+import numpy as np
+
+from lsst.ts.phosim.PssnModel import PssnModel
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class TestPssnModel(unittest.TestCase):
+    """ Test the PssnModel class."""
+
+    @classmethod
+    def setUpClass(cls):
+
+        # Use z4-z11 to reduce the number of samples in the calibration
+        cls.pssnModel = PssnModel(0.5, znTerms=11)
+        cls.pssnModel.calibrate(numOfSample=80, maxRmsInUm=0.2)
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output",
+                                      "tmpPssnModel")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def testGetNumOfZk(self):
+
+        self.assertEqual(self.pssnModel.getNumOfZk(), 8)
+
+    def testGetKey(self):
+
+        self.assertEqual(PssnModel(0.5, znTerms=11).getKey(),
+                         self.pssnModel.getKey())
+        self.assertNotEqual(PssnModel(0.5, zen=30, znTerms=11).getKey(),
+                            self.pssnModel.getKey())
+
+    def testCalibrateWithNotEnoughSample(self):
+
+        pssnModel = PssnModel(0.5, znTerms=11)
+        self.assertRaises(ValueError, pssnModel.calibrate, numOfSample=5)
+
+    def testGetQuadraticForm(self):
+
+        qMat = self.pssnModel.getQuadraticForm()
+        self.assertEqual(qMat.shape, (8, 8))
+        self.assertTrue(np.array_equal(qMat, qMat.T))
+
+        # Defocus (z4) and astigmatism (z5) are not coupled
+        self.assertEqual(qMat[0, 1], 0)
+        self.assertGreater(qMat[0, 0], 0)
+
+    def testCalcPssn(self):
+
+        zk = np.zeros(8)
+        pssn, errorBound = self.pssnModel.calcPssn(zk)
+        self.assertEqual(pssn, 1)
+        self.assertEqual(errorBound, 0)
+
+        zk = self.pssnModel._getSampleZk(5, 0.2, 1)
+        pssn, errorBound = self.pssnModel.calcPssn(zk)
+        pssnExact = self.pssnModel.calcExactPssn(zk)
+        self.assertEqual(pssn.shape, (5,))
+        self.assertTrue(np.all(np.abs(pssn - pssnExact) <= errorBound))
+
+    def testCalcPssnOutOfRange(self):
+
+        zk = np.zeros(8)
+        zk[0] = 0.5
+        errorBound = self.pssnModel.calcPssn(zk)[1]
+        self.assertEqual(errorBound, np.inf)
+
+    def testCalcPssnNotCalibrated(self):
+
+        pssnModel = PssnModel(0.5, znTerms=11)
+        self.assertRaises(RuntimeError, pssnModel.calcPssn, np.zeros(8))
+
+    def testWriteAndReadFile(self):
+
+        filePath = self.pssnModel.getCacheFilePath(self.outputDir)
+        self.pssnModel.writeToFile(filePath)
+
+        pssnModel = PssnModel(0.5, znTerms=11)
+        pssnModel.readFromFile(filePath)
+        self.assertTrue(pssnModel.isCalibrated())
+        self.assertTrue(np.array_equal(pssnModel.getQuadraticForm(),
+                                       self.pssnModel.getQuadraticForm()))
+        self.assertEqual(pssnModel.getErrorBound(),
+                         self.pssnModel.getErrorBound())
+
+        pssnModel = PssnModel(0.6, znTerms=11)
+        self.assertRaises(ValueError, pssnModel.readFromFile, filePath)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,178 @@
+import os
+import shutil
+import zipfile
+import numpy as np
+import unittest
+from unittest import mock
+
+from lsst.ts.phosim.ResultsStore import ResultsStore
+from lsst.ts.phosim.Utility import getModulePath
+
+
+class TestResultsStore(unittest.TestCase):
+    """ Test the ResultsStore class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output", "tmpStore")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+        self.filePath = os.path.join(self.outputDir, "results.npz")
+        self.resultsStore = ResultsStore(self.filePath)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+    def testGetFilePath(self):
+
+        self.assertEqual(self.resultsStore.getFilePath(), self.filePath)
+
+    def testAddData(self):
+
+        pssn = np.random.rand(2, 10)
+        self.resultsStore.addData(0, "pssn", pssn)
+
+        self.assertTrue(self.resultsStore.hasData(0, "pssn"))
+        self.assertFalse(self.resultsStore.hasData(1, "pssn"))
+        self.assertTrue(np.array_equal(self.resultsStore.getData(0, "pssn"),
+                                       pssn))
+
+    def testAddDataWithDuplicatedData(self):
+
+        self.resultsStore.addData(0, "pssn", np.zeros(3))
+        self.assertRaises(ValueError, self.resultsStore.addData, 0, "pssn",
+                          np.ones(3))
+
+    def testGetDataWithNoData(self):
+
+        self.assertRaises(ValueError, self.resultsStore.getData, 0, "pssn")
+
+    def testReopen(self):
+
+        dofInUm = np.arange(50, dtype=float)
+        self.resultsStore.addData(0, "dofInUm", dofInUm)
+        self.resultsStore.addData(1, "dofInUm", 2 * dofInUm)
+
+        resultsStore = ResultsStore(self.filePath)
+        self.assertEqual(resultsStore.getIterNumList(), [0, 1])
+        self.assertEqual(resultsStore.getQuantityList(1), ["dofInUm"])
+        self.assertTrue(np.array_equal(resultsStore.getData(1, "dofInUm"),
+                                       2 * dofInUm))
+
+        # Append the data to the existed store
+        resultsStore.addData(2, "dofInUm", 3 * dofInUm)
+        self.assertEqual(ResultsStore(self.filePath).getIterNumList(),
+                         [0, 1, 2])
+
+    def testAddDataWithInterruptedWriting(self):
+
+        for iterNum in range(2):
+            self.resultsStore.addData(iterNum, "pssn", iterNum * np.ones(3))
+
+        # The writing is interrupted in the middle of data
+        def writePartialArray(file, array, **kwargs):
+            file.write(b"\x93NUMPY")
+            raise KeyboardInterrupt
+
+        with mock.patch("numpy.lib.format.write_array",
+                        side_effect=writePartialArray):
+            self.assertRaises(KeyboardInterrupt, self.resultsStore.addData,
+                              2, "pssn", 2 * np.ones(3))
+
+        self.assertEqual(ResultsStore(self.filePath).getIterNumList(), [0, 1])
+
+        self.resultsStore.addData(2, "pssn", 2 * np.ones(3))
+        self.assertEqual(ResultsStore(self.filePath).getIterNumList(),
+                         [0, 1, 2])
+
+    def testAddDataWithKilledProcess(self):
+
+        for iterNum in range(2):
+            self.resultsStore.addData(iterNum, "pssn", iterNum * np.ones(3))
+        fileSize = os.path.getsize(self.filePath)
+
+        # The process is killed in the appending. The central directory is
+        # overwritten by a partial member.
+        with zipfile.ZipFile(self.filePath, mode="r") as zf:
+            endOfMember = zf.start_dir
+        with open(self.filePath, "r+b") as file:
+            file.seek(endOfMember)
+            file.truncate()
+            file.write(b"PK\x03\x04" + b"\x00" * 100)
+
+        # Resume from the data of previous iterations
+        resultsStore = ResultsStore(self.filePath)
+        self.assertEqual(os.path.getsize(self.filePath), fileSize)
+        self.assertEqual(resultsStore.getIterNumList(), [0, 1])
+        self.assertTrue(np.array_equal(resultsStore.getData(1, "pssn"),
+                                       np.ones(3)))
+
+        resultsStore.addData(2, "pssn", 2 * np.ones(3))
+        self.assertEqual(ResultsStore(self.filePath).getIterNumList(),
+                         [0, 1, 2])
+
+    def testAddDataWithoutRewriting(self):
+
+        self.resultsStore.addData(0, "pssn", np.zeros(3))
+        with open(self.filePath, "rb") as file:
+            content = file.read()
+        with zipfile.ZipFile(self.filePath, mode="r") as zf:
+            endOfMember = zf.start_dir
+
+        # The existed members are not rewritten
+        self.resultsStore.addData(1, "pssn", np.ones(3))
+        with open(self.filePath, "rb") as file:
+            self.assertEqual(file.read(endOfMember), content[:endOfMember])
+
+    def testReadByNumpy(self):
+
+        pssn = np.random.rand(2, 10)
+        self.resultsStore.addData(3, "pssn", pssn)
+
+        with np.load(self.filePath) as data:
+            self.assertTrue(np.array_equal(data["iter3/pssn"], pssn))
+
+    def testTruncate(self):
+
+        for iterNum in range(3):
+            self.resultsStore.addData(iterNum, "pssn", iterNum * np.ones(3))
+
+        self.resultsStore.truncate(1)
+        self.assertEqual(self.resultsStore.getIterNumList(), [0])
+
+        # The data of removed iteration can be added again
+        self.resultsStore.addData(1, "pssn", np.ones(3))
+
+        resultsStore = ResultsStore(self.filePath)
+        self.assertEqual(resultsStore.getIterNumList(), [0, 1])
+        self.assertTrue(np.array_equal(resultsStore.getData(1, "pssn"),
+                                       np.ones(3)))
+
+    def testGetDataOfIters(self):
+
+        for iterNum in range(4):
+            self.resultsStore.addData(iterNum, "pssn",
+                                      iterNum * np.ones((2, 10)))
+        self.resultsStore.addData(0, "opdZk", np.zeros((9, 19)))
+
+        self.assertEqual(self.resultsStore.getIterNumList(quantity="opdZk"),
+                         [0])
+
+        resultsStore = ResultsStore(self.filePath)
+        pssnOfIters = resultsStore.getDataOfIters("pssn")
+        self.assertEqual(pssnOfIters.shape, (4, 2, 10))
+        self.assertTrue(np.array_equal(pssnOfIters[:, 0, 0], np.arange(4)))
+
+        pssnOfIters = resultsStore.getDataOfIters("pssn",
+                                                  iterNumList=[3, 1])
+        self.assertTrue(np.array_equal(pssnOfIters[:, 0, 0], [3, 1]))
+
+        self.assertRaises(ValueError, resultsStore.getDataOfIters, "opdZk",
+                          iterNumList=[0, 1])
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
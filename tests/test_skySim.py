@@ -102,6 +102,69 @@ class TestSkySim(unittest.TestCase):
         self.assertTrue(os.path.isfile(outputFilePath))
         os.remove(outputFilePath)
 
+    def testAddStarByFileInChunks(self):
+
+        skyFile = os.path.join(getModulePath(), "tests", "testData", "sky",
+                               "wfsStar.txt")
+        self.skySim.addStarByFile(skyFile, chunkSize=3)
+
+        self.assertEqual(len(self.skySim.getStarId()), 8)
+
+        ra, decl = self.skySim.getRaDecInDeg()
+        self.assertEqual(ra[2], -1.176)
+        self.assertEqual(decl[2], 1.196)
+
+    def testAddStarByFileWithRepeatedIdInChunks(self):
+
+        skyFile = os.path.join(getModulePath(), "output", "testSkyRepeat.txt")
+        with open(skyFile, "w") as file:
+            file.write("1 1.0 1.0 15.0\n2 2.0 2.0 16.0\n"
+                       "1 3.0 3.0 17.0\n3 4.0 4.0 18.0\n")
+
+        self.skySim.addStarByRaDecInDeg(3, 5.0, 5.0, 19.0)
+        self.skySim.addStarByFile(skyFile, chunkSize=2)
+        os.remove(skyFile)
+
+        # The first appearance across the blocks and the existed stars are
+        # kept
+        self.assertEqual(self.skySim.getStarId().tolist(), [3, 1, 2])
+        self.assertEqual(self.skySim.getStarMag().tolist(),
+                         [19.0, 15.0, 16.0])
+
+    def testExportSkyToFileInChunks(self):
+
+        self._addStarByFile("wfsStar.txt")
+        outputFilePath = os.path.join(getModulePath(), "output",
+                                      "testSkyOutput.txt")
+        self.skySim.exportSkyToFile(outputFilePath, chunkSize=3)
+
+        skySim = SkySim()
+        skySim.addStarByFile(outputFilePath)
+        os.remove(outputFilePath)
+
+        self.assertEqual(skySim.getStarId().tolist(),
+                         self.skySim.getStarId().tolist())
+        self.assertTrue(np.allclose(skySim.getRaDecInDeg(),
+                                    self.skySim.getRaDecInDeg()))
+
+    def testExportSkyToNpyFile(self):
+
+        self._addStarByFile("wfsStar.txt")
+        outputFilePath = os.path.join(getModulePath(), "output",
+                                      "testSkyOutput.npy")
+        self.skySim.exportSkyToNpyFile(outputFilePath, chunkSize=3)
+
+        skySim = SkySim()
+        skySim.addStarByNpyFile(outputFilePath, chunkSize=5)
+        os.remove(outputFilePath)
+
+        self.assertEqual(skySim.getStarId().tolist(),
+                         self.skySim.getStarId().tolist())
+        self.assertTrue(np.allclose(skySim.getRaDecInDeg(),
+                                    self.skySim.getRaDecInDeg()))
+        self.assertTrue(np.allclose(skySim.getStarMag(),
+                                    self.skySim.getStarMag()))
+
     def testAddStarByChipPos(self):
 
         self._setObservationMetaData()
@@ -120,6 +183,97 @@ class TestSkySim(unittest.TestCase):
         self.assertAlmostEqual(ra[0], 359.99971038)
         self.assertAlmostEqual(decl[0], 0.0001889)
 
+    def testAddStarsByChipPos(self):
+
+        self._setObservationMetaData()
+
+        sensorNameList = ["R22_S11", "R22_S11", "R22_S10"]
+        starIdList = [0, 1, 2]
+        xInpixelInCam = [2000, 1000, 2000]
+        yInPixelInCam = [2036, 1000, 2036]
+        starMag = 17
+        self.skySim.addStarsByChipPos(sensorNameList, starIdList,
+                                      xInpixelInCam, yInPixelInCam, starMag)
+
+        self.assertEqual(len(self.skySim.getStarId()), 3)
+
+        ra, decl = self.skySim.getRaDecInDeg()
+        self.assertAlmostEqual(ra[0], 359.99971038)
+        self.assertAlmostEqual(decl[0], 0.0001889)
+
+        skySimSgl = SkySim()
+        skySimSgl.setObservationMetaData(0, 0, 0, 59580.0)
+        for ii in range(len(starIdList)):
+            skySimSgl.addStarByChipPos(sensorNameList[ii], starIdList[ii],
+                                       xInpixelInCam[ii], yInPixelInCam[ii],
+                                       starMag)
+
+        raSgl, declSgl = skySimSgl.getRaDecInDeg()
+        self.assertTrue(np.allclose(ra, raSgl))
+        self.assertTrue(np.allclose(decl, declSgl))
+
+    def testAddStarsByChipPosWithWrongLength(self):
+
+        self.assertRaises(ValueError, self.skySim.addStarsByChipPos,
+                          "R22_S11", [0, 1], [2000], [2036, 1000], 17)
+
+    def testAddStarByRaDecInDegWithRepeatedId(self):
+
+        self.skySim.addStarByRaDecInDeg([1, 2, 1], [2, 2.1, 2.2], 3, 4)
+        self.skySim.addStarByRaDecInDeg([2, 3], [2.3, 2.4], [3, 3], [4, 4])
+
+        starId = self.skySim.getStarId()
+        self.assertEqual(starId.tolist(), [1, 2, 3])
+
+        ra = self.skySim.getRaDecInDeg()[0]
+        self.assertEqual(ra.tolist(), [2, 2.1, 2.4])
+
+    def testGetSensorNameOfStars(self):
+
+        self._setObservationMetaData()
+        self.skySim.addStarsByChipPos(["R22_S11", "R22_S10"], [0, 1],
+                                      [2000, 2000], [2036, 2036], 17)
+        self.skySim.addStarByRaDecInDeg(2, 180.0, -60.0, 17)
+
+        sensorNameList = self.skySim.getSensorNameOfStars()
+        self.assertEqual(sensorNameList.tolist(),
+                         ["R22_S11", "R22_S10", None])
+
+    def testGetSensorNameOfDonuts(self):
+
+        self._setObservationMetaData()
+        self.skySim.addStarsByChipPos(["R22_S11", "R22_S11"], [0, 1],
+                                      [2000, 5], [2036, 2036], 17)
+
+        radiusInDeg = 15.0 / 3600
+        sensorNameList = self.skySim.getSensorNameOfDonuts(radiusInDeg)
+        self.assertEqual(sensorNameList.shape, (2, 17))
+
+        # The donut in the center of sensor lands on that sensor only
+        self.assertEqual(set(sensorNameList[0]), set(["R22_S11"]))
+
+        # The donut near the chip edge lands on the neighboring sensor
+        self.assertEqual(sensorNameList[1, 0], "R22_S11")
+        self.assertEqual(len(set(sensorNameList[1]) - set([None])), 2)
+
+    def testGetStarPixelPosBySensor(self):
+
+        self._setObservationMetaData()
+        self.skySim.addStarsByChipPos(["R22_S11", "R22_S11", "R22_S10"],
+                                      [0, 1, 2], [2000, 1000, 2000],
+                                      [2036, 1000, 2036], 17)
+
+        starPixelPos = self.skySim.getStarPixelPosBySensor(
+            ["R22_S11", "R22_S10", "R22_S00"])
+
+        starIdx, xInpixelInCam, yInPixelInCam = starPixelPos["R22_S11"]
+        self.assertEqual(starIdx.tolist(), [0, 1])
+        self.assertTrue(np.allclose(xInpixelInCam, [2000, 1000], atol=1e-3))
+        self.assertTrue(np.allclose(yInPixelInCam, [2036, 1000], atol=1e-3))
+
+        self.assertEqual(starPixelPos["R22_S10"][0].tolist(), [2])
+        self.assertEqual(len(starPixelPos["R22_S00"][0]), 0)
+
     def _setObservationMetaData(self):
 
         ra = 0
@@ -0,0 +1,130 @@
+import threading
+import unittest
+
+from lsst.ts.phosim.SocketWorker import SocketWorker
+from lsst.ts.phosim.SocketExecutor import SocketExecutor
+
+
+def _raiseImportError():
+
+    raise ImportError("The module is not on the worker.")
+
+
+class UnloadableArg(object):
+    """Argument failed to be unpickled by the worker."""
+
+    def __reduce__(self):
+
+        return (_raiseImportError, ())
+
+
+class TestSocketExecutor(unittest.TestCase):
+    """ Test the SocketExecutor and SocketWorker classes."""
+
+    def setUp(self):
+
+        self.authkey = b"test"
+
+        self.workerList = []
+        self.threadList = []
+        for idx in range(2):
+            worker = SocketWorker(authkey=self.authkey)
+            thread = threading.Thread(target=worker.serve,
+                                      kwargs={"numOfConn": 1}, daemon=True)
+            thread.start()
+
+            self.workerList.append(worker)
+            self.threadList.append(thread)
+
+    def tearDown(self):
+
+        for worker, thread in zip(self.workerList, self.threadList):
+            thread.join(timeout=10)
+            worker.close()
+
+    def _getAddressList(self):
+
+        return [worker.getAddress() for worker in self.workerList]
+
+    def testWorkerWithoutAuthkey(self):
+
+        self.assertRaises(ValueError, SocketWorker)
+
+        # Serve the connections of setUp()
+        with SocketExecutor(self._getAddressList(), authkey=self.authkey):
+            pass
+
+    def testExecutorWithoutAuthkey(self):
+
+        self.assertRaises(ValueError, SocketExecutor, self._getAddressList())
+
+        # Serve the connections of setUp()
+        with SocketExecutor(self._getAddressList(), authkey=self.authkey):
+            pass
+
+    def testSubmit(self):
+
+        with SocketExecutor(self._getAddressList(),
+                            authkey=self.authkey) as executor:
+            futureList = [executor.submit(pow, idx, 2) for idx in range(10)]
+            self.assertEqual([future.result() for future in futureList],
+                             [idx**2 for idx in range(10)])
+
+    def testSubmitWithError(self):
+
+        with SocketExecutor(self._getAddressList(),
+                            authkey=self.authkey) as executor:
+            future = executor.submit(int, "a")
+            self.assertRaises(ValueError, future.result)
+
+            # The worker is still alive
+            self.assertEqual(executor.submit(int, "1").result(), 1)
+
+    def testSubmitWithUnloadableTask(self):
+
+        with SocketExecutor(self._getAddressList(),
+                            authkey=self.authkey) as executor:
+            future = executor.submit(id, UnloadableArg())
+            self.assertRaises(ImportError, future.result, timeout=10)
+
+            # The worker is still alive
+            self.assertEqual(executor.submit(int, "1").result(timeout=10), 1)
+
+    def testSubmitWithUnpicklableReply(self):
+
+        with SocketExecutor(self._getAddressList(),
+                            authkey=self.authkey) as executor:
+            future = executor.submit(threading.Lock)
+            with self.assertRaises(RuntimeError) as context:
+                future.result(timeout=10)
+            self.assertIn("lock", str(context.exception))
+
+            # The worker is still alive
+            self.assertEqual(executor.submit(int, "1").result(timeout=10), 1)
+
+    def testSubmitWithWrongAuthkey(self):
+
+        with SocketExecutor(self._getAddressList(),
+                            authkey=b"wrong") as executor:
+            with self.assertRaises(RuntimeError) as context:
+                executor.submit(pow, 1, 2).result(timeout=10)
+
+        self.assertIn("AuthenticationError", str(context.exception))
+
+        # Serve the connections of setUp()
+        with SocketExecutor(self._getAddressList(), authkey=self.authkey):
+            pass
+
+    def testSubmitAfterShutdown(self):
+
+        executor = SocketExecutor(self._getAddressList(),
+                                  authkey=self.authkey)
+        executor.shutdown()
+
+        self.assertRaises(RuntimeError, executor.submit, pow, 1, 2)
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,98 @@
+import time
+import unittest
+
+from lsst.ts.phosim.TaskGraph import TaskGraph
+
+
+class TestTaskGraph(unittest.TestCase):
+    """ Test the TaskGraph class."""
+
+    def setUp(self):
+
+        self.taskGraph = TaskGraph()
+
+    def testAddTask(self):
+
+        self.taskGraph.addTask("a", time.sleep, args=(0,))
+        self.taskGraph.addTask("b", time.sleep, args=(0,), dependOn=["a"])
+
+        self.assertEqual(self.taskGraph.getTaskNameList(), ["a", "b"])
+
+    def testAddTaskWithDuplicatedName(self):
+
+        self.taskGraph.addTask("a", time.sleep, args=(0,))
+        self.assertRaises(ValueError, self.taskGraph.addTask, "a", time.sleep)
+
+    def testAddTaskWithUnknownDependency(self):
+
+        self.assertRaises(ValueError, self.taskGraph.addTask, "a", time.sleep,
+                          dependOn=["b"])
+
+    def testRun(self):
+
+        sleepTime = 0.2
+        self.taskGraph.addTask("a", self._sleepAndReturn,
+                               args=(sleepTime, 1))
+        self.taskGraph.addTask("b", self._sleepAndReturn,
+                               args=(sleepTime, 2))
+        self.taskGraph.addTask("c", self._sleepAndReturn,
+                               kwargs={"sleepTime": sleepTime, "value": 3},
+                               dependOn=["a", "b"])
+
+        self.taskGraph.run(cpuBudget=2)
+
+        self.assertEqual(self.taskGraph.getResult("c"), 3)
+
+        # The independent tasks run concurrently
+        self.assertLess(self.taskGraph.getElapsedTime(), 2.5 * sleepTime)
+        self.assertAlmostEqual(self.taskGraph.getCriticalPathTime(),
+                               2 * sleepTime, delta=0.5 * sleepTime)
+
+        # The dependent task starts after the others finish
+        startTimeOfC = self.taskGraph.getTimeOfTask("c")[0]
+        for taskName in ("a", "b"):
+            self.assertGreaterEqual(startTimeOfC,
+                                    self.taskGraph.getTimeOfTask(taskName)[1])
+
+        self.assertGreaterEqual(self.taskGraph.getDurationOfTask("a"),
+                                sleepTime)
+        self.assertEqual(
+            len(self.taskGraph.getTimingSummary().splitlines()), 4)
+
+    def _sleepAndReturn(self, sleepTime, value):
+
+        time.sleep(sleepTime)
+        return value
+
+    def testRunWithCpuBudget(self):
+
+        sleepTime = 0.1
+        self.taskGraph.addTask("a", time.sleep, args=(sleepTime,),
+                               numOfCpu=2)
+        self.taskGraph.addTask("b", time.sleep, args=(sleepTime,),
+                               numOfCpu=2)
+
+        self.taskGraph.run(cpuBudget=3)
+
+        # Only one task can run at the same time
+        endTimeOfA = self.taskGraph.getTimeOfTask("a")[1]
+        startTimeOfB = self.taskGraph.getTimeOfTask("b")[0]
+        self.assertGreaterEqual(startTimeOfB, endTimeOfA)
+
+    def testRunWithError(self):
+
+        self.taskGraph.addTask("a", self._raiseError)
+        self.taskGraph.addTask("b", time.sleep, args=(0,), dependOn=["a"])
+
+        self.assertRaises(RuntimeError, self.taskGraph.run)
+        self.assertRaises(ValueError, self.taskGraph.getResult, "b")
+
+    def _raiseError(self):
+
+        raise RuntimeError("Test error.")
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import json
+import shutil
+import unittest
+
+from lsst.ts.phosim.Tracer import Tracer, getTracer, traced, traceMethods
+from lsst.ts.phosim.Utility import getModulePath
+
+
+@traceMethods("add")
+class TracedClass(object):
+
+    def add(self, value1, value2):
+
+        return self._addValue(value1, value2) + self.getOffset()
+
+    def getOffset(self):
+
+        return 0
+
+    def _addValue(self, value1, value2):
+
+        return value1 + value2
+
+
+class TracedSubClass(TracedClass):
+    pass
+
+
+class TestTracer(unittest.TestCase):
+    """ Test the Tracer class."""
+
+    def setUp(self):
+
+        self.outputDir = os.path.join(getModulePath(), "output", "tmpTracer")
+        os.makedirs(self.outputDir, exist_ok=True)
+
+        self.tracer = Tracer()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.outputDir)
+
+        getTracer().disable()
+        getTracer().clear()
+        getTracer().setIterNum(None)
+
+    def testSpanIsDisabledByDefault(self):
+
+        self.assertFalse(self.tracer.isEnabled())
+
+        with self.tracer.span("a"):
+            pass
+        self.assertEqual(len(self.tracer.getSpanList()), 0)
+
+    def testSpan(self):
+
+        self.tracer.enable()
+        self.tracer.setIterNum(1)
+        with self.tracer.span("outer"):
+            with self.tracer.span("inner"):
+                with open(os.path.join(self.outputDir, "a.txt"), "w") as file:
+                    file.write("a" * 1000)
+
+        spanList = self.tracer.getSpanList()
+        self.assertEqual([span["name"] for span in spanList],
+                         ["inner", "outer"])
+        self.assertEqual([span["depth"] for span in spanList], [1, 0])
+        self.assertEqual(spanList[0]["iterNum"], 1)
+        self.assertGreaterEqual(spanList[1]["wall"], spanList[0]["wall"])
+        self.assertGreaterEqual(spanList[0]["writeBytes"], 0)
+
+    def testSpanWithError(self):
+
+        self.tracer.enable()
+        with self.assertRaises(ValueError):
+            with self.tracer.span("a"):
+                raise ValueError("Test error.")
+
+        self.assertEqual(len(self.tracer.getSpanList()), 1)
+
+    def testTraceMethods(self):
+
+        tracer = getTracer()
+        tracer.enable()
+
+        self.assertEqual(TracedSubClass().add(1, 2), 3)
+
+        spanList = tracer.getSpanList()
+        self.assertEqual([span["name"] for span in spanList],
+                         ["TracedClass.add"])
+
+    def testTraceMethodsWithUndefinedMethod(self):
+
+        self.assertRaises(ValueError, traceMethods("getOffset"),
+                          TracedSubClass)
+
+    def testTraced(self):
+
+        tracedAbs = traced("abs")(abs)
+        self.assertEqual(tracedAbs(-1), 1)
+        self.assertEqual(len(getTracer().getSpanList()), 0)
+
+        getTracer().enable()
+        self.assertEqual(tracedAbs(-1), 1)
+        self.assertEqual(len(getTracer().getSpanList()), 1)
+
+    def testWriteChromeTrace(self):
+
+        self.tracer.enable()
+        with self.tracer.span("a"):
+            pass
+
+        filePath = os.path.join(self.outputDir, "trace.json")
+        self.tracer.writeChromeTrace(filePath)
+        with open(filePath, "r") as file:
+            trace = json.load(file)
+
+        event = trace["traceEvents"][0]
+        self.assertEqual(event["name"], "a")
+        self.assertEqual(event["ph"], "X")
+        self.assertIn("cpu", event["args"])
+
+    def testGetSummary(self):
+
+        self.tracer.enable()
+        for iterNum in range(2):
+            self.tracer.setIterNum(iterNum)
+            for idx in range(3):
+                with self.tracer.span("a"):
+                    pass
+
+        lines = self.tracer.getSummary().split("\n")
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2].split()[:3], ["1", "a", "3"])
+
+
+if __name__ == "__main__":
+
+    # Run the unit test
+    unittest.main()
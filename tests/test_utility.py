@@ -3,7 +3,7 @@ import unittest
 
 from lsst.ts.phosim.Utility import opt2ZemaxCoorTrans, zemax2optCoorTrans, \
     mapSurfNameToEnum, SurfaceType, getPhoSimPath, sortOpdFileList, \
-    getAoclcOutputPath, getModulePath
+    getAoclcOutputPath, getModulePath, getEnsembleAuthkey
 
 
 class TestUtility(unittest.TestCase):
@@ -46,6 +46,29 @@ class TestUtility(unittest.TestCase):
 
         os.environ.pop("PHOSIMPATH")
 
+    def testGetEnsembleAuthkey(self):
+
+        os.environ["ENSEMBLEAUTHKEY"] = "key"
+        self.assertEqual(getEnsembleAuthkey(), b"key")
+        os.environ.pop("ENSEMBLEAUTHKEY")
+
+        self.assertEqual(getEnsembleAuthkey(), b"")
+
+    def testGetEnsembleAuthkeyFromFile(self):
+
+        outputDir = os.path.join(getModulePath(), "output")
+        os.makedirs(outputDir, exist_ok=True)
+        authkeyFilePath = os.path.join(outputDir, "tmpAuthkey")
+        with open(authkeyFilePath, "w") as file:
+            file.write("key\n")
+
+        try:
+            authkey = getEnsembleAuthkey(authkeyFilePath=authkeyFilePath)
+        finally:
+            os.remove(authkeyFilePath)
+
+        self.assertEqual(authkey, b"key")
+
     def testGetAoclcOutputPathNotAssigned(self):
 
         with self.assertWarns(UserWarning):